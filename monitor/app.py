@@ -1,25 +1,93 @@
+import hashlib
+import hmac
 import os
+import time
 from datetime import datetime
-from functools import wraps
+from functools import lru_cache, wraps
 from pathlib import Path
 
-import psutil
-import yaml
+import requests
 from flask import (
     Flask,
+    abort,
     jsonify,
     redirect,
-    render_template_string,
+    render_template,
     request,
     session,
     url_for,
 )
-from werkzeug.security import check_password_hash
 
 try:
+    from .arp import ArpStore
+    from .assets import IMMUTABLE_CACHE_CONTROL, AssetManifest
+    from .bgp import STATES as BGP_STATES
+    from .bgp import BgpTracker
     from .checklist_monitoramento import get_full_checklist
+    from .compression import PrecompressedBody, compress_response
+    from .credentials import AuthBusy, CredentialStore, HashCheckPool
+    from .host_import import AUTH_PROTOCOLS, ImportFormatError, detect_format, import_hosts, validate_row
+    from .inventory import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, HostInventory
+    from .netflow import NETFLOW_LISTEN, NetflowCollector, TopTalkers
+    from .ownership import ProcessLock
+    from .openmetrics import MetricsRegistry
+    from .optics import STATUSES as OPTICS_STATUSES
+    from .optics import OpticsStore
+    from .ospf import OspfTopology, full_neighbors
+    from .pppoe import DEFAULT_PAGE_SIZE as PPPOE_PAGE_SIZE
+    from .pppoe import TOP_FIELDS as PPPOE_TOP_FIELDS
+    from .pppoe import PppoeSessionStore
+    from .poller import SnmpPoller, SnmpTarget
+    from .rates import CounterRates
+    from .sampler import LocalSampler
+    from .grafana import annotations as grafana_annotations
+    from .grafana import evaluate as grafana_evaluate
+    from .grafana import search as grafana_search
+    from .timeseries import (
+        POLL_HISTORY_RESOLUTION,
+        POLL_HISTORY_RETENTION,
+        POLL_ROLLUP_LEVELS,
+        EventLog,
+        TimeSeriesStore,
+    )
+    from .topology import NeighborTopology
+    from .zabbix import ZABBIX_URL, ZabbixClient, ZabbixError, ZabbixSync, technical_name
+    from .zabbix_sender import SENDER_HOST, SENDER_SERVER, ZabbixSender
 except ImportError:  # fallback when executed as a script (python monitor/app.py)
+    from arp import ArpStore
+    from assets import IMMUTABLE_CACHE_CONTROL, AssetManifest
+    from bgp import STATES as BGP_STATES
+    from bgp import BgpTracker
     from checklist_monitoramento import get_full_checklist
+    from compression import PrecompressedBody, compress_response
+    from credentials import AuthBusy, CredentialStore, HashCheckPool
+    from host_import import AUTH_PROTOCOLS, ImportFormatError, detect_format, import_hosts, validate_row
+    from inventory import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, HostInventory
+    from netflow import NETFLOW_LISTEN, NetflowCollector, TopTalkers
+    from ownership import ProcessLock
+    from openmetrics import MetricsRegistry
+    from optics import STATUSES as OPTICS_STATUSES
+    from optics import OpticsStore
+    from ospf import OspfTopology, full_neighbors
+    from pppoe import DEFAULT_PAGE_SIZE as PPPOE_PAGE_SIZE
+    from pppoe import TOP_FIELDS as PPPOE_TOP_FIELDS
+    from pppoe import PppoeSessionStore
+    from poller import SnmpPoller, SnmpTarget
+    from rates import CounterRates
+    from sampler import LocalSampler
+    from grafana import annotations as grafana_annotations
+    from grafana import evaluate as grafana_evaluate
+    from grafana import search as grafana_search
+    from timeseries import (
+        POLL_HISTORY_RESOLUTION,
+        POLL_HISTORY_RETENTION,
+        POLL_ROLLUP_LEVELS,
+        EventLog,
+        TimeSeriesStore,
+    )
+    from topology import NeighborTopology
+    from zabbix import ZABBIX_URL, ZabbixClient, ZabbixError, ZabbixSync, technical_name
+    from zabbix_sender import SENDER_HOST, SENDER_SERVER, ZabbixSender
 HOME_TEMPLATE = """
 <!DOCTYPE html>
 <html lang="pt-br">
@@ -27,293 +95,8 @@ HOME_TEMPLATE = """
     <meta charset="UTF-8" />
     <meta name="viewport" content="width=device-width, initial-scale=1.0" />
     <title>Monitoramento · Hub</title>
-    <style>
-        @import url('https://fonts.googleapis.com/css2?family=Space+Grotesk:wght@400;500;600&display=swap');
-        :root {
-            --bg-page: #030712;
-            --bg-panel: rgba(9, 14, 25, 0.92);
-            --bg-soft: rgba(13, 20, 38, 0.8);
-            --border: rgba(148, 163, 184, 0.25);
-            --accent: #4ade80;
-            --accent-strong: #16a34a;
-            --text-primary: #f1f5f9;
-            --text-secondary: #94a3b8;
-        }
-        * {
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-            font-family: 'Space Grotesk', 'Segoe UI', sans-serif;
-        }
-        body {
-            min-height: 100vh;
-            background: radial-gradient(circle at top, #0b1120 0, #030712 55%, #000 100%);
-            color: var(--text-primary);
-            padding: 32px;
-        }
-        .layout {
-            display: grid;
-            grid-template-columns: 260px minmax(0, 1fr);
-            gap: 24px;
-            max-width: 1440px;
-            margin: 0 auto;
-        }
-        .sidebar {
-            background: var(--bg-panel);
-            border-radius: 28px;
-            padding: 28px 24px 32px;
-            border: 1px solid var(--border);
-            display: flex;
-            flex-direction: column;
-            gap: 28px;
-        }
-        .brand {
-            display: flex;
-            align-items: center;
-            gap: 10px;
-            font-weight: 600;
-            letter-spacing: 0.08em;
-            text-transform: uppercase;
-        }
-        .brand-dot {
-            width: 12px;
-            height: 12px;
-            border-radius: 999px;
-            background: var(--accent);
-            box-shadow: 0 0 12px rgba(74, 222, 128, 0.8);
-        }
-        nav ul {
-            list-style: none;
-            display: flex;
-            flex-direction: column;
-            gap: 6px;
-        }
-        nav a {
-            display: flex;
-            align-items: center;
-            gap: 10px;
-            padding: 12px 14px;
-            border-radius: 16px;
-            color: var(--text-secondary);
-            text-decoration: none;
-            font-weight: 500;
-            border: 1px solid transparent;
-        }
-        nav a.active {
-            background: rgba(74, 222, 128, 0.12);
-            color: var(--text-primary);
-            border-color: rgba(74, 222, 128, 0.4);
-        }
-        nav a:hover {
-            border-color: rgba(148, 163, 184, 0.4);
-        }
-        .sidebar-footer {
-            margin-top: auto;
-            padding: 16px;
-            border-radius: 18px;
-            background: rgba(148, 163, 184, 0.08);
-        }
-        .sidebar-footer strong {
-            display: block;
-            font-size: 1rem;
-        }
-        .content {
-            background: var(--bg-panel);
-            border-radius: 32px;
-            border: 1px solid var(--border);
-            padding: 36px 40px 44px;
-            display: flex;
-            flex-direction: column;
-            gap: 28px;
-            box-shadow: 0 40px 120px rgba(2, 6, 23, 0.9);
-        }
-        .hero {
-            display: flex;
-            flex-wrap: wrap;
-            gap: 20px;
-            align-items: center;
-        }
-        .hero-text {
-            flex: 1 1 360px;
-        }
-        .hero h1 {
-            font-size: clamp(2rem, 4vw, 2.6rem);
-            margin-bottom: 8px;
-        }
-        .hero p {
-            color: var(--text-secondary);
-            line-height: 1.4;
-        }
-        .hero-actions {
-            display: flex;
-            gap: 12px;
-            flex-wrap: wrap;
-        }
-        .hero-actions a {
-            padding: 14px 20px;
-            border-radius: 18px;
-            text-decoration: none;
-            font-weight: 600;
-            border: 1px solid transparent;
-        }
-        .primary-btn {
-            background: linear-gradient(135deg, var(--accent), var(--accent-strong));
-            color: #041007;
-        }
-        .ghost-btn {
-            border-color: var(--border);
-            color: var(--text-secondary);
-        }
-        .section-title {
-            text-transform: uppercase;
-            letter-spacing: 0.18em;
-            font-size: 0.78rem;
-            color: var(--text-secondary);
-        }
-        .highlights-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(220px, 1fr));
-            gap: 16px;
-        }
-        .highlight-card {
-            border-radius: 22px;
-            padding: 22px;
-            border: 1px solid rgba(148,163,184,0.35);
-            background: var(--bg-soft);
-        }
-        .highlight-label {
-            text-transform: uppercase;
-            letter-spacing: 0.16em;
-            font-size: 0.7rem;
-            color: var(--accent);
-        }
-        .highlight-card h3 {
-            margin: 10px 0 6px;
-            font-size: 1.15rem;
-        }
-        .highlights-grid p {
-            color: var(--text-secondary);
-            line-height: 1.45;
-        }
-        .actions-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(220px, 1fr));
-            gap: 16px;
-        }
-        .action-card {
-            border-radius: 22px;
-            padding: 20px;
-            border: 1px solid var(--border);
-            background: var(--bg-soft);
-            text-decoration: none;
-            color: inherit;
-            display: flex;
-            flex-direction: column;
-            gap: 6px;
-        }
-        .config-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(240px, 1fr));
-            gap: 16px;
-        }
-        .config-card {
-            border-radius: 22px;
-            padding: 22px;
-            border: 1px solid rgba(148,163,184,0.35);
-            background: var(--bg-soft);
-        }
-        .config-label {
-            font-size: 0.75rem;
-            letter-spacing: 0.16em;
-            text-transform: uppercase;
-            color: var(--accent);
-        }
-        .config-card h3 {
-            margin: 8px 0 6px;
-            font-size: 1.15rem;
-        }
-        .config-card p {
-            color: var(--text-secondary);
-            line-height: 1.4;
-        }
-        .config-tags {
-            display: flex;
-            flex-wrap: wrap;
-            gap: 6px;
-            margin-top: 12px;
-        }
-        .config-tags span {
-            padding: 4px 10px;
-            border-radius: 999px;
-            background: rgba(74, 222, 128, 0.12);
-            color: var(--accent);
-            font-size: 0.75rem;
-        }
-        .insights {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(260px, 1fr));
-            gap: 16px;
-        }
-        .panel {
-            border-radius: 22px;
-            padding: 20px;
-            border: 1px solid rgba(148,163,184,0.3);
-            background: var(--bg-soft);
-        }
-        .panel h2 {
-            font-size: 0.85rem;
-            letter-spacing: 0.2em;
-            text-transform: uppercase;
-            color: var(--text-secondary);
-            margin-bottom: 12px;
-        }
-        .list-simple {
-            list-style: none;
-            display: flex;
-            flex-direction: column;
-            gap: 10px;
-            font-size: 0.92rem;
-            color: var(--text-secondary);
-        }
-        .list-simple li {
-            display: flex;
-            justify-content: space-between;
-            gap: 16px;
-        }
-        .list-simple li div {
-            display: flex;
-            flex-direction: column;
-            gap: 2px;
-        }
-        .list-simple small {
-            color: rgba(148, 163, 184, 0.7);
-            font-size: 0.75rem;
-        }
-        .badge-light {
-            padding: 4px 10px;
-            border-radius: 999px;
-            border: 1px solid rgba(148,163,184,0.4);
-            color: var(--text-primary);
-            font-size: 0.75rem;
-        }
-        .highlight {
-            margin-top: 12px;
-            padding: 12px 14px;
-            border-radius: 14px;
-            border: 1px dashed rgba(148,163,184,0.35);
-            background: rgba(59, 130, 246, 0.08);
-        }
-        @media (max-width: 1080px) {
-            .layout { grid-template-columns: 1fr; }
-            .sidebar { flex-direction: row; flex-wrap: wrap; }
-            nav ul { flex-direction: row; flex-wrap: wrap; }
-            nav a { flex: 1 1 140px; }
-        }
-        @media (max-width: 720px) {
-            body { padding: 16px; }
-            .content { padding: 24px; }
-        }
-    </style>
+    <link rel="stylesheet" href="{{ asset_url('css/monitor.css') }}" />
+    <link rel="stylesheet" href="{{ asset_url('css/home.css') }}" />
 </head>
 <body>
     <div class="layout">
@@ -440,249 +223,8 @@ OVERVIEW_TEMPLATE = """
     <meta charset=\"UTF-8\" />
     <meta name=\"viewport\" content=\"width=device-width, initial-scale=1.0\" />
     <title>Monitoramento · Infraestrutura</title>
-    <style>
-        @import url('https://fonts.googleapis.com/css2?family=Space+Grotesk:wght@400;500;600&display=swap');
-        :root {
-            --bg-page: #030712;
-            --bg-panel: rgba(9, 14, 25, 0.92);
-            --bg-soft: rgba(13, 20, 38, 0.8);
-            --border: rgba(148, 163, 184, 0.25);
-            --accent: #4ade80;
-            --accent-strong: #16a34a;
-            --text-primary: #f1f5f9;
-            --text-secondary: #94a3b8;
-        }
-        * {
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-            font-family: 'Space Grotesk', 'Segoe UI', sans-serif;
-        }
-        body {
-            min-height: 100vh;
-            background: radial-gradient(circle at top, #0b1120 0, #030712 55%, #000 100%);
-            color: var(--text-primary);
-            padding: 32px;
-        }
-        .layout {
-            display: grid;
-            grid-template-columns: 260px minmax(0, 1fr);
-            gap: 24px;
-            max-width: 1440px;
-            margin: 0 auto;
-        }
-        .sidebar {
-            background: var(--bg-panel);
-            border-radius: 28px;
-            padding: 28px 24px 32px;
-            border: 1px solid var(--border);
-            display: flex;
-            flex-direction: column;
-            gap: 28px;
-        }
-        .brand {
-            display: flex;
-            align-items: center;
-            gap: 10px;
-            font-weight: 600;
-            letter-spacing: 0.08em;
-            text-transform: uppercase;
-        }
-        .brand-dot {
-            width: 12px;
-            height: 12px;
-            border-radius: 999px;
-            background: var(--accent);
-            box-shadow: 0 0 12px rgba(74, 222, 128, 0.8);
-        }
-        nav ul {
-            list-style: none;
-            display: flex;
-            flex-direction: column;
-            gap: 6px;
-        }
-        nav a {
-            display: flex;
-            align-items: center;
-            gap: 10px;
-            padding: 12px 14px;
-            border-radius: 16px;
-            color: var(--text-secondary);
-            text-decoration: none;
-            font-weight: 500;
-            border: 1px solid transparent;
-        }
-        nav a.active {
-            background: rgba(74, 222, 128, 0.12);
-            color: var(--text-primary);
-            border-color: rgba(74, 222, 128, 0.4);
-        }
-        nav a:hover {
-            border-color: rgba(148, 163, 184, 0.4);
-        }
-        .sidebar-footer {
-            margin-top: auto;
-            padding: 16px;
-            border-radius: 18px;
-            background: rgba(148, 163, 184, 0.08);
-        }
-        .sidebar-footer strong {
-            display: block;
-            font-size: 1rem;
-        }
-        .content {
-            background: var(--bg-panel);
-            border-radius: 32px;
-            border: 1px solid var(--border);
-            padding: 36px 40px 44px;
-            display: flex;
-            flex-direction: column;
-            gap: 28px;
-            box-shadow: 0 40px 120px rgba(2, 6, 23, 0.9);
-        }
-        .hero {
-            display: flex;
-            flex-wrap: wrap;
-            gap: 20px;
-            align-items: center;
-        }
-        .hero-text {
-            flex: 1 1 360px;
-        }
-        .hero h1 {
-            font-size: clamp(2rem, 4vw, 2.6rem);
-            margin-bottom: 8px;
-        }
-        .hero p {
-            color: var(--text-secondary);
-            line-height: 1.4;
-        }
-        .hero-actions {
-            display: flex;
-            gap: 12px;
-            flex-wrap: wrap;
-        }
-        .hero-actions a {
-            padding: 14px 20px;
-            border-radius: 18px;
-            text-decoration: none;
-            font-weight: 600;
-            border: 1px solid transparent;
-        }
-        .ghost-btn {
-            border-color: var(--border);
-            color: var(--text-secondary);
-        }
-        .stats-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-            gap: 16px;
-        }
-        .stat-card {
-            padding: 18px 20px;
-            border-radius: 20px;
-            background: var(--bg-soft);
-            border: 1px solid rgba(148, 163, 184, 0.25);
-        }
-        .stat-label {
-            text-transform: uppercase;
-            letter-spacing: 0.16em;
-            font-size: 0.78rem;
-            color: var(--text-secondary);
-        }
-        .stat-value {
-            font-size: 2rem;
-            font-weight: 600;
-            margin: 10px 0 4px;
-        }
-        .status-pill {
-            display: inline-flex;
-            align-items: center;
-            gap: 6px;
-            padding: 4px 10px;
-            border-radius: 999px;
-            font-size: 0.78rem;
-            border: 1px solid var(--border);
-        }
-        .status-pill.ok { color: #4ade80; border-color: rgba(74,222,128,0.4); }
-        .status-pill.warning { color: #facc15; border-color: rgba(250,204,21,0.4); }
-        .status-pill.critical { color: #fb7185; border-color: rgba(251,113,133,0.4); }
-        .section-title {
-            text-transform: uppercase;
-            letter-spacing: 0.18em;
-            font-size: 0.78rem;
-            color: var(--text-secondary);
-        }
-        .detail-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(320px, 1fr));
-            gap: 18px;
-        }
-        .detail-card {
-            border-radius: 22px;
-            padding: 20px;
-            border: 1px solid var(--border);
-            background: var(--bg-soft);
-        }
-        .detail-header {
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin-bottom: 10px;
-        }
-        .detail-title {
-            font-size: 0.85rem;
-            letter-spacing: 0.12em;
-            text-transform: uppercase;
-            color: var(--text-secondary);
-        }
-        .pill-count {
-            font-size: 0.75rem;
-            padding: 2px 8px;
-            border-radius: 999px;
-            border: 1px solid rgba(148,163,184,0.35);
-            color: var(--text-secondary);
-        }
-        .detail-list {
-            list-style: none;
-            display: grid;
-            grid-template-columns: repeat(1, minmax(0, 1fr));
-            gap: 6px;
-            color: var(--text-secondary);
-            font-size: 0.92rem;
-        }
-        @media (min-width: 720px) {
-            .detail-list { grid-template-columns: repeat(2, minmax(0, 1fr)); }
-        }
-        .detail-list li {
-            display: flex;
-            gap: 6px;
-            align-items: center;
-        }
-        .detail-list li::before {
-            content: '•';
-            color: rgba(148, 163, 184, 0.6);
-        }
-        .footer-info {
-            margin-top: 10px;
-            font-size: 0.85rem;
-            color: var(--text-secondary);
-            display: flex;
-            justify-content: space-between;
-            flex-wrap: wrap;
-            gap: 8px;
-        }
-        @media (max-width: 1080px) {
-            .layout { grid-template-columns: 1fr; }
-            .sidebar { flex-direction: row; flex-wrap: wrap; }
-            nav ul { flex-direction: row; flex-wrap: wrap; }
-            nav a { flex: 1 1 140px; }
-        }
-        @media (max-width: 720px) {
-            body { padding: 16px; }
-            .content { padding: 24px; }
-        }
-    </style>
+    <link rel="stylesheet" href="{{ asset_url('css/monitor.css') }}" />
+    <link rel="stylesheet" href="{{ asset_url('css/overview.css') }}" />
 </head>
 <body>
     <div class=\"layout\">
@@ -785,216 +327,8 @@ SERVERS_TEMPLATE = """
     <meta charset="UTF-8" />
     <meta name="viewport" content="width=device-width, initial-scale=1.0" />
     <title>Monitoramento · Servidores</title>
-    <style>
-        @import url('https://fonts.googleapis.com/css2?family=Space+Grotesk:wght@400;500;600&display=swap');
-        :root {
-            --bg-page: #030712;
-            --bg-panel: rgba(9, 14, 25, 0.92);
-            --bg-soft: rgba(13, 20, 38, 0.8);
-            --border: rgba(148, 163, 184, 0.25);
-            --accent: #4ade80;
-            --accent-strong: #16a34a;
-            --text-primary: #f1f5f9;
-            --text-secondary: #94a3b8;
-        }
-        * {
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-            font-family: 'Space Grotesk', 'Segoe UI', sans-serif;
-        }
-        body {
-            min-height: 100vh;
-            background: radial-gradient(circle at top, #0b1120 0, #030712 55%, #000 100%);
-            color: var(--text-primary);
-            padding: 32px;
-        }
-        .layout {
-            display: grid;
-            grid-template-columns: 260px minmax(0, 1fr);
-            gap: 24px;
-            max-width: 1440px;
-            margin: 0 auto;
-        }
-        .sidebar {
-            background: var(--bg-panel);
-            border-radius: 28px;
-            padding: 28px 24px 32px;
-            border: 1px solid var(--border);
-            display: flex;
-            flex-direction: column;
-            gap: 28px;
-        }
-        nav ul {
-            list-style: none;
-            display: flex;
-            flex-direction: column;
-            gap: 6px;
-        }
-        nav a {
-            display: flex;
-            align-items: center;
-            gap: 10px;
-            padding: 12px 14px;
-            border-radius: 16px;
-            color: var(--text-secondary);
-            text-decoration: none;
-            font-weight: 500;
-            border: 1px solid transparent;
-        }
-        nav a.active {
-            background: rgba(74, 222, 128, 0.12);
-            color: var(--text-primary);
-            border-color: rgba(74, 222, 128, 0.4);
-        }
-        nav a:hover {
-            border-color: rgba(148, 163, 184, 0.4);
-        }
-        .brand {
-            display: flex;
-            align-items: center;
-            gap: 10px;
-            font-weight: 600;
-            letter-spacing: 0.08em;
-            text-transform: uppercase;
-        }
-        .brand-dot {
-            width: 12px;
-            height: 12px;
-            border-radius: 999px;
-            background: var(--accent);
-            box-shadow: 0 0 12px rgba(74, 222, 128, 0.8);
-        }
-        .sidebar-footer {
-            margin-top: auto;
-            padding: 16px;
-            border-radius: 18px;
-            background: rgba(148, 163, 184, 0.08);
-        }
-        .content {
-            background: var(--bg-panel);
-            border-radius: 32px;
-            border: 1px solid var(--border);
-            padding: 36px 40px 44px;
-            display: flex;
-            flex-direction: column;
-            gap: 28px;
-            box-shadow: 0 40px 120px rgba(2, 6, 23, 0.9);
-        }
-        .hero {
-            display: flex;
-            flex-wrap: wrap;
-            gap: 20px;
-            align-items: center;
-        }
-        .hero-text {
-            flex: 1 1 360px;
-        }
-        .hero h1 {
-            font-size: clamp(2rem, 4vw, 2.6rem);
-            margin-bottom: 8px;
-        }
-        .tagline {
-            color: var(--text-secondary);
-            line-height: 1.5;
-        }
-        .form-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(220px, 1fr));
-            gap: 18px;
-        }
-        .field {
-            display: flex;
-            flex-direction: column;
-            gap: 6px;
-        }
-        label {
-            font-size: 0.78rem;
-            text-transform: uppercase;
-            letter-spacing: 0.16em;
-            color: var(--text-secondary);
-        }
-        input,
-        select,
-        textarea {
-            padding: 12px 14px;
-            border-radius: 16px;
-            border: 1px solid var(--border);
-            background: rgba(3, 7, 18, 0.4);
-            color: var(--text-primary);
-            font-size: 0.95rem;
-        }
-        textarea { min-height: 120px; resize: none; }
-        .cta-row {
-            margin-top: 8px;
-            display: flex;
-            gap: 12px;
-            flex-wrap: wrap;
-        }
-        button {
-            padding: 14px 20px;
-            border-radius: 18px;
-            border: none;
-            font-weight: 600;
-            letter-spacing: 0.08em;
-            text-transform: uppercase;
-            background: linear-gradient(135deg, var(--accent), var(--accent-strong));
-            color: #041007;
-            cursor: pointer;
-        }
-        .panel {
-            border-radius: 24px;
-            padding: 24px;
-            border: 1px solid rgba(148,163,184,0.35);
-            background: var(--bg-soft);
-        }
-        .panel h2 {
-            font-size: 0.9rem;
-            letter-spacing: 0.18em;
-            text-transform: uppercase;
-            color: var(--text-secondary);
-        }
-        .panel + .panel { margin-top: 18px; }
-        .profiles {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(220px, 1fr));
-            gap: 12px;
-        }
-        .profile-card {
-            border-radius: 20px;
-            padding: 18px;
-            border: 1px solid rgba(148,163,184,0.3);
-            background: rgba(10,16,32,0.9);
-        }
-        .profile-card strong { display: block; margin-bottom: 6px; }
-        .pill {
-            display: inline-flex;
-            align-items: center;
-            gap: 6px;
-            padding: 4px 10px;
-            border-radius: 999px;
-            border: 1px solid rgba(148,163,184,0.4);
-            font-size: 0.75rem;
-            color: var(--text-secondary);
-        }
-        .message {
-            padding: 14px 16px;
-            border-radius: 16px;
-            border: 1px solid rgba(74,222,128,0.4);
-            background: rgba(74, 222, 128, 0.12);
-            color: var(--text-primary);
-        }
-        @media (max-width: 1080px) {
-            .layout { grid-template-columns: 1fr; }
-            .sidebar { flex-direction: row; flex-wrap: wrap; }
-            nav ul { flex-direction: row; flex-wrap: wrap; }
-            nav a { flex: 1 1 140px; }
-        }
-        @media (max-width: 720px) {
-            body { padding: 16px; }
-            .content { padding: 24px; }
-        }
-    </style>
+    <link rel="stylesheet" href="{{ asset_url('css/monitor.css') }}" />
+    <link rel="stylesheet" href="{{ asset_url('css/servers.css') }}" />
 </head>
 <body>
     <div class="layout">
@@ -1042,6 +376,9 @@ SERVERS_TEMPLATE = """
             {% if message %}
             <div class="message">{{ message }}</div>
             {% endif %}
+            {% if form_errors %}
+            <div class="message error">Host não salvo · {{ form_errors|join(' · ') }}</div>
+            {% endif %}
 
             <form method="post" class="panel">
                 <div class="form-grid">
@@ -1083,6 +420,18 @@ SERVERS_TEMPLATE = """
                         <label for="community">Community / Usuário</label>
                         <input id="community" name="community" value="{{ form_state.community }}" placeholder="public" required />
                     </div>
+                    <div class="field">
+                        <label for="auth_protocol">Autenticação v3</label>
+                        <select id="auth_protocol" name="auth_protocol">
+                            {% for protocol in auth_protocols %}
+                            <option value="{{ protocol }}" {% if form_state.auth_protocol == protocol %}selected{% endif %}>{{ protocol|upper or 'Nenhuma (noAuthNoPriv)' }}</option>
+                            {% endfor %}
+                        </select>
+                    </div>
+                    <div class="field">
+                        <label for="auth_password">Senha v3</label>
+                        <input id="auth_password" name="auth_password" type="password" autocomplete="new-password" placeholder="mínimo 8 caracteres" />
+                    </div>
                     <div class="field">
                         <label for="polling">Intervalo (s)</label>
                         <input id="polling" name="polling" type="number" min="30" value="{{ form_state.polling }}" />
@@ -1128,231 +477,8 @@ CHECKLIST_TEMPLATE = """
     <meta charset=\"UTF-8\" />
     <meta name=\"viewport\" content=\"width=device-width, initial-scale=1.0\" />
     <title>Monitoramento · Checklist</title>
-    <style>
-        @import url('https://fonts.googleapis.com/css2?family=Space+Grotesk:wght@400;500;600&display=swap');
-        :root {
-            --bg-page: #030712;
-            --bg-panel: rgba(9, 14, 25, 0.92);
-            --bg-soft: rgba(13, 20, 38, 0.8);
-            --border: rgba(148, 163, 184, 0.25);
-            --accent: #4ade80;
-            --accent-strong: #16a34a;
-            --text-primary: #f1f5f9;
-            --text-secondary: #94a3b8;
-        }
-        * {
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-            font-family: 'Space Grotesk', 'Segoe UI', sans-serif;
-        }
-        body {
-            min-height: 100vh;
-            background: radial-gradient(circle at top, #0b1120 0, #030712 55%, #000 100%);
-            color: var(--text-primary);
-            padding: 32px;
-        }
-        .layout {
-            display: grid;
-            grid-template-columns: 260px minmax(0, 1fr);
-            gap: 24px;
-            max-width: 1440px;
-            margin: 0 auto;
-        }
-        .sidebar {
-            background: var(--bg-panel);
-            border-radius: 28px;
-            padding: 28px 24px 32px;
-            border: 1px solid var(--border);
-            display: flex;
-            flex-direction: column;
-            gap: 28px;
-        }
-        nav ul {
-            list-style: none;
-            display: flex;
-            flex-direction: column;
-            gap: 6px;
-        }
-        nav a {
-            display: flex;
-            align-items: center;
-            gap: 10px;
-            padding: 12px 14px;
-            border-radius: 16px;
-            color: var(--text-secondary);
-            text-decoration: none;
-            font-weight: 500;
-            border: 1px solid transparent;
-        }
-        nav a.active {
-            background: rgba(74, 222, 128, 0.12);
-            color: var(--text-primary);
-            border-color: rgba(74, 222, 128, 0.4);
-        }
-        nav a:hover {
-            border-color: rgba(148, 163, 184, 0.4);
-        }
-        .brand {
-            display: flex;
-            align-items: center;
-            gap: 10px;
-            font-weight: 600;
-            letter-spacing: 0.08em;
-            text-transform: uppercase;
-        }
-        .brand-dot {
-            width: 12px;
-            height: 12px;
-            border-radius: 999px;
-            background: var(--accent);
-            box-shadow: 0 0 12px rgba(74, 222, 128, 0.8);
-        }
-        .sidebar-footer {
-            margin-top: auto;
-            padding: 16px;
-            border-radius: 18px;
-            background: rgba(148, 163, 184, 0.08);
-        }
-        .content {
-            background: var(--bg-panel);
-            border-radius: 32px;
-            border: 1px solid var(--border);
-            padding: 36px 40px 44px;
-            display: flex;
-            flex-direction: column;
-            gap: 28px;
-            box-shadow: 0 40px 120px rgba(2, 6, 23, 0.9);
-        }
-        .hero {
-            display: flex;
-            flex-wrap: wrap;
-            gap: 20px;
-            align-items: center;
-        }
-        .hero-text { flex: 1 1 360px; }
-        .hero h1 { font-size: clamp(2rem, 4vw, 2.6rem); margin-bottom: 8px; }
-        .tagline { color: var(--text-secondary); line-height: 1.5; }
-        .hero-actions { display: flex; gap: 12px; flex-wrap: wrap; }
-        .primary-btn {
-            padding: 14px 20px;
-            border-radius: 18px;
-            text-decoration: none;
-            font-weight: 600;
-            border: 1px solid transparent;
-            background: linear-gradient(135deg, var(--accent), var(--accent-strong));
-            color: #041007;
-        }
-        .summary-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-            gap: 16px;
-        }
-        .summary-card {
-            border-radius: 24px;
-            padding: 20px;
-            border: 1px solid rgba(148, 163, 184, 0.35);
-            background: var(--bg-soft);
-        }
-        .summary-card span { color: var(--text-secondary); font-size: 0.8rem; }
-        .summary-card strong { display: block; font-size: 1.8rem; margin: 6px 0; }
-        .summary-card small { color: rgba(148, 163, 184, 0.7); font-size: 0.75rem; }
-        .section-title {
-            text-transform: uppercase;
-            letter-spacing: 0.18em;
-            font-size: 0.78rem;
-            color: var(--text-secondary);
-        }
-        .host-grid {
-            margin-top: 16px;
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(240px, 1fr));
-            gap: 16px;
-        }
-        .host-card {
-            border-radius: 22px;
-            padding: 18px;
-            border: 1px solid rgba(148,163,184,0.3);
-            background: rgba(11,17,32,0.9);
-            display: flex;
-            flex-direction: column;
-            gap: 8px;
-        }
-        .host-card h3 { font-size: 1rem; }
-        .status-pill {
-            display: inline-flex;
-            align-items: center;
-            gap: 6px;
-            padding: 4px 10px;
-            border-radius: 999px;
-            font-size: 0.75rem;
-            border: 1px solid rgba(148,163,184,0.4);
-        }
-        .status-pill.ok { color: #4ade80; border-color: rgba(74,222,128,0.4); }
-        .status-pill.pending { color: #facc15; border-color: rgba(250,204,21,0.4); }
-        .meta {
-            display: flex;
-            flex-wrap: wrap;
-            gap: 8px;
-            color: var(--text-secondary);
-            font-size: 0.85rem;
-        }
-        .tags {
-            display: flex;
-            flex-wrap: wrap;
-            gap: 6px;
-        }
-        .tags span {
-            padding: 2px 8px;
-            border-radius: 999px;
-            background: rgba(148, 163, 184, 0.15);
-            font-size: 0.72rem;
-        }
-        .empty-state {
-            margin-top: 18px;
-            padding: 24px;
-            border: 1px dashed rgba(148,163,184,0.4);
-            border-radius: 20px;
-            color: var(--text-secondary);
-            text-align: center;
-        }
-        .panels {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(220px, 1fr));
-            gap: 16px;
-        }
-        .panel {
-            border-radius: 22px;
-            padding: 20px;
-            border: 1px solid rgba(148,163,184,0.3);
-            background: var(--bg-soft);
-        }
-        .panel h2 {
-            font-size: 0.85rem;
-            letter-spacing: 0.2em;
-            text-transform: uppercase;
-            color: var(--text-secondary);
-            margin-bottom: 12px;
-        }
-        .list-simple {
-            list-style: none;
-            display: flex;
-            flex-direction: column;
-            gap: 8px;
-            color: var(--text-secondary);
-            font-size: 0.9rem;
-        }
-        @media (max-width: 1080px) {
-            .layout { grid-template-columns: 1fr; }
-            .sidebar { flex-direction: row; flex-wrap: wrap; }
-            nav ul { flex-direction: row; flex-wrap: wrap; }
-            nav a { flex: 1 1 140px; }
-        }
-        @media (max-width: 720px) {
-            body { padding: 16px; }
-            .content { padding: 24px; }
-        }
-    </style>
+    <link rel="stylesheet" href="{{ asset_url('css/monitor.css') }}" />
+    <link rel="stylesheet" href="{{ asset_url('css/checklist.css') }}" />
 </head>
 <body>
     <div class=\"layout\">
@@ -1430,6 +556,13 @@ CHECKLIST_TEMPLATE = """
                     </article>
                     {% endfor %}
                 </div>
+                {% if pagination.pages > 1 %}
+                <nav class=\"pager\">
+                    {% if prev_url %}<a href=\"{{ prev_url }}\">← Anterior</a>{% endif %}
+                    <span>Página {{ pagination.page }} de {{ pagination.pages }} · {{ pagination.total }} hosts</span>
+                    {% if next_url %}<a href=\"{{ next_url }}\">Próxima →</a>{% endif %}
+                </nav>
+                {% endif %}
                 {% else %}
                 <div class=\"empty-state\">Nenhum host cadastrado ainda. Use o botão acima para iniciar a checklist.</div>
                 {% endif %}
@@ -1467,95 +600,7 @@ LOGIN_TEMPLATE = """
     <meta charset="UTF-8" />
     <meta name="viewport" content="width=device-width, initial-scale=1.0" />
     <title>Monitoramento · Login</title>
-    <style>
-        @import url('https://fonts.googleapis.com/css2?family=Space+Grotesk:wght@400;500;600&display=swap');
-        :root {
-            --bg: #020617;
-            --panel: rgba(15, 23, 42, 0.9);
-            --border: rgba(148, 163, 184, 0.35);
-            --accent: #4ade80;
-            --text: #f8fafc;
-            --muted: #94a3b8;
-        }
-        * {
-            box-sizing: border-box;
-            font-family: 'Space Grotesk', 'Segoe UI', sans-serif;
-        }
-        body {
-            min-height: 100vh;
-            margin: 0;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            background: radial-gradient(circle at top, #0f172a 0, var(--bg) 60%, #000 100%);
-            color: var(--text);
-            padding: 32px 16px;
-        }
-        .card {
-            width: min(420px, 100%);
-            background: var(--panel);
-            border-radius: 28px;
-            border: 1px solid var(--border);
-            padding: 32px;
-            display: flex;
-            flex-direction: column;
-            gap: 18px;
-            box-shadow: 0 30px 80px rgba(2, 6, 23, 0.9);
-        }
-        h1 {
-            font-size: 1.5rem;
-            margin: 0;
-        }
-        p {
-            margin: 0;
-            color: var(--muted);
-            line-height: 1.5;
-        }
-        label {
-            font-size: 0.85rem;
-            text-transform: uppercase;
-            letter-spacing: 0.12em;
-            color: var(--muted);
-        }
-        input {
-            width: 100%;
-            padding: 12px 14px;
-            border-radius: 16px;
-            border: 1px solid var(--border);
-            background: rgba(2, 6, 23, 0.4);
-            color: var(--text);
-            font-size: 1rem;
-        }
-        .field {
-            display: flex;
-            flex-direction: column;
-            gap: 6px;
-        }
-        button {
-            margin-top: 8px;
-            width: 100%;
-            padding: 14px;
-            border-radius: 18px;
-            border: none;
-            font-weight: 600;
-            letter-spacing: 0.08em;
-            text-transform: uppercase;
-            background: linear-gradient(135deg, #22c55e, #16a34a);
-            color: #03120a;
-            cursor: pointer;
-        }
-        .alert {
-            padding: 12px 14px;
-            border-radius: 14px;
-            border: 1px solid rgba(248, 113, 113, 0.4);
-            background: rgba(248, 113, 113, 0.1);
-            color: #fecaca;
-            font-size: 0.9rem;
-        }
-        small {
-            color: var(--muted);
-        }
-    </style>
+    <link rel="stylesheet" href="{{ asset_url('css/login.css') }}" />
 </head>
 <body>
     <div class="card">
@@ -1594,61 +639,275 @@ LOGIN_TEMPLATE = """
 """
 
 
+DEMO_MIKROTIK_TEMPLATE = """
+<!DOCTYPE html>
+<html lang="pt-br">
+<head>
+    <meta charset="UTF-8" />
+    <meta name="viewport" content="width=device-width, initial-scale=1.0" />
+    <title>Demo Mikrotik · Monitoramento</title>
+    <link rel="stylesheet" href="{{ asset_url('css/demo-mikrotik.css') }}" />
+</head>
+<body>
+    <main class="shell">
+        <header class="topbar">
+            <div class="topbar-left">
+                <span class="label">Demo · Mikrotik</span>
+                <h1>{{ demo.device.hostname }} · {{ demo.device.model }}</h1>
+                <div class="breadcrumb">Monitoramento / Demo / Mikrotik</div>
+            </div>
+            <a href="/" class="btn-back">⟵ Voltar para visão geral</a>
+        </header>
+
+        <section class="grid">
+            <article class="panel">
+                <h2>Checklist operacional</h2>
+                <ul class="list-simple">
+                    <li>
+                        <span>Estado geral do host</span>
+                        <strong>{{ stats.cpu_status|capitalize }}</strong>
+                    </li>
+                    <li>
+                        <span>Memória em uso</span>
+                        <strong>{{ '%.1f'|format(stats.mem_percent) }}%</strong>
+                    </li>
+                    <li>
+                        <span>Capacidade em disco</span>
+                        <strong>{{ '%.1f'|format(stats.disk_percent) }}%</strong>
+                    </li>
+                </ul>
+                <div class="highlight">Revise estes indicadores rápidos antes de ajustar novas integrações ou liberar funcionalidades.</div>
+            </article>
+                    <div>
+                        <div class="kv-label">Versão</div>
+                        <div class="kv-value">{{ demo.device.os_version }}</div>
+                    </div>
+                    <div>
+                        <div class="kv-label">Serial</div>
+                        <div class="kv-value">{{ demo.device.serial }}</div>
+                    </div>
+                    <div>
+                        <div class="kv-label">Uptime</div>
+                        <div class="kv-value">{{ demo.device.uptime }}</div>
+                    </div>
+                </div>
+
+                <div style="margin-top:14px; display:flex; flex-direction:column; gap:6px;">
+                    <div class="kv-label" style="margin-bottom:2px;">Recursos principais</div>
+
+                    <div class="metric-row">
+                        <div class="kv-label">CPU</div>
+                        <div class="metric-bar">
+                            <div class="metric-bar-fill {{ cpu_class }}" style="width: {{ demo.cpu.usage_percent }}%;"></div>
+                        </div>
+                        <div class="metric-badge">{{ '%.1f'|format(demo.cpu.usage_percent) }}%</div>
+                    </div>
+
+                    <div class="metric-row">
+                        <div class="kv-label">Memória</div>
+                        <div class="metric-bar">
+                            <div class="metric-bar-fill {{ mem_class }}" style="width: {{ demo.memoria.usage_percent }}%;"></div>
+                        </div>
+                        <div class="metric-badge">{{ '%.1f'|format(demo.memoria.usage_percent) }}%</div>
+                    </div>
+
+                    <div class="metric-row">
+                        <div class="kv-label">Disco</div>
+                        <div class="metric-bar">
+                            <div class="metric-bar-fill {{ disk_class }}" style="width: {{ demo.disco.usage_percent }}%;"></div>
+                        </div>
+                        <div class="metric-badge">{{ '%.1f'|format(demo.disco.usage_percent) }}%</div>
+                    </div>
+                </div>
+            </article>
+
+            <article class="card">
+                <header class="card-header">
+                    <h2 class="card-title">Tráfego e sessões</h2>
+                    <span class="pill">Interfaces ativas</span>
+                </header>
+                <div class="kv-list" style="margin-bottom:8px;">
+                    <div>
+                        <div class="kv-label">Tráfego total in</div>
+                        <div class="kv-value">{{ '%.1f'|format(demo.trafego.total_in_mbps) }} Mbps</div>
+                    </div>
+                    <div>
+                        <div class="kv-label">Tráfego total out</div>
+                        <div class="kv-value">{{ '%.1f'|format(demo.trafego.total_out_mbps) }} Mbps</div>
+                    </div>
+                    <div>
+                        <div class="kv-label">Usuários PPPoE</div>
+                        <div class="kv-value">{{ demo.pppoe_users|length }}</div>
+                    </div>
+                    <div>
+                        <div class="kv-label">Peers BGP up</div>
+                        <div class="kv-value">{{ demo.bgp.peers_up }} / {{ demo.bgp.peers|length }}</div>
+                    </div>
+                </div>
+
+                <table class="table-like">
+                    <thead>
+                        <tr>
+                            <th>Interface</th>
+                            <th>In</th>
+                            <th>Out</th>
+                        </tr>
+                    </thead>
+                    <tbody>
+                        {% for iface in demo.trafego.interfaces_top %}
+                        <tr>
+                            <td>{{ iface.name }}</td>
+                            <td>{{ '%.1f'|format(iface.in_mbps) }} Mbps</td>
+                            <td>{{ '%.1f'|format(iface.out_mbps) }} Mbps</td>
+                        </tr>
+                        {% endfor %}
+                    </tbody>
+                </table>
+            </article>
+        </section>
+
+        <section class="grid" style="margin-top:16px;">
+            <article class="card">
+                <header class="card-header">
+                    <h2 class="card-title">Interfaces ópticas</h2>
+                    <span class="pill">{{ demo.interfaces.opticas|length }} portas</span>
+                </header>
+                <table class="table-like">
+                    <thead>
+                        <tr>
+                            <th>Porta</th>
+                            <th>Descrição</th>
+                            <th>RX (dBm)</th>
+                            <th>TX (dBm)</th>
+                            <th>Vel.</th>
+                            <th>Status</th>
+                        </tr>
+                    </thead>
+                    <tbody>
+                        {% for it in demo.interfaces.opticas %}
+                        <tr>
+                            <td>{{ it.name }}</td>
+                            <td>{{ it.description }}</td>
+                            <td>{{ '%.1f'|format(it.rx_dbm) }}</td>
+                            <td>{{ '%.1f'|format(it.tx_dbm) }}</td>
+                            <td>{{ it.speed }}</td>
+                            <td>
+                                <span class="pill-status {{ 'ok' if it.status == 'up' else 'down' }}">{{ it.status }}</span>
+                            </td>
+                        </tr>
+                        {% endfor %}
+                    </tbody>
+                </table>
+            </article>
+
+            <article class="card">
+                <header class="card-header">
+                    <h2 class="card-title">Interfaces elétricas</h2>
+                    <span class="pill">{{ demo.interfaces.eletricas|length }} portas</span>
+                </header>
+                <table class="table-like">
+                    <thead>
+                        <tr>
+                            <th>Porta</th>
+                            <th>Descrição</th>
+                            <th>Vel.</th>
+                            <th>Status</th>
+                        </tr>
+                    </thead>
+                    <tbody>
+                        {% for it in demo.interfaces.eletricas %}
+                        <tr>
+                            <td>{{ it.name }}</td>
+                            <td>{{ it.description }}</td>
+                            <td>{{ it.speed }}</td>
+                            <td>
+                                <span class="pill-status {{ 'ok' if it.status == 'up' else 'down' }}">{{ it.status }}</span>
+                            </td>
+                        </tr>
+                        {% endfor %}
+                    </tbody>
+                </table>
+            </article>
+        </section>
+    </main>
+</body>
+</html>
+"""
+
+
 app = Flask(__name__)
 app.secret_key = os.getenv('FLASK_SECRET', 'monitor-secret')
 
 BASE_DIR = Path(__file__).resolve().parent
 USERS_FILE = BASE_DIR / 'users.yml'
 
+LOCAL_SAMPLER = LocalSampler()
+STATIC_ASSETS = AssetManifest(BASE_DIR / 'static')
+METRICS_REGISTRY = MetricsRegistry()
+LOCAL_HISTORY = TimeSeriesStore()
+POLL_HISTORY = TimeSeriesStore(POLL_HISTORY_RETENTION, POLL_HISTORY_RESOLUTION, POLL_ROLLUP_LEVELS)
+POLL_EVENTS = EventLog()
+SNMP_POLLER = SnmpPoller()
 
-def _load_user_store():
-    if not USERS_FILE.exists():
-        return []
-    with open(USERS_FILE, 'r', encoding='utf-8') as stream:
-        data = yaml.safe_load(stream) or {}
-    return data.get('users', [])
 
+@app.template_global()
+def asset_url(logical_path: str) -> str:
+    return url_for('static_asset', filename=STATIC_ASSETS.hashed_path(logical_path))
 
-def _get_env_credentials():
-    env_user = os.getenv('MONITOR_ADMIN_USER') or os.getenv('MONITOR_USER')
-    env_password = os.getenv('MONITOR_ADMIN_PASSWORD') or os.getenv('MONITOR_PASSWORD')
-    if env_user and env_password:
-        return [{"username": env_user, "password": env_password}]
-    return []
 
+def _send_precompressed(payload, cache_control=None):
+    encoding, body, etag = payload.select(request.accept_encodings)
+    if ';' in payload.mimetype:
+        response = app.response_class(body, content_type=payload.mimetype)
+    else:
+        response = app.response_class(body, mimetype=payload.mimetype)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.set_etag(etag)
+    if cache_control:
+        response.headers['Cache-Control'] = cache_control
+    return response.make_conditional(request)
 
-def _credential_pool():
-    records = {}
-    for record in _load_user_store():
-        username = str(record.get('username', '')).strip()
-        if not username:
-            continue
-        records[username] = str(record.get('password', ''))
-    for item in _get_env_credentials():
-        username = str(item.get('username', '')).strip()
-        if not username:
-            continue
-        records[username] = str(item.get('password', ''))
-    return [{"username": user, "password": pwd} for user, pwd in records.items()]
 
+@app.after_request
+def _compress_dynamic_response(response):
+    return compress_response(response, request.accept_encodings)
 
-def _verify_password(stored_password: str, provided_password: str) -> bool:
-    if not stored_password:
-        return False
-    if stored_password.startswith(('pbkdf2:', 'scrypt:', 'sha256$')):
-        try:
-            return check_password_hash(stored_password, provided_password)
-        except ValueError:
-            return False
-    return stored_password == provided_password
+PAGE_TEMPLATES = {
+    "home": HOME_TEMPLATE,
+    "overview": OVERVIEW_TEMPLATE,
+    "servers": SERVERS_TEMPLATE,
+    "checklist": CHECKLIST_TEMPLATE,
+    "login": LOGIN_TEMPLATE,
+    "demo_mikrotik": DEMO_MIKROTIK_TEMPLATE,
+}
+_COMPILED_TEMPLATES = {}
+
+
+def _get_template(name: str):
+    # Compila cada template inline uma única vez (no primeiro uso) em vez de
+    # refazer o parse do Jinja a cada requisição.
+    template = _COMPILED_TEMPLATES.get(name)
+    if template is None:
+        template = app.jinja_env.from_string(PAGE_TEMPLATES[name])
+        _COMPILED_TEMPLATES[name] = template
+    return template
+
+
+def _render_page(name: str, **context):
+    return render_template(_get_template(name), **context)
+
+
+CREDENTIALS = CredentialStore(USERS_FILE)
+HASH_CHECKS = HashCheckPool()
 
 
 def _authenticate(username: str, password: str) -> bool:
-    username = username.strip()
-    for record in _credential_pool():
-        if record['username'] == username and _verify_password(record.get('password', ''), password):
-            return True
-    return False
+    stored_password = CREDENTIALS.get(username.strip())
+    if stored_password is None:
+        return False
+    return HASH_CHECKS.verify(stored_password, password)
 
 
 def login_required(view_func):
@@ -1671,29 +930,127 @@ def _status_from_percent(value: float, ok: float, warn: float) -> str:
 
 
 def _collect_local_status():
-    cpu_percent = psutil.cpu_percent(interval=0.3)
-    mem = psutil.virtual_memory()
-    disk_percent = 0.0
-    disk_path = os.getenv('MONITOR_DISK_PATH') or os.path.abspath(os.sep)
-    try:
-        disk_percent = psutil.disk_usage(disk_path).percent
-    except PermissionError:
-        for part in psutil.disk_partitions():
-            try:
-                disk_percent = max(disk_percent, psutil.disk_usage(part.mountpoint).percent)
-            except PermissionError:
-                continue
+    sample = LOCAL_SAMPLER.snapshot()
+    cpu_percent = sample['cpu_percent']
+    mem_percent = sample['memory']['percent']
+    disk_percent = sample['disk_percent']
 
     return {
         "cpu_percent": cpu_percent,
-        "mem_percent": mem.percent,
+        "mem_percent": mem_percent,
         "disk_percent": disk_percent,
         "cpu_status": _status_from_percent(cpu_percent, ok=60, warn=80),
-        "memory_status": _status_from_percent(mem.percent, ok=70, warn=85),
+        "memory_status": _status_from_percent(mem_percent, ok=70, warn=85),
         "disk_status": _status_from_percent(disk_percent, ok=70, warn=90),
+        "sampled_at": datetime.fromtimestamp(sample['timestamp']).strftime('%d/%m/%Y %H:%M:%S'),
     }
 
 
+_LOCAL_GAUGES = {
+    "cpu": METRICS_REGISTRY.gauge('monitor_cpu_usage_percent', 'Uso de CPU do host local.'),
+    "mem_percent": METRICS_REGISTRY.gauge('monitor_memory_usage_percent', 'Uso de memória do host local.'),
+    "mem_total": METRICS_REGISTRY.gauge('monitor_memory_total_bytes', 'Memória total do host local.'),
+    "mem_used": METRICS_REGISTRY.gauge('monitor_memory_used_bytes', 'Memória em uso no host local.'),
+    "mem_available": METRICS_REGISTRY.gauge('monitor_memory_available_bytes', 'Memória disponível no host local.'),
+    "disk_percent": METRICS_REGISTRY.gauge(
+        'monitor_disk_usage_percent', 'Uso de cada partição.', ('device', 'mountpoint', 'fstype')
+    ),
+    "disk_total": METRICS_REGISTRY.gauge(
+        'monitor_disk_total_bytes', 'Tamanho de cada partição.', ('device', 'mountpoint', 'fstype')
+    ),
+    "disk_used": METRICS_REGISTRY.gauge(
+        'monitor_disk_used_bytes', 'Espaço usado em cada partição.', ('device', 'mountpoint', 'fstype')
+    ),
+    "disk_free": METRICS_REGISTRY.gauge(
+        'monitor_disk_free_bytes', 'Espaço livre em cada partição.', ('device', 'mountpoint', 'fstype')
+    ),
+    "sampled_at": METRICS_REGISTRY.gauge(
+        'monitor_local_sample_timestamp_seconds', 'Momento (epoch) da última amostra local.'
+    ),
+}
+
+
+def _publish_local_metrics(sample):
+    memory = sample['memory']
+    _LOCAL_GAUGES['cpu'].set(sample['cpu_percent'])
+    _LOCAL_GAUGES['mem_percent'].set(memory['percent'])
+    _LOCAL_GAUGES['mem_total'].set(memory['total'])
+    _LOCAL_GAUGES['mem_used'].set(memory['used'])
+    _LOCAL_GAUGES['mem_available'].set(memory['available'])
+    for key in ('percent', 'total', 'used', 'free'):
+        _LOCAL_GAUGES[f'disk_{key}'].replace([
+            ({"device": disk['device'], "mountpoint": disk['mountpoint'], "fstype": disk['fstype']}, disk[key])
+            for disk in sample['disks']
+        ])
+    _LOCAL_GAUGES['sampled_at'].set(sample['timestamp'])
+
+
+def _record_local_history(sample):
+    timestamp = sample['timestamp']
+    LOCAL_HISTORY.append('cpu', timestamp, sample['cpu_percent'])
+    LOCAL_HISTORY.append('memory', timestamp, sample['memory']['percent'])
+    LOCAL_HISTORY.append('disk', timestamp, sample['disk_percent'])
+
+
+# Itens trapper esperados no Zabbix: monitor.cpu, monitor.memory, monitor.disk
+# (host MONITOR_ZABBIX_SENDER_HOST) e monitor.snmp.* em cada host sincronizado.
+ZABBIX_SENDER = ZabbixSender() if SENDER_SERVER else None
+
+
+def _send_local_to_zabbix(sample):
+    ZABBIX_SENDER.send_many(SENDER_HOST, {
+        "monitor.cpu": sample['cpu_percent'],
+        "monitor.memory": sample['memory']['percent'],
+        "monitor.disk": sample['disk_percent'],
+    }, clock=sample['timestamp'])
+
+
+LOCAL_SAMPLER.add_listener(_publish_local_metrics)
+LOCAL_SAMPLER.add_listener(_record_local_history)
+if ZABBIX_SENDER is not None:
+    LOCAL_SAMPLER.add_listener(_send_local_to_zabbix)
+# Amostra desde a carga do app, com os listeners já registrados.
+LOCAL_SAMPLER.start()
+
+
+@app.before_request
+def _start_local_sampler():
+    # Workers criados via fork não herdam a thread; start() é barato quando ela já roda.
+    LOCAL_SAMPLER.start()
+
+
+def _metrics_token_valid() -> bool:
+    expected = os.getenv('MONITOR_METRICS_TOKEN', '')
+    scheme, _, provided = request.headers.get('Authorization', '').partition(' ')
+    if not expected or scheme.lower() != 'bearer':
+        return False
+    return hmac.compare_digest(provided.strip().encode(), expected.encode())
+
+
+def metrics_token_required(view_func):
+    """Protege endpoints lidos por máquinas (Prometheus, Grafana) com o token Bearer."""
+    @wraps(view_func)
+    def wrapped_view(*args, **kwargs):
+        if not os.getenv('MONITOR_METRICS_TOKEN'):
+            return jsonify({"error": "MONITOR_METRICS_TOKEN não configurado"}), 403
+        if not _metrics_token_valid():
+            response = jsonify({"error": "token inválido"})
+            response.status_code = 401
+            response.headers['WWW-Authenticate'] = 'Bearer realm="monitor"'
+            return response
+        return view_func(*args, **kwargs)
+
+    return wrapped_view
+
+
+def _wants_openmetrics() -> bool:
+    # O Prometheus envia versões como parâmetro do mimetype, então compara só o prefixo.
+    accepted = list(request.accept_mimetypes)
+    openmetrics_q = max((q for value, q in accepted if value.startswith('application/openmetrics-text')), default=0)
+    text_q = max((q for value, q in accepted if value.startswith('text/plain')), default=0)
+    return openmetrics_q > 0 and openmetrics_q >= text_q
+
+
 NAV_ITEMS = [
     {"key": "dashboard", "endpoint": "index", "label": "Dashboard", "icon": "🏠"},
     {"key": "overview", "endpoint": "overview", "label": "Infraestrutura", "icon": "🛰️"},
@@ -1705,7 +1062,330 @@ NAV_ITEMS = [
 ]
 
 
-HOST_REGISTRY = []
+HOST_INVENTORY = HostInventory()
+ZABBIX_SYNC = ZabbixSync(ZabbixClient(), HOST_INVENTORY) if ZABBIX_URL else None
+_POLLING_SYNCED_PID = None
+
+_SNMP_GAUGES = {
+    "up": METRICS_REGISTRY.gauge('monitor_snmp_up', 'Último poll SNMP respondeu (1) ou falhou (0).', ('target',)),
+    "rtt": METRICS_REGISTRY.gauge('monitor_snmp_rtt_seconds', 'Tempo do último poll SNMP.', ('target',)),
+    "uptime": METRICS_REGISTRY.gauge('monitor_snmp_uptime_seconds', 'sysUpTime reportado pelo agente.', ('target',)),
+    "round_trips": METRICS_REGISTRY.gauge(
+        'monitor_snmp_poll_round_trips', 'Requisições SNMP usadas no último poll.', ('target',)
+    ),
+    "bytes_received": METRICS_REGISTRY.gauge(
+        'monitor_snmp_poll_bytes_received', 'Bytes recebidos no último poll.', ('target',)
+    ),
+    "requests": METRICS_REGISTRY.counter('monitor_snmp_requests', 'Requisições SNMP enviadas.', ('target',)),
+    "timeouts": METRICS_REGISTRY.counter('monitor_snmp_timeouts', 'Requisições SNMP sem resposta.', ('target',)),
+    "bytes_sent_total": METRICS_REGISTRY.counter('monitor_snmp_sent_bytes', 'Bytes SNMP enviados.', ('target',)),
+    "bytes_received_total": METRICS_REGISTRY.counter(
+        'monitor_snmp_received_bytes', 'Bytes SNMP recebidos.', ('target',)
+    ),
+}
+_SCHEDULER_GAUGES = {
+    "jobs": METRICS_REGISTRY.gauge('monitor_poller_jobs', 'Hosts agendados no poller SNMP.'),
+    "missed_deadlines": METRICS_REGISTRY.counter(
+        'monitor_poller_missed_deadlines', 'Disparos de poll perdidos (loop atrasado ou poll anterior em curso).'
+    ),
+    "lag_max": METRICS_REGISTRY.gauge('monitor_poller_lag_max_seconds', 'Maior atraso entre vencimento e início do poll.'),
+    "lag": METRICS_REGISTRY.gauge('monitor_poller_lag_seconds', 'Atraso do último poll iniciado.'),
+}
+
+
+def _polling_interval(raw_value) -> int:
+    try:
+        return max(int(raw_value), 5)
+    except (TypeError, ValueError):
+        return 60
+
+
+def _snmp_target(host_record):
+    address = (host_record.get('ip_address') or '').strip()
+    community = host_record.get('community') or ''
+    if not address or not community:
+        return None
+    host, port = address, 161
+    if address.count(':') == 1:
+        host, _, raw_port = address.partition(':')
+        port = int(raw_port) if raw_port.isdigit() else 161
+    # No v3 o campo community guarda o usuário USM; sem protocolo de autenticação o host é noAuthNoPriv.
+    return SnmpTarget(
+        host, port, version=host_record.get('snmp_version') or 'v2c', community=community,
+        auth_protocol=host_record.get('auth_protocol') or None,
+        auth_password=host_record.get('auth_password') or None,
+    )
+
+
+def _register_polling(host_record):
+    target = _snmp_target(host_record)
+    if target is None:
+        return
+    SNMP_POLLER.upsert(host_record['ip_address'], target, _polling_interval(host_record.get('polling')))
+    SNMP_POLLER.start()
+
+
+def _unregister_polling(host_record):
+    key = host_record.get('ip_address')
+    if key:
+        SNMP_POLLER.remove(key)
+        for gauge in _SNMP_GAUGES.values():
+            gauge.remove(target=key)
+        POLL_HISTORY.discard(f'snmp.up.{key}')
+        POLL_HISTORY.discard(f'snmp.rtt.{key}')
+        POLL_HISTORY.discard(f'snmp.in_bps.{key}')
+        POLL_HISTORY.discard(f'snmp.out_bps.{key}')
+        INTERFACE_RATES.remove_device(key)
+        _LAST_POLL_STATE.pop(key, None)
+        PPPOE_SESSIONS.remove_concentrator(key)
+        ARP_TABLES.remove_router(key)
+        BGP_PEERS.remove_router(key)
+        OSPF_TOPOLOGY.remove_router(key)
+        NETWORK_TOPOLOGY.remove_device(key)
+        OPTICS.remove_device(key)
+
+
+_LAST_POLL_STATE = {}
+
+
+def _record_poll_history(key, result):
+    timestamp = result['polled_at']
+    POLL_HISTORY.append(f'snmp.up.{key}', timestamp, 1 if result['ok'] else 0)
+    if result['ok']:
+        POLL_HISTORY.append(f'snmp.rtt.{key}', timestamp, result['rtt_ms'])
+    previous = _LAST_POLL_STATE.get(key)
+    _LAST_POLL_STATE[key] = result['ok']
+    if previous is not None and previous != result['ok']:
+        if result['ok']:
+            POLL_EVENTS.add(timestamp, f'{key} voltou', 'SNMP respondendo novamente', ('snmp', 'up'))
+        else:
+            POLL_EVENTS.add(timestamp, f'{key} caiu', result.get('error') or 'sem resposta SNMP', ('snmp', 'down'))
+
+
+def _publish_poll_result(key, result):
+    _SNMP_GAUGES['up'].set(1 if result['ok'] else 0, target=key)
+    _SNMP_GAUGES['rtt'].set(result['rtt_ms'] / 1000, target=key)
+    uptime_ticks = result['values'].get('sysUpTime')
+    if isinstance(uptime_ticks, int):
+        _SNMP_GAUGES['uptime'].set(uptime_ticks / 100, target=key)
+    _SNMP_GAUGES['round_trips'].set(result['round_trips'], target=key)
+    _SNMP_GAUGES['bytes_received'].set(result['bytes_received'], target=key)
+    device_stats = result['device_stats']
+    _SNMP_GAUGES['requests'].set(device_stats['requests'], target=key)
+    _SNMP_GAUGES['timeouts'].set(device_stats['timeouts'], target=key)
+    _SNMP_GAUGES['bytes_sent_total'].set(device_stats['bytes_sent'], target=key)
+    _SNMP_GAUGES['bytes_received_total'].set(device_stats['bytes_received'], target=key)
+    scheduler_stats = SNMP_POLLER.scheduler_stats()
+    _SCHEDULER_GAUGES['jobs'].set(scheduler_stats['jobs'])
+    _SCHEDULER_GAUGES['missed_deadlines'].set(scheduler_stats['missed_deadlines'])
+    _SCHEDULER_GAUGES['lag_max'].set(scheduler_stats['lag_max_ms'] / 1000)
+    _SCHEDULER_GAUGES['lag'].set(scheduler_stats['lag_last_ms'] / 1000)
+
+
+PPPOE_SESSIONS = PppoeSessionStore()
+
+
+def _record_pppoe_sessions(key, result):
+    # A tabela de interfaces traz todas as sessões do concentrador: vira um diff sobre as atuais.
+    rows = result['tables'].get('pppoe_users') if result['ok'] else None
+    if rows is not None:
+        PPPOE_SESSIONS.submit_snapshot(key, rows, result['polled_at'])
+
+
+ARP_TABLES = ArpStore()
+
+
+def _record_arp_table(key, result):
+    rows = result['tables'].get('arp') if result['ok'] else None
+    if rows is not None:
+        ARP_TABLES.submit_snapshot(key, rows, result['polled_at'])
+
+
+def _annotate_bgp_event(event):
+    # Quedas, retornos, flapping e variações de prefixos viram anotações no Grafana; remoções não.
+    if event['type'] != 'removed':
+        POLL_EVENTS.add(event['time'], f"BGP {event['router']}: {event['text']}", f"AS{event['asn']}",
+                        ('bgp', event['type']))
+
+
+BGP_PEERS = BgpTracker(on_event=_annotate_bgp_event)
+
+
+def _record_bgp_peers(key, result):
+    rows = result['tables'].get('bgp', {}).get('peers') if result['ok'] else None
+    if rows is not None:
+        BGP_PEERS.submit_snapshot(key, rows, result['polled_at'])
+
+
+def _annotate_ospf_event(event):
+    # Novas adjacências ficam só em /api/ospf/events; perdas e partições vão para o Grafana.
+    if event['type'] != 'adjacency_up':
+        POLL_EVENTS.add(event['time'], f"OSPF área {event['area']}", event['text'], ('ospf', event['type']))
+
+
+OSPF_TOPOLOGY = OspfTopology(on_event=_annotate_ospf_event)
+
+
+def _record_ospf_neighbors(key, result):
+    table = result['tables'].get('ospf') if result['ok'] else None
+    if table is not None:
+        OSPF_TOPOLOGY.submit_snapshot(key, table.get('router_id'), full_neighbors(table), result['polled_at'])
+
+
+NETWORK_TOPOLOGY = NeighborTopology()
+
+
+def _record_lldp_neighbors(key, result):
+    rows = result['tables'].get('neighbors', {}).get('lldp') if result['ok'] else None
+    if rows is not None:
+        name = result['values'].get('sysName')
+        if isinstance(name, bytes):
+            name = name.decode('utf-8', errors='replace')
+        NETWORK_TOPOLOGY.submit_snapshot(key, name, rows, result['polled_at'])
+
+
+OPTICS = OpticsStore()
+
+
+def _record_optics(key, result):
+    rows = result['tables'].get('optics') if result['ok'] else None
+    if rows:
+        OPTICS.submit_snapshot(key, rows, result['polled_at'])
+
+
+INTERFACE_RATES = CounterRates()
+
+
+def _record_interface_rates(key, result):
+    rows = result['tables'].get('interfaces') if result['ok'] else None
+    if rows is None:
+        return
+    uptime = result['values'].get('sysUpTime')
+    future = INTERFACE_RATES.submit_interfaces(key, rows, result['polled_at'],
+                                               uptime if isinstance(uptime, int) else None)
+
+    def record_totals(done):
+        if done.exception() is None and done.result()['rated']:
+            POLL_HISTORY.append(f'snmp.in_bps.{key}', result['polled_at'], done.result()['total_in_bps'])
+            POLL_HISTORY.append(f'snmp.out_bps.{key}', result['polled_at'], done.result()['total_out_bps'])
+
+    future.add_done_callback(record_totals)
+
+
+SNMP_POLLER.add_listener(_publish_poll_result)
+SNMP_POLLER.add_listener(_record_poll_history)
+SNMP_POLLER.add_listener(_record_pppoe_sessions)
+SNMP_POLLER.add_listener(_record_arp_table)
+SNMP_POLLER.add_listener(_record_bgp_peers)
+SNMP_POLLER.add_listener(_record_ospf_neighbors)
+SNMP_POLLER.add_listener(_record_lldp_neighbors)
+SNMP_POLLER.add_listener(_record_optics)
+SNMP_POLLER.add_listener(_record_interface_rates)
+
+
+def _send_poll_to_zabbix(key, result):
+    uptime_ticks = result['values'].get('sysUpTime')
+    ZABBIX_SENDER.send_many(technical_name({"ip_address": key}), {
+        "monitor.snmp.up": 1 if result['ok'] else 0,
+        "monitor.snmp.rtt": result['rtt_ms'] / 1000,
+        "monitor.snmp.uptime": uptime_ticks / 100 if isinstance(uptime_ticks, int) else None,
+        "monitor.snmp.round_trips": result['round_trips'],
+    }, clock=result['polled_at'])
+
+
+if ZABBIX_SENDER is not None:
+    SNMP_POLLER.add_listener(_send_poll_to_zabbix)
+
+
+# Poller, NetFlow e stores vivem na memória de um processo. Com vários workers só o
+# dono deste lock coleta e atende; os outros respondem 503 em vez de servir dados vazios.
+COLLECTOR_LOCK = ProcessLock(os.getenv(
+    'MONITOR_COLLECTOR_LOCK', str(Path(HOST_INVENTORY.path).with_name('collector.lock'))
+))
+_COLLECTOR_REFUSED_PID = None
+# Rotas servidas da memória do coletor (poller, NetFlow, stores) ou que agendam polling.
+# Login, health, assets e as páginas sem dados coletados seguem atendidas em qualquer worker.
+COLLECTOR_PATHS = ('/api/', '/grafana/', '/openmetrics', '/checklist', '/servers')
+
+
+@app.before_request
+def _require_collector_owner():
+    global _COLLECTOR_REFUSED_PID
+    if COLLECTOR_LOCK.acquire():
+        return None
+    if _COLLECTOR_REFUSED_PID != os.getpid():
+        _COLLECTOR_REFUSED_PID = os.getpid()
+        app.logger.error('Outro processo detém %s; rode o monitor com um único worker.', COLLECTOR_LOCK.path)
+    if not request.path.startswith(COLLECTOR_PATHS):
+        return None
+    return jsonify({"error": "Coleta ativa em outro processo: o monitor deve rodar com um único worker."}), 503
+
+
+@app.before_request
+def _sync_inventory_polling():
+    # Na primeira requisição de cada processo, agenda todos os hosts do inventário.
+    global _POLLING_SYNCED_PID
+    if _POLLING_SYNCED_PID == os.getpid() or not COLLECTOR_LOCK.acquire():
+        return
+    _POLLING_SYNCED_PID = os.getpid()
+    for host_record in HOST_INVENTORY.iter_hosts():
+        _register_polling(host_record)
+
+
+NETFLOW_COLLECTOR = NetflowCollector() if NETFLOW_LISTEN else None
+_NETFLOW_GAUGES = {
+    "flows": METRICS_REGISTRY.counter('monitor_netflow_flows', 'Fluxos NetFlow decodificados.'),
+    "packets": METRICS_REGISTRY.counter('monitor_netflow_packets', 'Datagramas NetFlow recebidos.'),
+    "malformed": METRICS_REGISTRY.counter('monitor_netflow_malformed', 'Datagramas NetFlow descartados por erro.'),
+    "unknown_template": METRICS_REGISTRY.counter(
+        'monitor_netflow_unknown_template', 'Conjuntos de dados v9 recebidos antes do template.'
+    ),
+}
+
+
+def _publish_netflow_stats(batch):
+    stats = NETFLOW_COLLECTOR.decoder.stats
+    for key, metric in _NETFLOW_GAUGES.items():
+        metric.set(stats[key])
+
+
+TOP_TALKERS = TopTalkers()
+
+
+if NETFLOW_COLLECTOR is not None:
+    NETFLOW_COLLECTOR.add_listener(_publish_netflow_stats)
+    NETFLOW_COLLECTOR.add_listener(TOP_TALKERS.add)
+_NETFLOW_STARTED_PID = None
+
+
+@app.before_request
+def _start_netflow_collector():
+    # Uma tentativa por processo: se a porta estiver ocupada, registra e segue sem coletor.
+    global _NETFLOW_STARTED_PID
+    if NETFLOW_COLLECTOR is None or _NETFLOW_STARTED_PID == os.getpid() or not COLLECTOR_LOCK.acquire():
+        return
+    _NETFLOW_STARTED_PID = os.getpid()
+    try:
+        NETFLOW_COLLECTOR.start()
+    except OSError as exc:
+        app.logger.warning('Coletor NetFlow não iniciado em %s: %s', NETFLOW_LISTEN, exc)
+
+
+def _hosts_with_poll_status(hosts):
+    enriched = []
+    for host in hosts:
+        result = SNMP_POLLER.status(host.get('ip_address'))
+        summary = None
+        if result:
+            # As tabelas coletadas podem ter milhares de linhas; aqui vai só o resumo.
+            summary = {key: value for key, value in result.items() if key != 'tables'}
+        host = {key: value for key, value in host.items() if key != 'auth_password'}
+        enriched.append(dict(
+            host,
+            snmp_active=bool(result and result['ok']),
+            snmp_status=summary,
+        ))
+    return enriched
 
 
 def _build_nav_links(active_key: str):
@@ -1720,10 +1400,15 @@ def _build_nav_links(active_key: str):
     return links
 
 
-def _split_tags(raw_tags):
-    if not raw_tags:
-        return []
-    return [tag.strip() for tag in raw_tags.split(',') if tag.strip()]
+FORM_LABELS = {
+    "ip_address": "Endereço / Interface",
+    "snmp_version": "SNMP",
+    "community": "Community / Usuário",
+    "auth_protocol": "Autenticação v3",
+    "auth_password": "Senha v3",
+    "polling": "Intervalo (s)",
+    "tags": "Tags",
+}
 
 
 @app.route('/login', methods=['GET', 'POST'])
@@ -1732,25 +1417,31 @@ def login():
         return redirect(url_for('index'))
 
     error = None
+    status = 200
     requested_next = request.values.get('next', '')
 
     if request.method == 'POST':
         username = request.form.get('username', '').strip()
         password = request.form.get('password', '')
 
-        if _authenticate(username, password):
-            session['auth_user'] = username
-            session['last_login'] = datetime.now().strftime('%d/%m/%Y %H:%M')
-            target = requested_next if requested_next.startswith('/') else url_for('index')
-            return redirect(target)
-
-        error = 'Credenciais inválidas. Verifique usuário e senha.'
-
-    return render_template_string(
-        LOGIN_TEMPLATE,
+        try:
+            authenticated = _authenticate(username, password)
+        except AuthBusy:
+            status = 503
+            error = 'Muitos logins simultâneos. Aguarde alguns segundos e tente novamente.'
+        else:
+            if authenticated:
+                session['auth_user'] = username
+                session['last_login'] = datetime.now().strftime('%d/%m/%Y %H:%M')
+                target = requested_next if requested_next.startswith('/') else url_for('index')
+                return redirect(target)
+            error = 'Credenciais inválidas. Verifique usuário e senha.'
+
+    return _render_page(
+        'login',
         error=error,
         next_url=requested_next,
-    )
+    ), status
 
 
 @app.route('/logout')
@@ -1862,8 +1553,8 @@ def index():
     nav_links = _build_nav_links('dashboard')
     docs_hint = "Consulte docs/SETUP.md e docs/ARCHITECTURE.md para entender a stack completa."
 
-    return render_template_string(
-        HOME_TEMPLATE,
+    return _render_page(
+        'home',
         user_name=session.get('auth_user', 'Operador'),
         action_tiles=action_tiles,
         config_steps=config_steps,
@@ -1883,6 +1574,7 @@ def index():
 def servers():
     nav_links = _build_nav_links('servers')
     snmp_versions = ['v2c', 'v3']
+    auth_protocols = [''] + list(AUTH_PROTOCOLS)
     templates = [
         'Template MikroTik SNMP',
         'Template Generic SNMP Interfaces',
@@ -1901,6 +1593,8 @@ def servers():
         "template": "",
         "snmp_version": "v2c",
         "community": "public",
+        "auth_protocol": "",
+        "auth_password": "",
         "polling": "60",
         "tags": "",
         "notes": "",
@@ -1908,28 +1602,23 @@ def servers():
     form_state = {key: request.form.get(key, default) for key, default in default_form.items()}
     message = None
 
+    form_errors = []
+
     if request.method == 'POST':
-        host_label = form_state.get('host_name') or 'Host sem nome'
-        ip_label = form_state.get('ip_address', 'interface não informada')
-        host_record = {
-            "host_name": host_label,
-            "ip_address": ip_label,
-            "host_group": form_state.get('host_group', ''),
-            "template": form_state.get('template', ''),
-            "snmp_version": form_state.get('snmp_version', 'v2c'),
-            "community": form_state.get('community', ''),
-            "polling": form_state.get('polling', '60'),
-            "tags": _split_tags(form_state.get('tags', '')),
-            "notes": form_state.get('notes', ''),
-            "snmp_active": bool(form_state.get('community')),
-            "created_at": datetime.now().strftime('%d/%m/%Y %H:%M'),
-        }
-        HOST_REGISTRY.insert(0, host_record)
-        if len(HOST_REGISTRY) > 60:
-            del HOST_REGISTRY[60:]
-
-        message = f"{host_label} configurado para coleta SNMP em {ip_label}."
-        form_state = default_form.copy()
+        # O inventário é indexado pelo endereço: sem validação, todo cadastro com IP em
+        # branco sobrescreveria o mesmo registro.
+        host_record, errors = validate_row(form_state)
+        if errors:
+            form_errors = [f"{FORM_LABELS.get(field, field)}: {text}" for field, text in errors]
+        else:
+            host_record['created_at'] = datetime.now().strftime('%d/%m/%Y %H:%M')
+            host_record = HOST_INVENTORY.upsert(host_record)
+            _register_polling(host_record)
+            if ZABBIX_SYNC is not None:
+                ZABBIX_SYNC.request_sync()
+
+            message = f"{host_record['host_name']} configurado para coleta SNMP em {host_record['ip_address']}."
+            form_state = default_form.copy()
 
     server_profiles = [
         {
@@ -1949,14 +1638,16 @@ def servers():
         },
     ]
 
-    return render_template_string(
-        SERVERS_TEMPLATE,
+    return _render_page(
+        'servers',
         user_name=session.get('auth_user', 'Operador'),
         nav_links=nav_links,
         last_refresh=datetime.now().strftime('%d/%m/%Y %H:%M'),
         message=message,
+        form_errors=form_errors,
         form_state=form_state,
         snmp_versions=snmp_versions,
+        auth_protocols=auth_protocols,
         templates=templates,
         host_groups=host_groups,
         server_profiles=server_profiles,
@@ -1972,8 +1663,8 @@ def overview():
     stats = _collect_local_status()
     nav_links = _build_nav_links('overview')
 
-    return render_template_string(
-        OVERVIEW_TEMPLATE,
+    return _render_page(
+        'overview',
         user_name=session.get('auth_user', 'Operador'),
         nav_links=nav_links,
         stats=stats,
@@ -1986,58 +1677,145 @@ def overview():
 @app.route('/metrics')
 @login_required
 def metrics():
-    cpu = psutil.cpu_percent(interval=0.5)
-    mem = psutil.virtual_memory()
-
-    max_disk_percent = 0.0
-    disks = []
-    for p in psutil.disk_partitions():
-        try:
-            usage = psutil.disk_usage(p.mountpoint)
-            disks.append({
-                "device": p.device,
-                "mountpoint": p.mountpoint,
-                "fstype": p.fstype,
-                "percent": usage.percent,
-                "total": usage.total,
-                "used": usage.used,
-                "free": usage.free,
-            })
-            if usage.percent > max_disk_percent:
-                max_disk_percent = usage.percent
-        except PermissionError:
-            continue
+    sample = LOCAL_SAMPLER.snapshot()
+    cpu = sample['cpu_percent']
+    mem_percent = sample['memory']['percent']
+    max_disk_percent = sample['max_disk_percent']
 
     status = {
         "cpu": _status_from_percent(cpu, ok=60, warn=80),
-        "memory": _status_from_percent(mem.percent, ok=70, warn=85),
+        "memory": _status_from_percent(mem_percent, ok=70, warn=85),
         "disk": _status_from_percent(max_disk_percent, ok=70, warn=90),
     }
 
     data = {
         "cpu_percent": cpu,
-        "memory_percent": mem.percent,
+        "memory_percent": mem_percent,
         "disk_percent": max_disk_percent,
         "status": status,
+        "sampled_at": datetime.fromtimestamp(sample['timestamp']).isoformat(timespec='seconds'),
         "raw": {
-            "memory": mem._asdict(),
-            "disks": disks,
+            "memory": sample['memory'],
+            "disks": sample['disks'],
         },
     }
     return jsonify(data)
 
 
+@app.route('/api/metrics/history')
+@login_required
+def metrics_history():
+    LOCAL_SAMPLER.snapshot()
+    series = request.args.get('series', 'cpu')
+    agg = request.args.get('agg', 'avg')
+    method = request.args.get('method') or None
+    try:
+        end = float(request.args.get('to') or time.time())
+        start = float(request.args.get('from') or end - 3600)
+        step = float(request.args.get('step') or 0)
+    except ValueError:
+        return jsonify({"error": "from, to e step devem ser números (epoch em segundos)"}), 400
+    if start > end or step < 0:
+        return jsonify({"error": "intervalo inválido"}), 400
+    if method not in (None, 'lttb'):
+        return jsonify({"error": "method aceita apenas 'lttb'"}), 400
+
+    try:
+        resolution, points = LOCAL_HISTORY.query(series, start, end, step=step or None, agg=agg, method=method)
+    except KeyError:
+        return jsonify({"error": f"série desconhecida: {series}", "series": LOCAL_HISTORY.names()}), 404
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    return jsonify({
+        "series": series,
+        "from": start,
+        "to": end,
+        "step": max(step, resolution),
+        "resolution": resolution,
+        "agg": agg,
+        "method": method,
+        "points": points,
+    })
+
+
+@app.route('/openmetrics')
+@metrics_token_required
+def openmetrics():
+    # Garante que a amostragem está ativa; o scrape em si só serializa o registro.
+    LOCAL_SAMPLER.snapshot()
+    payload = METRICS_REGISTRY.exposition(openmetrics=_wants_openmetrics())
+    return _send_precompressed(payload, cache_control='no-cache')
+
+
+@app.route('/grafana/', methods=['GET', 'POST'])
+@metrics_token_required
+def grafana_test():
+    # "Save & test" do datasource JSON do Grafana.
+    return jsonify({"status": "ok"})
+
+
+@app.route('/grafana/search', methods=['POST'])
+@metrics_token_required
+def grafana_search_view():
+    payload = request.get_json(silent=True) or {}
+    names = LOCAL_HISTORY.names() + POLL_HISTORY.names()
+    return jsonify(grafana_search(names, payload.get('target')))
+
+
+@app.route('/grafana/query', methods=['POST'])
+@metrics_token_required
+def grafana_query():
+    LOCAL_SAMPLER.snapshot()
+    try:
+        return jsonify(grafana_evaluate([LOCAL_HISTORY, POLL_HISTORY], request.get_json(silent=True) or {}))
+    except (TypeError, ValueError) as exc:
+        return jsonify({"error": f"consulta inválida: {exc}"}), 400
+
+
+@app.route('/grafana/annotations', methods=['POST'])
+@metrics_token_required
+def grafana_annotations_view():
+    try:
+        return jsonify(grafana_annotations(POLL_EVENTS, request.get_json(silent=True) or {}))
+    except (TypeError, ValueError) as exc:
+        return jsonify({"error": f"consulta inválida: {exc}"}), 400
+
+
+def _inventory_query():
+    """Filtros e página vindos da query string (``group``, ``template``, ``tag``, ``q``, ``page``)."""
+    filters = {
+        "host_group": request.args.get('group', '').strip() or None,
+        "template": request.args.get('template', '').strip() or None,
+        "tag": request.args.get('tag', '').strip() or None,
+        "search": request.args.get('q', '').strip() or None,
+    }
+    page = max(request.args.get('page', 1, type=int) or 1, 1)
+    per_page = request.args.get('per_page', DEFAULT_PAGE_SIZE, type=int) or DEFAULT_PAGE_SIZE
+    # Mesmo limite de ``HostInventory.page``: o total de páginas tem de usar o tamanho efetivo.
+    per_page = min(max(per_page, 1), MAX_PAGE_SIZE)
+    return filters, page, per_page
+
+
+def _pagination(page, per_page, total):
+    pages = max((total + per_page - 1) // per_page, 1)
+    return {"page": page, "per_page": per_page, "total": total, "pages": pages}
+
+
 @app.route('/checklist')
 @login_required
 def checklist():
     items = get_full_checklist()
-    hosts = HOST_REGISTRY.copy()
+    filters, page, per_page = _inventory_query()
+    page_hosts, matched = HOST_INVENTORY.page(page, per_page, **filters)
+    hosts = _hosts_with_poll_status(page_hosts)
+    pagination = _pagination(page, per_page, matched)
     recursos = items.get('recursos', [])
     equipamentos = items.get('equipamentos', [])
-    total_hosts = len(hosts)
-    snmp_active = sum(1 for host in hosts if host.get('snmp_active'))
-    inactive = total_hosts - snmp_active
-    group_names = sorted({host.get('host_group') for host in hosts if host.get('host_group')})
+    total_hosts = HOST_INVENTORY.count()
+    snmp_active = SNMP_POLLER.up_count()
+    inactive = max(total_hosts - snmp_active, 0)
+    group_names = HOST_INVENTORY.groups()
     group_detail = ', '.join(group_names[:3]) if group_names else 'Defina grupos nos cadastros'
     if len(group_names) > 3:
         group_detail += f" +{len(group_names) - 3}"
@@ -2060,13 +1838,17 @@ def checklist():
         },
     ]
 
-    return render_template_string(
-        CHECKLIST_TEMPLATE,
+    page_args = {key: value for key, value in request.args.items() if key != 'page'}
+    return _render_page(
+        'checklist',
         user_name=session.get('auth_user', 'Operador'),
         nav_links=_build_nav_links('checklist'),
         last_refresh=datetime.now().strftime('%d/%m/%Y %H:%M'),
         summary_stats=summary_stats,
         hosts=hosts,
+        pagination=pagination,
+        prev_url=url_for('checklist', page=page - 1, **page_args) if page > 1 else None,
+        next_url=url_for('checklist', page=page + 1, **page_args) if page < pagination['pages'] else None,
         recursos=recursos,
         equipamentos=equipamentos,
         servers_url=url_for('servers'),
@@ -2077,10 +1859,442 @@ def checklist():
 @login_required
 def checklist_api():
     payload = get_full_checklist()
-    payload['hosts'] = HOST_REGISTRY
+    filters, page, per_page = _inventory_query()
+    page_hosts, matched = HOST_INVENTORY.page(page, per_page, **filters)
+    payload['hosts'] = _hosts_with_poll_status(page_hosts)
+    payload['pagination'] = _pagination(page, per_page, matched)
     return jsonify(payload)
 
 
+@app.route('/api/hosts/import', methods=['POST'])
+@login_required
+def import_hosts_api():
+    """Importa hosts de um arquivo enviado (campo ``file``) ou do corpo da requisição.
+
+    O formato vem de ``?format=``, da extensão do arquivo ou do Content-Type;
+    ``?dry_run=1`` só valida.
+    """
+    upload = request.files.get('file')
+    if upload is not None:
+        stream, filename, content_type = upload.stream, upload.filename, upload.mimetype
+    else:
+        stream, filename, content_type = request.stream, None, request.mimetype
+    try:
+        fmt = detect_format(filename, content_type, request.args.get('format'))
+    except ImportFormatError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    def schedule(hosts):
+        for host_record in hosts:
+            _register_polling(host_record)
+
+    dry_run = request.args.get('dry_run', '').lower() in ('1', 'true', 'yes')
+    report = import_hosts(HOST_INVENTORY, stream, fmt, dry_run=dry_run, on_batch=schedule).as_dict()
+    if ZABBIX_SYNC is not None and report['imported'] and not dry_run:
+        ZABBIX_SYNC.request_sync()
+    status = 400 if report['fatal'] and not report['imported'] else 200
+    return jsonify(report), status
+
+
+@app.route('/api/hosts/<path:ip_address>', methods=['DELETE'])
+@login_required
+def delete_host_api(ip_address):
+    """Remove o host do inventário e encerra a coleta e o estado guardado dele."""
+    host_record = HOST_INVENTORY.get(ip_address)
+    if host_record is None:
+        return jsonify({"error": f"Host {ip_address} não cadastrado."}), 404
+    HOST_INVENTORY.remove(ip_address)
+    _unregister_polling(host_record)
+    return jsonify({"removed": ip_address})
+
+
+@app.route('/api/zabbix/sync', methods=['GET', 'POST'])
+@login_required
+def zabbix_sync():
+    """GET: resultado da última sincronização; POST: sincroniza agora os hosts alterados."""
+    if ZABBIX_SYNC is None:
+        return jsonify({"error": "Integração com o Zabbix desativada (defina MONITOR_ZABBIX_URL)."}), 404
+    if request.method == 'GET':
+        return jsonify({"last_result": ZABBIX_SYNC.last_result})
+    try:
+        return jsonify(ZABBIX_SYNC.sync())
+    except (requests.RequestException, ZabbixError) as exc:
+        return jsonify({"error": f"Falha ao sincronizar com o Zabbix: {exc}"}), 502
+
+
+@app.route('/api/pppoe/sessions')
+@login_required
+def pppoe_sessions():
+    """Sessões PPPoE paginadas; ``q`` busca por usuário/IP e ``concentrator`` filtra pelo BRAS."""
+    page = request.args.get('page', 1, type=int) or 1
+    per_page = request.args.get('per_page', PPPOE_PAGE_SIZE, type=int) or PPPOE_PAGE_SIZE
+    sessions, total = PPPOE_SESSIONS.page(
+        page, per_page,
+        concentrator=request.args.get('concentrator', '').strip() or None,
+        search=request.args.get('q', '').strip() or None,
+    )
+    return jsonify({"sessions": sessions, "pagination": _pagination(page, per_page, total),
+                    "stats": PPPOE_SESSIONS.stats()})
+
+
+@app.route('/api/pppoe/lookup')
+@login_required
+def pppoe_lookup():
+    """Busca exata por ``user`` e/ou ``ip``, com as últimas conexões/desconexões do usuário."""
+    user = request.args.get('user', '').strip() or None
+    ip = request.args.get('ip', '').strip() or None
+    if not user and not ip:
+        return jsonify({"error": "Informe user ou ip."}), 400
+    sessions = PPPOE_SESSIONS.lookup(user=user, ip=ip)
+    users = {user} if user else {session['user'] for session in sessions}
+    events = [event for name in sorted(users) for event in PPPOE_SESSIONS.recent_events(20, user=name)]
+    return jsonify({"sessions": sessions, "events": events})
+
+
+@app.route('/api/pppoe/top')
+@login_required
+def pppoe_top():
+    by = request.args.get('by', 'download_bps')
+    if by not in PPPOE_TOP_FIELDS:
+        return jsonify({"error": f"by deve ser um de: {', '.join(PPPOE_TOP_FIELDS)}"}), 400
+    n = request.args.get('n', 10, type=int) or 10
+    concentrator = request.args.get('concentrator', '').strip() or None
+    return jsonify({"by": by, "sessions": PPPOE_SESSIONS.top(n, by, concentrator=concentrator)})
+
+
+@app.route('/api/pppoe/<concentrator>/snapshot', methods=['POST'])
+@login_required
+def pppoe_snapshot(concentrator):
+    """Recebe a tabela completa de sessões de um concentrador (lista JSON ou ``{"sessions": [...]}``)."""
+    payload = request.get_json(silent=True)
+    if isinstance(payload, dict):
+        payload = payload.get('sessions')
+    if not isinstance(payload, list) or not all(isinstance(row, dict) for row in payload):
+        return jsonify({"error": "Envie uma lista de sessões em JSON."}), 400
+    return jsonify(PPPOE_SESSIONS.apply_snapshot(concentrator, payload))
+
+
+@app.route('/api/arp/lookup')
+@login_required
+def arp_lookup():
+    """Onde está um ``ip`` ou ``mac``: roteador, interface e quando foi visto."""
+    ip = request.args.get('ip', '').strip()
+    mac = request.args.get('mac', '').strip()
+    if not ip and not mac:
+        return jsonify({"error": "Informe ip ou mac."}), 400
+    try:
+        entries = ARP_TABLES.where_ip(ip) if ip else ARP_TABLES.where_mac(mac)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    return jsonify({"entries": entries})
+
+
+@app.route('/api/arp/events')
+@login_required
+def arp_events():
+    """Últimos IPs novos, movidos (``type=moved``) ou com MAC trocado (``type=mac_changed``)."""
+    events = ARP_TABLES.recent_events(
+        limit=request.args.get('limit', 100, type=int) or 100,
+        kind=request.args.get('type', '').strip() or None,
+        router=request.args.get('router', '').strip() or None,
+    )
+    return jsonify({"events": events, "stats": ARP_TABLES.stats()})
+
+
+@app.route('/api/arp/<router>/snapshot', methods=['POST'])
+@login_required
+def arp_snapshot(router):
+    """Recebe a tabela ARP completa de um roteador (lista JSON de ``ip``/``mac``/``interface``)."""
+    payload = request.get_json(silent=True)
+    if isinstance(payload, dict):
+        payload = payload.get('entries')
+    if not isinstance(payload, list) or not all(isinstance(row, dict) for row in payload):
+        return jsonify({"error": "Envie uma lista de entradas ARP em JSON."}), 400
+    try:
+        return jsonify(ARP_TABLES.apply_snapshot(router, payload))
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+
+@app.route('/api/bgp/summary')
+@login_required
+def bgp_summary():
+    """Peers, sessões up/down, instáveis e prefixos: da frota e por roteador."""
+    return jsonify(BGP_PEERS.summary())
+
+
+@app.route('/api/bgp/peers')
+@login_required
+def bgp_peers():
+    """Peers ordenados pelo score de flap; filtros ``router``, ``state`` e ``flapping=1``."""
+    state = request.args.get('state', '').strip().lower() or None
+    if state and state not in BGP_STATES:
+        return jsonify({"error": f"Estado BGP desconhecido: {state}"}), 400
+    peers = BGP_PEERS.list_peers(
+        router=request.args.get('router', '').strip() or None,
+        state=state,
+        flapping=request.args.get('flapping') in ('1', 'true'),
+        limit=request.args.get('limit', 500, type=int) or 500,
+    )
+    return jsonify({"peers": peers})
+
+
+@app.route('/api/bgp/history')
+@login_required
+def bgp_history():
+    """Últimas transições de estado de um peer (``router`` e ``peer``)."""
+    router = request.args.get('router', '').strip()
+    peer = request.args.get('peer', '').strip()
+    if not router or not peer:
+        return jsonify({"error": "Informe router e peer."}), 400
+    history = BGP_PEERS.history(router, peer)
+    if history is None:
+        return jsonify({"error": "Peer não encontrado."}), 404
+    return jsonify({"router": router, "peer": peer, "transitions": history})
+
+
+@app.route('/api/bgp/events')
+@login_required
+def bgp_events():
+    """Últimas quedas/retornos, flapping (``type=flapping``) e variações de prefixos."""
+    events = BGP_PEERS.recent_events(
+        limit=request.args.get('limit', 100, type=int) or 100,
+        kind=request.args.get('type', '').strip() or None,
+        router=request.args.get('router', '').strip() or None,
+    )
+    return jsonify({"events": events})
+
+
+@app.route('/api/bgp/<router>/snapshot', methods=['POST'])
+@login_required
+def bgp_snapshot(router):
+    """Recebe a tabela de peers de um roteador (``peer``, ``asn``, ``state``, ``prefixes_received``...)."""
+    payload = request.get_json(silent=True)
+    if isinstance(payload, dict):
+        payload = payload.get('peers')
+    if not isinstance(payload, list) or not all(isinstance(row, dict) for row in payload):
+        return jsonify({"error": "Envie uma lista de peers BGP em JSON."}), 400
+    return jsonify(BGP_PEERS.apply_snapshot(router, payload))
+
+
+@app.route('/api/ospf/areas')
+@login_required
+def ospf_areas():
+    """Roteadores, adjacências e componentes de cada área (``partitioned`` quando há mais de um)."""
+    return jsonify(OSPF_TOPOLOGY.summary())
+
+
+@app.route('/api/ospf/areas/<area>')
+@login_required
+def ospf_area(area):
+    """Arestas e componentes de uma área."""
+    data = OSPF_TOPOLOGY.area(area)
+    if data is None:
+        return jsonify({"error": "Área não encontrada."}), 404
+    return jsonify(data)
+
+
+@app.route('/api/ospf/events')
+@login_required
+def ospf_events():
+    """Últimas adjacências perdidas (``type=adjacency_lost``), partições e religações."""
+    events = OSPF_TOPOLOGY.recent_events(
+        limit=request.args.get('limit', 100, type=int) or 100,
+        kind=request.args.get('type', '').strip() or None,
+        area=request.args.get('area', '').strip() or None,
+    )
+    return jsonify({"events": events})
+
+
+@app.route('/api/ospf/<router>/snapshot', methods=['POST'])
+@login_required
+def ospf_snapshot(router):
+    """Recebe a tabela OSPF de um roteador (``router_id``, ``areas``, ``neighbors``) e devolve o que mudou."""
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not isinstance(payload.get('neighbors'), list):
+        return jsonify({"error": "Envie router_id e a lista neighbors em JSON."}), 400
+    return jsonify(OSPF_TOPOLOGY.apply_snapshot(router, payload.get('router_id'), full_neighbors(payload)))
+
+
+@app.route('/api/topology')
+@login_required
+def topology_graph():
+    """Grafo LLDP/CDP com posições (``x``/``y``) já calculadas; ``version`` muda quando algum link muda."""
+    return jsonify(NETWORK_TOPOLOGY.graph().as_dict())
+
+
+@app.route('/api/topology/path')
+@login_required
+def topology_path():
+    """Caminho com menos saltos entre ``from`` e ``to`` (sysName), com os links de cada salto."""
+    source = request.args.get('from', '').strip()
+    target = request.args.get('to', '').strip()
+    if not source or not target:
+        return jsonify({"error": "Informe from e to."}), 400
+    try:
+        path = NETWORK_TOPOLOGY.graph().shortest_path(source, target)
+    except KeyError as exc:
+        return jsonify({"error": f"Equipamento não encontrado: {exc.args[0]}"}), 404
+    if path is None:
+        return jsonify({"error": "Não há caminho entre os equipamentos."}), 404
+    return jsonify(path)
+
+
+@app.route('/api/topology/blast-radius')
+@login_required
+def topology_blast_radius():
+    """Equipamentos que ficam sem caminho até o núcleo (``MONITOR_TOPOLOGY_ROOTS``) se ``node`` cair."""
+    node = request.args.get('node', '').strip()
+    if not node:
+        return jsonify({"error": "Informe node."}), 400
+    try:
+        return jsonify(NETWORK_TOPOLOGY.graph().blast_radius(node))
+    except KeyError:
+        return jsonify({"error": f"Equipamento não encontrado: {node}"}), 404
+
+
+@app.route('/api/topology/components')
+@login_required
+def topology_components():
+    """Ilhas da topologia, da maior para a menor."""
+    return jsonify({"components": NETWORK_TOPOLOGY.graph().components()})
+
+
+@app.route('/api/topology/<device>/snapshot', methods=['POST'])
+@login_required
+def topology_snapshot(device):
+    """Recebe os vizinhos LLDP/CDP de um equipamento (``name`` e ``neighbors`` com ``local_interface``/``neighbor``/``port``)."""
+    payload = request.get_json(silent=True)
+    neighbors = payload.get('neighbors') if isinstance(payload, dict) else None
+    if not isinstance(neighbors, list) or not all(isinstance(row, dict) for row in neighbors):
+        return jsonify({"error": "Envie name e a lista neighbors em JSON."}), 400
+    return jsonify(NETWORK_TOPOLOGY.apply_snapshot(device, payload.get('name'), neighbors))
+
+
+@app.route('/api/optics/worst')
+@login_required
+def optics_worst():
+    """Os ``n`` piores transceptores: status, depois menos dias até o RX crítico, depois menor margem."""
+    status = request.args.get('status', '').strip() or None
+    if status and status not in OPTICS_STATUSES:
+        return jsonify({"error": f"Status desconhecido: {status}"}), 400
+    optics = OPTICS.worst(
+        n=min(max(request.args.get('n', 20, type=int) or 20, 1), 1000),
+        device=request.args.get('device', '').strip() or None,
+        status=status,
+        degrading=request.args.get('degrading') in ('1', 'true'),
+    )
+    return jsonify({"optics": optics, "summary": OPTICS.summary()})
+
+
+@app.route('/api/optics/<device>/snapshot', methods=['POST'])
+@login_required
+def optics_snapshot(device):
+    """Recebe as leituras DOM de um equipamento (lista de ``name``, ``rx_dbm``, ``tx_dbm``, ``temp_c``)."""
+    payload = request.get_json(silent=True)
+    if isinstance(payload, dict):
+        payload = payload.get('optics')
+    if not isinstance(payload, list) or not all(isinstance(row, dict) for row in payload):
+        return jsonify({"error": "Envie uma lista de leituras ópticas em JSON."}), 400
+    return jsonify(OPTICS.apply_snapshot(device, payload))
+
+
+@app.route('/api/traffic')
+@login_required
+def traffic_fleet():
+    """Tráfego total (Mbps) de cada equipamento, do mais carregado para o menos."""
+    return jsonify({"devices": INTERFACE_RATES.fleet()})
+
+
+@app.route('/api/traffic/<device>')
+@login_required
+def traffic_device(device):
+    """Totais e top-N interfaces do equipamento, no formato ``trafego`` da demo."""
+    traffic = INTERFACE_RATES.traffic(device, request.args.get('n', type=int))
+    if traffic is None:
+        return jsonify({"error": "Equipamento sem contadores coletados."}), 404
+    return jsonify(traffic)
+
+
+@app.route('/api/traffic/<device>/snapshot', methods=['POST'])
+@login_required
+def traffic_snapshot(device):
+    """Recebe os contadores de um equipamento (``uptime`` em centésimos e ``interfaces`` com
+    ``index``, ``name``, ``in_octets``, ``out_octets``, ``counter_bits``, ``speed_mbps``)."""
+    payload = request.get_json(silent=True)
+    interfaces = payload.get('interfaces') if isinstance(payload, dict) else None
+    if not isinstance(interfaces, list) or not all(isinstance(row, dict) for row in interfaces):
+        return jsonify({"error": "Envie a lista interfaces em JSON."}), 400
+    uptime = payload.get('uptime')
+    try:
+        return jsonify(INTERFACE_RATES.apply_interfaces(device, interfaces,
+                                                        uptime=uptime if isinstance(uptime, int) else None))
+    except (TypeError, ValueError, OverflowError):
+        return jsonify({"error": "Contadores inválidos."}), 400
+
+
+@app.route('/api/netflow')
+@login_required
+def netflow_summary():
+    """Tráfego agregado por exportador/interface/protocolo nos últimos ``minutes`` minutos."""
+    if NETFLOW_COLLECTOR is None:
+        return jsonify({"error": "Coletor NetFlow desativado (defina MONITOR_NETFLOW_LISTEN)."}), 404
+    try:
+        minutes = max(int(request.args.get('minutes', 15)), 1)
+        limit = max(int(request.args.get('limit', 100)), 1)
+    except ValueError:
+        return jsonify({"error": "minutes e limit devem ser inteiros"}), 400
+    rows = NETFLOW_COLLECTOR.aggregator.summary(exporter=request.args.get('exporter') or None, minutes=minutes)
+    return jsonify({"stats": NETFLOW_COLLECTOR.stats(), "minutes": minutes, "interfaces": rows[:limit]})
+
+
+@app.route('/api/netflow/top')
+@login_required
+def netflow_top():
+    """Top-N por ``dimension`` (src_ip, dst_ip, src_port, dst_port, as_pair); ``key`` estima uma chave só."""
+    if NETFLOW_COLLECTOR is None:
+        return jsonify({"error": "Coletor NetFlow desativado (defina MONITOR_NETFLOW_LISTEN)."}), 404
+    dimension = request.args.get('dimension', 'src_ip')
+    exporter = request.args.get('exporter') or None
+    try:
+        n = min(max(int(request.args.get('n', 10)), 1), 1000)
+        windows = max(int(request.args.get('windows', 1)), 1)
+        key = request.args.get('key')
+        if key:
+            return jsonify({"dimension": dimension, "key": key,
+                            "bytes": TOP_TALKERS.estimate(dimension, key, exporter=exporter, windows=windows)})
+        return jsonify(TOP_TALKERS.top(dimension, n, exporter=exporter, windows=windows))
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+
+@app.route('/api/netflow/sketches', methods=['GET', 'POST'])
+@metrics_token_required
+def netflow_sketches():
+    """GET exporta os sketches das últimas ``windows`` janelas; POST mescla os de outro coletor."""
+    if request.method == 'GET':
+        try:
+            windows = max(int(request.args.get('windows', 1)), 1)
+        except ValueError:
+            return jsonify({"error": "windows deve ser inteiro"}), 400
+        return jsonify(TOP_TALKERS.export(exporter=request.args.get('exporter') or None, windows=windows))
+    state = request.get_json(silent=True)
+    if not isinstance(state, dict):
+        return jsonify({"error": "corpo JSON inválido"}), 400
+    try:
+        return jsonify({"merged_windows": TOP_TALKERS.merge_state(state)})
+    except (KeyError, TypeError, ValueError) as exc:
+        return jsonify({"error": f"estado inválido: {exc}"}), 400
+
+
+@app.route('/assets/<path:filename>')
+def static_asset(filename):
+    asset = STATIC_ASSETS.get(filename)
+    if asset is None:
+        abort(404)
+    return _send_precompressed(asset.payload, cache_control=IMMUTABLE_CACHE_CONTROL)
+
+
 @app.route('/health')
 def health():
     return jsonify({"status": "ok"})
@@ -2097,9 +2311,7 @@ def get_config():
     return jsonify({"env": content})
 
 
-@app.route('/demo/mikrotik')
-@login_required
-def demo_mikrotik():
+def _demo_mikrotik_payload():
     demo = {
         "device": {
             "vendor": "MikroTik",
@@ -2225,391 +2437,29 @@ def demo_mikrotik():
             {"id": 100, "name": "MGMT", "interfaces": ["bridge-mgmt"]},
         ],
     }
-    return jsonify(demo)
+    return demo
+
+
+@lru_cache(maxsize=1)
+def _demo_mikrotik_body():
+    # O payload de demo não muda entre requisições: serializa e comprime uma vez.
+    body = app.json.response(_demo_mikrotik_payload()).get_data()
+    return PrecompressedBody(body, 'application/json', hashlib.sha256(body).hexdigest()[:12])
+
+
+@app.route('/demo/mikrotik')
+@login_required
+def demo_mikrotik():
+    return _send_precompressed(_demo_mikrotik_body())
 
 
 @app.route('/demo/mikrotik/view')
 @login_required
 def demo_mikrotik_view():
     # Reutiliza os dados de demo para montar um dashboard simples
-    demo = demo_mikrotik().get_json()
+    demo = _demo_mikrotik_payload()
     stats = _collect_local_status()
 
-    template = """
-    <!DOCTYPE html>
-    <html lang=\"pt-br\">
-    <head>
-        <meta charset=\"UTF-8\" />
-        <meta name=\"viewport\" content=\"width=device-width, initial-scale=1.0\" />
-        <title>Demo Mikrotik · Monitoramento</title>
-        <style>
-            :root {
-                --bg-main: #020617;
-                --bg-card: #020617;
-                --bg-soft: #020617;
-                --accent: #22c55e;
-                --accent-soft: rgba(34, 197, 94, 0.08);
-                --text-primary: #e5e7eb;
-                --text-secondary: #9ca3af;
-                --border-subtle: rgba(148, 163, 184, 0.25);
-            }
-            * {
-                box-sizing: border-box;
-                margin: 0;
-                padding: 0;
-                font-family: system-ui, -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif;
-            }
-            body {
-                min-height: 100vh;
-                background: radial-gradient(circle at top, #020617 0, #020617 40%, #000 100%);
-                color: var(--text-primary);
-                display: flex;
-                align-items: stretch;
-                justify-content: center;
-            }
-            .shell {
-                max-width: 1280px;
-                width: 100%;
-                padding: 24px 20px 32px;
-            }
-            .topbar {
-                display: flex;
-                justify-content: space-between;
-                align-items: center;
-                gap: 16px;
-                margin-bottom: 20px;
-            }
-            .topbar-left {
-                display: flex;
-                flex-direction: column;
-                gap: 4px;
-            }
-            .label {
-                font-size: 0.7rem;
-                text-transform: uppercase;
-                letter-spacing: 0.16em;
-                color: var(--text-secondary);
-            }
-            h1 {
-                font-size: 1.4rem;
-                font-weight: 600;
-            }
-            .breadcrumb {
-                font-size: 0.8rem;
-                color: var(--text-secondary);
-            }
-            .btn-back {
-                display: inline-flex;
-                align-items: center;
-                gap: 6px;
-                padding: 8px 12px;
-                border-radius: 999px;
-                font-size: 0.8rem;
-                color: var(--text-secondary);
-                border: 1px solid var(--border-subtle);
-                background: rgba(15, 23, 42, 0.7);
-                text-decoration: none;
-            }
-            .btn-back:hover {
-                border-color: rgba(148, 163, 184, 0.8);
-            }
-            .grid {
-                display: grid;
-                grid-template-columns: minmax(0, 2fr) minmax(0, 3fr);
-                gap: 16px;
-            }
-            @media (max-width: 960px) {
-                .grid {
-                    grid-template-columns: minmax(0, 1fr);
-                }
-            }
-            .card {
-                background: var(--bg-card);
-                border-radius: 16px;
-                border: 1px solid var(--border-subtle);
-                padding: 16px 16px 14px;
-                box-shadow: 0 14px 40px rgba(15, 23, 42, 0.9);
-            }
-            .card-header {
-                display: flex;
-                justify-content: space-between;
-                align-items: center;
-                margin-bottom: 10px;
-            }
-            .card-title {
-                font-size: 0.85rem;
-                font-weight: 600;
-                letter-spacing: 0.12em;
-                text-transform: uppercase;
-                color: var(--text-secondary);
-            }
-            .pill {
-                font-size: 0.7rem;
-                padding: 2px 8px;
-                border-radius: 999px;
-                border: 1px solid rgba(148, 163, 184, 0.4);
-                color: var(--text-secondary);
-            }
-            .kv-list {
-                display: grid;
-                grid-template-columns: repeat(2, minmax(0, 1fr));
-                gap: 8px 12px;
-                font-size: 0.85rem;
-            }
-            .kv-label {
-                color: var(--text-secondary);
-                font-size: 0.78rem;
-            }
-            .kv-value {
-                font-weight: 500;
-            }
-            .metric-row {
-                display: grid;
-                grid-template-columns: 70px minmax(0, 1fr) 52px;
-                gap: 8px;
-                align-items: center;
-                font-size: 0.8rem;
-            }
-            .metric-bar {
-                height: 6px;
-                border-radius: 999px;
-                background: #020617;
-                overflow: hidden;
-            }
-            .metric-bar-fill {
-                height: 100%;
-                border-radius: inherit;
-                transition: width 0.4s ease;
-            }
-            .metric-bar-fill.ok { background: #22c55e; }
-            .metric-bar-fill.warning { background: #eab308; }
-            .metric-bar-fill.critical { background: #ef4444; }
-            .metric-badge {
-                font-size: 0.7rem;
-                text-align: right;
-                color: var(--text-secondary);
-            }
-            .table-like {
-                width: 100%;
-                border-collapse: collapse;
-                font-size: 0.78rem;
-                margin-top: 4px;
-            }
-            .table-like thead {
-                color: var(--text-secondary);
-            }
-            .table-like th,
-            .table-like td {
-                padding: 4px 6px;
-                border-bottom: 1px solid rgba(15, 23, 42, 0.9);
-            }
-            .table-like tbody tr:hover {
-                background: rgba(15, 23, 42, 0.9);
-            }
-            .pill-status {
-                display: inline-flex;
-                align-items: center;
-                gap: 4px;
-                padding: 2px 6px;
-                border-radius: 999px;
-                font-size: 0.7rem;
-            }
-            .pill-status.ok {
-                background: rgba(34, 197, 94, 0.15);
-                color: #4ade80;
-            }
-            .pill-status.down {
-                background: rgba(248, 113, 113, 0.12);
-                color: #fb7185;
-            }
-        </style>
-    </head>
-    <body>
-        <main class=\"shell\">
-            <header class=\"topbar\">
-                <div class=\"topbar-left\">
-                    <span class=\"label\">Demo · Mikrotik</span>
-                    <h1>{{ demo.device.hostname }} · {{ demo.device.model }}</h1>
-                    <div class=\"breadcrumb\">Monitoramento / Demo / Mikrotik</div>
-                </div>
-                <a href=\"/\" class=\"btn-back\">⟵ Voltar para visão geral</a>
-            </header>
-
-            <section class=\"grid\">
-                <article class=\"panel\">
-                    <h2>Checklist operacional</h2>
-                    <ul class=\"list-simple\">
-                        <li>
-                            <span>Estado geral do host</span>
-                            <strong>{{ stats.cpu_status|capitalize }}</strong>
-                        </li>
-                        <li>
-                            <span>Memória em uso</span>
-                            <strong>{{ '%.1f'|format(stats.mem_percent) }}%</strong>
-                        </li>
-                        <li>
-                            <span>Capacidade em disco</span>
-                            <strong>{{ '%.1f'|format(stats.disk_percent) }}%</strong>
-                        </li>
-                    </ul>
-                    <div class=\"highlight\">Revise estes indicadores rápidos antes de ajustar novas integrações ou liberar funcionalidades.</div>
-                </article>
-                        <div>
-                            <div class=\"kv-label\">Versão</div>
-                            <div class=\"kv-value\">{{ demo.device.os_version }}</div>
-                        </div>
-                        <div>
-                            <div class=\"kv-label\">Serial</div>
-                            <div class=\"kv-value\">{{ demo.device.serial }}</div>
-                        </div>
-                        <div>
-                            <div class=\"kv-label\">Uptime</div>
-                            <div class=\"kv-value\">{{ demo.device.uptime }}</div>
-                        </div>
-                    </div>
-
-                    <div style=\"margin-top:14px; display:flex; flex-direction:column; gap:6px;\">
-                        <div class=\"kv-label\" style=\"margin-bottom:2px;\">Recursos principais</div>
-
-                        <div class=\"metric-row\">
-                            <div class=\"kv-label\">CPU</div>
-                            <div class=\"metric-bar\">
-                                <div class=\"metric-bar-fill {{ cpu_class }}\" style=\"width: {{ demo.cpu.usage_percent }}%;\"></div>
-                            </div>
-                            <div class=\"metric-badge\">{{ '%.1f'|format(demo.cpu.usage_percent) }}%</div>
-                        </div>
-
-                        <div class=\"metric-row\">
-                            <div class=\"kv-label\">Memória</div>
-                            <div class=\"metric-bar\">
-                                <div class=\"metric-bar-fill {{ mem_class }}\" style=\"width: {{ demo.memoria.usage_percent }}%;\"></div>
-                            </div>
-                            <div class=\"metric-badge\">{{ '%.1f'|format(demo.memoria.usage_percent) }}%</div>
-                        </div>
-
-                        <div class=\"metric-row\">
-                            <div class=\"kv-label\">Disco</div>
-                            <div class=\"metric-bar\">
-                                <div class=\"metric-bar-fill {{ disk_class }}\" style=\"width: {{ demo.disco.usage_percent }}%;\"></div>
-                            </div>
-                            <div class=\"metric-badge\">{{ '%.1f'|format(demo.disco.usage_percent) }}%</div>
-                        </div>
-                    </div>
-                </article>
-
-                <article class=\"card\">
-                    <header class=\"card-header\">
-                        <h2 class=\"card-title\">Tráfego e sessões</h2>
-                        <span class=\"pill\">Interfaces ativas</span>
-                    </header>
-                    <div class=\"kv-list\" style=\"margin-bottom:8px;\">
-                        <div>
-                            <div class=\"kv-label\">Tráfego total in</div>
-                            <div class=\"kv-value\">{{ '%.1f'|format(demo.trafego.total_in_mbps) }} Mbps</div>
-                        </div>
-                        <div>
-                            <div class=\"kv-label\">Tráfego total out</div>
-                            <div class=\"kv-value\">{{ '%.1f'|format(demo.trafego.total_out_mbps) }} Mbps</div>
-                        </div>
-                        <div>
-                            <div class=\"kv-label\">Usuários PPPoE</div>
-                            <div class=\"kv-value\">{{ demo.pppoe_users|length }}</div>
-                        </div>
-                        <div>
-                            <div class=\"kv-label\">Peers BGP up</div>
-                            <div class=\"kv-value\">{{ demo.bgp.peers_up }} / {{ demo.bgp.peers|length }}</div>
-                        </div>
-                    </div>
-
-                    <table class=\"table-like\">
-                        <thead>
-                            <tr>
-                                <th>Interface</th>
-                                <th>In</th>
-                                <th>Out</th>
-                            </tr>
-                        </thead>
-                        <tbody>
-                            {% for iface in demo.trafego.interfaces_top %}
-                            <tr>
-                                <td>{{ iface.name }}</td>
-                                <td>{{ '%.1f'|format(iface.in_mbps) }} Mbps</td>
-                                <td>{{ '%.1f'|format(iface.out_mbps) }} Mbps</td>
-                            </tr>
-                            {% endfor %}
-                        </tbody>
-                    </table>
-                </article>
-            </section>
-
-            <section class=\"grid\" style=\"margin-top:16px;\">
-                <article class=\"card\">
-                    <header class=\"card-header\">
-                        <h2 class=\"card-title\">Interfaces ópticas</h2>
-                        <span class=\"pill\">{{ demo.interfaces.opticas|length }} portas</span>
-                    </header>
-                    <table class=\"table-like\">
-                        <thead>
-                            <tr>
-                                <th>Porta</th>
-                                <th>Descrição</th>
-                                <th>RX (dBm)</th>
-                                <th>TX (dBm)</th>
-                                <th>Vel.</th>
-                                <th>Status</th>
-                            </tr>
-                        </thead>
-                        <tbody>
-                            {% for it in demo.interfaces.opticas %}
-                            <tr>
-                                <td>{{ it.name }}</td>
-                                <td>{{ it.description }}</td>
-                                <td>{{ '%.1f'|format(it.rx_dbm) }}</td>
-                                <td>{{ '%.1f'|format(it.tx_dbm) }}</td>
-                                <td>{{ it.speed }}</td>
-                                <td>
-                                    <span class=\"pill-status {{ 'ok' if it.status == 'up' else 'down' }}\">{{ it.status }}</span>
-                                </td>
-                            </tr>
-                            {% endfor %}
-                        </tbody>
-                    </table>
-                </article>
-
-                <article class=\"card\">
-                    <header class=\"card-header\">
-                        <h2 class=\"card-title\">Interfaces elétricas</h2>
-                        <span class=\"pill\">{{ demo.interfaces.eletricas|length }} portas</span>
-                    </header>
-                    <table class=\"table-like\">
-                        <thead>
-                            <tr>
-                                <th>Porta</th>
-                                <th>Descrição</th>
-                                <th>Vel.</th>
-                                <th>Status</th>
-                            </tr>
-                        </thead>
-                        <tbody>
-                            {% for it in demo.interfaces.eletricas %}
-                            <tr>
-                                <td>{{ it.name }}</td>
-                                <td>{{ it.description }}</td>
-                                <td>{{ it.speed }}</td>
-                                <td>
-                                    <span class=\"pill-status {{ 'ok' if it.status == 'up' else 'down' }}\">{{ it.status }}</span>
-                                </td>
-                            </tr>
-                            {% endfor %}
-                        </tbody>
-                    </table>
-                </article>
-            </section>
-        </main>
-    </body>
-    </html>
-    """
-
     def status_class(percent, ok, warn):
         if percent < ok:
             return "ok"
@@ -2621,8 +2471,8 @@ def demo_mikrotik_view():
     mem_class = status_class(demo["memoria"]["usage_percent"], 70, 85)
     disk_class = status_class(demo["disco"]["usage_percent"], 70, 90)
 
-    return render_template_string(
-        template,
+    return _render_page(
+        'demo_mikrotik',
         demo=demo,
         cpu_class=cpu_class,
         mem_class=mem_class,
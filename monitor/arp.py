@@ -0,0 +1,418 @@
+"""Tabelas ARP de muitos roteadores em colunas numpy, com índices por IP e por MAC.
+
+Cada linha é uma entrada ``(roteador, IP) -> MAC, interface``: IP em
+``uint32``, MAC em ``uint64`` e o resto em inteiros de 32 bits. Os índices
+são tabelas hash de endereçamento aberto (também em arrays) que apontam
+para a linha mais recente de cada IP/MAC; as demais linhas da mesma chave
+ficam encadeadas (``next_ip``/``next_mac``). Linhas removidas só são
+marcadas e a compactação periódica recupera o espaço.
+"""
+
+import ipaddress
+import os
+import socket
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+try:
+    from .snapshots import SnapshotWorker, latest_events
+except ImportError:  # fallback when executed as a script (python monitor/app.py)
+    from snapshots import SnapshotWorker, latest_events
+
+ARP_EVENT_CAPACITY = int(os.getenv('MONITOR_ARP_EVENT_CAPACITY', '50000'))
+# Ocupação máxima dos índices (ao crescer, dobram e ficam em ~40%) e crescimento das colunas.
+MAX_LOAD = 0.8
+COMPACT_LOAD = 0.6
+GROWTH = 1.25
+# Compacta quando as linhas mortas passam desta fração da tabela.
+COMPACT_RATIO = 0.25
+_HASH = np.uint64(0x9E3779B97F4A7C15)
+_COLUMNS = {
+    "ip": np.uint32, "mac": np.uint64, "router": np.uint16, "interface": np.int32,
+    "first_seen": np.uint32, "last_seen": np.uint32, "next_ip": np.int32, "next_mac": np.int32, "alive": np.bool_,
+}
+_NO_ROWS = np.empty(0, dtype=np.int32)
+
+
+class IntHashIndex:
+    """Hash ``chave inteira -> int32`` com sondagem linear; ``get``/``put`` recebem arrays.
+
+    A chave com todos os bits em 1 marca posição vazia e não pode ser usada
+    (255.255.255.255 ou ff:ff:...:ff com 64 bits, que nunca aparecem em ARP).
+    """
+
+    def __init__(self, dtype=np.uint64, capacity=1024):
+        self.dtype = np.dtype(dtype)
+        self.empty = np.iinfo(self.dtype).max
+        self._allocate(max(int(capacity) - 1, 15).bit_length())
+
+    def _allocate(self, bits):
+        self.bits = bits
+        self.mask = (1 << bits) - 1
+        self.keys = np.full(1 << bits, self.empty, dtype=self.dtype)
+        self.values = np.full(1 << bits, -1, dtype=np.int32)
+        self.used = 0
+
+    def __len__(self):
+        return self.used
+
+    @property
+    def nbytes(self):
+        return self.keys.nbytes + self.values.nbytes
+
+    def _slots(self, keys):
+        return ((keys.astype(np.uint64) * _HASH) >> np.uint64(64 - self.bits)).astype(np.int64)
+
+    def get(self, keys):
+        keys = np.asarray(keys, dtype=self.dtype)
+        result = np.full(len(keys), -1, dtype=np.int32)
+        pending = np.arange(len(keys))
+        slots = self._slots(keys)
+        while len(pending):
+            found = self.keys[slots]
+            hit = found == keys[pending]
+            result[pending[hit]] = self.values[slots[hit]]
+            more = ~hit & (found != self.empty)
+            pending, slots = pending[more], (slots[more] + 1) & self.mask
+        return result
+
+    def put(self, keys, values):
+        """Insere ou sobrescreve; ``keys`` não pode ter repetidas na mesma chamada."""
+        keys = np.asarray(keys, dtype=self.dtype)
+        values = np.asarray(values, dtype=np.int32)
+        if (self.used + len(keys)) > MAX_LOAD * (self.mask + 1):
+            self._grow(self.used + len(keys))
+        pending = np.arange(len(keys))
+        slots = self._slots(keys)
+        while len(pending):
+            found = self.keys[slots]
+            hit = found == keys[pending]
+            self.values[slots[hit]] = values[pending[hit]]
+            empty = np.nonzero(found == self.empty)[0]
+            # Várias chaves novas podem disputar a mesma posição vazia: a primeira fica com ela.
+            _, first = np.unique(slots[empty], return_index=True)
+            winners = empty[first]
+            self.keys[slots[winners]] = keys[pending[winners]]
+            self.values[slots[winners]] = values[pending[winners]]
+            self.used += len(winners)
+            done = hit.copy()
+            done[winners] = True
+            advance = ~hit & (found != self.empty)
+            slots = np.where(advance, (slots + 1) & self.mask, slots)
+            pending, slots = pending[~done], slots[~done]
+
+    def _grow(self, needed):
+        occupied = self.keys != self.empty
+        keys, values = self.keys[occupied], self.values[occupied]
+        bits = self.bits + 1
+        while needed > MAX_LOAD * (1 << bits):
+            bits += 1
+        self._allocate(bits)
+        self.put(keys, values)
+
+
+def parse_ip(value):
+    try:
+        return int.from_bytes(socket.inet_aton(str(value).strip()), 'big')
+    except OSError:
+        raise ValueError(f"IP inválido: {value}") from None
+
+
+def parse_mac(value):
+    text = str(value).strip()
+    digits = text.replace(':', '').replace('-', '').replace('.', '')
+    if len(digits) != 12:
+        # Alguns equipamentos omitem o zero à esquerda de cada octeto (0:1b:21:...).
+        parts = text.replace('-', ':').split(':')
+        if len(parts) != 6 or not all(0 < len(part) <= 2 for part in parts):
+            raise ValueError(f"MAC inválido: {value}")
+        digits = ''.join(part.zfill(2) for part in parts)
+    return int(digits, 16)
+
+
+def format_mac(value):
+    text = f"{int(value):012x}"
+    return ':'.join(text[i:i + 2] for i in range(0, 12, 2))
+
+
+class ArpStore:
+    """Entradas ARP de todos os roteadores com detecção de mudanças por snapshot.
+
+    ``apply_snapshot`` compara a tabela de um roteador com a anterior e gera
+    eventos ``new`` (IP novo), ``moved`` (IP/MAC que apareceu em outra
+    interface ou outro roteador) e ``mac_changed`` (mesmo IP com outro MAC).
+    O primeiro snapshot de cada roteador só carrega a tabela, sem eventos.
+    Ocupa 35 bytes por linha nas colunas, 4 na lista de linhas do roteador e
+    os dois índices (8 e 12 bytes por posição): de 64 a 99 bytes por entrada
+    conforme a folga de cada array.
+    """
+
+    def __init__(self, event_capacity=ARP_EVENT_CAPACITY, capacity=1024):
+        self.size = 0
+        self.dead = 0
+        self._columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in _COLUMNS.items()}
+        self.by_ip = IntHashIndex(np.uint32, capacity)
+        self.by_mac = IntHashIndex(np.uint64, capacity)
+        self.routers = []
+        self._router_ids = {}
+        # router_id -> linhas vivas do roteador (ordenadas); um roteador sem entrada aqui
+        # ainda não mandou snapshot, ou foi removido, e o próximo só carrega a tabela.
+        self._router_rows = {}
+        self.interfaces = []
+        self._interface_ids = {}
+        self.events = deque(maxlen=max(int(event_capacity), 1))
+        self._lock = threading.RLock()
+        self._worker = SnapshotWorker('arp-snapshot')
+
+    def __len__(self):
+        return self.size - self.dead
+
+    def __getattr__(self, name):
+        columns = self.__dict__.get('_columns')
+        if columns is not None and name in columns:
+            return columns[name]
+        raise AttributeError(name)
+
+    def _router_id(self, router):
+        router_id = self._router_ids.get(router)
+        if router_id is None:
+            if len(self.routers) > np.iinfo(_COLUMNS['router']).max:
+                raise ValueError('limite de roteadores na tabela ARP atingido')
+            router_id = self._router_ids[router] = len(self.routers)
+            self.routers.append(router)
+        return router_id
+
+    def _interface_id(self, router_id, name):
+        key = (router_id, name)
+        interface_id = self._interface_ids.get(key)
+        if interface_id is None:
+            interface_id = self._interface_ids[key] = len(self.interfaces)
+            self.interfaces.append(name)
+        return interface_id
+
+    def _append(self, count):
+        start = self.size
+        if start + count > len(self._columns['ip']):
+            capacity = max(int(len(self._columns['ip']) * GROWTH), start + count)
+            for name, column in self._columns.items():
+                grown = np.zeros(capacity, dtype=column.dtype)
+                grown[:start] = column[:start]
+                self._columns[name] = grown
+        self.size += count
+        return np.arange(start, start + count, dtype=np.int32)
+
+    def _link(self, index, next_column, keys, rows):
+        # Linhas novas viram a cabeça da lista da sua chave; as repetidas no lote se encadeiam entre si.
+        if not len(rows):
+            return
+        order = np.argsort(keys, kind='stable')
+        keys, rows = keys[order], rows[order]
+        first = np.ones(len(keys), dtype=bool)
+        first[1:] = keys[1:] != keys[:-1]
+        last = np.ones(len(keys), dtype=bool)
+        last[:-1] = first[1:]
+        following = np.empty(len(rows), dtype=np.int32)
+        following[:-1] = rows[1:]
+        following[last] = index.get(keys[first])
+        next_column[rows] = following
+        index.put(keys[first], rows[first])
+
+    def _find(self, router_id, ips):
+        """Linha viva de cada IP neste roteador (``-1`` se não houver), andando nas listas em lote."""
+        found = np.full(len(ips), -1, dtype=np.int32)
+        current = self.by_ip.get(ips)
+        pending = np.nonzero(current >= 0)[0]
+        current = current[pending]
+        router, alive, next_ip = self.router, self.alive, self.next_ip
+        while len(pending):
+            hit = (router[current] == router_id) & alive[current]
+            found[pending[hit]] = current[hit]
+            pending, current = pending[~hit], next_ip[current[~hit]]
+            keep = current >= 0
+            pending, current = pending[keep], current[keep]
+        return found
+
+    def _chain(self, head, next_column):
+        alive = self.alive
+        row = int(head)
+        while row >= 0:
+            if alive[row]:
+                yield row
+            row = int(next_column[row])
+
+    def _kill(self, rows):
+        self.alive[rows] = False
+        self.dead += len(rows)
+
+    def _parse(self, router_id, rows):
+        ips, macs, interfaces = [], [], []
+        invalid = 0
+        for row in rows:
+            try:
+                ip = parse_ip(row['ip'])
+                mac = parse_mac(row['mac'])
+            except (KeyError, TypeError, ValueError):
+                invalid += 1
+                continue
+            if ip == 0xFFFFFFFF:
+                invalid += 1
+                continue
+            ips.append(ip)
+            macs.append(mac)
+            interfaces.append(self._interface_id(router_id, str(row.get('interface') or '')))
+        ips = np.array(ips, dtype=np.uint32)
+        # Um IP repetido na mesma tabela: vale a última linha.
+        _, reverse_index = np.unique(ips[::-1], return_index=True)
+        keep = np.sort(len(ips) - 1 - reverse_index)
+        return ips[keep], np.array(macs, dtype=np.uint64)[keep], np.array(interfaces, dtype=np.int32)[keep], invalid
+
+    def apply_snapshot(self, router, rows, timestamp=None):
+        """Aplica a tabela ARP completa de ``router`` (``ip``, ``mac``, ``interface``); devolve o resumo."""
+        timestamp = int(time.time() if timestamp is None else timestamp)
+        with self._lock:
+            router_id = self._router_id(router)
+            previous_rows = self._router_rows.get(router_id)
+            initial = previous_rows is None
+            ips, macs, interfaces, invalid = self._parse(router_id, rows)
+            existing = self._find(router_id, ips)
+            known = existing >= 0
+            rows_known = existing[known]
+            mac_changed = self.mac[rows_known] != macs[known]
+            moved = ~mac_changed & (self.interface[rows_known] != interfaces[known])
+
+            if not initial:
+                self._record_changes(router_id, ips, macs, interfaces, known, rows_known, mac_changed, moved,
+                                     timestamp)
+
+            stay = rows_known[~mac_changed]
+            self.last_seen[stay] = timestamp
+            self.interface[stay] = interfaces[known][~mac_changed]
+            # Só as linhas deste roteador: o custo acompanha o tamanho da tabela dele, não o do store.
+            gone = np.setdiff1d(previous_rows, rows_known, assume_unique=True) if not initial else _NO_ROWS
+            self._kill(rows_known[mac_changed])
+            self._kill(gone)
+
+            insert = ~known
+            insert[np.nonzero(known)[0][mac_changed]] = True
+            new_rows = self._append(int(insert.sum()))
+            if len(new_rows):
+                self.ip[new_rows] = ips[insert]
+                self.mac[new_rows] = macs[insert]
+                self.router[new_rows] = router_id
+                self.interface[new_rows] = interfaces[insert]
+                self.first_seen[new_rows] = timestamp
+                self.last_seen[new_rows] = timestamp
+                self.alive[new_rows] = True
+                self._link(self.by_ip, self.next_ip, ips[insert], new_rows)
+                self._link(self.by_mac, self.next_mac, macs[insert], new_rows)
+            self._router_rows[router_id] = np.sort(np.concatenate((stay, new_rows)))
+            if self.dead > COMPACT_RATIO * max(self.size, 1024):
+                self.compact()
+            return {
+                "entries": len(ips), "new": int((~known).sum()), "mac_changed": int(mac_changed.sum()),
+                "moved": int(moved.sum()), "gone": len(gone), "invalid": invalid,
+            }
+
+    def _record_changes(self, router_id, ips, macs, interfaces, known, rows_known, mac_changed, moved, timestamp):
+        router = self.routers[router_id]
+        known_positions = np.nonzero(known)[0]
+        for position, row in zip(known_positions[mac_changed].tolist(), rows_known[mac_changed].tolist()):
+            self._event(timestamp, 'mac_changed', router, int(interfaces[position]), int(ips[position]),
+                        int(macs[position]), old_mac=format_mac(self.mac[row]))
+        for position, row in zip(known_positions[moved].tolist(), rows_known[moved].tolist()):
+            self._event(timestamp, 'moved', router, int(interfaces[position]), int(ips[position]),
+                        int(macs[position]), from_router=router,
+                        from_interface=self.interfaces[self.interface[row]])
+        for position in np.nonzero(~known)[0].tolist():
+            ip, mac = int(ips[position]), int(macs[position])
+            # IP novo neste roteador mas vivo em outro: o host mudou de lugar.
+            elsewhere = [row for row in self._chain(self.by_ip.get([ip])[0], self.next_ip)
+                         if self.router[row] != router_id]
+            if elsewhere:
+                previous = max(elsewhere, key=lambda row: self.last_seen[row])
+                self._event(timestamp, 'moved', router, int(interfaces[position]), ip, mac,
+                            from_router=self.routers[self.router[previous]],
+                            from_interface=self.interfaces[self.interface[previous]])
+            else:
+                self._event(timestamp, 'new', router, int(interfaces[position]), ip, mac)
+
+    def _event(self, timestamp, kind, router, interface_id, ip, mac, **extra):
+        event = {"time": timestamp, "type": kind, "router": router, "interface": self.interfaces[interface_id],
+                 "ip": str(ipaddress.IPv4Address(ip)), "mac": format_mac(mac)}
+        event.update(extra)
+        self.events.append(event)
+
+    def remove_router(self, router):
+        with self._lock:
+            rows = self._router_rows.pop(self._router_ids.get(router), None)
+            if rows is not None:
+                self._kill(rows)
+
+    def compact(self):
+        """Descarta as linhas mortas e reconstrói os dois índices."""
+        with self._lock:
+            live = np.nonzero(self.alive[:self.size])[0]
+            for name, column in self._columns.items():
+                compacted = np.zeros(max(int(len(live) * GROWTH), 1024), dtype=column.dtype)
+                compacted[:len(live)] = column[live]
+                self._columns[name] = compacted
+            self.size, self.dead = len(live), 0
+            rows = np.arange(self.size, dtype=np.int32)
+            self.by_ip = IntHashIndex(np.uint32, int(self.size / COMPACT_LOAD) + 1)
+            self.by_mac = IntHashIndex(np.uint64, int(self.size / COMPACT_LOAD) + 1)
+            self._link(self.by_ip, self.next_ip, self.ip[:self.size], rows)
+            self._link(self.by_mac, self.next_mac, self.mac[:self.size], rows)
+            # As linhas foram renumeradas: refaz a lista de cada roteador (já em ordem).
+            routers = self.router[:self.size]
+            order = np.argsort(routers, kind='stable').astype(np.int32)
+            ids, starts = np.unique(routers[order], return_index=True)
+            groups = dict(zip(ids.tolist(), np.split(order, starts[1:])))
+            self._router_rows = {router_id: groups.get(router_id, _NO_ROWS) for router_id in self._router_rows}
+
+    def _entry(self, row):
+        return {
+            "router": self.routers[self.router[row]],
+            "interface": self.interfaces[self.interface[row]],
+            "ip": str(ipaddress.IPv4Address(int(self.ip[row]))),
+            "mac": format_mac(self.mac[row]),
+            "first_seen": int(self.first_seen[row]),
+            "last_seen": int(self.last_seen[row]),
+        }
+
+    def where_ip(self, ip):
+        """Onde o IP está (um item por roteador que o tem na tabela ARP)."""
+        value = parse_ip(ip)
+        with self._lock:
+            head = self.by_ip.get([value])[0]
+            return [self._entry(row) for row in self._chain(head, self.next_ip)]
+
+    def where_mac(self, mac, limit=1000):
+        value = parse_mac(mac)
+        with self._lock:
+            head = self.by_mac.get([value])[0]
+            entries = []
+            for row in self._chain(head, self.next_mac):
+                entries.append(self._entry(row))
+                if len(entries) >= limit:
+                    break
+            return entries
+
+    def recent_events(self, limit=100, kind=None, router=None):
+        with self._lock:
+            return latest_events(self.events, limit, type=kind, router=router)
+
+    def submit_snapshot(self, router, rows, timestamp=None):
+        return self._worker.submit(self.apply_snapshot, router, rows, timestamp)
+
+    def stats(self):
+        with self._lock:
+            memory = sum(column.nbytes for column in self._columns.values()) + self.by_ip.nbytes + self.by_mac.nbytes
+            memory += sum(rows.nbytes for rows in self._router_rows.values())
+            entries = len(self)
+            return {
+                "entries": entries, "dead_rows": self.dead, "routers": len(self._router_rows),
+                "memory_bytes": memory, "bytes_per_entry": round(memory / entries, 1) if entries else None,
+            }
@@ -0,0 +1,68 @@
+import hashlib
+import mimetypes
+from pathlib import Path
+
+try:
+    from .compression import PrecompressedBody
+except ImportError:  # fallback when executed as a script (python monitor/app.py)
+    from compression import PrecompressedBody
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+class StaticAsset:
+    __slots__ = ('logical_path', 'hashed_path', 'payload')
+
+    def __init__(self, logical_path, hashed_path, payload):
+        self.logical_path = logical_path
+        self.hashed_path = hashed_path
+        self.payload = payload
+
+
+class AssetManifest:
+    """Carrega os arquivos de ``static/`` em memória com nome por hash de conteúdo.
+
+    ``css/monitor.css`` passa a ser servido como ``css/monitor.<hash>.css``;
+    como o nome muda junto com o conteúdo, o navegador pode manter o arquivo em
+    cache indefinidamente.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self._by_logical = {}
+        self._by_hashed = {}
+        self.reload()
+
+    def reload(self):
+        by_logical = {}
+        by_hashed = {}
+        if self.root.is_dir():
+            for path in sorted(self.root.rglob('*')):
+                if not path.is_file():
+                    continue
+                asset = self._load(path)
+                by_logical[asset.logical_path] = asset
+                by_hashed[asset.hashed_path] = asset
+        self._by_logical = by_logical
+        self._by_hashed = by_hashed
+
+    def _load(self, path):
+        body = path.read_bytes()
+        digest = hashlib.sha256(body).hexdigest()[:12]
+        logical_path = path.relative_to(self.root).as_posix()
+        stem, dot, suffix = logical_path.rpartition('.')
+        hashed_path = f"{stem}.{digest}.{suffix}" if dot else f"{logical_path}.{digest}"
+        mimetype = mimetypes.guess_type(logical_path)[0] or 'application/octet-stream'
+        return StaticAsset(logical_path, hashed_path, PrecompressedBody(body, mimetype, digest))
+
+    def hashed_path(self, logical_path):
+        asset = self._by_logical.get(logical_path)
+        if asset is None:
+            raise KeyError(f"asset não encontrado: {logical_path}")
+        return asset.hashed_path
+
+    def get(self, hashed_path):
+        return self._by_hashed.get(hashed_path)
+
+    def __iter__(self):
+        return iter(self._by_logical.values())
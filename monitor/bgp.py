@@ -0,0 +1,303 @@
+"""Estado das sessões BGP por roteador: transições, score de flap e variação de prefixos.
+
+A cada poll a tabela de peers de um roteador é comparada com a anterior.
+Cada peer guarda as últimas transições num buffer circular compacto e um
+score de flap com decaimento exponencial (atualizado em O(1)); os totais da
+frota são mantidos de forma incremental, sem varrer as sessões.
+"""
+
+import math
+import os
+import threading
+import time
+from array import array
+from collections import deque
+
+try:
+    from .snapshots import SnapshotWorker, latest_events
+except ImportError:  # fallback when executed as a script (python monitor/app.py)
+    from snapshots import SnapshotWorker, latest_events
+
+BGP_HISTORY = int(os.getenv('MONITOR_BGP_HISTORY', '64'))
+BGP_FLAP_HALF_LIFE = float(os.getenv('MONITOR_BGP_FLAP_HALF_LIFE', '900'))
+BGP_FLAP_THRESHOLD = float(os.getenv('MONITOR_BGP_FLAP_THRESHOLD', '3'))
+BGP_PREFIX_DELTA_RATIO = float(os.getenv('MONITOR_BGP_PREFIX_DELTA_RATIO', '0.2'))
+BGP_PREFIX_DELTA_MIN = int(os.getenv('MONITOR_BGP_PREFIX_DELTA_MIN', '100'))
+BGP_EVENT_CAPACITY = int(os.getenv('MONITOR_BGP_EVENT_CAPACITY', '10000'))
+
+STATES = ('unknown', 'idle', 'connect', 'active', 'opensent', 'openconfirm', 'established')
+STATE_CODES = {name: code for code, name in enumerate(STATES)}
+ESTABLISHED = STATE_CODES['established']
+# Tolerância (s) ao comparar o tempo em established entre dois polls.
+UPTIME_SLACK = 5
+
+
+class TransitionRing:
+    """Últimas ``capacity`` transições de um peer: 8 bytes de horário + 2 bytes (estado, flaps)."""
+
+    __slots__ = ('capacity', 'timestamps', 'states', 'flaps', '_start', '_size')
+
+    def __init__(self, capacity=BGP_HISTORY):
+        self.capacity = max(int(capacity), 1)
+        self.timestamps = array('d', bytes(8 * self.capacity))
+        self.states = bytearray(self.capacity)
+        self.flaps = bytearray(self.capacity)
+        self._start = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, timestamp, state, flaps=0):
+        if self._size < self.capacity:
+            slot = (self._start + self._size) % self.capacity
+            self._size += 1
+        else:
+            slot = self._start
+            self._start = (self._start + 1) % self.capacity
+        self.timestamps[slot] = timestamp
+        self.states[slot] = state
+        self.flaps[slot] = min(flaps, 255)
+
+    def items(self):
+        for index in range(self._size):
+            slot = (self._start + index) % self.capacity
+            yield self.timestamps[slot], STATES[self.states[slot]], self.flaps[slot]
+
+
+class BgpPeer:
+    __slots__ = ('router', 'peer', 'asn', 'state', 'since', 'established_seconds', 'transitions', 'prefixes',
+                 'score', 'score_at', 'flaps', 'updated_at', 'history')
+
+    def __init__(self, router, peer, timestamp):
+        self.router = router
+        self.peer = peer
+        self.asn = None
+        self.state = 0
+        self.since = timestamp
+        self.established_seconds = None
+        self.transitions = None
+        self.prefixes = None
+        self.score = 0.0
+        self.score_at = timestamp
+        self.flaps = 0
+        self.updated_at = timestamp
+        self.history = TransitionRing()
+
+    def decayed_score(self, now, half_life=BGP_FLAP_HALF_LIFE):
+        elapsed = max(now - self.score_at, 0)
+        return self.score * math.pow(0.5, elapsed / half_life)
+
+    def as_dict(self, now=None, half_life=BGP_FLAP_HALF_LIFE):
+        now = time.time() if now is None else now
+        return {
+            "router": self.router, "peer": self.peer, "asn": self.asn, "state": STATES[self.state],
+            "since": self.since, "prefixes": self.prefixes, "flaps": self.flaps,
+            "flap_score": round(self.decayed_score(now, half_life), 3), "updated_at": self.updated_at,
+        }
+
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class BgpTracker:
+    """Motor de estado BGP alimentado pela tabela de peers de cada poll.
+
+    Um flap é uma saída de ``established``: vista diretamente entre dois
+    polls, deduzida do contador ``bgpPeerFsmEstablishedTransitions`` ou de
+    ``established_seconds`` que voltou a zero entre polls. Cada flap soma 1
+    ao score, que cai pela metade a cada ``half_life`` segundos; acima de
+    ``threshold`` o peer é considerado instável. ``on_event(evento)`` recebe
+    quedas/retornos, início de flapping e variações bruscas de prefixos.
+    """
+
+    def __init__(self, half_life=BGP_FLAP_HALF_LIFE, threshold=BGP_FLAP_THRESHOLD,
+                 delta_ratio=BGP_PREFIX_DELTA_RATIO, delta_min=BGP_PREFIX_DELTA_MIN,
+                 event_capacity=BGP_EVENT_CAPACITY, on_event=None):
+        self.half_life = half_life
+        self.threshold = threshold
+        self.delta_ratio = delta_ratio
+        self.delta_min = delta_min
+        self.on_event = on_event
+        self.peers = {}
+        self.by_router = {}
+        self.events = deque(maxlen=max(int(event_capacity), 1))
+        # Totais por roteador mantidos a cada atualização: [peers, established, prefixos].
+        self._totals = {}
+        # Peers cujo score passou do limite; o score só cai até o próximo poll, então
+        # ``summary`` reavalia só estes e tira os que já esfriaram.
+        self._flapping = set()
+        self._lock = threading.RLock()
+        self._worker = SnapshotWorker('bgp-snapshot')
+
+    def _contribution(self, peer):
+        return 1, 1 if peer.state == ESTABLISHED else 0, peer.prefixes or 0
+
+    def _account(self, peer, sign):
+        totals = self._totals.setdefault(peer.router, [0, 0, 0])
+        for index, value in enumerate(self._contribution(peer)):
+            totals[index] += sign * value
+
+    def _emit(self, timestamp, kind, peer, text, **extra):
+        event = {"time": timestamp, "type": kind, "router": peer.router, "peer": peer.peer, "asn": peer.asn,
+                 "text": text}
+        event.update(extra)
+        self.events.append(event)
+        if self.on_event is not None:
+            self.on_event(event)
+
+    def _flaps_between(self, peer, state, transitions, established_seconds, timestamp):
+        was_up = peer.state == ESTABLISHED
+        is_up = state == ESTABLISHED
+        if transitions is not None and peer.transitions is not None and transitions >= peer.transitions:
+            # Entradas em established no intervalo + estava up - está up = saídas de established.
+            return max(transitions - peer.transitions + was_up - is_up, 0)
+        flaps = 1 if was_up and not is_up else 0
+        if (was_up and is_up and established_seconds is not None and peer.established_seconds is not None
+                and established_seconds + UPTIME_SLACK < peer.established_seconds + (timestamp - peer.updated_at)):
+            flaps += 1
+        return flaps
+
+    def update_peer(self, router, row, timestamp):
+        peer_id = str(row.get('peer') or '').strip()
+        if not peer_id:
+            return None
+        key = (router, peer_id)
+        state = STATE_CODES.get(str(row.get('state') or '').lower(), 0)
+        transitions = _int_or_none(row.get('established_transitions'))
+        established_seconds = _int_or_none(row.get('established_seconds'))
+        prefixes = _int_or_none(row.get('prefixes_received'))
+        peer = self.peers.get(key)
+        if peer is None:
+            peer = self.peers[key] = BgpPeer(router, peer_id, timestamp)
+            self.by_router.setdefault(router, set()).add(key)
+            peer.state = state
+            peer.history.append(timestamp, state)
+            flaps = 0
+        else:
+            self._account(peer, -1)
+            flaps = self._flaps_between(peer, state, transitions, established_seconds, timestamp)
+        peer.asn = _int_or_none(row.get('asn')) if row.get('asn') is not None else peer.asn
+        score = peer.decayed_score(timestamp, self.half_life)
+        was_flapping = score >= self.threshold
+        peer.score = score + flaps
+        peer.score_at = timestamp
+        peer.flaps += flaps
+        if peer.score >= self.threshold:
+            self._flapping.add(key)
+        else:
+            self._flapping.discard(key)
+
+        if state != peer.state or flaps:
+            if state != peer.state:
+                title = 'voltou' if state == ESTABLISHED else f'caiu ({STATES[state]})'
+                self._emit(timestamp, 'up' if state == ESTABLISHED else 'down', peer,
+                           f"{peer.peer} {title}", previous=STATES[peer.state], state=STATES[state])
+                peer.since = timestamp
+            peer.state = state
+            peer.history.append(timestamp, state, flaps)
+        if peer.score >= self.threshold and not was_flapping:
+            self._emit(timestamp, 'flapping', peer, f"{peer.peer} instável (score {peer.score:.1f})",
+                       score=round(peer.score, 2))
+
+        if prefixes is not None and peer.prefixes is not None and state == ESTABLISHED and not flaps:
+            delta = prefixes - peer.prefixes
+            if abs(delta) >= max(self.delta_min, self.delta_ratio * peer.prefixes):
+                kind = 'prefix_drop' if delta < 0 else 'prefix_jump'
+                self._emit(timestamp, kind, peer, f"{peer.peer}: prefixos {peer.prefixes} -> {prefixes}",
+                           previous=peer.prefixes, prefixes=prefixes, delta=delta)
+        if prefixes is not None:
+            peer.prefixes = prefixes
+        elif state != ESTABLISHED:
+            # O poll SNMP não traz prefixos: mantém o último valor enviado enquanto a sessão estiver up.
+            peer.prefixes = None
+        peer.transitions = transitions
+        peer.established_seconds = established_seconds
+        peer.updated_at = timestamp
+        self._account(peer, 1)
+        return peer
+
+    def apply_snapshot(self, router, peers, timestamp=None):
+        """Aplica a tabela completa de peers de ``router``; peers que sumiram são removidos."""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            seen = set()
+            for row in peers:
+                peer = self.update_peer(router, row, timestamp)
+                if peer is not None:
+                    seen.add((router, peer.peer))
+            removed = self.by_router.get(router, set()) - seen
+            for key in removed:
+                self._remove(key, timestamp)
+            return {"peers": len(seen), "removed": len(removed)}
+
+    def submit_snapshot(self, router, peers, timestamp=None):
+        return self._worker.submit(self.apply_snapshot, router, peers, timestamp)
+
+    def _remove(self, key, timestamp):
+        peer = self.peers.pop(key)
+        self._account(peer, -1)
+        self._flapping.discard(key)
+        self.by_router[peer.router].discard(key)
+        self._emit(timestamp, 'removed', peer, f"{peer.peer} saiu da tabela BGP")
+
+    def remove_router(self, router):
+        with self._lock:
+            for key in list(self.by_router.pop(router, ())):
+                peer = self.peers.pop(key)
+                self._account(peer, -1)
+                self._flapping.discard(key)
+            self._totals.pop(router, None)
+
+    def summary(self):
+        """Totais da frota e por roteador a partir dos contadores incrementais.
+
+        ``flapping`` usa o score decaído até agora, então um roteador que deixou
+        de ser coletado não fica com peers instáveis para sempre.
+        """
+        now = time.time()
+        with self._lock:
+            self._flapping = {key for key in self._flapping
+                              if self.peers[key].decayed_score(now, self.half_life) >= self.threshold}
+            flapping = {}
+            for router, _ in self._flapping:
+                flapping[router] = flapping.get(router, 0) + 1
+            routers = {
+                router: {"peers": totals[0], "peers_up": totals[1], "peers_down": totals[0] - totals[1],
+                         "flapping": flapping.get(router, 0), "prefixes": totals[2]}
+                for router, totals in self._totals.items() if totals[0]
+            }
+        fleet = {name: sum(item[name] for item in routers.values())
+                 for name in ("peers", "peers_up", "peers_down", "flapping", "prefixes")}
+        fleet["routers"] = len(routers)
+        return {"fleet": fleet, "routers": routers}
+
+    def list_peers(self, router=None, state=None, flapping=False, limit=500):
+        """Peers ordenados pelo score de flap (maior primeiro)."""
+        now = time.time()
+        with self._lock:
+            keys = self.by_router.get(router, set()) if router else self.peers.keys()
+            peers = [self.peers[key] for key in keys]
+        if state:
+            peers = [peer for peer in peers if STATES[peer.state] == state]
+        scored = [(peer.decayed_score(now, self.half_life), peer) for peer in peers]
+        if flapping:
+            scored = [item for item in scored if item[0] >= self.threshold]
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [peer.as_dict(now, self.half_life) for _, peer in scored[:max(int(limit), 1)]]
+
+    def history(self, router, peer_id):
+        with self._lock:
+            peer = self.peers.get((router, peer_id))
+            if peer is None:
+                return None
+            return [{"time": timestamp, "state": state, "flaps": flaps}
+                    for timestamp, state, flaps in peer.history.items()]
+
+    def recent_events(self, limit=100, kind=None, router=None):
+        with self._lock:
+            return latest_events(self.events, limit, type=kind, router=router)
@@ -0,0 +1,434 @@
+import asyncio
+import os
+
+try:
+    from . import snmp
+except ImportError:  # fallback when executed as a script (python monitor/app.py)
+    import snmp
+
+MAX_PDU_SIZE = int(os.getenv('MONITOR_SNMP_MAX_PDU', '8192'))
+MIN_REPETITIONS = 5
+MAX_REPETITIONS = 200
+INITIAL_REPETITIONS = 25
+COLUMNS_PER_REQUEST = 8
+# Cabeçalho da mensagem + PDU (versão, community/USM, request-id, erros)
+MESSAGE_OVERHEAD = 96
+ESTIMATED_VALUE_SIZE = 24
+
+TABLES = {
+    "interfaces": {
+        "ifName": '1.3.6.1.2.1.31.1.1.1.1',
+        "ifAlias": '1.3.6.1.2.1.31.1.1.1.18',
+        "ifOperStatus": '1.3.6.1.2.1.2.2.1.8',
+        "ifHighSpeed": '1.3.6.1.2.1.31.1.1.1.15',
+        "ifHCInOctets": '1.3.6.1.2.1.31.1.1.1.6',
+        "ifHCOutOctets": '1.3.6.1.2.1.31.1.1.1.10',
+        # Contadores de 32 bits, para equipamentos sem a IF-MIB de 64 bits (ou só SNMPv1).
+        "ifInOctets": '1.3.6.1.2.1.2.2.1.10',
+        "ifOutOctets": '1.3.6.1.2.1.2.2.1.16',
+    },
+    "arp": {
+        "ipNetToMediaPhysAddress": '1.3.6.1.2.1.4.22.1.2',
+    },
+    "bgp": {
+        "bgpPeerState": '1.3.6.1.2.1.15.3.1.2',
+        "bgpPeerRemoteAs": '1.3.6.1.2.1.15.3.1.9',
+        "bgpPeerFsmEstablishedTransitions": '1.3.6.1.2.1.15.3.1.15',
+        "bgpPeerFsmEstablishedTime": '1.3.6.1.2.1.15.3.1.16',
+    },
+    "ospf": {
+        "ospfRouterId": '1.3.6.1.2.1.14.1.1',
+        "ospfIfAreaId": '1.3.6.1.2.1.14.7.1.3',
+        "ospfNbrRtrId": '1.3.6.1.2.1.14.10.1.3',
+        "ospfNbrState": '1.3.6.1.2.1.14.10.1.6',
+        "ipAdEntNetMask": '1.3.6.1.2.1.4.20.1.3',
+    },
+    "neighbors": {
+        "lldpLocPortId": '1.0.8802.1.1.2.1.3.7.1.3',
+        "lldpLocPortDesc": '1.0.8802.1.1.2.1.3.7.1.4',
+        "lldpRemPortId": '1.0.8802.1.1.2.1.4.1.1.7',
+        "lldpRemPortDesc": '1.0.8802.1.1.2.1.4.1.1.8',
+        "lldpRemSysName": '1.0.8802.1.1.2.1.4.1.1.9',
+        "cdpCacheDeviceId": '1.3.6.1.4.1.9.9.23.1.2.1.1.6',
+        "cdpCacheDevicePort": '1.3.6.1.4.1.9.9.23.1.2.1.1.7',
+    },
+    # MIKROTIK-MIB mtxrOpticalTable: potências em milésimos de dBm, temperatura em °C.
+    "optics": {
+        "mtxrOpticalName": '1.3.6.1.4.1.14988.1.1.19.1.1.2',
+        "mtxrOpticalTemperature": '1.3.6.1.4.1.14988.1.1.19.1.1.6',
+        "mtxrOpticalTxPower": '1.3.6.1.4.1.14988.1.1.19.1.1.9',
+        "mtxrOpticalRxPower": '1.3.6.1.4.1.14988.1.1.19.1.1.10',
+    },
+    "vlans": {
+        "dot1qVlanStaticName": '1.3.6.1.2.1.17.7.1.4.3.1.1',
+    },
+}
+DEFAULT_TABLES = tuple(
+    name.strip() for name in os.getenv('MONITOR_SNMP_TABLES', ','.join(TABLES)).split(',') if name.strip() in TABLES
+)
+BGP_STATES = {1: 'idle', 2: 'connect', 3: 'active', 4: 'opensent', 5: 'openconfirm', 6: 'established'}
+OSPF_NEIGHBOR_STATES = {1: 'down', 2: 'attempt', 3: 'init', 4: 'two_way', 5: 'exchange_start', 6: 'exchange',
+                        7: 'loading', 8: 'full'}
+
+
+class RepetitionTuner:
+    """Ajusta ``max-repetitions`` do GETBULK para a resposta caber em ``max_pdu`` bytes.
+
+    Aprende o tamanho médio de cada varbind nas respostas do próprio agente e
+    reduz o teto quando o agente responde tooBig ou deixa de responder.
+    """
+
+    def __init__(self, max_pdu=MAX_PDU_SIZE):
+        self.max_pdu = max_pdu
+        self.bytes_per_varbind = 40.0
+        self.ceiling = MAX_REPETITIONS
+        self.current = INITIAL_REPETITIONS
+
+    def repetitions(self, columns):
+        budget = (self.max_pdu - MESSAGE_OVERHEAD) / (self.bytes_per_varbind * max(columns, 1))
+        return int(max(MIN_REPETITIONS, min(self.current, budget, self.ceiling)))
+
+    def observe(self, varbinds, response_bytes):
+        if varbinds:
+            sample = max(response_bytes - MESSAGE_OVERHEAD, 1) / varbinds
+            self.bytes_per_varbind = 0.7 * self.bytes_per_varbind + 0.3 * sample
+        # Resposta coube: cresce devagar até o limite calculado pelo tamanho.
+        self.current = min(self.ceiling, int(self.current * 1.5) + 1)
+
+    def shrink(self):
+        self.ceiling = max(MIN_REPETITIONS, self.current // 2)
+        self.current = self.ceiling
+
+
+def _varbind_size(oid):
+    return len(snmp.encode_oid(oid)) + 4 + ESTIMATED_VALUE_SIZE
+
+
+def pack_oids(oids, max_pdu=MAX_PDU_SIZE):
+    """Divide OIDs escalares em lotes cujo GET (e a resposta estimada) cabe num PDU."""
+    batches = []
+    current = []
+    size = MESSAGE_OVERHEAD
+    for oid in oids:
+        item = _varbind_size(oid)
+        if current and size + item > max_pdu:
+            batches.append(current)
+            current, size = [], MESSAGE_OVERHEAD
+        current.append(oid)
+        size += item
+    if current:
+        batches.append(current)
+    return batches
+
+
+async def get_scalars(client, target, oids, max_pdu=MAX_PDU_SIZE):
+    """GET de muitos escalares em poucos PDUs, com os lotes enviados em paralelo."""
+
+    async def fetch(batch):
+        try:
+            return await client.request(target, snmp.GET_REQUEST, batch)
+        except snmp.SnmpTooBig:
+            if len(batch) == 1:
+                raise
+            middle = len(batch) // 2
+            first, second = await asyncio.gather(fetch(batch[:middle]), fetch(batch[middle:]))
+            return first + second
+
+    results = await asyncio.gather(*(fetch(batch) for batch in pack_oids(oids, max_pdu)))
+    values = {}
+    for varbinds in results:
+        for oid, value in varbinds:
+            values[snmp.format_oid(oid)] = value
+    return values
+
+
+async def _walk_group(client, target, columns, tuner):
+    prefixes = [snmp.parse_oid(oid) for oid in columns]
+    cursors = list(prefixes)
+    rows = {oid: [] for oid in columns}
+    active = list(range(len(columns)))
+    while active:
+        repetitions = tuner.repetitions(len(active))
+        try:
+            varbinds, size = await client.exchange_pdu(
+                target, snmp.GET_BULK_REQUEST, [cursors[i] for i in active], 0, repetitions,
+            )
+        except (snmp.SnmpTooBig, snmp.SnmpTimeout):
+            if tuner.current <= MIN_REPETITIONS:
+                raise
+            tuner.shrink()
+            continue
+        tuner.observe(len(varbinds), size)
+
+        finished = set()
+        progressed = False
+        # A resposta do GETBULK vem linha a linha: varbind k pertence à coluna k % n.
+        for position, (oid, value) in enumerate(varbinds):
+            column = active[position % len(active)]
+            if column in finished:
+                continue
+            prefix = prefixes[column]
+            if isinstance(value, snmp.EndOfMib) or oid[:len(prefix)] != prefix or oid <= cursors[column]:
+                finished.add(column)
+                continue
+            rows[columns[column]].append((oid[len(prefix):], value))
+            cursors[column] = oid
+            progressed = True
+        active = [column for column in active if column not in finished]
+        if not progressed:
+            break
+    return rows
+
+
+async def walk_columns(client, target, columns, tuner=None):
+    """Percorre várias colunas de tabela com GETBULK.
+
+    Até ``COLUMNS_PER_REQUEST`` colunas vão no mesmo PDU; grupos maiores são
+    percorridos em paralelo. Devolve ``{coluna: [(índice, valor), ...]}``.
+    """
+    tuner = tuner or RepetitionTuner()
+    columns = list(columns)
+    groups = [columns[i:i + COLUMNS_PER_REQUEST] for i in range(0, len(columns), COLUMNS_PER_REQUEST)]
+    results = await asyncio.gather(*(_walk_group(client, target, group, tuner) for group in groups))
+    merged = {}
+    for rows in results:
+        merged.update(rows)
+    return merged
+
+
+def _text(value):
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    return value
+
+
+def _mac(value):
+    if isinstance(value, bytes) and len(value) == 6:
+        return ':'.join(f'{byte:02x}' for byte in value)
+    return _text(value)
+
+
+def _rows(walked, columns):
+    rows = {}
+    for name, oid in columns.items():
+        for index, value in walked.get(oid, []):
+            rows.setdefault(index, {})[name] = value
+    return rows
+
+
+def _shape_interfaces(rows):
+    interfaces = []
+    for index, row in sorted(rows.items()):
+        high_capacity = isinstance(row.get('ifHCInOctets'), int)
+        interfaces.append({
+            "index": index[0] if index else None,
+            "name": _text(row.get('ifName', '')),
+            "description": _text(row.get('ifAlias', '')),
+            "status": 'up' if row.get('ifOperStatus') == 1 else 'down',
+            "speed_mbps": row.get('ifHighSpeed'),
+            "in_octets": row.get('ifHCInOctets') if high_capacity else row.get('ifInOctets'),
+            "out_octets": row.get('ifHCOutOctets') if high_capacity else row.get('ifOutOctets'),
+            "counter_bits": 64 if high_capacity else 32,
+        })
+    return interfaces
+
+
+def _shape_pppoe(interfaces):
+    # No RouterOS cada sessão PPPoE ativa vira uma interface dinâmica "<pppoe-usuario>".
+    users = []
+    for interface in interfaces:
+        name = interface['name'] or ''
+        if name.startswith('<pppoe-') and name.endswith('>'):
+            users.append({
+                "user": name[len('<pppoe-'):-1],
+                "interface": name,
+                "index": interface['index'],
+                "download_octets": interface['out_octets'],
+                "upload_octets": interface['in_octets'],
+            })
+    return users
+
+
+def _shape_arp(rows, if_names):
+    entries = []
+    for index, row in rows.items():
+        if len(index) < 5:
+            continue
+        if_index = index[0]
+        entries.append({
+            "ip": '.'.join(str(part) for part in index[1:5]),
+            "mac": _mac(row.get('ipNetToMediaPhysAddress')),
+            "interface": if_names.get(if_index, str(if_index)),
+        })
+    return entries
+
+
+def _shape_bgp(rows):
+    peers = []
+    for index, row in sorted(rows.items()):
+        state = row.get('bgpPeerState')
+        peers.append({
+            "peer": '.'.join(str(part) for part in index),
+            "asn": row.get('bgpPeerRemoteAs'),
+            "state": BGP_STATES.get(state, str(state)),
+            "established_seconds": row.get('bgpPeerFsmEstablishedTime'),
+            "established_transitions": row.get('bgpPeerFsmEstablishedTransitions'),
+        })
+    return peers
+
+
+def _ip_int(parts):
+    value = 0
+    for part in parts:
+        value = (value << 8) | (part & 0xFF)
+    return value
+
+
+def _dotted_int(text):
+    return _ip_int(int(part) for part in str(text).split('.')) if text else 0
+
+
+def _shape_ospf(walked):
+    """Router ID, vizinhos e a área de cada vizinho.
+
+    A ospfNbrTable não traz a área: ela vem da interface OSPF local cuja
+    sub-rede contém o IP do vizinho (ou do mesmo ifIndex, em links unnumbered).
+    """
+    columns = TABLES['ospf']
+    router_id = next((value for _, value in walked.get(columns['ospfRouterId'], [])), None)
+    masks = {index[:4]: _dotted_int(row.get('ipAdEntNetMask'))
+             for index, row in _rows(walked, {"ipAdEntNetMask": columns['ipAdEntNetMask']}).items()}
+    numbered, unnumbered, areas = [], {}, {}
+    for index, row in _rows(walked, {"ospfIfAreaId": columns['ospfIfAreaId']}).items():
+        if len(index) < 5:
+            continue
+        area = row['ospfIfAreaId']
+        areas.setdefault(area, 0)
+        if index[4]:
+            unnumbered[index[4]] = area
+        else:
+            mask = masks.get(index[:4], 0xFFFFFFFF)
+            numbered.append((_ip_int(index[:4]) & mask, mask, area))
+    neighbors = []
+    nbr_columns = {name: columns[name] for name in ('ospfNbrRtrId', 'ospfNbrState')}
+    for index, row in sorted(_rows(walked, nbr_columns).items()):
+        if len(index) < 5:
+            continue
+        address = _ip_int(index[:4])
+        if index[4]:
+            area = unnumbered.get(index[4])
+        else:
+            area = next((area for network, mask, area in numbered if address & mask == network), None)
+        state = OSPF_NEIGHBOR_STATES.get(row.get('ospfNbrState'), str(row.get('ospfNbrState')))
+        if area is not None and state == 'full':
+            areas[area] += 1
+        neighbors.append({
+            "neighbor_id": row.get('ospfNbrRtrId'),
+            "address": '.'.join(str(part) for part in index[:4]),
+            "state": state,
+            "area": area,
+        })
+    return {
+        "router_id": router_id,
+        "areas": [{"id": area, "neighbors": count} for area, count in sorted(areas.items())],
+        "neighbors": neighbors,
+    }
+
+
+def _port_text(value):
+    # Port IDs do subtipo MAC chegam como 6 bytes crus.
+    if isinstance(value, bytes) and len(value) == 6 and not all(32 <= byte < 127 for byte in value):
+        return _mac(value)
+    return (_text(value) or '').strip() if value is not None else ''
+
+
+def _shape_neighbors(walked, if_names):
+    """Vizinhos LLDP e CDP no formato ``neighbors.lldp`` da demo (``local_interface``, ``neighbor``, ``port``)."""
+    columns = TABLES['neighbors']
+    local_ports = {}
+    for index, row in _rows(walked, {name: columns[name] for name in ('lldpLocPortId', 'lldpLocPortDesc')}).items():
+        local_ports[index] = _port_text(row.get('lldpLocPortId')) or _port_text(row.get('lldpLocPortDesc'))
+    neighbors = []
+    remote = {name: columns[name] for name in ('lldpRemPortId', 'lldpRemPortDesc', 'lldpRemSysName')}
+    for index, row in sorted(_rows(walked, remote).items()):
+        name = _port_text(row.get('lldpRemSysName'))
+        if len(index) < 3 or not name:
+            continue
+        neighbors.append({
+            "local_interface": local_ports.get(index[1:2], str(index[1])),
+            "neighbor": name,
+            "port": _port_text(row.get('lldpRemPortId')) or _port_text(row.get('lldpRemPortDesc')),
+            "protocol": 'lldp',
+        })
+    cdp = {name: columns[name] for name in ('cdpCacheDeviceId', 'cdpCacheDevicePort')}
+    for index, row in sorted(_rows(walked, cdp).items()):
+        name = _port_text(row.get('cdpCacheDeviceId'))
+        if len(index) < 2 or not name:
+            continue
+        neighbors.append({
+            "local_interface": if_names.get(index[0], str(index[0])),
+            "neighbor": name,
+            "port": _port_text(row.get('cdpCacheDevicePort')),
+            "protocol": 'cdp',
+        })
+    return neighbors
+
+
+def _milli(value):
+    return value / 1000 if isinstance(value, int) else None
+
+
+def _shape_optics(rows):
+    """Leituras DOM no formato ``interfaces.opticas``/``energia.gbics`` da demo."""
+    return [
+        {
+            "name": _text(row.get('mtxrOpticalName', '')) or str(index[0]),
+            "rx_dbm": _milli(row.get('mtxrOpticalRxPower')),
+            "tx_dbm": _milli(row.get('mtxrOpticalTxPower')),
+            "temp_c": row.get('mtxrOpticalTemperature') if isinstance(row.get('mtxrOpticalTemperature'), int) else None,
+        }
+        for index, row in sorted(rows.items()) if index
+    ]
+
+
+def _shape_vlans(rows):
+    return [
+        {"id": index[0], "name": _text(row.get('dot1qVlanStaticName', ''))}
+        for index, row in sorted(rows.items()) if index
+    ]
+
+
+async def collect_tables(client, target, names=DEFAULT_TABLES, tuner=None):
+    """Coleta as tabelas pedidas numa única rodada de GETBULKs e devolve dados no formato da demo."""
+    tuner = tuner or RepetitionTuner()
+    columns = {}
+    for name in names:
+        columns.update(TABLES[name])
+    walked = await walk_columns(client, target, columns.values(), tuner)
+
+    data = {}
+    interfaces = []
+    if 'interfaces' in names:
+        interfaces = _shape_interfaces(_rows(walked, TABLES['interfaces']))
+        data['interfaces'] = interfaces
+        data['pppoe_users'] = _shape_pppoe(interfaces)
+    if 'arp' in names:
+        if_names = {interface['index']: interface['name'] for interface in interfaces}
+        data['arp'] = _shape_arp(_rows(walked, TABLES['arp']), if_names)
+    if 'bgp' in names:
+        peers = _shape_bgp(_rows(walked, TABLES['bgp']))
+        data['bgp'] = {
+            "peers": peers,
+            "peers_up": sum(1 for peer in peers if peer['state'] == 'established'),
+            "peers_down": sum(1 for peer in peers if peer['state'] != 'established'),
+        }
+    if 'ospf' in names:
+        data['ospf'] = _shape_ospf(walked)
+    if 'neighbors' in names:
+        if_names = {interface['index']: interface['name'] for interface in interfaces}
+        data['neighbors'] = {"lldp": _shape_neighbors(walked, if_names)}
+    if 'optics' in names:
+        data['optics'] = _shape_optics(_rows(walked, TABLES['optics']))
+    if 'vlans' in names:
+        data['vlans'] = _shape_vlans(_rows(walked, TABLES['vlans']))
+    return data
@@ -0,0 +1,98 @@
+import gzip
+import os
+import threading
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele negociamos apenas gzip
+    brotli = None
+
+MIN_COMPRESS_SIZE = int(os.getenv('MONITOR_COMPRESS_MIN_SIZE', '1024'))
+COMPRESSIBLE_MIMETYPES = (
+    'text/',
+    'application/json',
+    'application/javascript',
+    'application/openmetrics-text',
+    'image/svg+xml',
+)
+SUPPORTED_ENCODINGS = ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def is_compressible(mimetype):
+    return bool(mimetype) and mimetype.startswith(COMPRESSIBLE_MIMETYPES)
+
+
+def negotiate_encoding(accept_encodings):
+    """Escolhe ``br`` ou ``gzip`` a partir do Accept-Encoding já parseado pelo Werkzeug."""
+    return accept_encodings.best_match(SUPPORTED_ENCODINGS)
+
+
+def compress(body, encoding, static=False):
+    # Corpos estáticos são comprimidos uma única vez, então vale usar o nível máximo.
+    if encoding == 'br':
+        return brotli.compress(body, quality=11 if static else 5)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=9 if static else 6, mtime=0)
+    raise ValueError(f"encoding não suportado: {encoding}")
+
+
+class PrecompressedBody:
+    """Corpo imutável cujas versões comprimidas são geradas uma vez e reaproveitadas.
+
+    ``static=False`` usa o nível dinâmico, para corpos que são refeitos com
+    frequência (ex.: exposição de métricas) e não compensam o nível máximo.
+    """
+
+    def __init__(self, body, mimetype, etag, static=True):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = etag
+        self.static = static
+        self._encoded = {}
+        self._lock = threading.Lock()
+
+    def encoded(self, encoding):
+        data = self._encoded.get(encoding)
+        if data is None:
+            with self._lock:
+                data = self._encoded.get(encoding)
+                if data is None:
+                    data = compress(self.body, encoding, static=self.static)
+                    self._encoded[encoding] = data
+        return data
+
+    def select(self, accept_encodings):
+        """Devolve ``(encoding, bytes, etag)`` para a requisição; encoding ``None`` = identidade."""
+        if len(self.body) >= MIN_COMPRESS_SIZE and is_compressible(self.mimetype):
+            encoding = negotiate_encoding(accept_encodings)
+            if encoding:
+                return encoding, self.encoded(encoding), f"{self.etag}-{encoding}"
+        return None, self.body, self.etag
+
+
+def compress_response(response, accept_encodings):
+    """Comprime respostas dinâmicas na saída (usado em ``after_request``)."""
+    if not is_compressible(response.mimetype):
+        return response
+    response.vary.add('Accept-Encoding')
+    if (
+        response.direct_passthrough
+        or response.is_streamed
+        or response.status_code != 200
+        or 'Content-Encoding' in response.headers
+    ):
+        return response
+
+    body = response.get_data()
+    if len(body) < MIN_COMPRESS_SIZE:
+        return response
+    encoding = negotiate_encoding(accept_encodings)
+    if not encoding:
+        return response
+
+    response.set_data(compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f"{etag}-{encoding}")
+    return response
@@ -0,0 +1,131 @@
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import yaml
+from werkzeug.security import check_password_hash
+
+AUTH_WORKERS = int(os.getenv('MONITOR_AUTH_WORKERS', '4'))
+AUTH_MAX_PENDING = int(os.getenv('MONITOR_AUTH_MAX_PENDING', '64'))
+AUTH_TIMEOUT = float(os.getenv('MONITOR_AUTH_TIMEOUT', '10'))
+HASH_PREFIXES = ('pbkdf2:', 'scrypt:', 'sha256$')
+
+
+class AuthBusy(RuntimeError):
+    """Fila de verificação de senhas cheia; o login deve ser tentado de novo."""
+
+
+def _env_credentials():
+    env_user = os.getenv('MONITOR_ADMIN_USER') or os.getenv('MONITOR_USER')
+    env_password = os.getenv('MONITOR_ADMIN_PASSWORD') or os.getenv('MONITOR_PASSWORD')
+    if env_user and env_password:
+        return [{"username": env_user, "password": env_password}]
+    return []
+
+
+class CredentialStore:
+    """``users.yml`` + variáveis de ambiente num dict ``{usuario: senha}`` em cache.
+
+    O arquivo só é relido quando o ``mtime``/tamanho muda (um ``stat`` por
+    consulta); as credenciais do ambiente têm prioridade, como antes.
+    """
+
+    def __init__(self, path, env_loader=_env_credentials):
+        self.path = path
+        self._env_loader = env_loader
+        self._lock = threading.Lock()
+        self._signature = object()
+        self._records = {}
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _load(self):
+        records = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as stream:
+                data = yaml.safe_load(stream) or {}
+            for record in data.get('users', []) or []:
+                username = str(record.get('username', '')).strip()
+                if username:
+                    records[username] = str(record.get('password', ''))
+        for item in self._env_loader():
+            username = str(item.get('username', '')).strip()
+            if username:
+                records[username] = str(item.get('password', ''))
+        return records
+
+    def records(self):
+        signature = self._file_signature()
+        if signature != self._signature:
+            with self._lock:
+                if signature != self._signature:
+                    try:
+                        self._records = self._load()
+                    except (OSError, yaml.YAMLError):
+                        # Arquivo no meio de uma gravação: mantém a versão anterior.
+                        return self._records
+                    self._signature = signature
+        return self._records
+
+    def get(self, username):
+        return self.records().get(username)
+
+    def invalidate(self):
+        with self._lock:
+            self._signature = object()
+
+
+class HashCheckPool:
+    """Executa ``check_password_hash`` fora da thread da requisição, com limite.
+
+    pbkdf2/scrypt liberam o GIL, então poucas threads dão conta do volume sem
+    disputar CPU com o resto do app. Acima de ``max_pending`` verificações na
+    fila o login falha rápido com ``AuthBusy`` em vez de segurar o worker.
+    """
+
+    def __init__(self, workers=AUTH_WORKERS, max_pending=AUTH_MAX_PENDING, timeout=AUTH_TIMEOUT):
+        self.workers = max(int(workers), 1)
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max(int(max_pending), 1))
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    # Após um fork as threads do pool não existem no processo filho.
+                    self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='auth-hash')
+                    self._pid = os.getpid()
+        return self._executor
+
+    def check(self, stored_password, provided_password):
+        if not self._slots.acquire(blocking=False):
+            raise AuthBusy('muitas tentativas de login simultâneas')
+        try:
+            future = self._pool().submit(check_password_hash, stored_password, provided_password)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise AuthBusy('verificação de senha demorou demais') from None
+        except ValueError:
+            return False
+
+    def verify(self, stored_password, provided_password):
+        if not stored_password:
+            return False
+        if stored_password.startswith(HASH_PREFIXES):
+            return self.check(stored_password, provided_password)
+        return hmac.compare_digest(stored_password.encode(), provided_password.encode())
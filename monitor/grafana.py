@@ -0,0 +1,127 @@
+import fnmatch
+import math
+import time
+from datetime import datetime
+
+try:
+    from .timeseries import AGGREGATES
+except ImportError:  # fallback when executed as a script (python monitor/app.py)
+    from timeseries import AGGREGATES
+
+DEFAULT_MAX_DATA_POINTS = 1000
+MAX_SEARCH_RESULTS = 1000
+_GLOB_CHARS = set('*?[')
+
+
+def parse_time(value, default):
+    """Aceita o ISO 8601 que o Grafana envia (``...Z``) ou epoch em milissegundos."""
+    if value in (None, ''):
+        return default
+    if isinstance(value, (int, float)):
+        return float(value) / 1000
+    text = str(value).strip()
+    if text.isdigit():
+        return int(text) / 1000
+    return datetime.fromisoformat(text.replace('Z', '+00:00')).timestamp()
+
+
+def query_window(payload):
+    """``(início, fim, passo)`` em segundos a partir de ``range``, ``intervalMs`` e ``maxDataPoints``."""
+    window = payload.get('range') or {}
+    end = parse_time(window.get('to'), time.time())
+    start = parse_time(window.get('from'), end - 3600)
+    if start > end:
+        raise ValueError('range.from depois de range.to')
+    max_points = int(payload.get('maxDataPoints') or DEFAULT_MAX_DATA_POINTS)
+    interval = float(payload.get('intervalMs') or 0) / 1000
+    # Nunca devolve mais pontos do que o painel consegue desenhar (janelas começam em ``start``).
+    step = max((end - start) / max(max_points - 1, 1), interval)
+    return start, end, step
+
+
+def expand_targets(targets, names):
+    """Resolve cada alvo (nome exato ou glob como ``snmp.rtt.*``) para as séries existentes."""
+    available = set(names)
+    expanded = []
+    for target in targets:
+        if target.get('hide'):
+            continue
+        pattern = str(target.get('target') or '').strip()
+        if not pattern:
+            continue
+        if _GLOB_CHARS & set(pattern):
+            matches = fnmatch.filter(sorted(available), pattern)
+        else:
+            matches = [pattern] if pattern in available else []
+        options = target.get('payload') or target.get('data') or {}
+        if not isinstance(options, dict):
+            options = {}
+        expanded.extend((target.get('refId'), name, options) for name in matches)
+    return expanded
+
+
+def evaluate(stores, payload):
+    """Responde um ``/query`` do Grafana lendo cada loja de séries uma única vez.
+
+    ``stores`` é uma lista de ``TimeSeriesStore``; todos os alvos de uma loja
+    são consultados juntos (``query_many``) e séries repetidas entre alvos
+    são lidas uma vez só. ``payload``/``data`` de cada alvo aceita
+    ``{"agg": "max"}`` e ``{"method": "lttb"}``.
+    """
+    start, end, step = query_window(payload)
+    targets = payload.get('targets') or []
+    response = []
+    for store in stores:
+        wanted = expand_targets(targets, store.names())
+        # Alvos com as mesmas opções (agregado/método) vão numa única consulta.
+        groups = {}
+        for ref_id, name, options in wanted:
+            agg = options.get('agg', 'avg')
+            if agg not in AGGREGATES:
+                raise ValueError(f"agregado desconhecido: {agg}")
+            method = 'lttb' if options.get('method') == 'lttb' else None
+            groups.setdefault((agg, method), []).append((ref_id, name))
+        for (agg, method), group in groups.items():
+            points = store.query_many([name for _, name in group], start, end, step=step, agg=agg, method=method)
+            response.extend(_series(group, points))
+    return response
+
+
+def _series(group, points):
+    return [
+        {
+            "target": name,
+            "refId": ref_id,
+            "datapoints": [[value, int(timestamp * 1000)] for timestamp, value in points.get(name, [])
+                           if not math.isnan(value)],
+        }
+        for ref_id, name in group
+    ]
+
+
+def search(names, query):
+    query = str(query or '').strip().lower()
+    if query and _GLOB_CHARS & set(query):
+        matches = fnmatch.filter(names, query)
+    else:
+        matches = [name for name in names if query in name.lower()]
+    return matches[:MAX_SEARCH_RESULTS]
+
+
+def annotations(events, payload):
+    """Eventos do período no formato de anotações do Grafana; ``annotation.query`` filtra por texto."""
+    start, end, _ = query_window(payload)
+    annotation = payload.get('annotation') or {}
+    query = str(annotation.get('query') or '').strip().lower()
+    result = []
+    for event in events.between(start, end):
+        if query and query not in event['title'].lower() and query not in event['text'].lower():
+            continue
+        result.append({
+            "annotation": annotation,
+            "time": int(event['time'] * 1000),
+            "title": event['title'],
+            "text": event['text'],
+            "tags": event['tags'],
+        })
+    return result
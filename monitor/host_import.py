@@ -0,0 +1,276 @@
+import argparse
+import codecs
+import csv
+import io
+import ipaddress
+import json
+import re
+import sys
+
+import yaml
+
+try:
+    from .inventory import INVENTORY_PATH, HostInventory
+except ImportError:  # fallback when executed as a script (python monitor/app.py)
+    from inventory import INVENTORY_PATH, HostInventory
+
+FORMATS = ('csv', 'yaml', 'ndjson')
+BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+SNMP_VERSIONS = ('v2c', 'v3')
+AUTH_PROTOCOLS = ('md5', 'sha')
+MIN_AUTH_PASSWORD = 8  # RFC 3414: senhas menores não geram uma chave segura
+MIN_POLLING = 5
+_HOSTNAME = re.compile(r'^(?=.{1,253}$)[A-Za-z0-9]([A-Za-z0-9-]{0,61}[A-Za-z0-9])?(\.[A-Za-z0-9]([A-Za-z0-9-]{0,61}[A-Za-z0-9])?)*$')
+
+
+class ImportFormatError(ValueError):
+    """Formato desconhecido ou arquivo ilegível como um todo."""
+
+
+def detect_format(filename=None, content_type=None, explicit=None):
+    if explicit:
+        explicit = explicit.lower()
+        if explicit in ('yml', 'jsonl'):
+            explicit = {'yml': 'yaml', 'jsonl': 'ndjson'}[explicit]
+        if explicit not in FORMATS:
+            raise ImportFormatError(f"formato não suportado: {explicit}")
+        return explicit
+    name = (filename or '').lower()
+    for suffix, fmt in (('.csv', 'csv'), ('.yaml', 'yaml'), ('.yml', 'yaml'), ('.ndjson', 'ndjson'), ('.jsonl', 'ndjson')):
+        if name.endswith(suffix):
+            return fmt
+    mimetype = (content_type or '').split(';')[0].strip().lower()
+    for fragment, fmt in (('csv', 'csv'), ('yaml', 'yaml'), ('ndjson', 'ndjson'), ('jsonl', 'ndjson')):
+        if fragment in mimetype:
+            return fmt
+    raise ImportFormatError("informe o formato (csv, yaml ou ndjson)")
+
+
+def _text_stream(stream):
+    if isinstance(stream, io.TextIOBase):
+        return stream
+    return codecs.getreader('utf-8-sig')(stream, errors='replace')
+
+
+def iter_csv(stream):
+    """``(linha, registro)`` de um CSV com cabeçalho; tags separadas por vírgula."""
+    reader = csv.DictReader(_text_stream(stream))
+    for row in reader:
+        yield reader.line_num, {key.strip(): value for key, value in row.items() if key}
+
+
+def iter_ndjson(stream):
+    for number, line in enumerate(_text_stream(stream), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError as exc:
+            yield number, exc
+
+
+def iter_yaml(stream):
+    """Lê uma lista de hosts (ou um host por documento) sem carregar o arquivo inteiro.
+
+    Cada item da lista é composto e construído isoladamente a partir dos
+    eventos do parser, em vez de ``safe_load`` montar a lista completa.
+    """
+    loader = yaml.SafeLoader(_text_stream(stream))
+    try:
+        loader.get_event()  # StreamStart
+        while loader.check_event(yaml.DocumentStartEvent):
+            loader.get_event()
+            if loader.check_event(yaml.SequenceStartEvent):
+                loader.get_event()
+                index = 0
+                while not loader.check_event(yaml.SequenceEndEvent):
+                    node = loader.compose_node(None, index)
+                    yield node.start_mark.line + 1, loader.construct_document(node)
+                    index += 1
+                loader.get_event()
+            elif not loader.check_event(yaml.DocumentEndEvent):
+                node = loader.compose_node(None, None)
+                yield node.start_mark.line + 1, loader.construct_document(node)
+            loader.get_event()  # DocumentEnd
+            loader.anchors = {}
+    except yaml.YAMLError as exc:
+        raise ImportFormatError(f"YAML inválido: {exc}") from exc
+    finally:
+        loader.dispose()
+
+
+READERS = {'csv': iter_csv, 'yaml': iter_yaml, 'ndjson': iter_ndjson}
+
+
+def _valid_address(value):
+    host, port = value, None
+    if value.count(':') == 1:
+        host, _, port = value.partition(':')
+    if port is not None and not (port.isdigit() and 0 < int(port) < 65536):
+        return False
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        # "300.1.1.1" casaria com a regra de hostname; só dígitos precisa ser IP.
+        return not host.replace('.', '').isdigit() and bool(_HOSTNAME.match(host))
+
+
+def validate_row(raw):
+    """Valida um registro com os campos de ``servers()``; devolve ``(host, erros)``."""
+    if not isinstance(raw, dict):
+        return None, [("", "cada registro deve ser um objeto com os campos do host")]
+    errors = []
+
+    def text(field, default=''):
+        value = raw.get(field)
+        return default if value is None else str(value).strip()
+
+    host = {
+        "host_name": text('host_name'),
+        "ip_address": text('ip_address'),
+        "host_group": text('host_group'),
+        "template": text('template'),
+        "snmp_version": text('snmp_version', 'v2c').lower() or 'v2c',
+        "community": text('community'),
+        "auth_protocol": text('auth_protocol').lower(),
+        "auth_password": text('auth_password'),
+        "polling": text('polling', '60') or '60',
+        "notes": text('notes'),
+    }
+    if not host['ip_address']:
+        errors.append(('ip_address', 'obrigatório'))
+    elif not _valid_address(host['ip_address']):
+        errors.append(('ip_address', f"endereço inválido: {host['ip_address']}"))
+    if not host['host_name']:
+        host['host_name'] = 'Host sem nome'
+    if host['snmp_version'] not in SNMP_VERSIONS:
+        errors.append(('snmp_version', f"use {' ou '.join(SNMP_VERSIONS)}"))
+    elif host['snmp_version'] != 'v3':
+        # Só o v3 autentica; no v2c a community já é a credencial.
+        host['auth_protocol'] = host['auth_password'] = ''
+    elif not host['community']:
+        errors.append(('community', 'usuário SNMPv3 obrigatório'))
+    if host['auth_protocol'] and host['auth_protocol'] not in AUTH_PROTOCOLS:
+        errors.append(('auth_protocol', f"use {' ou '.join(AUTH_PROTOCOLS)} (ou vazio para noAuthNoPriv)"))
+    elif host['auth_protocol'] and len(host['auth_password']) < MIN_AUTH_PASSWORD:
+        errors.append(('auth_password', f"mínimo de {MIN_AUTH_PASSWORD} caracteres"))
+    if not host['polling'].isdigit() or int(host['polling']) < MIN_POLLING:
+        errors.append(('polling', f"inteiro em segundos (mínimo {MIN_POLLING})"))
+
+    tags = raw.get('tags') or []
+    if isinstance(tags, str):
+        tags = tags.split(',')
+    elif not isinstance(tags, (list, tuple)):
+        errors.append(('tags', 'lista ou texto separado por vírgulas'))
+        tags = []
+    host['tags'] = [str(tag).strip() for tag in tags if str(tag).strip()]
+    return (None if errors else host), errors
+
+
+class ImportReport:
+    """Resumo da importação; guarda no máximo ``MAX_REPORTED_ERRORS`` erros detalhados."""
+
+    def __init__(self, fmt, dry_run=False):
+        self.format = fmt
+        self.dry_run = dry_run
+        self.processed = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self.errors_truncated = False
+        self.fatal = None
+
+    def add_error(self, line, field, message):
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "field": field, "message": message})
+        else:
+            self.errors_truncated = True
+
+    def as_dict(self):
+        return {
+            "format": self.format,
+            "dry_run": self.dry_run,
+            "processed": self.processed,
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.errors_truncated,
+            "fatal": self.fatal,
+        }
+
+
+def import_hosts(inventory, stream, fmt, batch_size=BATCH_SIZE, dry_run=False, on_batch=None):
+    """Importa ``stream`` no inventário em lotes de ``batch_size`` hosts por transação.
+
+    O arquivo é lido registro a registro, então a memória usada não cresce com
+    o tamanho do arquivo (só o relatório de erros, limitado a
+    ``MAX_REPORTED_ERRORS`` itens).
+
+    ``on_batch(hosts)`` é chamado após cada lote gravado (ex.: agendar o polling).
+    """
+    report = ImportReport(fmt, dry_run)
+    batch = []
+
+    def flush():
+        if not batch:
+            return
+        if not dry_run:
+            inventory.upsert_many(batch)
+            if on_batch is not None:
+                on_batch(list(batch))
+        report.imported += len(batch)
+        batch.clear()
+
+    try:
+        for line, raw in READERS[fmt](stream):
+            report.processed += 1
+            if isinstance(raw, Exception):
+                report.failed += 1
+                report.add_error(line, '', f"linha ilegível: {raw}")
+                continue
+            host, errors = validate_row(raw)
+            if errors:
+                report.failed += 1
+                for field, message in errors:
+                    report.add_error(line, field, message)
+                continue
+            batch.append(host)
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+    except (ImportFormatError, csv.Error, UnicodeError) as exc:
+        flush()
+        report.fatal = str(exc)
+    return report
+
+
+def main(argv=None):
+    """``python -m monitor.host_import hosts.csv [--format csv] [--dry-run]``"""
+    parser = argparse.ArgumentParser(description='Importa hosts em massa para o inventário do monitor.')
+    parser.add_argument('path', help='arquivo CSV, YAML ou NDJSON ("-" para stdin)')
+    parser.add_argument('--format', choices=FORMATS + ('yml', 'jsonl'), help='padrão: pela extensão do arquivo')
+    parser.add_argument('--db', default=INVENTORY_PATH, help='banco SQLite do inventário')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--dry-run', action='store_true', help='só valida, não grava')
+    args = parser.parse_args(argv)
+
+    try:
+        fmt = detect_format(args.path, explicit=args.format)
+    except ImportFormatError as exc:
+        parser.error(str(exc))
+    inventory = HostInventory(args.db)
+    if args.path == '-':
+        report = import_hosts(inventory, sys.stdin.buffer, fmt, args.batch_size, args.dry_run)
+    else:
+        with open(args.path, 'rb') as stream:
+            report = import_hosts(inventory, stream, fmt, args.batch_size, args.dry_run)
+    json.dump(report.as_dict(), sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write('\n')
+    return 1 if report.failed or report.fatal else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,295 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+INVENTORY_PATH = os.getenv(
+    'MONITOR_INVENTORY_DB', str(Path(__file__).resolve().parent / 'data' / 'inventory.sqlite3')
+)
+DEFAULT_PAGE_SIZE = 60
+MAX_PAGE_SIZE = 500
+
+HOST_FIELDS = (
+    'host_name', 'ip_address', 'host_group', 'template', 'snmp_version', 'community', 'auth_protocol',
+    'auth_password', 'polling', 'notes',
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hosts (
+    id INTEGER PRIMARY KEY,
+    host_name TEXT NOT NULL,
+    ip_address TEXT NOT NULL UNIQUE,
+    host_group TEXT NOT NULL DEFAULT '',
+    template TEXT NOT NULL DEFAULT '',
+    snmp_version TEXT NOT NULL DEFAULT 'v2c',
+    community TEXT NOT NULL DEFAULT '',
+    auth_protocol TEXT NOT NULL DEFAULT '',
+    auth_password TEXT NOT NULL DEFAULT '',
+    polling INTEGER NOT NULL DEFAULT 60,
+    notes TEXT NOT NULL DEFAULT '',
+    created_at TEXT NOT NULL,
+    updated_ts REAL NOT NULL
+);
+-- Busca por prefixo sem diferenciar maiúsculas (NOCASE: só ASCII).
+DROP INDEX IF EXISTS hosts_name_idx;
+CREATE INDEX IF NOT EXISTS hosts_name_nocase_idx ON hosts (host_name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS hosts_address_nocase_idx ON hosts (ip_address COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS hosts_group_idx ON hosts (host_group);
+CREATE INDEX IF NOT EXISTS hosts_template_idx ON hosts (template);
+CREATE INDEX IF NOT EXISTS hosts_updated_idx ON hosts (updated_ts);
+CREATE TABLE IF NOT EXISTS host_tags (
+    host_id INTEGER NOT NULL REFERENCES hosts (id) ON DELETE CASCADE,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (host_id, tag)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS host_tags_tag_idx ON host_tags (tag, host_id);
+CREATE TABLE IF NOT EXISTS sync_state (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Colunas criadas depois da primeira versão do schema: ``(nome, definição)``.
+_ADDED_COLUMNS = (
+    ('auth_protocol', "TEXT NOT NULL DEFAULT ''"),
+    ('auth_password', "TEXT NOT NULL DEFAULT ''"),
+)
+
+_UPSERT_HOST = """
+INSERT INTO hosts (host_name, ip_address, host_group, template, snmp_version, community, auth_protocol,
+                   auth_password, polling, notes, created_at, updated_ts)
+VALUES (:host_name, :ip_address, :host_group, :template, :snmp_version, :community, :auth_protocol,
+        :auth_password, :polling, :notes, :created_at, :updated_ts)
+ON CONFLICT (ip_address) DO UPDATE SET
+    host_name = excluded.host_name,
+    host_group = excluded.host_group,
+    template = excluded.template,
+    snmp_version = excluded.snmp_version,
+    community = excluded.community,
+    auth_protocol = excluded.auth_protocol,
+    auth_password = excluded.auth_password,
+    polling = excluded.polling,
+    notes = excluded.notes,
+    updated_ts = excluded.updated_ts
+"""
+
+
+def _polling(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 60
+
+
+class HostInventory:
+    """Inventário de hosts persistido em SQLite (WAL), compartilhado entre workers.
+
+    O IP é a chave natural (é também a chave do poller SNMP): cadastrar de novo
+    o mesmo IP atualiza o registro. Nome, grupo, template e tags são indexados,
+    e a listagem é sempre paginada, então nenhuma leitura percorre o inventário
+    inteiro em memória.
+    """
+
+    def __init__(self, path=INVENTORY_PATH):
+        self.path = str(path)
+        self._local = threading.local()
+        if self.path != ':memory:':
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connection()
+        conn.executescript(SCHEMA)
+        existing = {row['name'] for row in conn.execute('PRAGMA table_info(hosts)')}
+        for name, definition in _ADDED_COLUMNS:
+            if name not in existing:
+                # Bancos criados por versões anteriores: a coluna nova entra com o valor padrão.
+                try:
+                    conn.execute(f'ALTER TABLE hosts ADD COLUMN {name} {definition}')
+                except sqlite3.OperationalError as exc:
+                    if 'duplicate column' not in str(exc):  # outro processo migrou antes
+                        raise
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            # Uma conexão por thread (e por processo: conexões não sobrevivem a fork).
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA foreign_keys=ON')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    @staticmethod
+    def normalize(record):
+        """Converte um registro no formato de ``servers()`` para as colunas da tabela."""
+        row = {field: (record.get(field) or '') for field in HOST_FIELDS}
+        row['host_name'] = str(row['host_name']).strip()
+        row['ip_address'] = str(row['ip_address']).strip()
+        row['snmp_version'] = row['snmp_version'] or 'v2c'
+        row['polling'] = _polling(record.get('polling'))
+        row['created_at'] = record.get('created_at') or datetime.now().strftime('%d/%m/%Y %H:%M')
+        row['updated_ts'] = time.time()
+        tags = record.get('tags') or []
+        if isinstance(tags, str):
+            tags = tags.split(',')
+        row['tags'] = sorted({str(tag).strip() for tag in tags if str(tag).strip()})
+        return row
+
+    def _write(self, conn, row):
+        conn.execute(_UPSERT_HOST, row)
+        host_id = conn.execute('SELECT id FROM hosts WHERE ip_address = ?', (row['ip_address'],)).fetchone()[0]
+        conn.execute('DELETE FROM host_tags WHERE host_id = ?', (host_id,))
+        conn.executemany('INSERT INTO host_tags (host_id, tag) VALUES (?, ?)', ((host_id, tag) for tag in row['tags']))
+
+    def upsert(self, record):
+        row = self.normalize(record)
+        with self._transaction() as conn:
+            self._write(conn, row)
+        return self.get(row['ip_address'])
+
+    def upsert_many(self, records):
+        """Grava vários hosts numa única transação; devolve quantos foram gravados."""
+        written = 0
+        with self._transaction() as conn:
+            for record in records:
+                self._write(conn, self.normalize(record))
+                written += 1
+        return written
+
+    def remove(self, ip_address):
+        with self._transaction() as conn:
+            cursor = conn.execute('DELETE FROM hosts WHERE ip_address = ?', (ip_address,))
+        return cursor.rowcount > 0
+
+    def _hydrate(self, rows):
+        rows = list(rows)
+        if not rows:
+            return []
+        ids = [row['id'] for row in rows]
+        tags = {}
+        placeholders = ','.join('?' * len(ids))
+        for host_id, tag in self._connection().execute(
+            f'SELECT host_id, tag FROM host_tags WHERE host_id IN ({placeholders}) ORDER BY tag', ids
+        ):
+            tags.setdefault(host_id, []).append(tag)
+        hosts = []
+        for row in rows:
+            host = {field: row[field] for field in HOST_FIELDS}
+            host['polling'] = str(row['polling'])
+            host['tags'] = tags.get(row['id'], [])
+            host['created_at'] = row['created_at']
+            hosts.append(host)
+        return hosts
+
+    def get(self, ip_address):
+        row = self._connection().execute('SELECT * FROM hosts WHERE ip_address = ?', (ip_address,)).fetchone()
+        hosts = self._hydrate([row] if row else [])
+        return hosts[0] if hosts else None
+
+    @staticmethod
+    def _where(host_group=None, template=None, tag=None, search=None):
+        clauses, params = [], []
+        if host_group:
+            clauses.append('host_group = ?')
+            params.append(host_group)
+        if template:
+            clauses.append('template = ?')
+            params.append(template)
+        if tag:
+            clauses.append('id IN (SELECT host_id FROM host_tags WHERE tag = ?)')
+            params.append(tag)
+        if search:
+            # Busca por prefixo sem diferenciar maiúsculas: usa os índices NOCASE de nome e endereço.
+            clauses.append(
+                "(host_name >= ? COLLATE NOCASE AND host_name < ? COLLATE NOCASE"
+                " OR ip_address >= ? COLLATE NOCASE AND ip_address < ? COLLATE NOCASE)"
+            )
+            params.extend([search, search + '\uffff', search, search + '\uffff'])
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def count(self, **filters):
+        where, params = self._where(**filters)
+        return self._connection().execute(f'SELECT COUNT(*) FROM hosts{where}', params).fetchone()[0]
+
+    def page(self, page=1, per_page=DEFAULT_PAGE_SIZE, **filters):
+        """Página de hosts (mais recentes primeiro) e o total que casa com os filtros."""
+        per_page = min(max(int(per_page), 1), MAX_PAGE_SIZE)
+        page = max(int(page), 1)
+        where, params = self._where(**filters)
+        rows = self._connection().execute(
+            f'SELECT * FROM hosts{where} ORDER BY updated_ts DESC, id DESC LIMIT ? OFFSET ?',
+            params + [per_page, (page - 1) * per_page],
+        )
+        return self._hydrate(rows), self.count(**filters)
+
+    def iter_hosts(self, batch_size=500):
+        """Percorre todo o inventário em lotes (paginação por chave, memória constante)."""
+        last_id = 0
+        while True:
+            rows = self._connection().execute(
+                'SELECT * FROM hosts WHERE id > ? ORDER BY id LIMIT ?', (last_id, batch_size)
+            ).fetchall()
+            if not rows:
+                return
+            yield from self._hydrate(rows)
+            last_id = rows[-1]['id']
+
+    def changed_since(self, watermark=None, batch_size=500):
+        """Lotes ``(hosts, watermark)`` alterados depois de ``watermark`` (ordem de alteração).
+
+        O watermark é ``"updated_ts:id"`` do último host do lote; guardá-lo
+        (ver ``set_state``) permite sincronizações incrementais.
+        """
+        last_ts, last_id = 0.0, 0
+        if watermark:
+            raw_ts, _, raw_id = str(watermark).partition(':')
+            last_ts, last_id = float(raw_ts), int(raw_id or 0)
+        while True:
+            rows = self._connection().execute(
+                'SELECT * FROM hosts WHERE updated_ts > ? OR (updated_ts = ? AND id > ?) '
+                'ORDER BY updated_ts, id LIMIT ?',
+                (last_ts, last_ts, last_id, batch_size),
+            ).fetchall()
+            if not rows:
+                return
+            last_ts, last_id = rows[-1]['updated_ts'], rows[-1]['id']
+            yield self._hydrate(rows), f"{last_ts!r}:{last_id}"
+
+    def get_state(self, name, default=None):
+        row = self._connection().execute('SELECT value FROM sync_state WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else default
+
+    def set_state(self, name, value):
+        with self._transaction() as conn:
+            conn.execute(
+                'INSERT INTO sync_state (name, value) VALUES (?, ?) '
+                'ON CONFLICT (name) DO UPDATE SET value = excluded.value',
+                (name, str(value)),
+            )
+
+    def groups(self):
+        rows = self._connection().execute(
+            "SELECT DISTINCT host_group FROM hosts WHERE host_group != '' ORDER BY host_group"
+        )
+        return [row[0] for row in rows]
+
+    def tags(self):
+        return [row[0] for row in self._connection().execute('SELECT DISTINCT tag FROM host_tags ORDER BY tag')]
+
+    def __len__(self):
+        return self.count()
@@ -0,0 +1,611 @@
+"""Coletor NetFlow v5/v9 (UDP) com decodificação colunar e agregação por minuto.
+
+Os datagramas são lidos em lotes; os registros de cada lote viram arrays
+numpy (uma coluna por campo, via ``dtype`` estruturado big-endian) e a
+agregação por (exportador, interface, protocolo, minuto) é feita com
+operações vetorizadas, sem laço Python por fluxo.
+"""
+
+import ipaddress
+import os
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+
+try:
+    from .sketches import CountMinSketch, SpaceSaving
+except ImportError:  # fallback when executed as a script (python monitor/app.py)
+    from sketches import CountMinSketch, SpaceSaving
+
+NETFLOW_LISTEN = os.getenv('MONITOR_NETFLOW_LISTEN', '')
+NETFLOW_RETENTION_MINUTES = int(os.getenv('MONITOR_NETFLOW_RETENTION_MINUTES', '60'))
+BATCH_PACKETS = 512
+BATCH_LATENCY = 0.05
+RECV_BUFFER = 8 * 1024 * 1024
+# Top talkers: janelas de SKETCH_WINDOW segundos, SKETCH_WINDOWS janelas por exportador.
+SKETCH_WINDOW = int(os.getenv('MONITOR_NETFLOW_SKETCH_WINDOW', '300'))
+SKETCH_WINDOWS = int(os.getenv('MONITOR_NETFLOW_SKETCH_WINDOWS', '12'))
+SKETCH_CAPACITY = int(os.getenv('MONITOR_NETFLOW_SKETCH_CAPACITY', '256'))
+SKETCH_WIDTH = int(os.getenv('MONITOR_NETFLOW_SKETCH_WIDTH', '1024'))
+SKETCH_DEPTH = int(os.getenv('MONITOR_NETFLOW_SKETCH_DEPTH', '4'))
+TOP_DIMENSIONS = ('src_ip', 'dst_ip', 'src_port', 'dst_port', 'as_pair')
+PROTOCOL_NAMES = {1: 'icmp', 6: 'tcp', 17: 'udp', 47: 'gre', 50: 'esp', 58: 'icmpv6', 132: 'sctp'}
+
+V5_HEADER = struct.Struct('!HHIIIIBBH')
+V9_HEADER = struct.Struct('!HHIIII')
+FLOWSET_HEADER = struct.Struct('!HH')
+V5_RECORD = np.dtype([
+    ('srcaddr', '>u4'), ('dstaddr', '>u4'), ('nexthop', '>u4'), ('input', '>u2'), ('output', '>u2'),
+    ('packets', '>u4'), ('bytes', '>u4'), ('first', '>u4'), ('last', '>u4'), ('srcport', '>u2'),
+    ('dstport', '>u2'), ('pad1', 'u1'), ('tcp_flags', 'u1'), ('protocol', 'u1'), ('tos', 'u1'),
+    ('src_as', '>u2'), ('dst_as', '>u2'), ('src_mask', 'u1'), ('dst_mask', 'u1'), ('pad2', '>u2'),
+])
+
+# Campos v9 (RFC 3954) usados nas colunas; os demais são lidos e ignorados.
+V9_FIELDS = {
+    1: 'bytes', 2: 'packets', 4: 'protocol', 7: 'srcport', 8: 'srcaddr', 10: 'input',
+    11: 'dstport', 12: 'dstaddr', 14: 'output', 16: 'src_as', 17: 'dst_as', 21: 'last', 22: 'first',
+}
+COLUMNS = ('input', 'output', 'protocol', 'bytes', 'packets', 'end', 'srcaddr', 'dstaddr', 'srcport', 'dstport',
+           'src_as', 'dst_as')
+_INT_TYPES = {1: 'u1', 2: '>u2', 4: '>u4', 8: '>u8'}
+UPTIME_WRAP = 1 << 32
+
+
+class FlowBatch:
+    """Colunas de um lote de fluxos de um exportador (arrays numpy do mesmo tamanho)."""
+
+    __slots__ = ('exporter',) + COLUMNS
+
+    def __init__(self, exporter, **columns):
+        self.exporter = exporter
+        for name in COLUMNS:
+            setattr(self, name, columns[name])
+
+    def __len__(self):
+        return len(self.bytes)
+
+    @classmethod
+    def concat(cls, exporter, batches):
+        return cls(exporter, **{name: np.concatenate([getattr(b, name) for b in batches]) for name in COLUMNS})
+
+
+def _end_times(last_uptime, sys_uptime, unix_secs):
+    # Horário de fim do fluxo: relógio do exportador menos a distância em uptime (ms),
+    # módulo 2**32 porque o sysUpTime do exportador dá a volta a cada ~49,7 dias.
+    delta = ((sys_uptime.astype(np.int64) - last_uptime.astype(np.int64)) % UPTIME_WRAP) / 1000.0
+    return unix_secs - delta
+
+
+class V9Template:
+    __slots__ = ('dtype', 'size', 'fields', 'options')
+
+    def __init__(self, fields, options=False):
+        names = []
+        formats = []
+        offsets = []
+        offset = 0
+        self.fields = {}
+        for position, (field_type, length) in enumerate(fields):
+            column = V9_FIELDS.get(field_type)
+            if column is not None and length in _INT_TYPES and column not in self.fields.values():
+                names.append(column)
+                formats.append(_INT_TYPES[length])
+                offsets.append(offset)
+                self.fields[field_type] = column
+            offset += length
+        self.size = offset
+        self.options = options
+        self.dtype = np.dtype({'names': names, 'formats': formats, 'offsets': offsets, 'itemsize': max(offset, 1)})
+
+
+class NetflowDecoder:
+    """Decodifica datagramas v5/v9 e mantém o cache de templates v9 por exportador.
+
+    Templates são indexados por ``(exportador, source_id, template_id)``.
+    Conjuntos de dados que chegam antes do template são descartados e
+    contados em ``stats['unknown_template']``.
+    """
+
+    def __init__(self):
+        self.templates = {}
+        self.stats = {"packets": 0, "flows": 0, "malformed": 0, "unknown_template": 0, "templates": 0}
+
+    def decode(self, exporter, datagrams, received_at=None):
+        """Decodifica vários datagramas do mesmo exportador num único ``FlowBatch``.
+
+        O fim de cada fluxo é limitado a ``received_at`` (padrão: agora): um
+        relógio adiantado ou um pacote forjado não empurra a janela de retenção.
+        """
+        batches = []
+        v5_chunks, v5_meta = [], []
+        for datagram in datagrams:
+            self.stats["packets"] += 1
+            if len(datagram) < 4:
+                self.stats["malformed"] += 1
+                continue
+            version = (datagram[0] << 8) | datagram[1]
+            try:
+                if version == 5:
+                    self._collect_v5(datagram, v5_chunks, v5_meta)
+                elif version == 9:
+                    batches.extend(self._decode_v9(exporter, datagram))
+                else:
+                    self.stats["malformed"] += 1
+            except (struct.error, ValueError):
+                self.stats["malformed"] += 1
+        if v5_chunks:
+            batches.append(self._decode_v5(exporter, v5_chunks, v5_meta))
+        if not batches:
+            return None
+        batch = batches[0] if len(batches) == 1 else FlowBatch.concat(exporter, batches)
+        np.minimum(batch.end, time.time() if received_at is None else received_at, out=batch.end)
+        self.stats["flows"] += len(batch)
+        return batch
+
+    def _collect_v5(self, datagram, chunks, meta):
+        _, count, sys_uptime, unix_secs, unix_nsecs, _, _, _, sampling = V5_HEADER.unpack_from(datagram)
+        end = V5_HEADER.size + count * V5_RECORD.itemsize
+        if count == 0 or len(datagram) < end:
+            raise ValueError('v5 truncado')
+        chunks.append(datagram[V5_HEADER.size:end])
+        # Os 14 bits baixos são o intervalo de amostragem (0 = sem amostragem).
+        meta.append((count, sys_uptime, unix_secs + unix_nsecs / 1e9, (sampling & 0x3FFF) or 1))
+
+    def _decode_v5(self, exporter, chunks, meta):
+        records = np.frombuffer(b''.join(chunks), dtype=V5_RECORD)
+        counts = np.array([item[0] for item in meta])
+        sys_uptime = np.repeat(np.array([item[1] for item in meta], dtype=np.int64), counts)
+        unix_secs = np.repeat(np.array([item[2] for item in meta]), counts)
+        sampling = np.repeat(np.array([item[3] for item in meta], dtype=np.uint64), counts)
+        return FlowBatch(
+            exporter,
+            input=records['input'].astype(np.uint32),
+            output=records['output'].astype(np.uint32),
+            protocol=records['protocol'].astype(np.uint8),
+            bytes=records['bytes'].astype(np.uint64) * sampling,
+            packets=records['packets'].astype(np.uint64) * sampling,
+            end=_end_times(records['last'], sys_uptime, unix_secs),
+            srcaddr=records['srcaddr'].astype(np.uint32),
+            dstaddr=records['dstaddr'].astype(np.uint32),
+            srcport=records['srcport'].astype(np.uint16),
+            dstport=records['dstport'].astype(np.uint16),
+            src_as=records['src_as'].astype(np.uint32),
+            dst_as=records['dst_as'].astype(np.uint32),
+        )
+
+    def _parse_templates(self, key_prefix, data, options):
+        offset = 0
+        while offset + 4 <= len(data):
+            if options:
+                template_id, scope_length, option_length = struct.unpack_from('!HHH', data, offset)
+                offset += 6
+                field_count = (scope_length + option_length) // 4
+            else:
+                template_id, field_count = struct.unpack_from('!HH', data, offset)
+                offset += 4
+            if template_id < 256:
+                break  # padding
+            fields = [struct.unpack_from('!HH', data, offset + 4 * i) for i in range(field_count)]
+            offset += 4 * field_count
+            self.templates[key_prefix + (template_id,)] = V9Template(fields, options)
+            self.stats["templates"] = len(self.templates)
+
+    def _decode_v9(self, exporter, datagram):
+        _, _, sys_uptime, unix_secs, _, source_id = V9_HEADER.unpack_from(datagram)
+        key_prefix = (exporter, source_id)
+        batches = []
+        offset = V9_HEADER.size
+        while offset + FLOWSET_HEADER.size <= len(datagram):
+            flowset_id, length = FLOWSET_HEADER.unpack_from(datagram, offset)
+            if length < FLOWSET_HEADER.size or offset + length > len(datagram):
+                raise ValueError('flowset v9 com tamanho inválido')
+            body = datagram[offset + FLOWSET_HEADER.size:offset + length]
+            offset += length
+            if flowset_id in (0, 1):
+                self._parse_templates(key_prefix, body, options=flowset_id == 1)
+                continue
+            template = self.templates.get(key_prefix + (flowset_id,))
+            if template is None:
+                self.stats["unknown_template"] += 1
+                continue
+            if template.options or template.size == 0:
+                continue
+            count = len(body) // template.size
+            if not count:
+                continue
+            records = np.frombuffer(body, dtype=template.dtype, count=count)
+            batches.append(self._columns_v9(exporter, records, count, sys_uptime, unix_secs))
+        return batches
+
+    @staticmethod
+    def _columns_v9(exporter, records, count, sys_uptime, unix_secs):
+        names = records.dtype.names
+
+        def column(name, dtype):
+            if name in names:
+                return records[name].astype(dtype)
+            return np.zeros(count, dtype=dtype)
+
+        if 'last' in names:
+            end = _end_times(records['last'], np.full(count, sys_uptime, dtype=np.int64), float(unix_secs))
+        else:
+            end = np.full(count, float(unix_secs))
+        return FlowBatch(
+            exporter,
+            input=column('input', np.uint32),
+            output=column('output', np.uint32),
+            protocol=column('protocol', np.uint8),
+            bytes=column('bytes', np.uint64),
+            packets=column('packets', np.uint64),
+            end=end,
+            srcaddr=column('srcaddr', np.uint32),
+            dstaddr=column('dstaddr', np.uint32),
+            srcport=column('srcport', np.uint16),
+            dstport=column('dstport', np.uint16),
+            src_as=column('src_as', np.uint32),
+            dst_as=column('dst_as', np.uint32),
+        )
+
+
+class FlowAggregator:
+    """Totais por (exportador, interface, protocolo, minuto), somados por lote.
+
+    Cada fluxo conta como entrada na interface ``input`` e como saída na
+    ``output``. Guarda ``retention_minutes`` minutos.
+    """
+
+    def __init__(self, retention_minutes=NETFLOW_RETENTION_MINUTES):
+        self.retention_minutes = max(int(retention_minutes), 1)
+        self.buckets = {}
+        self._lock = threading.Lock()
+        self._newest_minute = 0
+
+    @staticmethod
+    def _group(interfaces, protocols, minutes, byte_counts, packet_counts):
+        base = int(minutes.min())
+        # Chave composta (minuto relativo | interface | protocolo) num int64 para agrupar com np.unique.
+        keys = ((minutes - base).astype(np.int64) << 40) | (interfaces.astype(np.int64) << 8) | protocols
+        unique, inverse = np.unique(keys, return_inverse=True)
+        flows = np.bincount(inverse, minlength=len(unique))
+        total_bytes = np.bincount(inverse, weights=byte_counts, minlength=len(unique))
+        total_packets = np.bincount(inverse, weights=packet_counts, minlength=len(unique))
+        for key, nbytes, npackets, nflows in zip(unique.tolist(), total_bytes.tolist(), total_packets.tolist(),
+                                                 flows.tolist()):
+            yield ((key >> 40) + base, (key >> 8) & 0xFFFFFFFF, key & 0xFF), nbytes, npackets, nflows
+
+    def add(self, batch):
+        if not len(batch):
+            return
+        minutes = (batch.end // 60).astype(np.int64)
+        protocols = batch.protocol.astype(np.int64)
+        byte_counts = batch.bytes.astype(np.float64)
+        packet_counts = batch.packets.astype(np.float64)
+        with self._lock:
+            for direction, interfaces in ((0, batch.input), (2, batch.output)):
+                for (minute, interface, protocol), nbytes, npackets, nflows in self._group(
+                    interfaces, protocols, minutes, byte_counts, packet_counts,
+                ):
+                    key = (batch.exporter, interface, protocol, minute)
+                    totals = self.buckets.get(key)
+                    if totals is None:
+                        totals = self.buckets[key] = [0, 0, 0, 0, 0]
+                    totals[direction] += int(nbytes)
+                    totals[direction + 1] += int(npackets)
+                    if direction == 0:
+                        totals[4] += nflows
+            newest = int(minutes.max())
+            if newest > self._newest_minute:
+                self._newest_minute = newest
+                self._prune()
+
+    def _prune(self):
+        oldest = self._newest_minute - self.retention_minutes
+        for key in [key for key in self.buckets if key[3] <= oldest]:
+            del self.buckets[key]
+
+    def summary(self, exporter=None, minutes=15):
+        """Totais das últimas ``minutes`` por exportador/interface/protocolo."""
+        since = self._newest_minute - max(int(minutes), 1)
+        totals = {}
+        with self._lock:
+            for (flow_exporter, interface, protocol, minute), values in self.buckets.items():
+                if minute <= since or (exporter and flow_exporter != exporter):
+                    continue
+                row = totals.setdefault((flow_exporter, interface, protocol), [0, 0, 0, 0, 0])
+                for index, value in enumerate(values):
+                    row[index] += value
+        return [
+            {
+                "exporter": flow_exporter, "interface": interface, "protocol": protocol,
+                "bytes_in": row[0], "packets_in": row[1], "bytes_out": row[2], "packets_out": row[3],
+                "flows": row[4],
+            }
+            for (flow_exporter, interface, protocol), row in sorted(
+                totals.items(), key=lambda item: item[1][0] + item[1][2], reverse=True,
+            )
+        ]
+
+
+def dimension_keys(batch):
+    """Chave ``uint64`` de cada fluxo por dimensão (porta = protocolo << 16 | porta; AS = origem << 32 | destino)."""
+    protocol = batch.protocol.astype(np.uint64) << np.uint64(16)
+    return {
+        'src_ip': batch.srcaddr.astype(np.uint64),
+        'dst_ip': batch.dstaddr.astype(np.uint64),
+        'src_port': protocol | batch.srcport.astype(np.uint64),
+        'dst_port': protocol | batch.dstport.astype(np.uint64),
+        'as_pair': (batch.src_as.astype(np.uint64) << np.uint64(32)) | batch.dst_as.astype(np.uint64),
+    }
+
+
+def format_key(dimension, key):
+    if dimension in ('src_ip', 'dst_ip'):
+        return str(ipaddress.IPv4Address(key))
+    if dimension in ('src_port', 'dst_port'):
+        protocol = key >> 16
+        return f"{PROTOCOL_NAMES.get(protocol, protocol)}/{key & 0xFFFF}"
+    return f"AS{key >> 32}-AS{key & 0xFFFFFFFF}"
+
+
+def parse_key(dimension, text):
+    """Inverso de ``format_key`` (``10.0.0.1``, ``tcp/443``, ``AS64500-AS64501``)."""
+    text = str(text).strip()
+    if dimension in ('src_ip', 'dst_ip'):
+        return int(ipaddress.IPv4Address(text))
+    if dimension in ('src_port', 'dst_port'):
+        protocol, _, port = text.rpartition('/')
+        names = {name: number for number, name in PROTOCOL_NAMES.items()}
+        protocol = names.get(protocol.lower()) if not protocol.isdigit() else int(protocol)
+        if protocol is None or not port.isdigit():
+            raise ValueError(f"porta inválida: {text}")
+        return (protocol << 16) | int(port)
+    source, _, destination = text.upper().partition('-')
+    if not source.startswith('AS') or not destination.startswith('AS'):
+        raise ValueError(f"par de AS inválido: {text}")
+    return (int(source[2:]) << 32) | int(destination[2:])
+
+
+class WindowSketches:
+    """Um Space-Saving e um Count-Min (peso = bytes) por dimensão, para uma janela."""
+
+    __slots__ = ('heavy', 'counts')
+
+    def __init__(self, capacity=SKETCH_CAPACITY, width=SKETCH_WIDTH, depth=SKETCH_DEPTH):
+        self.heavy = {dimension: SpaceSaving(capacity) for dimension in TOP_DIMENSIONS}
+        self.counts = {dimension: CountMinSketch(width, depth) for dimension in TOP_DIMENSIONS}
+
+    def update(self, keys, weights):
+        for dimension in TOP_DIMENSIONS:
+            self.heavy[dimension].update(keys[dimension], weights)
+            self.counts[dimension].update(keys[dimension], weights)
+
+    def merge(self, other):
+        for dimension in TOP_DIMENSIONS:
+            self.heavy[dimension].merge(other.heavy[dimension])
+            self.counts[dimension].merge(other.counts[dimension])
+
+    def to_dict(self):
+        return {dimension: {"heavy": self.heavy[dimension].to_dict(), "counts": self.counts[dimension].to_dict()}
+                for dimension in TOP_DIMENSIONS}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketches = cls.__new__(cls)
+        sketches.heavy = {d: SpaceSaving.from_dict(data[d]['heavy']) for d in TOP_DIMENSIONS}
+        sketches.counts = {d: CountMinSketch.from_dict(data[d]['counts']) for d in TOP_DIMENSIONS}
+        return sketches
+
+
+class TopTalkers:
+    """Maiores IPs, portas e pares de AS por exportador e janela de tempo.
+
+    Memória fixa por exportador: ``windows`` janelas x 5 dimensões x
+    (``capacity`` contadores + tabela ``depth x width``); com os padrões,
+    cerca de 2 MB. Consultas de várias janelas ou de todos os exportadores
+    mesclam os sketches (custo proporcional ao tamanho deles, não ao tráfego).
+    """
+
+    def __init__(self, window=SKETCH_WINDOW, windows=SKETCH_WINDOWS, capacity=SKETCH_CAPACITY,
+                 width=SKETCH_WIDTH, depth=SKETCH_DEPTH):
+        self.window = max(int(window), 1)
+        self.windows = max(int(windows), 1)
+        self._factory = lambda: WindowSketches(capacity, width, depth)
+        self._exporters = {}
+        self._lock = threading.Lock()
+
+    def add(self, batch):
+        if not len(batch):
+            return
+        starts = (batch.end // self.window).astype(np.int64) * self.window
+        keys = dimension_keys(batch)
+        weights = batch.bytes.astype(np.float64)
+        with self._lock:
+            windows = self._exporters.setdefault(batch.exporter, {})
+            oldest = max(windows, default=0) - (self.windows - 1) * self.window
+            unique_starts = np.unique(starts).tolist()
+            for start in unique_starts:
+                if start < oldest:
+                    continue  # fluxo atrasado para uma janela já descartada
+                sketch = windows.get(start)
+                if sketch is None:
+                    sketch = windows[start] = self._factory()
+                if len(unique_starts) == 1:
+                    sketch.update(keys, weights)
+                else:
+                    mask = starts == start
+                    sketch.update({dimension: values[mask] for dimension, values in keys.items()}, weights[mask])
+            for start in sorted(windows)[:-self.windows]:
+                del windows[start]
+
+    def _select(self, exporter, windows):
+        with self._lock:
+            candidates = [self._exporters.get(exporter, {})] if exporter else list(self._exporters.values())
+            newest = max((start for windows_ in candidates for start in windows_), default=None)
+            if newest is None:
+                return None, None, None
+            oldest = newest - (max(int(windows), 1) - 1) * self.window
+            chosen = [sketch for windows_ in candidates for start, sketch in windows_.items() if start >= oldest]
+            if len(chosen) == 1:
+                return chosen[0], oldest, newest + self.window
+            merged = self._factory()
+            for sketch in chosen:
+                merged.merge(sketch)
+            return merged, oldest, newest + self.window
+
+    def top(self, dimension, n=10, exporter=None, windows=1):
+        if dimension not in TOP_DIMENSIONS:
+            raise ValueError(f"dimensão desconhecida: {dimension}")
+        sketch, start, end = self._select(exporter, windows)
+        result = {"dimension": dimension, "exporter": exporter, "window_start": start, "window_end": end,
+                  "total_bytes": 0, "error_bound": 0, "items": []}
+        if sketch is None:
+            return result
+        heavy = sketch.heavy[dimension]
+        top = heavy.top(max(int(n), 1))
+        # Os dois sketches superestimam: o menor limite superior vale para ambos.
+        upper_cm = sketch.counts[dimension].estimate(np.array([key for key, _, _ in top], dtype=np.uint64)).tolist()
+        result.update(total_bytes=heavy.total, error_bound=heavy.error_bound(), items=[
+            {"key": format_key(dimension, key), "bytes": min(upper, cm), "bytes_min": lower}
+            for (key, lower, upper), cm in zip(top, upper_cm)
+        ])
+        return result
+
+    def estimate(self, dimension, key, exporter=None, windows=1):
+        """Bytes estimados (limite superior, Count-Min) de uma chave qualquer."""
+        if dimension not in TOP_DIMENSIONS:
+            raise ValueError(f"dimensão desconhecida: {dimension}")
+        value = parse_key(dimension, key)
+        sketch, _, _ = self._select(exporter, windows)
+        if sketch is None:
+            return 0
+        return int(sketch.counts[dimension].estimate(np.array([value], dtype=np.uint64))[0])
+
+    def export(self, exporter=None, windows=1):
+        """Estado serializável das últimas ``windows`` janelas, para mesclar em outro coletor."""
+        with self._lock:
+            newest = max((start for windows_ in self._exporters.values() for start in windows_), default=0)
+            oldest = newest - (max(int(windows), 1) - 1) * self.window
+            return {
+                "window": self.window,
+                "exporters": {
+                    name: {str(start): sketch.to_dict() for start, sketch in windows_.items() if start >= oldest}
+                    for name, windows_ in self._exporters.items() if not exporter or name == exporter
+                },
+            }
+
+    def merge_state(self, state):
+        """Soma o estado exportado por outro coletor (mesma janela e parâmetros dos sketches)."""
+        if int(state.get('window', 0)) != self.window:
+            raise ValueError('estado com duração de janela diferente')
+        incoming = [(name, int(start), WindowSketches.from_dict(data))
+                    for name, windows_ in (state.get('exporters') or {}).items()
+                    for start, data in windows_.items()]
+        reference = self._factory()
+        for _, _, sketch in incoming:
+            for dimension in TOP_DIMENSIONS:
+                if (sketch.heavy[dimension].capacity != reference.heavy[dimension].capacity
+                        or not sketch.counts[dimension].compatible(reference.counts[dimension])):
+                    raise ValueError('sketches com parâmetros diferentes dos deste coletor')
+        with self._lock:
+            for name, start, sketch in incoming:
+                windows = self._exporters.setdefault(name, {})
+                if start in windows:
+                    windows[start].merge(sketch)
+                else:
+                    windows[start] = sketch
+                for old in sorted(windows)[:-self.windows]:
+                    del windows[old]
+        return len(incoming)
+
+
+class NetflowCollector:
+    """Recebe NetFlow via UDP numa thread e entrega lotes colunares ao agregador.
+
+    Lê até ``BATCH_PACKETS`` datagramas ou ``BATCH_LATENCY`` segundos por
+    lote; ``add_listener(callback)`` recebe cada ``FlowBatch`` decodificado.
+    """
+
+    def __init__(self, listen=NETFLOW_LISTEN, aggregator=None):
+        host, _, port = listen.rpartition(':')
+        self.address = (host or '0.0.0.0', int(port or 2055))
+        self.decoder = NetflowDecoder()
+        self.aggregator = aggregator or FlowAggregator()
+        self._listeners = []
+        self._sock = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._started_at = None
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECV_BUFFER)
+            sock.bind(self.address)
+            sock.settimeout(BATCH_LATENCY)
+            self._sock = sock
+            self.address = sock.getsockname()
+            self._pid = os.getpid()
+            self._stopping.clear()
+            self._started_at = time.monotonic()
+            self._thread = threading.Thread(target=self._run, name='netflow-collector', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def _run(self):
+        sock = self._sock
+        while not self._stopping.is_set():
+            pending = {}
+            deadline = time.monotonic() + BATCH_LATENCY
+            received = 0
+            while received < BATCH_PACKETS:
+                try:
+                    datagram, (address, _) = sock.recvfrom(65535)
+                except socket.timeout:
+                    break
+                except OSError:
+                    return
+                pending.setdefault(address, []).append(datagram)
+                received += 1
+                if time.monotonic() >= deadline:
+                    break
+            received_at = time.time()
+            for exporter, datagrams in pending.items():
+                self.process(exporter, datagrams, received_at)
+
+    def process(self, exporter, datagrams, received_at=None):
+        batch = self.decoder.decode(exporter, datagrams, received_at)
+        if batch is None:
+            return None
+        self.aggregator.add(batch)
+        for callback in list(self._listeners):
+            try:
+                callback(batch)
+            except Exception:  # um consumidor com erro não pode parar a coleta
+                continue
+        return batch
+
+    def stats(self):
+        stats = dict(self.decoder.stats)
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0
+        stats["flows_per_second"] = round(stats["flows"] / elapsed, 1) if elapsed else 0.0
+        stats["listen"] = f"{self.address[0]}:{self.address[1]}"
+        stats["running"] = self._thread is not None and self._thread.is_alive()
+        return stats
@@ -0,0 +1,153 @@
+import hashlib
+import math
+import os
+import threading
+import time
+
+try:
+    from .compression import PrecompressedBody
+except ImportError:  # fallback when executed as a script (python monitor/app.py)
+    from compression import PrecompressedBody
+
+OPENMETRICS_CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+# Intervalo mínimo (s) entre duas serializações do registro; scrapes dentro dele
+# recebem o corpo anterior mesmo que algum valor já tenha mudado.
+METRICS_RENDER_INTERVAL = float(os.getenv('MONITOR_METRICS_RENDER_INTERVAL', '1'))
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    value = float(value)
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+class MetricFamily:
+    """Família de métricas com labels fixos; cada combinação de labels é uma série."""
+
+    def __init__(self, registry, name, metric_type, documentation, labelnames=()):
+        self._registry = registry
+        self.name = name
+        self.type = metric_type
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.samples = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: labels esperados {self.labelnames}, recebidos {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._registry._lock:
+            if key not in self.samples or self.samples[key] != value:
+                self.samples[key] = value
+                self._registry._invalidate()
+
+    def remove(self, **labels):
+        with self._registry._lock:
+            if self.samples.pop(self._key(labels), None) is not None:
+                self._registry._invalidate()
+
+    def replace(self, rows):
+        """Troca todas as séries da família de uma vez (ex.: discos que sumiram)."""
+        samples = {self._key(labels): value for labels, value in rows}
+        with self._registry._lock:
+            self.samples = samples
+            self._registry._invalidate()
+
+    def _render(self, lines, openmetrics):
+        # Contadores: amostras sempre com sufixo _total; no formato 0.0.4 o
+        # HELP/TYPE também usa o nome com sufixo.
+        sample_name = f"{self.name}_total" if self.type == 'counter' else self.name
+        family_name = self.name if openmetrics else sample_name
+        lines.append(f"# HELP {family_name} {self.documentation}")
+        lines.append(f"# TYPE {family_name} {self.type}")
+        for key, value in self.samples.items():
+            if key:
+                labels = ','.join(
+                    f'{name}="{_escape_label(label)}"' for name, label in zip(self.labelnames, key)
+                )
+                lines.append(f"{sample_name}{{{labels}}} {_format_value(value)}")
+            else:
+                lines.append(f"{sample_name} {_format_value(value)}")
+
+
+class MetricsRegistry:
+    """Registro pré-montado: coletores atualizam valores e o scrape só serializa.
+
+    Atualizações só avançam a geração. O texto de exposição é refeito no
+    scrape quando a geração mudou, no máximo uma vez a cada
+    ``render_interval`` segundos, e fica em cache (comprimido sob demanda,
+    no nível dinâmico); com um poller atualizando gauges o tempo todo,
+    scrapes de várias réplicas do Prometheus continuam custando uma
+    serialização por intervalo.
+    """
+
+    def __init__(self, render_interval=METRICS_RENDER_INTERVAL):
+        self.render_interval = max(float(render_interval), 0.0)
+        self._lock = threading.Lock()
+        self._families = {}
+        self._generation = 0
+        # formato -> (geração, instante da serialização, PrecompressedBody)
+        self._rendered = {}
+
+    def _invalidate(self):
+        self._generation += 1
+
+    def _fresh(self, openmetrics):
+        cached = self._rendered.get(openmetrics)
+        if cached is None:
+            return None
+        generation, rendered_at, rendered = cached
+        if generation == self._generation or time.monotonic() - rendered_at < self.render_interval:
+            return rendered
+        return None
+
+    def _family(self, name, metric_type, documentation, labelnames):
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = MetricFamily(self, name, metric_type, documentation, labelnames)
+                self._families[name] = family
+                self._invalidate()
+            elif family.type != metric_type or family.labelnames != tuple(labelnames):
+                raise ValueError(f"métrica {name} já registrada com outro tipo/labels")
+            return family
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._family(name, 'gauge', documentation, labelnames)
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._family(name, 'counter', documentation, labelnames)
+
+    def exposition(self, openmetrics=True):
+        """Devolve o corpo pronto (``PrecompressedBody``) no formato pedido."""
+        rendered = self._fresh(openmetrics)
+        if rendered is not None:
+            return rendered
+        with self._lock:
+            rendered = self._fresh(openmetrics)
+            if rendered is None:
+                generation = self._generation
+                lines = []
+                for family in self._families.values():
+                    family._render(lines, openmetrics)
+                if openmetrics:
+                    lines.append('# EOF')
+                body = ('\n'.join(lines) + '\n').encode('utf-8')
+                content_type = OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE
+                etag = hashlib.sha256(body).hexdigest()[:12]
+                rendered = PrecompressedBody(body, content_type, etag, static=False)
+                self._rendered[openmetrics] = (generation, time.monotonic(), rendered)
+        return rendered
@@ -0,0 +1,261 @@
+"""Leituras DOM dos transceptores ópticos (RX/TX em dBm e temperatura) da frota inteira.
+
+Cada SFP ocupa uma linha de arrays numpy. A cada poll as leituras de um
+equipamento entram de uma vez e atualizam, também por linha, as somas de
+uma regressão linear com esquecimento exponencial, de onde sai a tendência
+(dBm/dia, °C/dia). Classificação por limites, tendências e o ranking dos
+links que estão degradando são uma passada vetorizada sobre todas as linhas.
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+try:
+    from .snapshots import SnapshotWorker
+except ImportError:  # fallback when executed as a script (python monitor/app.py)
+    from snapshots import SnapshotWorker
+
+OPTICS_RX_WARN = float(os.getenv('MONITOR_OPTICS_RX_WARN', '-22'))
+OPTICS_RX_CRIT = float(os.getenv('MONITOR_OPTICS_RX_CRIT', '-25'))
+OPTICS_RX_HIGH = float(os.getenv('MONITOR_OPTICS_RX_HIGH', '0'))
+OPTICS_TX_WARN = float(os.getenv('MONITOR_OPTICS_TX_WARN', '-6'))
+OPTICS_TX_CRIT = float(os.getenv('MONITOR_OPTICS_TX_CRIT', '-9'))
+OPTICS_TEMP_WARN = float(os.getenv('MONITOR_OPTICS_TEMP_WARN', '60'))
+OPTICS_TEMP_CRIT = float(os.getenv('MONITOR_OPTICS_TEMP_CRIT', '70'))
+# Meia-vida (dias) do peso das leituras antigas na tendência.
+OPTICS_TREND_HALF_LIFE = float(os.getenv('MONITOR_OPTICS_TREND_HALF_LIFE', '3'))
+# Queda de RX (dBm/dia) a partir da qual o link entra no ranking de degradação.
+OPTICS_DEGRADING_SLOPE = float(os.getenv('MONITOR_OPTICS_DEGRADING_SLOPE', '0.1'))
+# A tendência só vale depois de as leituras cobrirem este intervalo (desvio padrão, em horas).
+MIN_TREND_SPREAD_HOURS = 6
+# Queda que não passa deste múltiplo do erro padrão da inclinação é tratada como ruído.
+TREND_SIGNIFICANCE = 4
+GROWTH = 1.5
+METRICS = ('rx_dbm', 'tx_dbm', 'temp_c')
+STATUSES = ('ok', 'warning', 'critical')
+REASONS = ('rx_low', 'rx_high', 'tx_low', 'temp_high')
+DAY = 86400.0
+
+
+class OpticsStore:
+    """Linhas ``(equipamento, porta)`` com a última leitura e as somas da regressão.
+
+    ``sums[linha, métrica]`` guarda ``(Σw, Σw·t, Σw·y, Σw·t², Σw·t·y, Σw·y²)`` com
+    ``t`` em dias desde ``epoch``; antes de cada nova leitura todas as somas
+    da linha são multiplicadas por ``0.5 ** (Δt / meia-vida)``.
+    """
+
+    def __init__(self, capacity=1024, half_life_days=OPTICS_TREND_HALF_LIFE):
+        self.half_life = half_life_days
+        self.epoch = time.time()
+        self.slots = {}
+        self.devices = {}
+        self._device_ids = {}
+        self.keys = []
+        self._free = []
+        self.version = 0
+        self._evaluation = None
+        self._allocate(max(int(capacity), 1))
+        self._lock = threading.RLock()
+        self._worker = SnapshotWorker('optics-snapshot')
+
+    def _allocate(self, capacity):
+        self.values = np.full((capacity, len(METRICS)), np.nan, dtype=np.float32)
+        self.sums = np.zeros((capacity, len(METRICS), 6))
+        self.updated_at = np.zeros(capacity)
+        self.active = np.zeros(capacity, dtype=bool)
+        self.owner = np.zeros(capacity, dtype=np.int32)
+
+    def _grow(self, needed):
+        capacity = len(self.active)
+        if needed <= capacity:
+            return
+        capacity = max(int(capacity * GROWTH), needed)
+        old = (self.values, self.sums, self.updated_at, self.active, self.owner)
+        self._allocate(capacity)
+        for new, column in zip((self.values, self.sums, self.updated_at, self.active, self.owner), old):
+            new[:len(column)] = column
+
+    def _slots_for(self, device, ports):
+        slots = np.empty(len(ports), dtype=np.int64)
+        owned = self.devices.setdefault(device, set())
+        owner = self._device_ids.setdefault(device, len(self._device_ids))
+        for position, port in enumerate(ports):
+            key = (device, port)
+            slot = self.slots.get(key)
+            if slot is None:
+                if self._free:
+                    slot = self._free.pop()
+                    self.keys[slot] = key
+                else:
+                    slot = len(self.keys)
+                    self.keys.append(key)
+                    self._grow(slot + 1)
+                self.slots[key] = slot
+                self.values[slot] = np.nan
+                self.sums[slot] = 0
+                self.active[slot] = True
+                self.owner[slot] = owner
+                owned.add(key)
+            slots[position] = slot
+        return slots
+
+    def _release(self, keys):
+        for key in keys:
+            slot = self.slots.pop(key)
+            self.active[slot] = False
+            self.keys[slot] = None
+            self._free.append(slot)
+
+    def apply_snapshot(self, device, rows, timestamp=None):
+        """Aplica as leituras de um equipamento (``name``/``port``, ``rx_dbm``, ``tx_dbm``, ``temp_c``).
+
+        Portas que sumiram do snapshot (módulo removido) deixam de ser acompanhadas.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        readings = {}
+        for row in rows:
+            port = str(row.get('name') or row.get('port') or '').strip()
+            if port:
+                readings[port] = [_float(row.get(metric)) for metric in METRICS]
+        with self._lock:
+            ports = sorted(readings)
+            slots = self._slots_for(device, ports)
+            gone = self.devices[device] - {(device, port) for port in ports}
+            self._release(gone)
+            self.devices[device] -= gone
+            if len(slots):
+                self._record(slots, np.array([readings[port] for port in ports], dtype=np.float64), timestamp)
+            self.version += 1
+        return {"optics": len(ports), "removed": len(gone)}
+
+    def _record(self, slots, values, timestamp):
+        t = (timestamp - self.epoch) / DAY
+        elapsed = np.maximum(t - (self.updated_at[slots] - self.epoch) / DAY, 0)
+        sums = self.sums[slots] * (0.5 ** (elapsed / self.half_life))[:, None, None]
+        present = ~np.isnan(values)
+        y = np.where(present, values, 0.0)
+        weight = present.astype(np.float64)
+        sums[:, :, 0] += weight
+        sums[:, :, 1] += weight * t
+        sums[:, :, 2] += weight * y
+        sums[:, :, 3] += weight * t * t
+        sums[:, :, 4] += weight * t * y
+        sums[:, :, 5] += weight * y * y
+        self.sums[slots] = sums
+        self.values[slots] = values
+        self.updated_at[slots] = timestamp
+
+    def submit_snapshot(self, device, rows, timestamp=None):
+        return self._worker.submit(self.apply_snapshot, device, rows, timestamp)
+
+    def remove_device(self, device):
+        with self._lock:
+            self._release(self.devices.pop(device, ()))
+            self.version += 1
+
+    def evaluate(self):
+        """Status, motivos, tendências e horizonte de RX crítico de todas as linhas, numa passada.
+
+        O resultado fica em cache até o próximo snapshot.
+        """
+        with self._lock:
+            if self._evaluation is not None and self._evaluation["version"] == self.version:
+                return self._evaluation
+            rows = np.flatnonzero(self.active[:len(self.keys)])
+            values = self.values[rows].astype(np.float64)
+            sums = self.sums[rows]
+            keys = [self.keys[row] for row in rows.tolist()]
+            updated_at = self.updated_at[rows]
+            owner = self.owner[rows]
+            version = self.version
+        rx, tx, temp = values[:, 0], values[:, 1], values[:, 2]
+        with np.errstate(invalid='ignore'):
+            flags = np.stack((rx < OPTICS_RX_WARN, rx > OPTICS_RX_HIGH, tx < OPTICS_TX_WARN, temp > OPTICS_TEMP_WARN))
+            critical = (rx < OPTICS_RX_CRIT) | (tx < OPTICS_TX_CRIT) | (temp > OPTICS_TEMP_CRIT)
+        reasons = (flags * (1 << np.arange(len(REASONS)))[:, None]).sum(axis=0)
+        status = np.where(critical, 2, np.where(reasons > 0, 1, 0))
+
+        weight, sum_t, sum_y, sum_tt, sum_ty, sum_yy = (sums[:, :, index] for index in range(6))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_t, mean_y = sum_t / weight, sum_y / weight
+            variance = sum_tt / weight - mean_t * mean_t
+            covariance = sum_ty / weight - mean_t * mean_y
+            slope = covariance / variance
+            residual = np.maximum(sum_yy / weight - mean_y * mean_y - covariance * slope, 0)
+            slope_error = np.sqrt(residual / (np.maximum(weight - 2, 1) * variance))
+        slope[~(variance >= (MIN_TREND_SPREAD_HOURS / 24) ** 2)] = np.nan
+
+        rx_slope = slope[:, 0]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            degrading = (rx_slope <= -OPTICS_DEGRADING_SLOPE) & (-rx_slope > TREND_SIGNIFICANCE * slope_error[:, 0])
+            days_to_critical = np.where(degrading, (rx - OPTICS_RX_CRIT) / -rx_slope, np.inf)
+        days_to_critical = np.where(np.isnan(days_to_critical), np.inf, np.maximum(days_to_critical, 0))
+        # Pior primeiro: status, depois menos dias até o RX crítico, depois menor margem de RX.
+        margin = np.where(np.isnan(rx), np.inf, rx - OPTICS_RX_CRIT)
+        order = np.lexsort((margin, days_to_critical, -status))
+        evaluation = {
+            "version": version, "keys": keys, "values": values, "status": status, "reasons": reasons,
+            "slope": slope, "degrading": degrading, "days_to_critical": days_to_critical, "order": order,
+            "updated_at": updated_at, "owner": owner,
+        }
+        with self._lock:
+            if self.version == version:
+                self._evaluation = evaluation
+        return evaluation
+
+    def worst(self, n=20, device=None, status=None, degrading=False):
+        evaluation = self.evaluate()
+        order = evaluation["order"]
+        if device is not None or status is not None or degrading:
+            keep = np.ones(len(order), dtype=bool)
+            if device is not None:
+                keep &= evaluation["owner"][order] == self._device_ids.get(device, -1)
+            if status is not None:
+                keep &= evaluation["status"][order] == STATUSES.index(status)
+            if degrading:
+                keep &= evaluation["degrading"][order]
+            order = order[keep]
+        return [self._row(evaluation, row) for row in order[:max(int(n), 1)].tolist()]
+
+    @staticmethod
+    def _row(evaluation, row):
+        device, port = evaluation["keys"][row]
+        values, slope = evaluation["values"][row], evaluation["slope"][row]
+        days = evaluation["days_to_critical"][row]
+        return {
+            "device": device, "port": port,
+            **{metric: _rounded(values[index], 2) for index, metric in enumerate(METRICS)},
+            "status": STATUSES[evaluation["status"][row]],
+            "reasons": [reason for bit, reason in enumerate(REASONS) if evaluation["reasons"][row] >> bit & 1],
+            "rx_trend_dbm_day": _rounded(slope[0], 3),
+            "tx_trend_dbm_day": _rounded(slope[1], 3),
+            "temp_trend_c_day": _rounded(slope[2], 3),
+            "degrading": bool(evaluation["degrading"][row]),
+            "days_to_rx_critical": None if np.isinf(days) else round(float(days), 1),
+            "updated_at": float(evaluation["updated_at"][row]),
+        }
+
+    def summary(self):
+        evaluation = self.evaluate()
+        counts = np.bincount(evaluation["status"], minlength=len(STATUSES))
+        return {
+            "optics": len(evaluation["keys"]),
+            "devices": len(self.devices),
+            **{name: int(count) for name, count in zip(STATUSES, counts)},
+            "degrading": int(evaluation["degrading"].sum()),
+        }
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _rounded(value, digits):
+    return None if np.isnan(value) else round(float(value), digits)
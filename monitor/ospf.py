@@ -0,0 +1,277 @@
+"""Topologia OSPF por área montada a partir das tabelas de vizinhos de todos os roteadores.
+
+Cada roteador informa, por área, os vizinhos em ``full``. Uma adjacência
+existe quando todo roteador monitorado nas duas pontas concorda com ela (um
+vizinho que não é monitorado vale pelo que o outro lado informa). A cada
+snapshot só as arestas daquele roteador são reavaliadas; os componentes
+conexos de cada área são mantidos de forma incremental, então adjacências
+perdidas e partições aparecem no mesmo poll que as revela.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+try:
+    from .snapshots import SnapshotWorker, latest_events
+except ImportError:  # fallback when executed as a script (python monitor/app.py)
+    from snapshots import SnapshotWorker, latest_events
+
+OSPF_EVENT_CAPACITY = int(os.getenv('MONITOR_OSPF_EVENT_CAPACITY', '10000'))
+# Membros listados nos eventos de partição (o tamanho do componente vai sempre).
+PARTITION_MEMBERS = 50
+
+
+def full_neighbors(table):
+    """``{área: {router IDs em full}}`` a partir da tabela ``ospf`` do coletor (``areas`` + ``neighbors``)."""
+    areas = {str(area['id']): set() for area in table.get('areas') or () if isinstance(area, dict) and area.get('id')}
+    for neighbor in table.get('neighbors') or ():
+        if not isinstance(neighbor, dict):
+            continue
+        area, router_id = neighbor.get('area'), neighbor.get('neighbor_id')
+        if area and router_id and str(neighbor.get('state', 'full')).lower() == 'full':
+            areas.setdefault(str(area), set()).add(str(router_id))
+    return areas
+
+
+class OspfArea:
+    """Grafo não direcionado de uma área e seus componentes conexos.
+
+    ``component[nó]`` é o id do componente e ``members[id]`` o conjunto de
+    nós. Inserir uma aresta une os componentes (o menor é renumerado);
+    remover procura as duas pontas em BFS intercalada e para quando uma
+    encontra a outra ou quando o lado menor se esgota, então o custo é
+    proporcional à parte que se separou, não à área inteira.
+    """
+
+    __slots__ = ('id', 'adjacency', 'component', 'members', 'edges', '_next_id')
+
+    def __init__(self, area_id):
+        self.id = area_id
+        self.adjacency = {}
+        self.component = {}
+        self.members = {}
+        self.edges = 0
+        self._next_id = 0
+
+    def add_node(self, node):
+        if node not in self.adjacency:
+            self.adjacency[node] = set()
+            self.component[node] = self._next_id
+            self.members[self._next_id] = {node}
+            self._next_id += 1
+            return True
+        return False
+
+    def drop_node(self, node):
+        if node in self.adjacency and not self.adjacency[node]:
+            del self.adjacency[node]
+            component = self.component.pop(node)
+            self.members[component].discard(node)
+            if not self.members[component]:
+                del self.members[component]
+
+    def add_edge(self, a, b):
+        """Liga ``a`` e ``b``; devolve ``True`` se dois componentes foram unidos."""
+        self.add_node(a)
+        self.add_node(b)
+        self.adjacency[a].add(b)
+        self.adjacency[b].add(a)
+        self.edges += 1
+        first, second = self.component[a], self.component[b]
+        if first == second:
+            return False
+        if len(self.members[first]) < len(self.members[second]):
+            first, second = second, first
+        for node in self.members[second]:
+            self.component[node] = first
+        self.members[first] |= self.members.pop(second)
+        return True
+
+    def remove_edge(self, a, b):
+        """Desliga ``a`` e ``b``; devolve os nós que se separaram do componente (ou ``None``)."""
+        self.adjacency[a].discard(b)
+        self.adjacency[b].discard(a)
+        self.edges -= 1
+        sides = [({a}, deque([a])), ({b}, deque([b]))]
+        while True:
+            for index, (seen, queue) in enumerate(sides):
+                if not queue:
+                    return self._split(seen)
+                node = queue.popleft()
+                for neighbor in self.adjacency[node]:
+                    if neighbor in sides[1 - index][0]:
+                        return None
+                    if neighbor not in seen:
+                        seen.add(neighbor)
+                        queue.append(neighbor)
+
+    def _split(self, nodes):
+        component = self._next_id
+        self._next_id += 1
+        self.members[self.component[next(iter(nodes))]] -= nodes
+        self.members[component] = nodes
+        for node in nodes:
+            self.component[node] = component
+        return nodes
+
+    def as_dict(self, detail=False):
+        data = {"id": self.id, "routers": len(self.adjacency), "adjacencies": self.edges,
+                "components": len(self.members), "partitioned": len(self.members) > 1}
+        if detail:
+            data["edges"] = sorted((a, b) for a, neighbors in self.adjacency.items() for b in neighbors if a < b)
+            data["component_members"] = sorted((sorted(nodes) for nodes in self.members.values()),
+                                               key=len, reverse=True)
+        return data
+
+
+class OspfTopology:
+    """Grafos de todas as áreas alimentados pelos snapshots de cada roteador.
+
+    ``apply_snapshot(chave, router_id, {área: vizinhos_full})`` compara com o
+    snapshot anterior da mesma chave e reavalia só as arestas que podem ter
+    mudado. O primeiro snapshot de um roteador monta o grafo sem gerar eventos.
+    """
+
+    def __init__(self, event_capacity=OSPF_EVENT_CAPACITY, on_event=None):
+        self.on_event = on_event
+        self.areas = {}
+        self.routers = {}
+        # (área, router_id) -> vizinhos full informados por um roteador monitorado.
+        self.reports = {}
+        # (área, router_id) -> roteadores monitorados que informam esse vizinho.
+        self.reported_by = {}
+        self.events = deque(maxlen=max(int(event_capacity), 1))
+        self._lock = threading.RLock()
+        self._worker = SnapshotWorker('ospf-snapshot')
+
+    def _emit(self, timestamp, kind, area, text, **extra):
+        event = {"time": timestamp, "type": kind, "area": area, "text": text}
+        event.update(extra)
+        self.events.append(event)
+        if self.on_event is not None:
+            self.on_event(event)
+
+    def _present(self, area, a, b):
+        seen_by_a = self.reports.get((area, a))
+        seen_by_b = self.reports.get((area, b))
+        if seen_by_a is None and seen_by_b is None:
+            return False
+        return (seen_by_a is None or b in seen_by_a) and (seen_by_b is None or a in seen_by_b)
+
+    def _set_report(self, area, router_id, neighbors):
+        """Troca o que ``router_id`` informa na área; devolve os vizinhos a reavaliar (``None`` se nada mudou)."""
+        key = (area, router_id)
+        old = self.reports.get(key)
+        if old == neighbors:
+            return None
+        for neighbor in (old or set()) - (neighbors or set()):
+            reporters = self.reported_by[(area, neighbor)]
+            reporters.discard(router_id)
+            if not reporters:
+                del self.reported_by[(area, neighbor)]
+        for neighbor in (neighbors or set()) - (old or set()):
+            self.reported_by.setdefault((area, neighbor), set()).add(router_id)
+        if neighbors is None:
+            del self.reports[key]
+        else:
+            self.reports[key] = neighbors
+        if (old is None) != (neighbors is None):
+            # Entrou ou saiu da área: muda a validação das arestas que os outros informam.
+            return (old or set()) | (neighbors or set()) | self.reported_by.get(key, set())
+        return old ^ neighbors
+
+    def _reevaluate(self, area_id, router_id, affected, timestamp, record_events, changes):
+        area = self.areas.setdefault(area_id, OspfArea(area_id))
+        if (area_id, router_id) in self.reports:
+            area.add_node(router_id)
+        current = area.adjacency.get(router_id, ())
+        added, lost = [], []
+        for neighbor in affected:
+            present = self._present(area_id, router_id, neighbor)
+            if present != (neighbor in current):
+                (added if present else lost).append(neighbor)
+        # Novas arestas primeiro: trocar um vizinho por outro no mesmo poll não vira partição.
+        for neighbor in sorted(added):
+            created = router_id not in area.adjacency or neighbor not in area.adjacency
+            merged = area.add_edge(router_id, neighbor)
+            changes["added"] += 1
+            if record_events:
+                self._emit(timestamp, 'adjacency_up', area_id, f"{router_id} <-> {neighbor} em full",
+                           routers=[router_id, neighbor])
+                if merged and not created:
+                    self._emit(timestamp, 'partition_healed', area_id,
+                               f"área {area_id} religada por {router_id} <-> {neighbor}",
+                               components=len(area.members))
+        for neighbor in sorted(lost):
+            split = area.remove_edge(router_id, neighbor)
+            changes["lost"].append({"area": area_id, "routers": [router_id, neighbor]})
+            if record_events:
+                self._emit(timestamp, 'adjacency_lost', area_id, f"{router_id} <-> {neighbor} perdida",
+                           routers=[router_id, neighbor])
+            if split is not None:
+                members = sorted(split)[:PARTITION_MEMBERS]
+                changes["partitions"].append({"area": area_id, "size": len(split), "members": members})
+                if record_events:
+                    self._emit(timestamp, 'partition', area_id,
+                               f"área {area_id} partida: {len(split)} roteador(es) separado(s)",
+                               size=len(split), members=members, components=len(area.members))
+            if (area_id, neighbor) not in self.reports:
+                area.drop_node(neighbor)
+        if (area_id, router_id) not in self.reports:
+            area.drop_node(router_id)
+        if not area.adjacency:
+            del self.areas[area_id]
+
+    def apply_snapshot(self, key, router_id, areas, timestamp=None):
+        """Aplica os vizinhos ``full`` por área (``{área: conjunto de router IDs}``) de um roteador."""
+        timestamp = time.time() if timestamp is None else timestamp
+        router_id = router_id or key
+        areas = {area: set(neighbors) - {router_id} for area, neighbors in areas.items()}
+        changes = {"added": 0, "lost": [], "partitions": []}
+        with self._lock:
+            previous = self.routers.get(key)
+            record_events = previous is not None
+            if previous is not None and previous[0] != router_id:
+                # Router ID trocado: sai o nó antigo, entra o novo.
+                self._withdraw(key, timestamp, record_events, changes)
+                previous = None
+            self.routers[key] = (router_id, areas)
+            for area_id in set(areas) | set(previous[1] if previous else ()):
+                affected = self._set_report(area_id, router_id, areas.get(area_id))
+                if affected is not None:
+                    self._reevaluate(area_id, router_id, affected, timestamp, record_events, changes)
+        return changes
+
+    def submit_snapshot(self, key, router_id, areas, timestamp=None):
+        return self._worker.submit(self.apply_snapshot, key, router_id, areas, timestamp)
+
+    def _withdraw(self, key, timestamp, record_events, changes):
+        router_id, areas = self.routers.pop(key)
+        for area_id in areas:
+            affected = self._set_report(area_id, router_id, None)
+            if affected is not None:
+                self._reevaluate(area_id, router_id, affected, timestamp, record_events, changes)
+
+    def remove_router(self, key):
+        """Esquece um roteador descadastrado; as arestas que só ele informava somem sem eventos."""
+        with self._lock:
+            if key in self.routers:
+                self._withdraw(key, time.time(), False, {"added": 0, "lost": [], "partitions": []})
+
+    def summary(self):
+        with self._lock:
+            return {
+                "routers": len(self.routers),
+                "areas": [area.as_dict() for _, area in sorted(self.areas.items())],
+            }
+
+    def area(self, area_id):
+        with self._lock:
+            area = self.areas.get(area_id)
+            return area.as_dict(detail=True) if area is not None else None
+
+    def recent_events(self, limit=100, kind=None, area=None):
+        with self._lock:
+            return latest_events(self.events, limit, type=kind, area=area)
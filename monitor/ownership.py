@@ -0,0 +1,56 @@
+"""Elege, entre os processos do servidor, o único que coleta e atende.
+
+O poller SNMP, o coletor NetFlow e os stores alimentados por eles vivem na
+memória do processo. Com vários workers, cada um agendaria todos os hosts e
+só um conseguiria abrir a porta UDP do NetFlow, então as consultas caídas
+nos outros voltariam vazias. ``ProcessLock`` usa ``flock`` num arquivo ao
+lado do inventário: o primeiro processo que o obtém fica com ele até sair.
+"""
+
+import os
+import threading
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem flock; o servidor padrão (python app.py) já é um processo só
+    fcntl = None
+
+
+class ProcessLock:
+    """Lock exclusivo entre processos, tentado uma vez por PID e mantido enquanto o processo viver."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._pid = None
+        self._owner = False
+        self._file = None
+
+    def acquire(self):
+        """``True`` se este processo é o dono do lock (sem bloquear)."""
+        if self._pid == os.getpid():
+            return self._owner
+        with self._lock:
+            if self._pid != os.getpid():
+                self._owner = self._try_lock()
+                self._pid = os.getpid()
+        return self._owner
+
+    def _try_lock(self):
+        if fcntl is None:
+            return True
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        # Arquivo aberto pelo próprio processo: um descritor herdado via fork compartilharia o lock.
+        handle = open(self.path, 'a+')
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        handle.seek(0)
+        handle.truncate()
+        handle.write(f"{os.getpid()}\n")
+        handle.flush()
+        self._file = handle
+        return True
@@ -0,0 +1,483 @@
+import asyncio
+import itertools
+import logging
+import os
+import threading
+import time
+
+try:
+    from . import snmp
+    from .collector import DEFAULT_TABLES, RepetitionTuner, collect_tables, get_scalars
+    from .scheduler import JitteredScheduler
+    from .snapshots import SnapshotWorker
+except ImportError:  # fallback when executed as a script (python monitor/app.py)
+    import snmp
+    from collector import DEFAULT_TABLES, RepetitionTuner, collect_tables, get_scalars
+    from scheduler import JitteredScheduler
+    from snapshots import SnapshotWorker
+
+logger = logging.getLogger(__name__)
+
+SNMP_CONCURRENCY = int(os.getenv('MONITOR_SNMP_CONCURRENCY', '256'))
+SNMP_TIMEOUT = float(os.getenv('MONITOR_SNMP_TIMEOUT', '2.0'))
+SNMP_RETRIES = int(os.getenv('MONITOR_SNMP_RETRIES', '1'))
+
+SYSTEM_OIDS = {
+    "sysDescr": '1.3.6.1.2.1.1.1.0',
+    "sysUpTime": '1.3.6.1.2.1.1.3.0',
+    "sysName": '1.3.6.1.2.1.1.5.0',
+}
+USM_NOT_IN_TIME_WINDOW = (1, 3, 6, 1, 6, 3, 15, 1, 1, 2, 0)
+USM_UNKNOWN_ENGINE_ID = (1, 3, 6, 1, 6, 3, 15, 1, 1, 4, 0)
+
+
+class DeviceStats:
+    """Contadores por agente para calibrar o polling (round-trips e bytes)."""
+
+    __slots__ = ('requests', 'responses', 'timeouts', 'bytes_sent', 'bytes_received')
+
+    def __init__(self):
+        self.requests = 0
+        self.responses = 0
+        self.timeouts = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class SnmpTarget:
+    """Como falar com um agente: endereço, versão e credenciais."""
+
+    __slots__ = (
+        'host', 'port', 'version', 'community', 'user', 'auth_protocol', 'auth_password', 'timeout', 'retries',
+    )
+
+    def __init__(self, host, port=161, version='v2c', community='public', user='', auth_protocol=None,
+                 auth_password=None, timeout=SNMP_TIMEOUT, retries=SNMP_RETRIES):
+        self.host = host
+        self.port = int(port)
+        self.version = version
+        self.community = community
+        self.user = user or community
+        self.auth_protocol = auth_protocol
+        self.auth_password = auth_password
+        self.timeout = timeout
+        self.retries = retries
+
+    @property
+    def address(self):
+        return (self.host, self.port)
+
+
+class _SnmpProtocol(asyncio.DatagramProtocol):
+    """Um único socket UDP para todos os agentes; respostas casadas pelo request-id."""
+
+    def __init__(self):
+        self.transport = None
+        self.pending = {}
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        try:
+            request_id = snmp.peek_request_id(data)
+        except snmp.SnmpError:
+            return
+        future = self.pending.pop(request_id, None)
+        if future is not None and not future.done():
+            future.set_result(data)
+
+    def error_received(self, exc):
+        pass
+
+
+class SnmpClient:
+    """Cliente SNMP assíncrono (v2c e v3 noAuthNoPriv/authNoPriv)."""
+
+    def __init__(self):
+        self._protocol = None
+        self._ids = itertools.count(1)
+        self._usm = {}
+        self._keys = {}
+        self.stats = {}
+
+    def device_stats(self, target):
+        stats = self.stats.get(target.address)
+        if stats is None:
+            stats = DeviceStats()
+            self.stats[target.address] = stats
+        return stats
+
+    async def open(self):
+        loop = asyncio.get_running_loop()
+        _, self._protocol = await loop.create_datagram_endpoint(_SnmpProtocol, local_addr=('0.0.0.0', 0))
+
+    def close(self):
+        if self._protocol is not None and self._protocol.transport is not None:
+            self._protocol.transport.close()
+
+    def _next_id(self):
+        return next(self._ids) & 0x7FFFFFFF or next(self._ids)
+
+    def forget(self, address):
+        """Descarta contadores e estado USM de um agente que saiu do polling."""
+        self.stats.pop(address, None)
+        self._usm.pop(address, None)
+
+    async def _exchange(self, target, build_message):
+        """Envia com timeout e retransmissões; ``build_message(request_id)`` gera o datagrama."""
+        loop = asyncio.get_running_loop()
+        stats = self.device_stats(target)
+        for _attempt in range(target.retries + 1):
+            request_id = self._next_id()
+            future = loop.create_future()
+            self._protocol.pending[request_id] = future
+            message = build_message(request_id)
+            self._protocol.transport.sendto(message, target.address)
+            stats.requests += 1
+            stats.bytes_sent += len(message)
+            try:
+                data = await asyncio.wait_for(future, target.timeout)
+            except asyncio.TimeoutError:
+                stats.timeouts += 1
+                continue
+            finally:
+                self._protocol.pending.pop(request_id, None)
+            stats.responses += 1
+            stats.bytes_received += len(data)
+            return data
+        raise snmp.SnmpTimeout(f"sem resposta de {target.host}:{target.port}")
+
+    async def request(self, target, pdu_type, oids, non_repeaters=0, max_repetitions=0):
+        varbinds, _ = await self.exchange_pdu(target, pdu_type, oids, non_repeaters, max_repetitions)
+        return varbinds
+
+    async def exchange_pdu(self, target, pdu_type, oids, non_repeaters=0, max_repetitions=0):
+        """Como ``request``, mas devolve também o tamanho da resposta em bytes."""
+        if target.version == 'v3':
+            return await self._request_v3(target, pdu_type, oids, non_repeaters, max_repetitions)
+
+        def build(request_id):
+            pdu = snmp.encode_pdu(pdu_type, request_id, oids, non_repeaters, max_repetitions)
+            return snmp.build_v2c_message(target.community, pdu)
+
+        data = await self._exchange(target, build)
+        return self._check(snmp.parse_v2c_message(data)), len(data)
+
+    async def _request_v3(self, target, pdu_type, oids, non_repeaters, max_repetitions):
+        state = self._usm.get(target.address)
+        if state is None or not state.engine_id:
+            state = await self._discover(target)
+
+        for _ in range(2):
+            auth_key = self._auth_key(target, state)
+
+            def build(request_id):
+                pdu = snmp.encode_pdu(pdu_type, request_id, oids, non_repeaters, max_repetitions)
+                return snmp.build_v3_message(
+                    request_id, target.user, pdu, state,
+                    auth_protocol=target.auth_protocol, auth_key=auth_key, now=time.monotonic(),
+                )
+
+            data = await self._exchange(target, build)
+            response = snmp.parse_v3_message(data)
+            if auth_key and response['flags'] & snmp.FLAG_AUTH:
+                if not snmp.verify_v3_auth(data, response['auth_params'], auth_key, target.auth_protocol):
+                    raise snmp.SnmpError(f"assinatura inválida na resposta de {target.host}")
+            if response['type'] == snmp.REPORT:
+                report_oid = response['varbinds'][0][0] if response['varbinds'] else ()
+                if report_oid in (USM_NOT_IN_TIME_WINDOW, USM_UNKNOWN_ENGINE_ID):
+                    self._sync(state, response)
+                    continue
+                raise snmp.SnmpError(f"report {snmp.format_oid(report_oid)} de {target.host}")
+            return self._check(response), len(data)
+        raise snmp.SnmpError(f"não foi possível sincronizar o engine de {target.host}")
+
+    async def _discover(self, target):
+        state = snmp.UsmState()
+
+        def build(request_id):
+            pdu = snmp.encode_pdu(snmp.GET_REQUEST, request_id, [])
+            return snmp.build_v3_message(request_id, b'', pdu, state)
+
+        response = snmp.parse_v3_message(await self._exchange(target, build))
+        self._sync(state, response)
+        self._usm[target.address] = state
+        return state
+
+    @staticmethod
+    def _sync(state, response):
+        if response['engine_id'] != state.engine_id:
+            state.localized_key = None
+        state.engine_id = response['engine_id']
+        state.engine_boots = response['engine_boots']
+        state.engine_time = response['engine_time']
+        state.synced_at = time.monotonic()
+
+    def _auth_key(self, target, state):
+        if not target.auth_protocol or not target.auth_password:
+            return None
+        if state.localized_key is None:
+            cache_key = (target.auth_password, target.auth_protocol)
+            master = self._keys.get(cache_key)
+            if master is None:
+                master = snmp.password_to_key(target.auth_password, target.auth_protocol)
+                self._keys[cache_key] = master
+            state.localized_key = snmp.localize_key(master, state.engine_id, target.auth_protocol)
+        return state.localized_key
+
+    @staticmethod
+    def _check(response):
+        if response['error_status'] == 1:
+            raise snmp.SnmpTooBig('resposta excede o tamanho máximo do agente (tooBig)')
+        if response['error_status']:
+            raise snmp.SnmpError(
+                f"erro SNMP {response['error_status']} no varbind {response['error_index']}"
+            )
+        return response['varbinds']
+
+    async def get(self, target, oids):
+        return await self.request(target, snmp.GET_REQUEST, oids)
+
+    async def get_next(self, target, oids):
+        return await self.request(target, snmp.GET_NEXT_REQUEST, oids)
+
+    async def get_bulk(self, target, oids, non_repeaters=0, max_repetitions=10):
+        return await self.request(target, snmp.GET_BULK_REQUEST, oids, non_repeaters, max_repetitions)
+
+
+def _plain(value):
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    if isinstance(value, tuple):
+        return snmp.format_oid(value)
+    if isinstance(value, snmp.EndOfMib):
+        return None
+    return value
+
+
+class PollJob:
+    __slots__ = ('key', 'target', 'interval', 'in_flight')
+
+    def __init__(self, key, target, interval):
+        self.key = key
+        self.target = target
+        self.interval = max(float(interval), 1.0)
+        self.in_flight = False
+
+
+class SnmpPoller:
+    """Motor de polling assíncrono que roda numa thread própria ao lado do Flask.
+
+    Todos os hosts compartilham um event loop e um socket UDP; o número de
+    requisições simultâneas é limitado por um semáforo, não por threads.
+    """
+
+    def __init__(self, concurrency=SNMP_CONCURRENCY, oids=None, tables=DEFAULT_TABLES):
+        self.concurrency = max(int(concurrency), 1)
+        self.oids = dict(oids or SYSTEM_OIDS)
+        self.tables = tuple(tables)
+        self.client = SnmpClient()
+        self._tuners = {}
+        self._jobs = {}
+        self._results = {}
+        self._listeners = []
+        self._notifier = SnapshotWorker('snmp-listeners')
+        self.scheduler = JitteredScheduler()
+        self._loop = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._wakeup = None
+        self._semaphore = None
+        self._lock = threading.Lock()
+
+    def add_listener(self, callback):
+        """Registra ``callback(key, result)``, chamado após cada poll.
+
+        Os listeners rodam em sequência numa thread própria, fora do event
+        loop: um consumidor lento atrasa os outros, mas não o polling.
+        """
+        self._listeners.append(callback)
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._ready.clear()
+            self._thread = threading.Thread(target=self._run, name='snmp-poller', daemon=True)
+            self._thread.start()
+        self._ready.wait(timeout=5)
+
+    @property
+    def running(self):
+        return self._ready.is_set() and self._thread is not None and self._thread.is_alive()
+
+    def stop(self):
+        loop = self._loop
+        if loop is not None and loop.is_running():
+            loop.call_soon_threadsafe(loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._wakeup = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        loop.run_until_complete(self.client.open())
+        with self._lock:
+            # A partir daqui toda alteração chega pelo próprio loop (_call).
+            for job in self._jobs.values():
+                self.scheduler.add(job.key, job.interval)
+            self._loop = loop
+        loop.create_task(self._dispatch())
+        loop.call_soon(self._ready.set)
+        try:
+            loop.run_forever()
+        finally:
+            pending = asyncio.all_tasks(loop)
+            for task in pending:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self.client.close()
+            with self._lock:
+                self._loop = None
+            loop.close()
+
+    def _call(self, func, *args):
+        with self._lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(func, *args)
+                return
+            func(*args)
+
+    def upsert(self, key, target, interval):
+        """Cadastra (ou atualiza) um host; pode ser chamado de qualquer thread."""
+        self._call(self._upsert, key, target, interval)
+
+    def remove(self, key):
+        self._call(self._remove, key)
+
+    def _upsert(self, key, target, interval):
+        job = self._jobs.get(key)
+        if job is None:
+            job = PollJob(key, target, interval)
+            self._jobs[key] = job
+        else:
+            previous, job.target = job.target.address, target
+            job.interval = max(float(interval), 1.0)
+            if previous != target.address:
+                self._forget(previous)
+        if self._loop is not None:
+            self.scheduler.add(key, job.interval)
+            self._wakeup.set()
+
+    def _remove(self, key):
+        job = self._jobs.pop(key, None)
+        self.scheduler.remove(key)
+        self._results.pop(key, None)
+        if job is not None:
+            self._forget(job.target.address)
+
+    def _forget(self, address):
+        if not any(other.target.address == address for other in self._jobs.values()):
+            self._tuners.pop(address, None)
+            self.client.forget(address)
+
+    async def _dispatch(self):
+        while True:
+            for key, due in self.scheduler.pop_due():
+                job = self._jobs.get(key)
+                if job is None:
+                    continue
+                if job.in_flight:
+                    # O poll anterior ainda não terminou: descarta este disparo.
+                    self.scheduler.mark_missed(key)
+                    continue
+                job.in_flight = True
+                asyncio.ensure_future(self._poll(job, due))
+            deadline = self.scheduler.next_deadline()
+            delay = deadline - time.monotonic() if deadline is not None else 3600
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(delay, 0))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll(self, job, due):
+        try:
+            await self._poll_once(job, due)
+        finally:
+            job.in_flight = False
+
+    async def _poll_once(self, job, due):
+        target = job.target
+        stats = self.client.device_stats(target)
+        before = stats.as_dict()
+        async with self._semaphore:
+            started = time.monotonic()
+            # Atraso entre o vencimento e o início real (fila do semáforo/loop).
+            self.scheduler.record_lag(started - due)
+            result = {"ok": False, "error": None, "values": {}, "tables": {}}
+            try:
+                scalars = await get_scalars(self.client, target, list(self.oids.values()))
+                result["values"] = {name: _plain(scalars.get(oid)) for name, oid in self.oids.items()}
+                result["rtt_ms"] = round((time.monotonic() - started) * 1000, 2)
+                if self.tables:
+                    tuner = self._tuners.get(target.address)
+                    if tuner is None:
+                        tuner = self._tuners[target.address] = RepetitionTuner()
+                    result["tables"] = await collect_tables(self.client, target, self.tables, tuner)
+                    result["max_repetitions"] = tuner.current
+                result["ok"] = True
+            except (snmp.SnmpError, OSError) as exc:
+                result["error"] = str(exc)
+            except Exception as exc:  # um host com resposta inesperada não pode derrubar o dispatcher
+                logger.exception('Falha inesperada no poll de %s', job.key)
+                result["error"] = f"{type(exc).__name__}: {exc}"
+            result.setdefault("rtt_ms", round((time.monotonic() - started) * 1000, 2))
+            result["duration_ms"] = round((time.monotonic() - started) * 1000, 2)
+            result["polled_at"] = time.time()
+        after = stats.as_dict()
+        # Custo deste poll (round-trips e bytes) e acumulado do dispositivo.
+        result["round_trips"] = after['requests'] - before['requests']
+        result["bytes_sent"] = after['bytes_sent'] - before['bytes_sent']
+        result["bytes_received"] = after['bytes_received'] - before['bytes_received']
+        result["device_stats"] = after
+        if job.key not in self._jobs:
+            # Removido durante o poll, que pode ter recriado os contadores do agente.
+            self._forget(target.address)
+            return
+        self._results[job.key] = result
+        if self._listeners:
+            self._notifier.submit(self._notify, job.key, result)
+
+    def _notify(self, key, result):
+        if key not in self._jobs:
+            return
+        for callback in list(self._listeners):
+            try:
+                callback(key, result)
+            except Exception:  # um consumidor com erro não pode parar os demais
+                logger.exception('Listener %r falhou para %s', callback, key)
+
+    def status(self, key=None):
+        if key is not None:
+            return self._results.get(key)
+        return dict(self._results)
+
+    def up_count(self):
+        return sum(1 for result in list(self._results.values()) if result['ok'])
+
+    def scheduler_stats(self):
+        return self.scheduler.stats()
+
+    def is_up(self, key):
+        result = self._results.get(key)
+        return bool(result and result['ok'])
+
+    def __len__(self):
+        return len(self._jobs)
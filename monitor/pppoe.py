@@ -0,0 +1,343 @@
+"""Sessões PPPoE ativas por concentrador, atualizadas por diferença entre snapshots.
+
+Cada snapshot (tabela completa de um BRAS/CCR) vira conexões, desconexões e
+alterações; índices por usuário e IP respondem buscas do suporte sem varrer
+as sessões, e o top de download é mantido por concentrador a cada alteração.
+"""
+
+import bisect
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from operator import itemgetter
+
+try:
+    from .snapshots import SnapshotWorker, latest_events
+except ImportError:  # fallback when executed as a script (python monitor/app.py)
+    from snapshots import SnapshotWorker, latest_events
+
+PPPOE_TOP_SIZE = int(os.getenv('MONITOR_PPPOE_TOP_SIZE', '1000'))
+PPPOE_EVENT_CAPACITY = int(os.getenv('MONITOR_PPPOE_EVENT_CAPACITY', '50000'))
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Linhas aplicadas por vez; entre blocos o lock é liberado para as consultas do suporte.
+SNAPSHOT_CHUNK = 5000
+TOP_FIELDS = ('download_bps', 'upload_bps', 'download_octets', 'upload_octets')
+# Candidatos guardados além do top: quem sai do top cai para a folga em vez de forçar uma varredura.
+TOP_SLACK = 0.25
+
+
+class PppoeSession:
+    __slots__ = ('concentrator', 'user', 'ip', 'interface', 'index', 'download_octets', 'upload_octets',
+                 'download_bps', 'upload_bps', 'connected_at', 'updated_at', 'signature')
+    FIELDS = __slots__[:-1]
+
+    def __init__(self, concentrator, user, timestamp):
+        self.concentrator = concentrator
+        self.user = user
+        self.ip = None
+        self.interface = None
+        self.index = None
+        self.download_octets = 0
+        self.upload_octets = 0
+        self.download_bps = 0.0
+        self.upload_bps = 0.0
+        self.connected_at = timestamp
+        self.updated_at = timestamp
+        self.signature = None
+
+    def as_dict(self):
+        record = {name: getattr(self, name) for name in self.FIELDS}
+        record['download_bps'] = round(self.download_bps, 1)
+        record['upload_bps'] = round(self.upload_bps, 1)
+        return record
+
+
+def _octets(value):
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _rate(current, previous, elapsed):
+    # Contador zerado (reinício da sessão ou do equipamento) não vira taxa negativa.
+    if elapsed <= 0 or current < previous:
+        return 0.0
+    return (current - previous) * 8 / elapsed
+
+
+class _TopList:
+    """Maiores valores de um campo num concentrador, em ``entries`` ``(-valor, chave)`` ordenadas.
+
+    ``floor`` é um limite superior para o valor de qualquer sessão fora da
+    lista; o trecho com valor >= ``floor`` é exatamente o top do concentrador.
+    Só quando esse trecho fica menor que o top pedido é preciso varrer as
+    sessões de novo (``valid``).
+    """
+
+    __slots__ = ('capacity', 'entries', 'values', 'floor')
+
+    def __init__(self, capacity, items=(), complete=True):
+        self.capacity = capacity
+        self.entries = sorted((-value, key) for key, value in items)[:capacity]
+        self.values = {key: -negative for negative, key in self.entries}
+        # Sem ninguém de fora (``complete``), nada limita as próximas entradas.
+        self.floor = -self.entries[-1][0] if self.entries and not complete else 0
+
+    def update(self, key, value):
+        old = self.values.get(key)
+        if old is not None:
+            if old == value:
+                return
+            del self.entries[bisect.bisect_left(self.entries, (-old, key))]
+        elif len(self.entries) >= self.capacity:
+            if value <= -self.entries[-1][0]:
+                self.floor = max(self.floor, value)
+                return
+            negative, evicted = self.entries.pop()
+            del self.values[evicted]
+            self.floor = max(self.floor, -negative)
+        bisect.insort(self.entries, (-value, key))
+        self.values[key] = value
+
+    def discard(self, key):
+        old = self.values.pop(key, None)
+        if old is not None:
+            del self.entries[bisect.bisect_left(self.entries, (-old, key))]
+
+    def valid(self, size):
+        # Entradas com valor >= floor não podem ter sido ultrapassadas por sessões de fora.
+        return bisect.bisect_right(self.entries, -self.floor, key=itemgetter(0)) >= size
+
+
+class PppoeSessionStore:
+    """Tabela de sessões com índices ``user -> {chaves}`` e ``ip -> chave``.
+
+    A chave de uma sessão é ``(concentrador, usuário)``. ``apply_snapshot``
+    recebe a tabela completa de um concentrador e devolve o resumo do diff;
+    sessões de outros concentradores não são tocadas.
+    """
+
+    def __init__(self, top_size=PPPOE_TOP_SIZE, event_capacity=PPPOE_EVENT_CAPACITY):
+        self.top_size = max(int(top_size), 1)
+        self.top_capacity = self.top_size + max(int(self.top_size * TOP_SLACK), 1)
+        self.sessions = {}
+        self.by_user = {}
+        self.by_ip = {}
+        self.by_concentrator = {}
+        self.events = deque(maxlen=max(int(event_capacity), 1))
+        self._top = {}
+        self._ordered = None
+        self._search_index = None
+        self._lock = threading.RLock()
+        self._worker = SnapshotWorker('pppoe-snapshot')
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def _index_ip(self, key, old_ip, new_ip):
+        if old_ip and self.by_ip.get(old_ip) == key:
+            del self.by_ip[old_ip]
+        if new_ip:
+            self.by_ip[new_ip] = key
+
+    def _connect(self, concentrator, user, timestamp, record_event=True):
+        key = (concentrator, user)
+        session = self.sessions[key] = PppoeSession(concentrator, user, timestamp)
+        self.by_user.setdefault(user, set()).add(key)
+        self.by_concentrator.setdefault(concentrator, set()).add(key)
+        if record_event:
+            self.events.append({"time": timestamp, "event": "connect", "concentrator": concentrator, "user": user})
+        self._ordered = None
+        self._search_index = None
+        return session
+
+    def _disconnect(self, key, timestamp):
+        session = self.sessions.pop(key)
+        self._index_ip(key, session.ip, None)
+        keys = self.by_user.get(session.user)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.by_user[session.user]
+        self.by_concentrator[session.concentrator].discard(key)
+        for top in self._top.get(session.concentrator, {}).values():
+            top.discard(key)
+        self.events.append({"time": timestamp, "event": "disconnect", "concentrator": session.concentrator,
+                            "user": session.user, "ip": session.ip,
+                            "duration_seconds": round(timestamp - session.connected_at, 1)})
+        self._ordered = None
+        self._search_index = None
+
+    def apply_snapshot(self, concentrator, rows, timestamp=None):
+        """Aplica a tabela completa ``rows`` (``user``, ``ip``, ``interface``, ``index``,
+        ``download_octets``, ``upload_octets``) como diff sobre as sessões atuais.
+
+        O primeiro snapshot de um concentrador não gera eventos de conexão
+        (as sessões já existiam antes de o monitor começar a olhar).
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        summary = {"connected": 0, "disconnected": 0, "changed": 0, "unchanged": 0, "invalid": 0}
+        with self._lock:
+            initial = concentrator not in self.by_concentrator
+            current = set(self.by_concentrator.setdefault(concentrator, set()))
+        seen = set()
+        rows = iter(rows)
+        while True:
+            chunk = list(itertools.islice(rows, SNAPSHOT_CHUNK))
+            if not chunk:
+                break
+            with self._lock:
+                self._apply_rows(concentrator, chunk, timestamp, seen, summary, not initial)
+        with self._lock:
+            for key in current - seen:
+                if key in self.sessions:
+                    self._disconnect(key, timestamp)
+                    summary["disconnected"] += 1
+            size = min(self.top_size, len(self.by_concentrator.get(concentrator, ())))
+            for field, top in self._tops(concentrator).items():
+                if not top.valid(size):
+                    self._rebuild_top(concentrator, field)
+        summary["sessions"] = len(seen)
+        return summary
+
+    def submit_snapshot(self, concentrator, rows, timestamp=None):
+        return self._worker.submit(self.apply_snapshot, concentrator, rows, timestamp)
+
+    def _apply_rows(self, concentrator, rows, timestamp, seen, summary, record_events):
+        sessions = self.sessions
+        tops = self._tops(concentrator)
+        for row in rows:
+            get = row.get
+            user = get('user')
+            if user and not isinstance(user, str):
+                user = str(user)
+            if not user:
+                summary["invalid"] += 1
+                continue
+            key = (concentrator, user)
+            if key in seen:
+                summary["invalid"] += 1
+                continue
+            seen.add(key)
+            # Compara a linha crua com a anterior; só normaliza o que mudou.
+            signature = (get('ip'), get('interface'), get('index'), get('download_octets'), get('upload_octets'))
+            session = sessions.get(key)
+            if session is None:
+                session = self._connect(concentrator, user, timestamp, record_events)
+                summary["connected"] += 1
+            elif session.signature == signature:
+                summary["unchanged"] += 1
+                continue
+            else:
+                summary["changed"] += 1
+            download, upload = _octets(signature[3]), _octets(signature[4])
+            if session.signature is not None:
+                elapsed = timestamp - session.updated_at
+                session.download_bps = _rate(download, session.download_octets, elapsed)
+                session.upload_bps = _rate(upload, session.upload_octets, elapsed)
+            ip = str(signature[0]).strip() if signature[0] else None
+            if ip != session.ip:
+                self._index_ip(key, session.ip, ip)
+                session.ip = ip
+                self._search_index = None
+            session.interface, session.index = signature[1], signature[2]
+            session.download_octets, session.upload_octets = download, upload
+            session.signature = signature
+            session.updated_at = timestamp
+            for field, top in tops.items():
+                top.update(key, getattr(session, field))
+
+    def _tops(self, concentrator):
+        tops = self._top.get(concentrator)
+        if tops is None:
+            tops = self._top[concentrator] = {field: _TopList(self.top_capacity) for field in TOP_FIELDS}
+        return tops
+
+    def _rebuild_top(self, concentrator, field):
+        keys = self.by_concentrator.get(concentrator, ())
+        items = heapq.nlargest(self.top_capacity, ((key, getattr(self.sessions[key], field)) for key in keys),
+                               key=itemgetter(1))
+        self._top[concentrator][field] = _TopList(self.top_capacity, items, complete=len(keys) <= len(items))
+
+    def remove_concentrator(self, concentrator, timestamp=None):
+        with self._lock:
+            for key in list(self.by_concentrator.get(concentrator, ())):
+                self._disconnect(key, time.time() if timestamp is None else timestamp)
+            self.by_concentrator.pop(concentrator, None)
+            self._top.pop(concentrator, None)
+
+    def lookup(self, user=None, ip=None):
+        """Sessões de um usuário (em qualquer concentrador) ou a dona de um IP."""
+        with self._lock:
+            keys = set()
+            if user:
+                keys |= self.by_user.get(user, set())
+            if ip and ip in self.by_ip:
+                keys.add(self.by_ip[ip])
+            return [self.sessions[key].as_dict() for key in sorted(keys)]
+
+    def top(self, n=10, field='download_bps', concentrator=None):
+        if field not in TOP_FIELDS:
+            raise ValueError(f"campo de ordenação desconhecido: {field}")
+        n = min(max(int(n), 1), self.top_size)
+        with self._lock:
+            if concentrator:
+                lists = [self._top[concentrator][field].entries] if concentrator in self._top else []
+            else:
+                lists = [top[field].entries for top in self._top.values()]
+            # Cada lista já está ordenada: a fusão lê só os primeiros ``n`` itens.
+            merged = heapq.merge(*lists)
+            return [self.sessions[key].as_dict() for (_, key), _ in zip(merged, range(n))]
+
+    def _ordered_keys(self):
+        if self._ordered is None:
+            self._ordered = sorted(self.sessions)
+        return self._ordered
+
+    def _searchable(self):
+        # "usuario ip" em minúsculas, na mesma ordem da paginação; refeito após conexões/desconexões.
+        if self._search_index is None:
+            self._search_index = [
+                (key, f"{key[1].lower()} {self.sessions[key].ip or ''}") for key in self._ordered_keys()
+            ]
+        return self._search_index
+
+    def page(self, page=1, per_page=DEFAULT_PAGE_SIZE, concentrator=None, search=None):
+        """Página de sessões ordenadas por (concentrador, usuário); ``search`` casa usuário/IP.
+
+        Um ``search`` igual a um usuário ou IP existente é respondido pelos
+        índices; caso contrário procura o trecho em usuário e IP.
+        """
+        per_page = min(max(int(per_page), 1), MAX_PAGE_SIZE)
+        page = max(int(page), 1)
+        with self._lock:
+            if search and (search in self.by_user or search in self.by_ip):
+                keys = set(self.by_user.get(search, ()))
+                if search in self.by_ip:
+                    keys.add(self.by_ip[search])
+                keys = sorted(keys)
+            else:
+                keys = self._ordered_keys()
+                if search:
+                    needle = search.lower()
+                    keys = [key for key, text in self._searchable() if needle in text]
+            if concentrator:
+                keys = [key for key in keys if key[0] == concentrator]
+            start = (page - 1) * per_page
+            return [self.sessions[key].as_dict() for key in keys[start:start + per_page]], len(keys)
+
+    def recent_events(self, limit=100, user=None):
+        with self._lock:
+            return latest_events(self.events, limit, user=user)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "sessions": len(self.sessions),
+                "concentrators": {name: len(keys) for name, keys in self.by_concentrator.items()},
+            }
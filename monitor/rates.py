@@ -0,0 +1,190 @@
+"""Taxas das interfaces (bps) a partir dos contadores de octetos de cada poll.
+
+Por equipamento ficam só arrays: ifIndex ordenado, contadores anteriores
+(``uint64``), largura do contador e velocidade. Cada poll casa os ifIndex
+novos com os anteriores por ``searchsorted`` e calcula todas as taxas numa
+operação só, tratando a volta de contadores de 32/64 bits e o reinício do
+equipamento (``sysUpTime`` menor que o esperado), além do top-N do equipamento.
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+try:
+    from .snapshots import SnapshotWorker
+except ImportError:  # fallback when executed as a script (python monitor/app.py)
+    from snapshots import SnapshotWorker
+
+RATES_TOP_SIZE = int(os.getenv('MONITOR_RATES_TOP_SIZE', '10'))
+# Taxa acima de velocidade x este fator (ou de MAX_RATE_BPS, sem velocidade conhecida) é
+# tratada como contador zerado, não como volta do contador.
+MAX_SPEED_FACTOR = 1.5
+MAX_RATE_BPS = 4e12
+UPTIME_WRAP = 1 << 32
+# Tolerância (s) entre o relógio do monitor e o sysUpTime ao detectar reinício.
+UPTIME_SLACK = 30
+_MASK_32 = np.uint64(0xFFFFFFFF)
+
+
+def rebooted(previous_uptime, uptime, elapsed):
+    """``True`` se o sysUpTime (centésimos) andou menos do que o relógio indica, descontada a volta em 2**32."""
+    if previous_uptime is None or uptime is None:
+        return False
+    # Atraso do sysUpTime em relação ao esperado, módulo 2**32 (volta a cada 497 dias).
+    behind = (previous_uptime + int(elapsed * 100) - uptime) % UPTIME_WRAP
+    return UPTIME_SLACK * 100 < behind < UPTIME_WRAP // 2
+
+
+class DeviceCounters:
+    __slots__ = ('index', 'in_octets', 'out_octets', 'bits', 'speed', 'names', 'in_bps', 'out_bps',
+                 'timestamp', 'uptime', 'top', 'resets')
+
+    def __init__(self):
+        self.index = np.empty(0, dtype=np.int64)
+        self.in_octets = np.empty(0, dtype=np.uint64)
+        self.out_octets = np.empty(0, dtype=np.uint64)
+        self.bits = np.empty(0, dtype=np.uint8)
+        self.speed = np.empty(0)
+        self.names = []
+        self.in_bps = np.empty(0)
+        self.out_bps = np.empty(0)
+        self.timestamp = None
+        self.uptime = None
+        self.top = []
+        self.resets = 0
+
+    def totals(self):
+        return float(np.nansum(self.in_bps)), float(np.nansum(self.out_bps))
+
+
+def _deltas(current, previous, bits):
+    # Subtração em uint64 já dá a volta módulo 2**64; contadores de 32 bits são mascarados.
+    delta = current - previous
+    return np.where(bits == 32, delta & _MASK_32, delta)
+
+
+class CounterRates:
+    """Estado dos contadores de todos os equipamentos; ``update`` recebe arrays, ``apply_interfaces`` as linhas do coletor.
+
+    Um contador menor que o anterior deu a volta (diferença módulo 2**32 ou
+    2**64) se a taxa resultante couber na velocidade da interface; senão foi
+    zerado (limpeza de contadores, interface recriada) e a taxa fica para o
+    próximo poll. Depois de reinício do equipamento o poll só serve de base.
+    """
+
+    def __init__(self, top_size=RATES_TOP_SIZE):
+        self.top_size = max(int(top_size), 1)
+        self.devices = {}
+        self._lock = threading.RLock()
+        self._worker = SnapshotWorker('counter-rates')
+
+    def update(self, device, index, in_octets, out_octets, timestamp=None, uptime=None, bits=None, speed_mbps=None,
+               names=None):
+        timestamp = time.time() if timestamp is None else timestamp
+        index = np.asarray(index, dtype=np.int64)
+        order = np.argsort(index, kind='stable')
+        index = index[order]
+        in_octets = np.asarray(in_octets, dtype=np.uint64)[order]
+        out_octets = np.asarray(out_octets, dtype=np.uint64)[order]
+        bits = np.full(len(index), 64, dtype=np.uint8) if bits is None else np.asarray(bits, dtype=np.uint8)[order]
+        speed = np.full(len(index), np.nan) if speed_mbps is None else np.asarray(speed_mbps, dtype=np.float64)[order]
+        names = [str(value) for value in index] if names is None else [names[position] for position in order.tolist()]
+
+        with self._lock:
+            state = self.devices.get(device) or DeviceCounters()
+            in_bps = np.full(len(index), np.nan)
+            out_bps = np.full(len(index), np.nan)
+            elapsed = timestamp - state.timestamp if state.timestamp is not None else 0
+            reset = rebooted(state.uptime, uptime, elapsed)
+            if elapsed > 0 and not reset and len(state.index):
+                position = np.minimum(np.searchsorted(state.index, index), len(state.index) - 1)
+                matched = (state.index[position] == index) & (state.bits[position] == bits)
+                previous_in = state.in_octets[position]
+                previous_out = state.out_octets[position]
+                delta_in = _deltas(in_octets, previous_in, bits).astype(np.float64)
+                delta_out = _deltas(out_octets, previous_out, bits).astype(np.float64)
+                in_rate, out_rate = delta_in * 8 / elapsed, delta_out * 8 / elapsed
+                limit = np.where(speed > 0, speed * 1e6 * MAX_SPEED_FACTOR, MAX_RATE_BPS)
+                valid = matched & (in_rate <= limit) & (out_rate <= limit)
+                in_bps[valid] = in_rate[valid]
+                out_bps[valid] = out_rate[valid]
+                state.resets += int((matched & ~valid).sum())
+            elif reset:
+                state.resets += 1
+            state.index, state.in_octets, state.out_octets, state.bits = index, in_octets, out_octets, bits
+            state.speed, state.names, state.in_bps, state.out_bps = speed, names, in_bps, out_bps
+            state.timestamp, state.uptime = timestamp, uptime
+            state.top = self._top(state)
+            self.devices[device] = state
+            total_in, total_out = state.totals()
+        return {"interfaces": len(index), "rated": int((~np.isnan(in_bps)).sum()), "rebooted": reset,
+                "total_in_bps": total_in, "total_out_bps": total_out}
+
+    def _top(self, state):
+        load = np.nan_to_num(state.in_bps) + np.nan_to_num(state.out_bps)
+        count = min(self.top_size, len(load))
+        if not count:
+            return []
+        best = np.argpartition(load, len(load) - count)[len(load) - count:]
+        best = best[np.argsort(load[best], kind='stable')[::-1]]
+        return [
+            {"name": state.names[position], "index": int(state.index[position]),
+             "in_mbps": round(float(np.nan_to_num(state.in_bps[position])) / 1e6, 1),
+             "out_mbps": round(float(np.nan_to_num(state.out_bps[position])) / 1e6, 1)}
+            for position in best.tolist() if load[position] > 0
+        ]
+
+    def apply_interfaces(self, device, rows, timestamp=None, uptime=None):
+        """Converte as linhas de ``interfaces`` do coletor (``index``, ``name``, ``in_octets``, ``out_octets``,
+        ``counter_bits``, ``speed_mbps``) e chama ``update``; linhas sem contador são ignoradas."""
+        rows = [row for row in rows if row.get('index') is not None
+                and isinstance(row.get('in_octets'), int) and isinstance(row.get('out_octets'), int)]
+        count = len(rows)
+        return self.update(
+            device,
+            np.fromiter((row['index'] for row in rows), dtype=np.int64, count=count),
+            np.fromiter((row['in_octets'] for row in rows), dtype=np.uint64, count=count),
+            np.fromiter((row['out_octets'] for row in rows), dtype=np.uint64, count=count),
+            timestamp, uptime,
+            bits=np.fromiter((row.get('counter_bits') or 64 for row in rows), dtype=np.uint8, count=count),
+            speed_mbps=np.fromiter((row.get('speed_mbps') or np.nan for row in rows), dtype=np.float64, count=count),
+            names=[row.get('name') or str(row['index']) for row in rows],
+        )
+
+    def submit_interfaces(self, device, rows, timestamp=None, uptime=None):
+        return self._worker.submit(self.apply_interfaces, device, rows, timestamp, uptime)
+
+    def remove_device(self, device):
+        with self._lock:
+            self.devices.pop(device, None)
+
+    def traffic(self, device, n=None):
+        """Totais e top do equipamento no formato ``trafego`` da demo (``None`` se ainda não foi coletado)."""
+        with self._lock:
+            state = self.devices.get(device)
+            if state is None:
+                return None
+            total_in, total_out = state.totals()
+            return {
+                "total_in_mbps": round(total_in / 1e6, 1),
+                "total_out_mbps": round(total_out / 1e6, 1),
+                "interfaces_top": state.top[:n or self.top_size],
+                "interfaces": len(state.index),
+                "counter_resets": state.resets,
+                "updated_at": state.timestamp,
+            }
+
+    def fleet(self):
+        """Totais por equipamento, do mais carregado para o menos."""
+        with self._lock:
+            devices = [(device, state.totals(), len(state.index), state.timestamp)
+                       for device, state in self.devices.items()]
+        devices.sort(key=lambda item: item[1][0] + item[1][1], reverse=True)
+        return [
+            {"device": device, "total_in_mbps": round(total_in / 1e6, 1), "total_out_mbps": round(total_out / 1e6, 1),
+             "interfaces": interfaces, "updated_at": updated_at}
+            for device, (total_in, total_out), interfaces, updated_at in devices
+        ]
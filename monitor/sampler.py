@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+
+import psutil
+
+SAMPLE_INTERVAL = float(os.getenv('MONITOR_SAMPLE_INTERVAL', '5'))
+# Quanto ``snapshot()`` espera pela primeira amostra logo depois de o sampler subir.
+FIRST_SAMPLE_TIMEOUT = 2.0
+FIRST_CPU_INTERVAL = 0.3
+
+
+def _disk_path():
+    return os.getenv('MONITOR_DISK_PATH') or os.path.abspath(os.sep)
+
+
+def _collect_disks():
+    disks = []
+    for part in psutil.disk_partitions():
+        try:
+            usage = psutil.disk_usage(part.mountpoint)
+        except (PermissionError, OSError):
+            continue
+        disks.append({
+            "device": part.device,
+            "mountpoint": part.mountpoint,
+            "fstype": part.fstype,
+            "percent": usage.percent,
+            "total": usage.total,
+            "used": usage.used,
+            "free": usage.free,
+        })
+    return disks
+
+
+def collect_sample(cpu_interval=None):
+    """Lê CPU, memória e discos uma vez e devolve um snapshot imutável."""
+    cpu_percent = psutil.cpu_percent(interval=cpu_interval)
+    mem = psutil.virtual_memory()
+    disks = _collect_disks()
+    max_disk_percent = max((disk['percent'] for disk in disks), default=0.0)
+
+    try:
+        disk_percent = psutil.disk_usage(_disk_path()).percent
+    except (PermissionError, OSError):
+        disk_percent = max_disk_percent
+
+    return {
+        "timestamp": time.time(),
+        "cpu_percent": cpu_percent,
+        "memory": mem._asdict(),
+        "disk_percent": disk_percent,
+        "max_disk_percent": max_disk_percent,
+        "disks": disks,
+    }
+
+
+class LocalSampler:
+    """Amostra o host local em uma thread de fundo.
+
+    As rotas leem apenas o último snapshot, sem bloquear em ``cpu_percent``.
+    O app chama ``start()`` ao carregar (e de novo em cada worker criado via
+    fork), então histórico, métricas e listeners recebem amostras desde o
+    início, sem depender de uma rota ler o snapshot.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = max(float(interval), 0.5)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._latest = None
+        self._first = threading.Event()
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """Registra ``callback(sample)``, chamado a cada nova amostra."""
+        self._listeners.append(callback)
+
+    def start(self):
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._stop.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='local-sampler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=self.interval + 1)
+
+    def _run(self):
+        # A primeira leitura mede um intervalo curto para não publicar 0.0;
+        # as seguintes usam o delta desde a amostra anterior.
+        cpu_interval = FIRST_CPU_INTERVAL
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                sample = collect_sample(cpu_interval=cpu_interval)
+            except Exception:  # mantém a thread viva se o psutil falhar pontualmente
+                sample = None
+            if sample is not None:
+                self._publish(sample)
+            cpu_interval = None
+            elapsed = time.monotonic() - started
+            self._stop.wait(max(self.interval - elapsed, 0.0))
+
+    def snapshot(self):
+        """Devolve o último snapshot; só espera se a primeira amostra ainda não saiu."""
+        self.start()
+        latest = self._latest
+        if latest is None:
+            # Um cpu_percent(interval=None) sem leitura anterior não mede nada: aguarda a
+            # primeira amostra da thread e, se ela falhar, mede aqui sem publicar.
+            self._first.wait(FIRST_SAMPLE_TIMEOUT)
+            latest = self._latest or collect_sample(cpu_interval=FIRST_CPU_INTERVAL)
+        return latest
+
+    def _publish(self, sample):
+        self._latest = sample
+        self._first.set()
+        for callback in list(self._listeners):
+            try:
+                callback(sample)
+            except Exception:  # um consumidor com erro não pode derrubar a amostragem
+                continue
@@ -0,0 +1,136 @@
+import heapq
+import itertools
+import math
+import time
+import zlib
+
+
+class ScheduledJob:
+    __slots__ = ('key', 'interval', 'phase', 'due', 'generation', 'missed')
+
+    def __init__(self, key, interval, phase, due):
+        self.key = key
+        self.interval = interval
+        self.phase = phase
+        self.due = due
+        self.generation = 0
+        self.missed = 0
+
+
+def stable_phase(key, interval):
+    """Fase determinística em ``[0, interval)``; igual entre reinícios e processos."""
+    bucket = zlib.crc32(str(key).encode('utf-8')) / 0xFFFFFFFF
+    return bucket * interval
+
+
+class JitteredScheduler:
+    """Agenda jobs periódicos espalhando a fase de cada um ao longo do intervalo.
+
+    Cada job dispara em ``k * interval + fase`` (alinhado ao relógio de parede),
+    então 5.000 hosts com ``polling = 60`` viram ~83 polls/s em vez de uma
+    rajada por minuto. O próximo vencimento é sempre ``vencimento + interval``
+    (sem deriva); se o loop atrasar mais de um intervalo, os disparos perdidos
+    são contados e pulados em vez de acumulados. Operações são O(log n) num heap.
+    """
+
+    def __init__(self, clock=time.monotonic, wall_clock=time.time):
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self._jobs = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._generations = itertools.count()
+        self.missed_deadlines = 0
+        self.dispatched = 0
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+        self.last_lag = 0.0
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def __contains__(self, key):
+        return key in self._jobs
+
+    def _first_due(self, interval, phase):
+        now, wall = self._clock(), self._wall_clock()
+        slot = math.floor((wall - phase) / interval) * interval + phase
+        if slot <= wall:
+            slot += interval
+        return now + (slot - wall)
+
+    def add(self, key, interval):
+        """Cadastra ou atualiza um job; mudar o intervalo recalcula a fase."""
+        interval = float(interval)
+        job = self._jobs.get(key)
+        if job is not None and job.interval == interval:
+            return job
+        phase = stable_phase(key, interval)
+        if job is None:
+            job = ScheduledJob(key, interval, phase, self._first_due(interval, phase))
+            self._jobs[key] = job
+        else:
+            job.interval = interval
+            job.phase = phase
+            job.due = self._first_due(interval, phase)
+        # Geração única: entradas antigas no heap (remoção/alteração) são ignoradas.
+        job.generation = next(self._generations)
+        heapq.heappush(self._heap, (job.due, next(self._seq), key, job.generation))
+        return job
+
+    def remove(self, key):
+        self._jobs.pop(key, None)
+
+    def next_deadline(self):
+        while self._heap:
+            due, _, key, generation = self._heap[0]
+            job = self._jobs.get(key)
+            if job is not None and job.generation == generation:
+                return due
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_due(self, now=None):
+        """Devolve ``[(key, vencimento), ...]`` vencidos e já reagenda cada um."""
+        now = self._clock() if now is None else now
+        ready = []
+        while self._heap and self._heap[0][0] <= now:
+            due, _, key, generation = heapq.heappop(self._heap)
+            job = self._jobs.get(key)
+            if job is None or job.generation != generation:
+                continue
+            next_due = due + job.interval
+            if next_due <= now:
+                skipped = math.floor((now - due) / job.interval)
+                job.missed += skipped
+                self.missed_deadlines += skipped
+                next_due = due + (skipped + 1) * job.interval
+            job.due = next_due
+            heapq.heappush(self._heap, (next_due, next(self._seq), key, generation))
+            ready.append((key, due))
+        return ready
+
+    def mark_missed(self, key):
+        """Um disparo foi descartado (ex.: o poll anterior ainda não terminou)."""
+        job = self._jobs.get(key)
+        if job is not None:
+            job.missed += 1
+        self.missed_deadlines += 1
+
+    def record_lag(self, lag):
+        lag = max(lag, 0.0)
+        self.dispatched += 1
+        self.lag_total += lag
+        self.last_lag = lag
+        if lag > self.lag_max:
+            self.lag_max = lag
+
+    def stats(self):
+        return {
+            "jobs": len(self._jobs),
+            "dispatched": self.dispatched,
+            "missed_deadlines": self.missed_deadlines,
+            "lag_avg_ms": round(self.lag_total / self.dispatched * 1000, 2) if self.dispatched else 0.0,
+            "lag_max_ms": round(self.lag_max * 1000, 2),
+            "lag_last_ms": round(self.last_lag * 1000, 2),
+        }
@@ -0,0 +1,156 @@
+"""Sketches de fluxo com memória e erro limitados: Space-Saving e Count-Min.
+
+Ambos recebem lotes (arrays numpy de chaves ``uint64`` e pesos) e podem ser
+mesclados entre janelas de tempo ou entre processos coletores
+(``merge``/``to_dict``/``from_dict``).
+"""
+
+import numpy as np
+
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+DEFAULT_SEED = 0x5EED
+
+
+def _mix64(keys):
+    # Finalizador do SplitMix64: espalha chaves estruturadas (IPs, portas) antes do hash por linha.
+    x = np.asarray(keys, dtype=np.uint64)
+    x = x ^ (x >> np.uint64(30))
+    x = x * _MIX_1
+    x = x ^ (x >> np.uint64(27))
+    x = x * _MIX_2
+    return x ^ (x >> np.uint64(31))
+
+
+def _group(keys, weights):
+    """Soma os pesos por chave dentro de um lote: ``(chaves únicas, somas int64)``."""
+    unique, inverse = np.unique(np.asarray(keys, dtype=np.uint64), return_inverse=True)
+    sums = np.bincount(inverse, weights=np.asarray(weights, dtype=np.float64), minlength=len(unique))
+    return unique, np.rint(sums).astype(np.int64)
+
+
+class SpaceSaving:
+    """Heavy hitters com no máximo ``capacity`` contadores.
+
+    Guardado na forma Misra-Gries equivalente (Agarwal et al., "Mergeable
+    Summaries"): ``counts`` são limites inferiores, e o erro de qualquer
+    chave é no máximo ``error_bound() <= total / (capacity + 1)``. Lotes e
+    mesclas usam a mesma redução (soma e subtrai o ``capacity+1``-ésimo
+    maior contador), então o limite vale após qualquer número de mesclas.
+    Os contadores ficam ordenados do maior para o menor: o top-N é uma fatia.
+    """
+
+    def __init__(self, capacity=256):
+        self.capacity = max(int(capacity), 1)
+        self.keys = np.empty(0, dtype=np.uint64)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.total = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def update(self, keys, weights):
+        if not len(keys):
+            return
+        unique, sums = _group(keys, weights)
+        self.total += int(sums.sum())
+        self._combine(unique, sums)
+
+    def merge(self, other):
+        if other.capacity != self.capacity:
+            raise ValueError('SpaceSaving com capacidades diferentes')
+        self.total += other.total
+        self._combine(other.keys, other.counts)
+
+    def _combine(self, keys, counts):
+        if len(self.keys):
+            keys, counts = _group(np.concatenate((self.keys, keys)), np.concatenate((self.counts, counts)))
+        if len(keys) > self.capacity:
+            cut = np.partition(counts, len(counts) - self.capacity - 1)[len(counts) - self.capacity - 1]
+            counts = counts - cut
+            keep = counts > 0
+            keys, counts = keys[keep], counts[keep]
+        order = np.argsort(counts, kind='stable')[::-1]
+        self.keys, self.counts = keys[order], counts[order]
+
+    def error_bound(self):
+        return (self.total - int(self.counts.sum())) // (self.capacity + 1)
+
+    def top(self, n):
+        """``[(chave, limite_inferior, limite_superior), ...]`` dos ``n`` maiores."""
+        error = self.error_bound()
+        return [(key, count, count + error)
+                for key, count in zip(self.keys[:n].tolist(), self.counts[:n].tolist())]
+
+    def to_dict(self):
+        return {"capacity": self.capacity, "total": self.total,
+                "keys": self.keys.tolist(), "counts": self.counts.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['capacity'])
+        sketch.total = int(data.get('total', 0))
+        sketch._combine(np.asarray(data.get('keys', []), dtype=np.uint64),
+                        np.asarray(data.get('counts', []), dtype=np.int64))
+        return sketch
+
+
+class CountMinSketch:
+    """Estimativa de peso por chave em ``depth x width`` contadores.
+
+    A estimativa nunca fica abaixo do valor real e, com probabilidade
+    ``1 - e**-depth``, passa dele no máximo ``e / width`` do total. A largura
+    é arredondada para potência de dois (hash multiply-shift); sketches com a
+    mesma largura, profundidade e semente somam tabela a tabela.
+    """
+
+    def __init__(self, width=1024, depth=4, seed=DEFAULT_SEED):
+        self.width = 1 << max(int(width) - 1, 1).bit_length()
+        self.depth = max(int(depth), 1)
+        self.seed = int(seed)
+        self.table = np.zeros((self.depth, self.width), dtype=np.int64)
+        self.total = 0
+        rng = np.random.default_rng(self.seed)
+        self._multipliers = rng.integers(1, 2 ** 63, size=self.depth, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._offsets = rng.integers(0, 2 ** 63, size=self.depth, dtype=np.uint64)
+        self._shift = np.uint64(64 - (self.width.bit_length() - 1))
+
+    def _columns(self, keys):
+        mixed = _mix64(keys)
+        return [((mixed * self._multipliers[row] + self._offsets[row]) >> self._shift).astype(np.intp)
+                for row in range(self.depth)]
+
+    def update(self, keys, weights):
+        if not len(keys):
+            return
+        weights = np.asarray(weights, dtype=np.float64)
+        for row, columns in enumerate(self._columns(keys)):
+            self.table[row] += np.rint(np.bincount(columns, weights=weights, minlength=self.width)).astype(np.int64)
+        self.total += int(round(weights.sum()))
+
+    def estimate(self, keys):
+        columns = self._columns(keys)
+        return np.min([self.table[row][columns[row]] for row in range(self.depth)], axis=0)
+
+    def compatible(self, other):
+        return (self.width, self.depth, self.seed) == (other.width, other.depth, other.seed)
+
+    def merge(self, other):
+        if not self.compatible(other):
+            raise ValueError('CountMinSketch com largura/profundidade/semente diferentes')
+        self.table += other.table
+        self.total += other.total
+
+    def to_dict(self):
+        return {"width": self.width, "depth": self.depth, "seed": self.seed, "total": self.total,
+                "table": self.table.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['width'], data['depth'], data.get('seed', DEFAULT_SEED))
+        table = np.asarray(data['table'], dtype=np.int64)
+        if table.shape != sketch.table.shape:
+            raise ValueError('tabela do CountMinSketch com formato inválido')
+        sketch.table = table
+        sketch.total = int(data.get('total', 0))
+        return sketch
@@ -0,0 +1,40 @@
+"""Apoio comum dos stores alimentados pelo poller (PPPoE, ARP, BGP, OSPF, topologia, ópticos, taxas).
+
+Os listeners do poller rodam em sequência numa única thread; aplicar um
+snapshot é trabalho de CPU e fica numa thread própria de cada store. Uma
+thread só por store mantém os snapshots do mesmo equipamento na ordem em que chegaram.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class SnapshotWorker:
+    """Executor de uma thread, criado sob demanda e recriado em processos filhos (fork)."""
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    def submit(self, func, *args):
+        """Agenda ``func(*args)`` na thread do store; devolve o ``Future``."""
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(1, thread_name_prefix=self.name)
+                    self._pid = os.getpid()
+        return self._executor.submit(func, *args)
+
+
+def latest_events(events, limit=100, **filters):
+    """Até ``limit`` eventos, do mais recente para o mais antigo.
+
+    ``filters`` compara campos do evento (``type=``, ``router=``...); filtros
+    vazios são ignorados. Quem chama segura o lock do store.
+    """
+    wanted = [(field, value) for field, value in filters.items() if value]
+    selected = (event for event in reversed(events) if all(event[field] == value for field, value in wanted))
+    return [event for event, _ in zip(selected, range(max(int(limit), 1)))]
@@ -0,0 +1,387 @@
+"""Codificação BER e mensagens SNMP v2c/v3 (USM) usadas pelo poller.
+
+Implementação mínima e sem dependências externas: cobre GET, GETNEXT e
+GETBULK, respostas/relatórios e autenticação USM HMAC-MD5-96/HMAC-SHA-96.
+Privacidade (criptografia) do v3 não é suportada.
+"""
+
+import hashlib
+import hmac
+
+# Tipos universais/aplicação
+INTEGER = 0x02
+OCTET_STRING = 0x04
+NULL = 0x05
+OBJECT_IDENTIFIER = 0x06
+SEQUENCE = 0x30
+IP_ADDRESS = 0x40
+COUNTER32 = 0x41
+GAUGE32 = 0x42
+TIMETICKS = 0x43
+OPAQUE = 0x44
+COUNTER64 = 0x46
+NO_SUCH_OBJECT = 0x80
+NO_SUCH_INSTANCE = 0x81
+END_OF_MIB_VIEW = 0x82
+
+# PDUs
+GET_REQUEST = 0xA0
+GET_NEXT_REQUEST = 0xA1
+RESPONSE = 0xA2
+GET_BULK_REQUEST = 0xA5
+REPORT = 0xA8
+
+VERSION_V2C = 1
+VERSION_V3 = 3
+
+USM_SECURITY_MODEL = 3
+FLAG_AUTH = 0x01
+FLAG_REPORTABLE = 0x04
+AUTH_PARAMS_LENGTH = 12
+MAX_MESSAGE_SIZE = 65507
+
+
+class SnmpError(Exception):
+    pass
+
+
+class SnmpDecodeError(SnmpError):
+    pass
+
+
+class SnmpTimeout(SnmpError):
+    pass
+
+
+class SnmpTooBig(SnmpError):
+    pass
+
+
+class EndOfMib:
+    """Marcador para noSuchObject/noSuchInstance/endOfMibView."""
+
+    __slots__ = ('tag',)
+
+    def __init__(self, tag):
+        self.tag = tag
+
+    def __repr__(self):
+        names = {NO_SUCH_OBJECT: 'noSuchObject', NO_SUCH_INSTANCE: 'noSuchInstance', END_OF_MIB_VIEW: 'endOfMibView'}
+        return names.get(self.tag, hex(self.tag))
+
+    def __eq__(self, other):
+        return isinstance(other, EndOfMib) and other.tag == self.tag
+
+    def __hash__(self):
+        return hash(('EndOfMib', self.tag))
+
+
+# BER encode
+
+def encode_length(length):
+    if length < 0x80:
+        return bytes((length,))
+    raw = length.to_bytes((length.bit_length() + 7) // 8, 'big')
+    return bytes((0x80 | len(raw),)) + raw
+
+
+def encode_tlv(tag, payload):
+    return bytes((tag,)) + encode_length(len(payload)) + payload
+
+
+def encode_integer(value, tag=INTEGER):
+    length = max(1, (value.bit_length() + 8) // 8)
+    return encode_tlv(tag, value.to_bytes(length, 'big', signed=True))
+
+
+def encode_unsigned(value, tag):
+    length = max(1, (value.bit_length() + 8) // 8)
+    return encode_tlv(tag, value.to_bytes(length, 'big', signed=False))
+
+
+def encode_octets(value, tag=OCTET_STRING):
+    if isinstance(value, str):
+        value = value.encode('utf-8')
+    return encode_tlv(tag, bytes(value))
+
+
+def parse_oid(oid):
+    if isinstance(oid, tuple):
+        return oid
+    return tuple(int(part) for part in oid.strip('.').split('.'))
+
+
+def format_oid(oid):
+    return '.'.join(str(part) for part in oid)
+
+
+def encode_oid(oid):
+    parts = parse_oid(oid)
+    if len(parts) < 2:
+        raise ValueError(f"OID inválido: {oid}")
+    body = bytearray((parts[0] * 40 + parts[1],))
+    for part in parts[2:]:
+        chunk = [part & 0x7F]
+        part >>= 7
+        while part:
+            chunk.append(0x80 | (part & 0x7F))
+            part >>= 7
+        body.extend(reversed(chunk))
+    return encode_tlv(OBJECT_IDENTIFIER, bytes(body))
+
+
+def encode_sequence(*items, tag=SEQUENCE):
+    return encode_tlv(tag, b''.join(items))
+
+
+def encode_varbinds(oids):
+    return encode_sequence(*(encode_sequence(encode_oid(oid), encode_tlv(NULL, b'')) for oid in oids))
+
+
+def encode_pdu(pdu_type, request_id, oids, non_repeaters=0, max_repetitions=0):
+    if pdu_type == GET_BULK_REQUEST:
+        second, third = non_repeaters, max_repetitions
+    else:
+        second, third = 0, 0
+    return encode_sequence(
+        encode_integer(request_id),
+        encode_integer(second),
+        encode_integer(third),
+        encode_varbinds(oids),
+        tag=pdu_type,
+    )
+
+
+# BER decode
+
+def decode_tlv(data, offset=0):
+    """Devolve ``(tag, início do valor, fim do valor)``."""
+    try:
+        tag = data[offset]
+        length = data[offset + 1]
+    except IndexError:
+        raise SnmpDecodeError('mensagem truncada') from None
+    offset += 2
+    if length & 0x80:
+        count = length & 0x7F
+        if count == 0 or count > 4:
+            raise SnmpDecodeError('comprimento BER inválido')
+        length = int.from_bytes(data[offset:offset + count], 'big')
+        offset += count
+    end = offset + length
+    if end > len(data):
+        raise SnmpDecodeError('mensagem truncada')
+    return tag, offset, end
+
+
+def decode_oid(data, start, end):
+    if start == end:
+        return ()
+    first = data[start]
+    parts = [first // 40 if first < 80 else 2, first % 40 if first < 80 else first - 80]
+    value = 0
+    for byte in data[start + 1:end]:
+        value = (value << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            parts.append(value)
+            value = 0
+    return tuple(parts)
+
+
+def decode_value(data, offset):
+    tag, start, end = decode_tlv(data, offset)
+    raw = data[start:end]
+    if tag == INTEGER:
+        value = int.from_bytes(raw, 'big', signed=True)
+    elif tag in (COUNTER32, GAUGE32, TIMETICKS, COUNTER64):
+        value = int.from_bytes(raw, 'big', signed=False)
+    elif tag == OCTET_STRING or tag == OPAQUE:
+        value = bytes(raw)
+    elif tag == OBJECT_IDENTIFIER:
+        value = decode_oid(data, start, end)
+    elif tag == IP_ADDRESS:
+        value = '.'.join(str(b) for b in raw)
+    elif tag == NULL:
+        value = None
+    elif tag in (NO_SUCH_OBJECT, NO_SUCH_INSTANCE, END_OF_MIB_VIEW):
+        value = EndOfMib(tag)
+    else:
+        value = bytes(raw)
+    return tag, value, end
+
+
+def decode_pdu(data, offset):
+    pdu_type, start, end = decode_tlv(data, offset)
+    _, request_id, pos = decode_value(data, start)
+    _, error_status, pos = decode_value(data, pos)
+    _, error_index, pos = decode_value(data, pos)
+    _, vb_start, vb_end = decode_tlv(data, pos)
+    varbinds = []
+    pos = vb_start
+    while pos < vb_end:
+        _, item_start, item_end = decode_tlv(data, pos)
+        oid_tag, oid_start, oid_end = decode_tlv(data, item_start)
+        if oid_tag != OBJECT_IDENTIFIER:
+            raise SnmpDecodeError('varbind sem OID')
+        _, value, _ = decode_value(data, oid_end)
+        varbinds.append((decode_oid(data, oid_start, oid_end), value))
+        pos = item_end
+    return {
+        "type": pdu_type,
+        "request_id": request_id,
+        "error_status": error_status,
+        "error_index": error_index,
+        "varbinds": varbinds,
+    }
+
+
+def peek_request_id(data):
+    """Extrai o identificador para casar a resposta (request-id no v2c, msgID no v3)."""
+    _, start, _ = decode_tlv(data, 0)
+    _, version, pos = decode_value(data, start)
+    if version == VERSION_V3:
+        _, gd_start, _ = decode_tlv(data, pos)
+        _, msg_id, _ = decode_value(data, gd_start)
+        return msg_id
+    _, _, pos = decode_value(data, pos)
+    _, pdu_start, _ = decode_tlv(data, pos)
+    _, request_id, _ = decode_value(data, pdu_start)
+    return request_id
+
+
+# v2c
+
+def build_v2c_message(community, pdu):
+    return encode_sequence(encode_integer(VERSION_V2C), encode_octets(community), pdu)
+
+
+def parse_v2c_message(data):
+    _, start, _ = decode_tlv(data, 0)
+    _, version, pos = decode_value(data, start)
+    if version != VERSION_V2C:
+        raise SnmpDecodeError(f"versão inesperada: {version}")
+    _, community, pos = decode_value(data, pos)
+    return decode_pdu(data, pos)
+
+
+# v3 / USM
+
+AUTH_HASHES = {
+    'md5': hashlib.md5,
+    'sha': hashlib.sha1,
+}
+
+
+def password_to_key(password, auth_protocol):
+    """RFC 3414 A.2: expande a senha para 1 MB e gera o hash (Ku)."""
+    digest = AUTH_HASHES[auth_protocol]
+    password = password.encode('utf-8') if isinstance(password, str) else password
+    if not password:
+        raise ValueError('senha de autenticação vazia')
+    repeated = (password * (1048576 // len(password) + 1))[:1048576]
+    return digest(repeated).digest()
+
+
+def localize_key(key, engine_id, auth_protocol):
+    digest = AUTH_HASHES[auth_protocol]
+    return digest(key + engine_id + key).digest()
+
+
+class UsmState:
+    """Estado de descoberta do agente v3 (engineID, boots, time)."""
+
+    __slots__ = ('engine_id', 'engine_boots', 'engine_time', 'synced_at', 'localized_key')
+
+    def __init__(self):
+        self.engine_id = b''
+        self.engine_boots = 0
+        self.engine_time = 0
+        self.synced_at = 0.0
+        self.localized_key = None
+
+
+def build_v3_message(msg_id, user, pdu, state, auth_protocol=None, auth_key=None, now=0.0, reportable=True):
+    """Monta uma mensagem v3; com ``auth_key`` (já localizada) assina com HMAC-96."""
+    flags = FLAG_REPORTABLE if reportable else 0
+    if auth_key:
+        flags |= FLAG_AUTH
+    engine_time = state.engine_time + int(now - state.synced_at) if state.synced_at else state.engine_time
+    global_data = encode_sequence(
+        encode_integer(msg_id),
+        encode_integer(MAX_MESSAGE_SIZE),
+        encode_octets(bytes((flags,))),
+        encode_integer(USM_SECURITY_MODEL),
+    )
+    auth_placeholder = b'\x00' * AUTH_PARAMS_LENGTH if auth_key else b''
+    sec_prefix = (
+        encode_octets(state.engine_id)
+        + encode_integer(state.engine_boots)
+        + encode_integer(engine_time)
+        + encode_octets(user)
+    )
+    sec_tail = encode_octets(auth_placeholder) + encode_octets(b'')
+    sec_seq = encode_sequence(sec_prefix, sec_tail)
+    sec_params = encode_octets(sec_seq)
+    scoped_pdu = encode_sequence(encode_octets(state.engine_id), encode_octets(b''), pdu)
+    version = encode_integer(VERSION_V3)
+    body = version + global_data + sec_params + scoped_pdu
+    message = encode_tlv(SEQUENCE, body)
+    if not auth_key:
+        return message
+
+    # Localiza o placeholder a partir dos tamanhos conhecidos e substitui pelo HMAC.
+    header_len = len(message) - len(body)
+    sec_params_header = len(sec_params) - len(sec_seq)
+    sec_seq_header = len(sec_seq) - len(sec_prefix) - len(sec_tail)
+    offset = (
+        header_len + len(version) + len(global_data) + sec_params_header + sec_seq_header
+        + len(sec_prefix) + 2
+    )
+    mac = hmac.new(auth_key, message, AUTH_HASHES[auth_protocol]).digest()[:AUTH_PARAMS_LENGTH]
+    return message[:offset] + mac + message[offset + AUTH_PARAMS_LENGTH:]
+
+
+def parse_v3_message(data):
+    _, start, _ = decode_tlv(data, 0)
+    _, version, pos = decode_value(data, start)
+    if version != VERSION_V3:
+        raise SnmpDecodeError(f"versão inesperada: {version}")
+    _, gd_start, gd_end = decode_tlv(data, pos)
+    _, msg_id, p = decode_value(data, gd_start)
+    _, _, p = decode_value(data, p)
+    _, flags, p = decode_value(data, p)
+    pos = gd_end
+    _, sec_raw, pos = decode_value(data, pos)
+    _, s_start, _ = decode_tlv(sec_raw, 0)
+    _, engine_id, p = decode_value(sec_raw, s_start)
+    _, engine_boots, p = decode_value(sec_raw, p)
+    _, engine_time, p = decode_value(sec_raw, p)
+    _, user, p = decode_value(sec_raw, p)
+    _, auth_params, p = decode_value(sec_raw, p)
+    scoped_tag, sp_start, _ = decode_tlv(data, pos)
+    if scoped_tag != SEQUENCE:
+        raise SnmpDecodeError('scopedPDU criptografado não é suportado')
+    _, _, p = decode_value(data, sp_start)
+    _, _, p = decode_value(data, p)
+    pdu = decode_pdu(data, p)
+    pdu.update({
+        "msg_id": msg_id,
+        "flags": flags[0] if flags else 0,
+        "engine_id": engine_id,
+        "engine_boots": engine_boots,
+        "engine_time": engine_time,
+        "user": user,
+        "auth_params": auth_params,
+    })
+    return pdu
+
+
+def verify_v3_auth(data, auth_params, auth_key, auth_protocol):
+    if len(auth_params) != AUTH_PARAMS_LENGTH:
+        return False
+    index = data.find(auth_params)
+    if index < 0:
+        return False
+    zeroed = data[:index] + b'\x00' * AUTH_PARAMS_LENGTH + data[index + AUTH_PARAMS_LENGTH:]
+    expected = hmac.new(auth_key, zeroed, AUTH_HASHES[auth_protocol]).digest()[:AUTH_PARAMS_LENGTH]
+    return hmac.compare_digest(expected, auth_params)
@@ -0,0 +1,351 @@
+import math
+import os
+import threading
+from array import array
+from collections import deque
+
+HISTORY_RETENTION = int(os.getenv('MONITOR_HISTORY_RETENTION', str(24 * 3600)))
+HISTORY_RESOLUTION = int(os.getenv('MONITOR_HISTORY_RESOLUTION', '10'))
+# Histórico dos hosts SNMP: menor resolução, pois são milhares de séries.
+POLL_HISTORY_RETENTION = int(os.getenv('MONITOR_POLL_HISTORY_RETENTION', str(6 * 3600)))
+POLL_HISTORY_RESOLUTION = int(os.getenv('MONITOR_POLL_HISTORY_RESOLUTION', '60'))
+EVENT_CAPACITY = int(os.getenv('MONITOR_EVENT_CAPACITY', '10000'))
+
+
+def _parse_levels(raw):
+    levels = []
+    for item in raw.split(','):
+        resolution, _, retention = item.strip().partition(':')
+        if resolution.isdigit() and retention.isdigit():
+            levels.append((int(resolution), int(retention)))
+    return tuple(sorted(levels))
+
+
+# Rollups "resolução:retenção" em segundos; padrão 1 min/7 d, 5 min/30 d e 1 h/1 ano.
+ROLLUP_LEVELS = _parse_levels(os.getenv('MONITOR_ROLLUP_LEVELS', '60:604800,300:2592000,3600:31536000'))
+POLL_ROLLUP_LEVELS = _parse_levels(os.getenv('MONITOR_POLL_ROLLUP_LEVELS', '3600:604800'))
+AGGREGATES = ('avg', 'min', 'max', 'last', 'count')
+# O LTTB escolhe pontos a partir de dados até esta vezes mais finos que o passo pedido.
+LTTB_OVERSAMPLE = 8
+
+
+class RingSeries:
+    """Buffer circular de tamanho fixo com timestamps e valores em arrays paralelos.
+
+    Cada ponto ocupa 16 bytes (dois ``double``), alocados de uma vez na criação.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self.timestamps = array('d', bytes(8 * self.capacity))
+        self.values = array('d', bytes(8 * self.capacity))
+        self._start = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _physical(self, index):
+        return (self._start + index) % self.capacity
+
+    def last_timestamp(self):
+        if not self._size:
+            return None
+        return self.timestamps[self._physical(self._size - 1)]
+
+    def append(self, timestamp, value):
+        if self._size < self.capacity:
+            slot = self._physical(self._size)
+            self._size += 1
+        else:
+            slot = self._start
+            self._start = (self._start + 1) % self.capacity
+        self.timestamps[slot] = timestamp
+        self.values[slot] = value
+
+    def replace_last(self, timestamp, value):
+        slot = self._physical(self._size - 1)
+        self.timestamps[slot] = timestamp
+        self.values[slot] = value
+
+    def _bisect_left(self, timestamp):
+        low, high = 0, self._size
+        while low < high:
+            mid = (low + high) // 2
+            if self.timestamps[self._physical(mid)] < timestamp:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def iter_range(self, start, end):
+        """Itera ``(timestamp, valor)`` com ``start <= timestamp <= end`` em ordem."""
+        index = self._bisect_left(start)
+        while index < self._size:
+            slot = self._physical(index)
+            timestamp = self.timestamps[slot]
+            if timestamp > end:
+                break
+            yield timestamp, self.values[slot]
+            index += 1
+
+    def oldest_timestamp(self):
+        if not self._size:
+            return None
+        return self.timestamps[self._start]
+
+    def covers(self, start):
+        """``True`` se nada anterior a ``start`` foi descartado do buffer."""
+        return self._size < self.capacity or self.timestamps[self._start] <= start
+
+    def rows(self, start, end):
+        # Mesmo formato das linhas de rollup: (ts, min, max, soma, contagem, último).
+        for timestamp, value in self.iter_range(start, end):
+            yield timestamp, value, value, value, 1, value
+
+
+class RollupSeries:
+    """Agregados por janela fixa (min/max/soma/contagem/último) atualizados a cada amostra.
+
+    Cada amostra só mexe no bucket corrente, então não há recálculo em lote;
+    amostras anteriores ao bucket corrente são ignoradas.
+    """
+
+    def __init__(self, resolution, retention):
+        self.resolution = int(resolution)
+        self.capacity = max(math.ceil(int(retention) / self.resolution), 1)
+        self.buckets = RingSeries(self.capacity)
+        self.mins = array('d', bytes(8 * self.capacity))
+        self.maxs = array('d', bytes(8 * self.capacity))
+        self.sums = array('d', bytes(8 * self.capacity))
+        self.counts = array('d', bytes(8 * self.capacity))
+        self.lasts = array('d', bytes(8 * self.capacity))
+
+    def add(self, timestamp, value):
+        bucket = timestamp - timestamp % self.resolution
+        ring = self.buckets
+        last = ring.last_timestamp()
+        if last is not None and bucket < last:
+            return
+        if last is None or bucket > last:
+            ring.append(bucket, 0.0)
+            slot = ring._physical(len(ring) - 1)
+            self.mins[slot] = self.maxs[slot] = self.lasts[slot] = value
+            self.sums[slot] = value
+            self.counts[slot] = 1
+            return
+        slot = ring._physical(len(ring) - 1)
+        if value < self.mins[slot]:
+            self.mins[slot] = value
+        if value > self.maxs[slot]:
+            self.maxs[slot] = value
+        self.sums[slot] += value
+        self.counts[slot] += 1
+        self.lasts[slot] = value
+
+    def covers(self, start):
+        return self.buckets.covers(start - self.resolution)
+
+    def rows(self, start, end):
+        ring = self.buckets
+        # Inclui o bucket que contém ``start``.
+        index = ring._bisect_left(start - start % self.resolution)
+        while index < len(ring):
+            slot = ring._physical(index)
+            timestamp = ring.timestamps[slot]
+            if timestamp > end:
+                break
+            yield (timestamp, self.mins[slot], self.maxs[slot], self.sums[slot], self.counts[slot],
+                   self.lasts[slot])
+            index += 1
+
+    def memory_bytes(self):
+        return self.capacity * 8 * 7
+
+
+def _value(row, agg):
+    _, low, high, total, count, last = row
+    if agg == 'min':
+        return low
+    if agg == 'max':
+        return high
+    if agg == 'last':
+        return last
+    if agg == 'count':
+        return count
+    return total / count
+
+
+def aggregate(rows, start, step, agg='avg'):
+    """Reagrupa linhas ``(ts, min, max, soma, contagem, último)`` em janelas de ``step`` a partir de ``start``."""
+    points = []
+    window = None
+    merged = None
+    for row in rows:
+        bucket = start + math.floor((row[0] - start) / step) * step
+        if bucket != window:
+            if merged is not None:
+                points.append((window, _value(merged, agg)))
+            window, merged = bucket, list(row)
+            continue
+        if row[1] < merged[1]:
+            merged[1] = row[1]
+        if row[2] > merged[2]:
+            merged[2] = row[2]
+        merged[3] += row[3]
+        merged[4] += row[4]
+        merged[5] = row[5]
+    if merged is not None:
+        points.append((window, _value(merged, agg)))
+    return points
+
+
+def lttb(points, threshold):
+    """Largest-Triangle-Three-Buckets: reduz ``points`` a ``threshold`` pontos preservando a forma."""
+    size = len(points)
+    if threshold >= size or threshold < 3:
+        return list(points)
+    sampled = [points[0]]
+    every = (size - 2) / (threshold - 2)
+    anchor = 0
+    for bucket in range(threshold - 2):
+        # Média do próximo bucket: terceiro vértice do triângulo.
+        next_start = int((bucket + 1) * every) + 1
+        next_end = min(int((bucket + 2) * every) + 1, size)
+        span = next_end - next_start or 1
+        avg_x = sum(points[i][0] for i in range(next_start, next_end)) / span
+        avg_y = sum(points[i][1] for i in range(next_start, next_end)) / span
+
+        ax, ay = points[anchor]
+        best, best_area = None, -1.0
+        for i in range(int(bucket * every) + 1, int((bucket + 1) * every) + 1):
+            x, y = points[i]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = i, area
+        sampled.append(points[best])
+        anchor = best
+    sampled.append(points[-1])
+    return sampled
+
+
+class TimeSeriesStore:
+    """Conjunto de séries com pontos brutos de retenção curta e rollups mais longos.
+
+    Com os padrões (24 h a cada 10 s) cada série guarda 8640 pontos brutos,
+    ~138 KB, mais os rollups de ``rollups`` (~1,3 MB com ``ROLLUP_LEVELS``).
+    Amostras mais frequentes que a resolução substituem o último ponto bruto;
+    os rollups recebem todas as amostras.
+
+    As consultas usam a resolução mais grossa que ainda atenda ao ``step``
+    pedido (e que cubra o início do intervalo), então 30 dias com passo de
+    1 h leem ~720 buckets em vez de 259 mil pontos brutos.
+    """
+
+    def __init__(self, retention=HISTORY_RETENTION, resolution=HISTORY_RESOLUTION, rollups=ROLLUP_LEVELS):
+        self.retention = int(retention)
+        self.resolution = max(int(resolution), 1)
+        self.capacity = max(math.ceil(self.retention / self.resolution), 1)
+        self.rollups = tuple((res, ret) for res, ret in rollups if res > self.resolution)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def names(self):
+        return sorted(self._series)
+
+    def memory_bytes(self):
+        return sum(
+            raw.capacity * 16 + sum(level.memory_bytes() for level in levels)
+            for raw, levels in self._series.values()
+        )
+
+    def append(self, name, timestamp, value):
+        with self._lock:
+            entry = self._series.get(name)
+            if entry is None:
+                entry = (RingSeries(self.capacity), [RollupSeries(res, ret) for res, ret in self.rollups])
+                self._series[name] = entry
+            raw, levels = entry
+            last = raw.last_timestamp()
+            if last is not None and timestamp < last:
+                return
+            if last is not None and timestamp // self.resolution == last // self.resolution:
+                raw.replace_last(timestamp, value)
+            else:
+                raw.append(timestamp, value)
+            for level in levels:
+                level.add(timestamp, value)
+
+    def discard(self, name):
+        with self._lock:
+            self._series.pop(name, None)
+
+    def _pick(self, entry, start, step):
+        raw, levels = entry
+        candidates = [(self.resolution, raw)] + [(level.resolution, level) for level in levels]
+        covering = [item for item in candidates if item[1].covers(start)] or [candidates[-1]]
+        if step:
+            usable = [item for item in covering if item[0] <= step]
+            if usable:
+                return usable[-1]
+        return covering[0]
+
+    def _read(self, entry, start, end, step, agg, method):
+        if method == 'lttb' and step:
+            # LTTB precisa de dados mais finos que o passo para escolher os pontos.
+            resolution, source = self._pick(entry, start, step / LTTB_OVERSAMPLE)
+            points = [(row[0], _value(row, agg)) for row in source.rows(start, end)]
+            return resolution, lttb(points, max(int((end - start) / step), 3))
+        resolution, source = self._pick(entry, start, step)
+        if step and step > resolution:
+            return resolution, aggregate(source.rows(start, end), start, step, agg)
+        return resolution, [(row[0], _value(row, agg)) for row in source.rows(start, end)]
+
+    def query_many(self, names, start, end, step=None, agg='avg', method=None):
+        """Várias séries num único passo sob o lock: ``{nome: pontos}``; nomes desconhecidos são ignorados."""
+        results = {}
+        with self._lock:
+            for name in dict.fromkeys(names):
+                entry = self._series.get(name)
+                if entry is not None:
+                    results[name] = self._read(entry, start, end, step, agg, method)[1]
+        return results
+
+    def query(self, name, start, end, step=None, agg='avg', method=None):
+        """Devolve ``(resolução usada, [(timestamp, valor), ...])``.
+
+        ``agg`` escolhe o agregado por janela (``avg``, ``min``, ``max``,
+        ``last``, ``count``); ``method='lttb'`` troca a média por janela pelo
+        downsampling visual LTTB com ``(end - start) / step`` pontos.
+        """
+        if agg not in AGGREGATES:
+            raise ValueError(f"agregado desconhecido: {agg}")
+        with self._lock:
+            entry = self._series.get(name)
+            if entry is None:
+                raise KeyError(name)
+            return self._read(entry, start, end, step, agg, method)
+
+
+class EventLog:
+    """Eventos pontuais (ex.: host SNMP caiu/voltou) numa fila de tamanho fixo."""
+
+    def __init__(self, capacity=EVENT_CAPACITY):
+        self._events = deque(maxlen=max(int(capacity), 1))
+
+    def add(self, timestamp, title, text='', tags=()):
+        self._events.append({"time": timestamp, "title": title, "text": text, "tags": list(tags)})
+
+    def between(self, start, end):
+        # Os eventos chegam em ordem de tempo: percorre de trás para frente e para cedo.
+        found = []
+        for event in reversed(self._events.copy()):
+            if event['time'] < start:
+                break
+            if event['time'] <= end:
+                found.append(event)
+        found.reverse()
+        return found
+
+    def __len__(self):
+        return len(self._events)
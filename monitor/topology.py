@@ -0,0 +1,287 @@
+"""Grafo da rede a partir dos vizinhos LLDP/CDP de todos os equipamentos coletados.
+
+Cada equipamento informa seus links (interface local, vizinho, porta). O
+grafo é montado em arrays de adjacência (CSR: ``indptr``/``indices`` com IDs
+inteiros) junto com componentes conexos e um layout radial; tudo fica em
+cache e só é refeito quando algum link muda. Caminho mais curto e raio de
+impacto são buscas em largura vetorizadas sobre esses arrays.
+"""
+
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+try:
+    from .snapshots import SnapshotWorker
+except ImportError:  # fallback when executed as a script (python monitor/app.py)
+    from snapshots import SnapshotWorker
+
+# Equipamentos de núcleo/saída (sysName). O "raio de impacto" de um nó é o que perde o
+# caminho até eles; sem raízes configuradas usa o nó de maior grau de cada componente.
+TOPOLOGY_ROOTS = tuple(name.strip() for name in os.getenv('MONITOR_TOPOLOGY_ROOTS', '').split(',') if name.strip())
+# Distância entre os anéis do layout radial e entre componentes.
+LAYOUT_RING = 100.0
+LAYOUT_GAP = 200.0
+# CDP devolve "nome.dominio(SERIAL)" em alguns equipamentos.
+_CDP_SERIAL = re.compile(r'\([^)]*\)$')
+
+
+def node_name(value):
+    return _CDP_SERIAL.sub('', str(value or '').strip()).strip()
+
+
+def _bfs(indptr, indices, sources, blocked=None, target=None):
+    """Busca em largura por níveis: cada nível expande a fronteira inteira com operações numpy.
+
+    Devolve ``(distância, pai)`` (``-1`` para não alcançados); ``blocked`` é um
+    nó que não pode ser atravessado e ``target`` encerra a busca ao ser alcançado.
+    """
+    size = len(indptr) - 1
+    dist = np.full(size, -1, dtype=np.int32)
+    parent = np.full(size, -1, dtype=np.int32)
+    if blocked is not None:
+        dist[blocked] = -2
+    frontier = np.unique(np.asarray(sources, dtype=np.int64))
+    frontier = frontier[dist[frontier] == -1]
+    dist[frontier] = 0
+    level = 0
+    while len(frontier) and (target is None or dist[target] < 0):
+        starts = indptr[frontier]
+        counts = indptr[frontier + 1] - starts
+        total = int(counts.sum())
+        if not total:
+            break
+        offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(total)
+        neighbors = indices[offsets]
+        parents = np.repeat(frontier, counts)
+        fresh = dist[neighbors] == -1
+        neighbors, first = np.unique(neighbors[fresh], return_index=True)
+        level += 1
+        dist[neighbors] = level
+        parent[neighbors] = parents[fresh][first]
+        frontier = neighbors
+    if blocked is not None:
+        dist[blocked] = -1
+    return dist, parent
+
+
+class TopologyGraph:
+    """Fotografia imutável do grafo numa versão: CSR, componentes, raízes e layout."""
+
+    def __init__(self, version, names, pairs, links, roots=TOPOLOGY_ROOTS):
+        self.version = version
+        self.names = names
+        self.index = {name: node for node, name in enumerate(names)}
+        self.links = links
+        size = len(names)
+        pairs = np.asarray(sorted(pairs), dtype=np.int64).reshape(-1, 2)
+        self.pairs = pairs
+        source = np.concatenate((pairs[:, 0], pairs[:, 1]))
+        target = np.concatenate((pairs[:, 1], pairs[:, 0]))
+        order = np.argsort(source, kind='stable')
+        self.indices = target[order].astype(np.int32)
+        self.degree = np.bincount(source, minlength=size).astype(np.int32)
+        self.indptr = np.concatenate(([0], np.cumsum(self.degree))).astype(np.int64)
+        self.component = self._components(source, target, size)
+        self.roots = self._roots(roots)
+        self.layout = self._layout()
+        self._payload = None
+
+    @staticmethod
+    def _components(source, target, size):
+        # Propagação do menor rótulo com salto de ponteiros até estabilizar.
+        labels = np.arange(size)
+        while True:
+            previous = labels.copy()
+            np.minimum.at(labels, source, labels[target])
+            labels = labels[labels]
+            if np.array_equal(labels, previous):
+                break
+        _, dense = np.unique(labels, return_inverse=True)
+        return dense.astype(np.int32)
+
+    def _roots(self, configured):
+        roots = {}
+        for name in configured:
+            node = self.index.get(name)
+            if node is not None:
+                roots.setdefault(int(self.component[node]), []).append(node)
+        for component in range(int(self.component.max()) + 1 if len(self.component) else 0):
+            if component not in roots:
+                members = np.flatnonzero(self.component == component)
+                roots[component] = [int(members[np.argmax(self.degree[members])])]
+        return roots
+
+    def _layout(self):
+        """Layout radial: raiz no centro, um anel por salto, ângulo proporcional às folhas de cada subárvore."""
+        size = len(self.names)
+        positions = np.zeros((size, 2))
+        if not size:
+            return positions
+        sources = [node for nodes in self.roots.values() for node in nodes]
+        dist, parent = _bfs(self.indptr, self.indices, sources)
+        order = np.argsort(dist, kind='stable')
+        # Folhas de cada subárvore, dos nós mais distantes para a raiz.
+        leaves = np.zeros(size)
+        for node in order[::-1].tolist():
+            if not leaves[node]:
+                leaves[node] = 1
+            if parent[node] >= 0:
+                leaves[parent[node]] += leaves[node]
+        start = np.zeros(size)
+        span = np.zeros(size)
+        cursor = {}
+        for node in order:
+            node = int(node)
+            if parent[node] < 0:
+                span[node] = 2 * np.pi
+            else:
+                up = int(parent[node])
+                offset = cursor.get(up, start[up])
+                span[node] = span[up] * leaves[node] / leaves[up]
+                start[node] = offset
+                cursor[up] = offset + span[node]
+            angle = start[node] + span[node] / 2
+            positions[node] = (dist[node] * LAYOUT_RING * np.cos(angle), dist[node] * LAYOUT_RING * np.sin(angle))
+        # Componentes lado a lado, cada um centrado na sua raiz.
+        shift = 0.0
+        for component in range(int(self.component.max()) + 1):
+            members = self.component == component
+            radius = float(dist[members].max()) * LAYOUT_RING
+            positions[members, 0] += shift + radius
+            shift += 2 * radius + LAYOUT_GAP
+        return np.round(positions, 1)
+
+    def as_dict(self):
+        if self._payload is None:
+            root_nodes = {node for nodes in self.roots.values() for node in nodes}
+            self._payload = {
+                "version": self.version,
+                "nodes": [
+                    {"id": node, "name": name, "component": int(self.component[node]),
+                     "degree": int(self.degree[node]), "root": node in root_nodes,
+                     "x": float(self.layout[node, 0]), "y": float(self.layout[node, 1])}
+                    for node, name in enumerate(self.names)
+                ],
+                "edges": [
+                    {"source": int(a), "target": int(b), "links": self.links[(int(a), int(b))]}
+                    for a, b in self.pairs
+                ],
+            }
+        return self._payload
+
+    def node(self, name):
+        node = self.index.get(node_name(name))
+        if node is None:
+            raise KeyError(name)
+        return node
+
+    def shortest_path(self, source, target):
+        """Nós do caminho com menos saltos (com os links de cada salto) ou ``None`` se não há caminho."""
+        source, target = self.node(source), self.node(target)
+        _, parent = _bfs(self.indptr, self.indices, [source], target=target)
+        if source != target and parent[target] < 0:
+            return None
+        path = [target]
+        while path[-1] != source:
+            path.append(int(parent[path[-1]]))
+        path.reverse()
+        hops = [self.links[(min(a, b), max(a, b))] for a, b in zip(path, path[1:])]
+        return {"nodes": [self.names[node] for node in path], "hops": len(path) - 1, "links": hops}
+
+    def blast_radius(self, name):
+        """Nós que perdem o caminho até as raízes do componente se ``name`` cair."""
+        node = self.node(name)
+        component = int(self.component[node])
+        sources = [root for root in self.roots[component] if root != node]
+        members = np.flatnonzero(self.component == component)
+        if sources:
+            dist, _ = _bfs(self.indptr, self.indices, sources, blocked=node)
+            affected = members[(dist[members] < 0) & (members != node)]
+        else:
+            affected = members[members != node]
+        return {
+            "node": self.names[node],
+            "roots": [self.names[root] for root in self.roots[component]],
+            "affected": sorted(self.names[other] for other in affected.tolist()),
+            "count": int(len(affected)),
+        }
+
+    def components(self):
+        sizes = np.bincount(self.component, minlength=len(self.roots)) if len(self.component) else []
+        result = [
+            {"id": component, "size": int(sizes[component]),
+             "roots": [self.names[root] for root in self.roots[component]],
+             "members": sorted(self.names[node] for node in np.flatnonzero(self.component == component).tolist())}
+            for component in range(len(sizes))
+        ]
+        return sorted(result, key=lambda item: item["size"], reverse=True)
+
+
+class NeighborTopology:
+    """Links LLDP/CDP por equipamento; o ``TopologyGraph`` é refeito só quando eles mudam.
+
+    ``apply_snapshot(chave, nome, vizinhos)`` recebe a tabela completa de um
+    equipamento (``local_interface``, ``neighbor``, ``port``); um snapshot
+    igual ao anterior não mexe na versão do grafo.
+    """
+
+    def __init__(self, roots=TOPOLOGY_ROOTS):
+        self.roots = roots
+        self.devices = {}
+        self.version = 0
+        self._graph = None
+        self._lock = threading.RLock()
+        self._worker = SnapshotWorker('topology-snapshot')
+
+    def apply_snapshot(self, key, name, neighbors, timestamp=None):
+        name = node_name(name) or key
+        links = frozenset(
+            (str(row.get('local_interface') or ''), node_name(row.get('neighbor')), str(row.get('port') or ''),
+             str(row.get('protocol') or 'lldp'))
+            for row in neighbors if node_name(row.get('neighbor'))
+        )
+        with self._lock:
+            previous = self.devices.get(key)
+            changed = previous is None or previous[0] != name or previous[1] != links
+            if changed:
+                self.devices[key] = (name, links, time.time() if timestamp is None else timestamp)
+                self.version += 1
+            return {"changed": changed, "links": len(links), "version": self.version}
+
+    def submit_snapshot(self, key, name, neighbors, timestamp=None):
+        return self._worker.submit(self.apply_snapshot, key, name, neighbors, timestamp)
+
+    def remove_device(self, key):
+        with self._lock:
+            if self.devices.pop(key, None) is not None:
+                self.version += 1
+
+    def graph(self):
+        """Grafo da versão atual (refeito na primeira consulta depois de uma mudança)."""
+        with self._lock:
+            if self._graph is None or self._graph.version != self.version:
+                self._graph = self._build()
+            return self._graph
+
+    def _build(self):
+        names = set()
+        for name, links, _ in self.devices.values():
+            names.add(name)
+            names.update(link[1] for link in links)
+        names = sorted(names)
+        index = {name: node for node, name in enumerate(names)}
+        detail = {}
+        for name, links, _ in self.devices.values():
+            for local_interface, neighbor, port, protocol in sorted(links):
+                a, b = index[name], index[neighbor]
+                if a == b:
+                    continue
+                detail.setdefault((min(a, b), max(a, b)), []).append({
+                    "device": name, "local_interface": local_interface, "neighbor": neighbor, "port": port,
+                    "protocol": protocol,
+                })
+        return TopologyGraph(self.version, names, detail.keys(), detail, self.roots)
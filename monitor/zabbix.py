@@ -0,0 +1,291 @@
+import itertools
+import os
+import re
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+ZABBIX_URL = os.getenv('MONITOR_ZABBIX_URL', '')
+ZABBIX_TOKEN = os.getenv('MONITOR_ZABBIX_TOKEN', '')
+ZABBIX_USER = os.getenv('MONITOR_ZABBIX_USER', '')
+ZABBIX_PASSWORD = os.getenv('MONITOR_ZABBIX_PASSWORD', '')
+ZABBIX_TIMEOUT = float(os.getenv('MONITOR_ZABBIX_TIMEOUT', '30'))
+ZABBIX_BATCH_SIZE = int(os.getenv('MONITOR_ZABBIX_BATCH_SIZE', '1000'))
+# O Zabbix exige ao menos um grupo por host; hosts sem grupo no inventário vão para este.
+ZABBIX_DEFAULT_GROUP = os.getenv('MONITOR_ZABBIX_DEFAULT_GROUP', 'Monitor Hub')
+
+SYNC_STATE_KEY = 'zabbix.watermark'
+INTERFACE_SNMP = 2
+SNMP_BULK_ON = 1
+SNMPV3_NOAUTHNOPRIV = 0
+SNMPV3_AUTHNOPRIV = 1
+SNMPV3_AUTH_PROTOCOLS = {'md5': 0, 'sha': 1}
+_INVALID_HOST_CHARS = re.compile(r'[^0-9A-Za-z _.\-]')
+
+
+class ZabbixError(RuntimeError):
+    def __init__(self, method, error):
+        self.method = method
+        self.code = error.get('code')
+        self.data = error.get('data', '')
+        super().__init__(f"{method}: {error.get('message', 'erro')} {self.data}".strip())
+
+
+class ZabbixClient:
+    """Cliente JSON-RPC da API do Zabbix sobre uma ``requests.Session`` com keep-alive.
+
+    ``batch()`` envia várias chamadas num único POST (lote JSON-RPC 2.0), que
+    é como a sincronização fala com o Zabbix: poucas requisições HTTP grandes
+    em vez de uma por host.
+    """
+
+    def __init__(self, url=ZABBIX_URL, token=ZABBIX_TOKEN, user=ZABBIX_USER, password=ZABBIX_PASSWORD,
+                 timeout=ZABBIX_TIMEOUT, pool_size=4):
+        self.url = url
+        self.timeout = timeout
+        self._user = user
+        self._password = password
+        self._auth = token or None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.http_requests = 0
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=2)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['Content-Type'] = 'application/json-rpc'
+
+    def close(self):
+        self.session.close()
+
+    def _request(self, method, params, authenticated=True):
+        request = {"jsonrpc": "2.0", "method": method, "params": params, "id": next(self._ids)}
+        if authenticated and self._auth:
+            request["auth"] = self._auth
+        return request
+
+    def _post(self, payload):
+        self.http_requests += 1
+        response = self.session.post(self.url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def login(self):
+        if self._auth or not self._user:
+            return
+        with self._lock:
+            if self._auth:
+                return
+            # Zabbix >= 5.4 usa "username"; versões anteriores (como a do compose), "user".
+            for field in ('username', 'user'):
+                reply = self._post(self._request(
+                    'user.login', {field: self._user, "password": self._password}, authenticated=False,
+                ))
+                if 'result' in reply:
+                    self._auth = reply['result']
+                    return
+            raise ZabbixError('user.login', reply.get('error', {}))
+
+    def call(self, method, params):
+        return self.batch([(method, params)])[0]
+
+    def batch(self, calls):
+        """Executa ``[(método, params), ...]`` num único POST e devolve os resultados na ordem."""
+        if not calls:
+            return []
+        self.login()
+        requests_ = [self._request(method, params) for method, params in calls]
+        replies = self._post(requests_ if len(requests_) > 1 else requests_[0])
+        if isinstance(replies, dict):
+            replies = [replies]
+        by_id = {reply.get('id'): reply for reply in replies}
+        results = []
+        for request in requests_:
+            reply = by_id.get(request['id'], {"error": {"message": "sem resposta no lote"}})
+            if 'error' in reply:
+                raise ZabbixError(request['method'], reply['error'])
+            results.append(reply['result'])
+        return results
+
+
+def technical_name(host_record):
+    """Nome técnico (único) no Zabbix: o endereço do host, que é a chave do inventário."""
+    return _INVALID_HOST_CHARS.sub('_', host_record['ip_address'])
+
+
+def _group_name(host_record):
+    return host_record.get('host_group') or ZABBIX_DEFAULT_GROUP
+
+
+def _snmp_interface(host_record):
+    address = host_record['ip_address']
+    port = '161'
+    if address.count(':') == 1:
+        address, _, port = address.partition(':')
+    version = host_record.get('snmp_version') or 'v2c'
+    if version == 'v3':
+        details = {"version": 3, "bulk": SNMP_BULK_ON, "securityname": host_record.get('community', ''),
+                   "securitylevel": SNMPV3_NOAUTHNOPRIV}
+        auth_protocol = host_record.get('auth_protocol')
+        if auth_protocol in SNMPV3_AUTH_PROTOCOLS:
+            details.update(securitylevel=SNMPV3_AUTHNOPRIV, authprotocol=SNMPV3_AUTH_PROTOCOLS[auth_protocol],
+                           authpassphrase=host_record.get('auth_password', ''))
+    else:
+        details = {"version": 2, "bulk": SNMP_BULK_ON, "community": host_record.get('community', '')}
+    return {"type": INTERFACE_SNMP, "main": 1, "useip": 1, "ip": address, "dns": "", "port": port,
+            "details": details}
+
+
+def _snmp_interface_id(zabbix_host):
+    """ID da interface SNMP principal de um host devolvido por ``host.get`` (``None`` se não tem)."""
+    interfaces = [item for item in zabbix_host.get('interfaces') or () if int(item['type']) == INTERFACE_SNMP]
+    interfaces.sort(key=lambda item: int(item.get('main', 0)), reverse=True)
+    return interfaces[0]['interfaceid'] if interfaces else None
+
+
+class ZabbixSync:
+    """Empurra o inventário para o Zabbix de forma incremental e em lote.
+
+    Cada lote de hosts alterados custa no máximo três POSTs: um para resolver
+    grupos/templates desconhecidos e hosts já existentes (com a interface
+    SNMP), um para criar os grupos que faltam e um com ``host.create``,
+    ``host.massupdate`` (grupos/templates), ``host.update`` (nome visível e
+    tags) e ``hostinterface.update`` (endereço, porta, versão e credenciais SNMP).
+    Os IDs de grupos e templates ficam em cache entre sincronizações.
+    """
+
+    def __init__(self, client, inventory, batch_size=ZABBIX_BATCH_SIZE):
+        self.client = client
+        self.inventory = inventory
+        self.batch_size = max(int(batch_size), 1)
+        self.group_ids = {}
+        self.template_ids = {}
+        self.last_result = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def _resolve(self, hosts):
+        groups = sorted({_group_name(host) for host in hosts} - set(self.group_ids))
+        templates = sorted({host['template'] for host in hosts if host['template']} - set(self.template_ids))
+        calls = [('host.get', {"output": ["hostid", "host"], "selectInterfaces": ["interfaceid", "type", "main"],
+                               "filter": {"host": [technical_name(h) for h in hosts]}})]
+        if groups:
+            calls.append(('hostgroup.get', {"output": ["groupid", "name"], "filter": {"name": groups}}))
+        if templates:
+            calls.append(('template.get', {"output": ["templateid", "host", "name"],
+                                           "filter": {"host": templates}}))
+            calls.append(('template.get', {"output": ["templateid", "host", "name"],
+                                           "filter": {"name": templates}}))
+        results = self.client.batch(calls)
+        existing = {item['host']: (item['hostid'], _snmp_interface_id(item)) for item in results[0]}
+        position = 1
+        if groups:
+            self.group_ids.update({item['name']: item['groupid'] for item in results[position]})
+            position += 1
+        if templates:
+            for item in results[position] + results[position + 1]:
+                for label in (item['host'], item['name']):
+                    if label in templates:
+                        self.template_ids[label] = item['templateid']
+            # Template inexistente no Zabbix: guarda a ausência para não consultar a cada lote.
+            for name in templates:
+                self.template_ids.setdefault(name, None)
+
+        missing = [name for name in groups if name not in self.group_ids]
+        if missing:
+            created = self.client.call('hostgroup.create', [{"name": name} for name in missing])
+            self.group_ids.update(zip(missing, created['groupids']))
+        return existing
+
+    def _host_payload(self, host):
+        payload = {
+            "host": technical_name(host),
+            "name": host['host_name'],
+            "groups": [{"groupid": self.group_ids[_group_name(host)]}],
+            "tags": [{"tag": tag} for tag in host['tags']],
+        }
+        template_id = self.template_ids.get(host['template'])
+        if template_id:
+            payload["templates"] = [{"templateid": template_id}]
+        return payload
+
+    def _push(self, hosts):
+        existing = self._resolve(hosts)
+        created, updates, renamed, interfaces, new_interfaces = [], {}, [], [], []
+        for host in hosts:
+            payload = self._host_payload(host)
+            hostid, interfaceid = existing.get(payload['host'], (None, None))
+            if hostid is None:
+                payload["interfaces"] = [_snmp_interface(host)]
+                created.append(payload)
+                continue
+            # massupdate aplica os mesmos grupos/templates a todos os hosts do grupo.
+            key = (_group_name(host), self.template_ids.get(host['template']))
+            updates.setdefault(key, (payload, []))[1].append({"hostid": hostid})
+            # Nome e tags variam por host: vão num único host.update com a lista inteira.
+            renamed.append({"hostid": hostid, "name": payload['name'], "tags": payload['tags']})
+            interface = _snmp_interface(host)
+            if interfaceid is None:
+                new_interfaces.append(dict(interface, hostid=hostid))
+            else:
+                interface.pop('type')
+                interfaces.append(dict(interface, interfaceid=interfaceid))
+        calls = []
+        if created:
+            calls.append(('host.create', created))
+        for payload, hostids in updates.values():
+            params = {"hosts": hostids, "groups": payload['groups']}
+            if 'templates' in payload:
+                params["templates"] = payload['templates']
+            calls.append(('host.massupdate', params))
+        if renamed:
+            calls.append(('host.update', renamed))
+        if interfaces:
+            calls.append(('hostinterface.update', interfaces))
+        if new_interfaces:
+            calls.append(('hostinterface.create', new_interfaces))
+        self.client.batch(calls)
+        return len(created), sum(len(hostids) for _, hostids in updates.values())
+
+    def sync(self):
+        """Sincroniza os hosts alterados desde a última execução; devolve um resumo."""
+        with self._lock:
+            started = time.monotonic()
+            requests_before = self.client.http_requests
+            watermark = self.inventory.get_state(SYNC_STATE_KEY)
+            summary = {"hosts": 0, "created": 0, "updated": 0}
+            for hosts, next_watermark in self.inventory.changed_since(watermark, self.batch_size):
+                created, updated = self._push(hosts)
+                summary["hosts"] += len(hosts)
+                summary["created"] += created
+                summary["updated"] += updated
+                # Só avança depois de o lote ser aceito: uma falha repete o lote na próxima vez.
+                self.inventory.set_state(SYNC_STATE_KEY, next_watermark)
+            summary["http_requests"] = self.client.http_requests - requests_before
+            summary["duration_ms"] = round((time.monotonic() - started) * 1000, 2)
+            summary["synced_at"] = time.time()
+            self.last_result = summary
+            return summary
+
+    def request_sync(self):
+        """Agenda uma sincronização em segundo plano; pedidos em rajada viram uma só."""
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='zabbix-sync', daemon=True)
+            self._thread.start()
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            # Espera a rajada terminar (cadastros/importação) antes de sincronizar.
+            time.sleep(1.0)
+            self._wakeup.clear()
+            try:
+                self.sync()
+            except (requests.RequestException, ZabbixError, ValueError) as exc:
+                self.last_result = {"error": str(exc), "synced_at": time.time()}
@@ -0,0 +1,251 @@
+import json
+import os
+import random
+import re
+import select
+import socket
+import struct
+import threading
+import time
+from collections import deque
+
+SENDER_SERVER = os.getenv('MONITOR_ZABBIX_SERVER', '')
+SENDER_HOST = os.getenv('MONITOR_ZABBIX_SENDER_HOST', socket.gethostname())
+SENDER_BATCH_SIZE = int(os.getenv('MONITOR_ZABBIX_SENDER_BATCH', '1000'))
+SENDER_MAX_LATENCY = float(os.getenv('MONITOR_ZABBIX_SENDER_LATENCY', '1.0'))
+SENDER_BUFFER = int(os.getenv('MONITOR_ZABBIX_SENDER_BUFFER', '100000'))
+SENDER_TIMEOUT = float(os.getenv('MONITOR_ZABBIX_SENDER_TIMEOUT', '10'))
+
+HEADER = struct.Struct('<4sBII')
+PROTOCOL = b'ZBXD'
+FLAG_ZABBIX = 0x01
+MAX_BACKOFF = 30.0
+REUSE_PROBE = 0.05  # espera pelo fechamento após a primeira resposta, para saber se dá para reaproveitar
+_INFO = re.compile(r'processed:\s*(\d+);\s*failed:\s*(\d+)')
+
+
+class SenderError(RuntimeError):
+    pass
+
+
+def encode_packet(payload):
+    body = json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return HEADER.pack(PROTOCOL, FLAG_ZABBIX, len(body), 0) + body
+
+
+def _recv_exact(sock, size):
+    chunks = bytearray()
+    while len(chunks) < size:
+        chunk = sock.recv(size - len(chunks))
+        if not chunk:
+            raise ConnectionResetError('conexão encerrada pelo servidor')
+        chunks += chunk
+    return bytes(chunks)
+
+
+def peer_closed(sock, timeout=0):
+    """``True`` se o outro lado já fechou (ou mandou algo inesperado) numa conexão ociosa."""
+    try:
+        readable, _, _ = select.select([sock], [], [], timeout)
+        if not readable:
+            return False
+        # Ociosa não deveria ter nada para ler: EOF ou bytes soltos tornam a conexão inútil.
+        sock.recv(1, socket.MSG_PEEK)
+        return True
+    except (OSError, ValueError):
+        return True
+
+
+def read_packet(sock):
+    protocol, flags, length, _ = HEADER.unpack(_recv_exact(sock, HEADER.size))
+    if protocol != PROTOCOL:
+        raise SenderError('resposta fora do protocolo ZBXD')
+    if flags & 0x02:
+        raise SenderError('resposta comprimida não suportada')
+    return json.loads(_recv_exact(sock, length))
+
+
+class ZabbixSender:
+    """Envia valores para itens trapper do Zabbix (protocolo do ``zabbix_sender``).
+
+    ``send()`` só enfileira; uma thread descarrega a fila em lotes de até
+    ``batch_size`` valores assim que o lote enche ou que o valor mais antigo
+    espera ``max_latency`` segundos. A conexão TCP é persistente quando o
+    servidor a mantém aberta: após a primeira resposta o sender espera
+    ``REUSE_PROBE`` pelo fechamento; o trapper do Zabbix fecha após cada
+    resposta e, com ele (ou ao achar a conexão fechada antes de um lote),
+    passa a abrir uma conexão por lote. A conexão reaproveitada é testada sem
+    bloquear antes de cada lote, e o lote só é reenviado na hora se nenhum
+    byte saiu por ela. Qualquer outra falha recoloca o lote na fila e tenta
+    de novo com backoff exponencial (entrega "pelo menos uma vez": se a
+    resposta se perder depois de o servidor processar o lote, ele chega duas
+    vezes). Com a fila cheia, os valores mais antigos são descartados e
+    contados em ``dropped``.
+    """
+
+    def __init__(self, server=SENDER_SERVER, batch_size=SENDER_BATCH_SIZE, max_latency=SENDER_MAX_LATENCY,
+                 buffer_size=SENDER_BUFFER, timeout=SENDER_TIMEOUT):
+        host, _, port = server.rpartition(':') if ':' in server else (server, '', '10051')
+        self.address = (host, int(port or 10051))
+        self.batch_size = max(int(batch_size), 1)
+        self.max_latency = max_latency
+        self.timeout = timeout
+        self._queue = deque()
+        self._buffer_size = max(int(buffer_size), self.batch_size)
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._oldest = None
+        self._sock = None
+        self._reuse = None  # None até a primeira resposta dizer se o servidor mantém a conexão
+        self._thread = None
+        self._pid = None
+        self._stopping = False
+        self.stats = {"queued": 0, "sent": 0, "processed": 0, "failed": 0, "dropped": 0,
+                      "batches": 0, "retries": 0, "reconnects": 0, "last_error": None}
+
+    def send(self, host, key, value, clock=None):
+        now = time.time() if clock is None else clock
+        item = {"host": host, "key": key, "value": str(value), "clock": int(now), "ns": int(now % 1 * 1e9)}
+        with self._lock:
+            if len(self._queue) >= self._buffer_size:
+                self._queue.popleft()
+                self.stats["dropped"] += 1
+            self._queue.append(item)
+            self.stats["queued"] += 1
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            if len(self._queue) >= self.batch_size:
+                self._ready.notify()
+        self._ensure_thread()
+
+    def send_many(self, host, values, clock=None):
+        for key, value in values.items():
+            if value is not None:
+                self.send(host, key, value, clock)
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._sock = None
+                self._thread = threading.Thread(target=self._run, name='zabbix-sender', daemon=True)
+                self._thread.start()
+
+    def _next_batch(self):
+        with self._lock:
+            while not self._stopping:
+                if self._queue:
+                    waited = time.monotonic() - self._oldest
+                    if len(self._queue) >= self.batch_size or waited >= self.max_latency:
+                        break
+                    self._ready.wait(self.max_latency - waited)
+                else:
+                    self._ready.wait()
+            count = min(len(self._queue), self.batch_size)
+            batch = [self._queue.popleft() for _ in range(count)]
+            self._oldest = time.monotonic() if self._queue else None
+            return batch
+
+    def _requeue(self, batch):
+        with self._lock:
+            room = self._buffer_size - len(self._queue)
+            if room < len(batch):
+                self.stats["dropped"] += len(batch) - max(room, 0)
+                batch = batch[len(batch) - max(room, 0):]
+            self._queue.extendleft(reversed(batch))
+            if self._oldest is None and self._queue:
+                self._oldest = time.monotonic()
+
+    def _connect(self):
+        sock = socket.create_connection(self.address, timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.stats["reconnects"] += 1
+        return sock
+
+    def _close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+    def _exchange(self, packet):
+        if self._sock is not None and peer_closed(self._sock):
+            self._close()
+            self._reuse = False
+        reused = self._sock is not None
+        if self._sock is None:
+            self._sock = self._connect()
+        try:
+            try:
+                sent = self._sock.send(packet)
+            except OSError:
+                if not reused:
+                    raise
+                # Fechada entre o teste e o envio, sem nenhum byte enviado: repetir não duplica.
+                self._close()
+                self._sock = self._connect()
+                sent = self._sock.send(packet)
+            self._sock.sendall(packet[sent:])
+            response = read_packet(self._sock)
+        except OSError:
+            self._close()
+            raise
+        if self._reuse is None:
+            self._reuse = not peer_closed(self._sock, REUSE_PROBE)
+        if not self._reuse:
+            self._close()
+        return response
+
+    def flush_batch(self, batch):
+        """Envia um lote já montado e devolve a resposta do servidor (usado pela thread)."""
+        now = time.time()
+        response = self._exchange(encode_packet({
+            "request": "sender data", "data": batch, "clock": int(now), "ns": int(now % 1 * 1e9),
+        }))
+        if response.get('response') != 'success':
+            raise SenderError(f"servidor recusou o lote: {response.get('info', response)}")
+        match = _INFO.search(response.get('info', ''))
+        self.stats["batches"] += 1
+        self.stats["sent"] += len(batch)
+        if match:
+            self.stats["processed"] += int(match.group(1))
+            self.stats["failed"] += int(match.group(2))
+        return response
+
+    def _run(self):
+        backoff = 0.5
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                if self._stopping:
+                    self._close()
+                    return
+                continue
+            try:
+                self.flush_batch(batch)
+                backoff = 0.5
+                self.stats["last_error"] = None
+            except (OSError, SenderError, ValueError) as exc:
+                self._close()
+                self._requeue(batch)
+                self.stats["retries"] += 1
+                self.stats["last_error"] = str(exc)
+                if self._stopping:
+                    return
+                time.sleep(backoff * random.uniform(0.8, 1.2))
+                backoff = min(backoff * 2, MAX_BACKOFF)
+
+    def stop(self, timeout=5):
+        """Descarrega o que estiver na fila (até ``timeout``) e encerra a thread."""
+        with self._lock:
+            self._stopping = True
+            self._ready.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def pending(self):
+        return len(self._queue)
@@ -0,0 +1,51 @@
+"""Mede o custo de renderizar as páginas inline com e sem o cache de templates.
+
+Compara ``render_template_string`` (parse e compilação do Jinja a cada
+chamada, como antes) com ``_render_page`` (template compilado uma vez) dentro
+de um contexto de requisição de teste. Uso, na raiz do repositório:
+
+    python scripts/bench_templates.py [--number 200] [login servers checklist]
+"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from flask import render_template_string
+
+from monitor import app as monitor_app
+
+# Páginas cujo contexto abaixo basta para renderizar (as demais precisam de dados do poller).
+PAGES = ('login', 'servers', 'checklist')
+CONTEXT = {
+    "user_name": 'admin', "error": None, "next_url": '', "nav_links": [], "last_refresh": '',
+    "message": None, "form_state": {}, "form_errors": [], "snmp_versions": [], "templates": [],
+    "host_groups": [], "server_profiles": [], "summary_stats": [], "hosts": [], "recursos": [],
+    "equipamentos": [], "servers_url": '/servers',
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('pages', nargs='*', default=list(PAGES), metavar='página', help=', '.join(PAGES))
+    parser.add_argument('--number', type=int, default=200, help='renderizações por medida (padrão: 200)')
+    args = parser.parse_args()
+    unknown = sorted(set(args.pages) - set(PAGES))
+    if unknown:
+        parser.error(f"página não suportada: {', '.join(unknown)}")
+
+    with monitor_app.app.test_request_context('/'):
+        for name in args.pages:
+            source = monitor_app.PAGE_TEMPLATES[name]
+            before = timeit.timeit(lambda: render_template_string(source, **CONTEXT), number=args.number)
+            monitor_app._get_template(name)
+            after = timeit.timeit(lambda: monitor_app._render_page(name, **CONTEXT), number=args.number)
+            print(f"{name:10s} render_template_string {before / args.number * 1e6:8.0f} us"
+                  f" -> cached {after / args.number * 1e6:6.0f} us")
+
+
+if __name__ == '__main__':
+    main()
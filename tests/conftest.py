@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Os módulos do monitor são importados como pacote (``from monitor import snmp``) a partir da raiz do repositório.
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
@@ -0,0 +1,237 @@
+"""Servidores locais que imitam o Zabbix: a API JSON-RPC e o trapper (porta 10051)."""
+
+import itertools
+import json
+import socket
+import struct
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TOKEN = 'token-de-teste'
+ZBXD_HEADER = struct.Struct('<4sBII')
+
+
+class FakeZabbixApi:
+    """API JSON-RPC em memória com os métodos usados por ``ZabbixSync``.
+
+    Aceita lotes JSON-RPC 2.0, conta POSTs e chamadas e, como o Zabbix do
+    compose (< 5.4), recusa ``username`` no ``user.login``. ``fail_methods``
+    (``{método: chamadas aceitas antes de falhar}``) faz o método responder
+    erro, para testar a repetição do lote.
+    """
+
+    def __init__(self):
+        self.hosts = {}
+        self.interfaces = {}
+        self.groups = {'Edge': '10'}
+        self.templates = {'Template MikroTik SNMP': '500'}
+        self.posts = 0
+        self.posted_methods = []
+        self.fail_methods = {}
+        self._ids = itertools.count(1000)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/api_jsonrpc.php"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def calls(self, method):
+        return [name for post in self.posted_methods for name in post if name == method]
+
+    def host_by_name(self, name):
+        return next(host for host in self.hosts.values() if host['host'] == name)
+
+    def _new_id(self):
+        return str(next(self._ids))
+
+    def _call(self, request):
+        method, params = request['method'], request['params']
+        if method == 'user.login':
+            if 'username' in params:
+                return {"error": {"code": -32602, "message": "Invalid params.", "data": 'unexpected "username"'}}
+            return {"result": TOKEN}
+        if request.get('auth') != TOKEN:
+            return {"error": {"code": -32602, "message": "Not authorised."}}
+        if method in self.fail_methods:
+            if self.fail_methods[method] > 0:
+                self.fail_methods[method] -= 1
+            else:
+                return {"error": {"code": -32500, "message": "Application error.", "data": "falha simulada"}}
+        handler = getattr(self, '_' + method.replace('.', '_'), None)
+        if handler is None:
+            return {"error": {"code": -32601, "message": "Method not found."}}
+        return {"result": handler(params)}
+
+    def _host_get(self, params):
+        wanted = set(params['filter']['host'])
+        return [
+            {"hostid": hostid, "host": host['host'],
+             "interfaces": [dict(item) for item in self.interfaces.values() if item['hostid'] == hostid]}
+            for hostid, host in self.hosts.items() if host['host'] in wanted
+        ]
+
+    def _hostgroup_get(self, params):
+        return [{"groupid": self.groups[name], "name": name} for name in params['filter']['name']
+                if name in self.groups]
+
+    def _hostgroup_create(self, params):
+        for group in params:
+            self.groups[group['name']] = self._new_id()
+        return {"groupids": [self.groups[group['name']] for group in params]}
+
+    def _template_get(self, params):
+        names = params['filter'].get('host') or params['filter'].get('name')
+        return [{"templateid": self.templates[name], "host": name, "name": name} for name in names
+                if name in self.templates]
+
+    def _add_interface(self, hostid, interface):
+        interfaceid = self._new_id()
+        self.interfaces[interfaceid] = dict(interface, hostid=hostid, interfaceid=interfaceid)
+
+    def _host_create(self, params):
+        hostids = []
+        for host in params:
+            assert host['groups'] and host['interfaces']
+            hostid = self._new_id()
+            interfaces = host.pop('interfaces')
+            self.hosts[hostid] = dict(host)
+            for interface in interfaces:
+                self._add_interface(hostid, interface)
+            hostids.append(hostid)
+        return {"hostids": hostids}
+
+    def _host_massupdate(self, params):
+        for ref in params['hosts']:
+            self.hosts[ref['hostid']]['groups'] = params['groups']
+            if 'templates' in params:
+                self.hosts[ref['hostid']]['templates'] = params['templates']
+        return {"hostids": [ref['hostid'] for ref in params['hosts']]}
+
+    def _host_update(self, params):
+        for change in params:
+            self.hosts[change['hostid']].update({key: value for key, value in change.items() if key != 'hostid'})
+        return {"hostids": [change['hostid'] for change in params]}
+
+    def _hostinterface_update(self, params):
+        for change in params:
+            assert 'type' not in change
+            self.interfaces[change['interfaceid']].update(change)
+        return {"interfaceids": [change['interfaceid'] for change in params]}
+
+    def _hostinterface_create(self, params):
+        for interface in params:
+            self._add_interface(interface['hostid'], interface)
+        return {"interfaceids": [interface['hostid'] for interface in params]}
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                requests_ = body if isinstance(body, list) else [body]
+                with api._lock:
+                    api.posts += 1
+                    api.posted_methods.append([request['method'] for request in requests_])
+                    replies = [dict(api._call(request), jsonrpc='2.0', id=request['id']) for request in requests_]
+                data = json.dumps(replies if isinstance(body, list) else replies[0]).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+
+class FakeTrapper:
+    """Trapper TCP que lê pacotes ZBXD e responde como o ``zabbix_server``.
+
+    Por padrão fecha a conexão após cada resposta (como o Zabbix);
+    ``keep_open=True`` a mantém aberta. As ``fail_first`` primeiras conexões
+    são fechadas sem resposta; os pacotes cujo número (a partir de 1) está em
+    ``drop_replies`` são lidos e a conexão fecha sem responder.
+    """
+
+    def __init__(self, keep_open=False, fail_first=0, drop_replies=()):
+        self.keep_open = keep_open
+        self.fail_first = fail_first
+        self.drop_replies = set(drop_replies)
+        self.values = []
+        self.packets = []
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._sock = socket.socket()
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(('127.0.0.1', 0))
+        self._sock.listen(16)
+        self.server = '127.0.0.1:%d' % self._sock.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def stop(self):
+        self._sock.close()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            with self._lock:
+                self.connections += 1
+                refuse = self.fail_first > 0
+                self.fail_first -= refuse
+            if refuse:
+                conn.close()
+                continue
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    @staticmethod
+    def _recv_exact(conn, size):
+        data = b''
+        while len(data) < size:
+            chunk = conn.recv(size - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return data
+
+    def _serve(self, conn):
+        with conn:
+            while True:
+                header = self._recv_exact(conn, ZBXD_HEADER.size)
+                if header is None:
+                    return
+                protocol, flags, length, _ = ZBXD_HEADER.unpack(header)
+                assert (protocol, flags) == (b'ZBXD', 1)
+                packet = json.loads(self._recv_exact(conn, length))
+                with self._lock:
+                    self.packets.append(packet)
+                    self.values.extend(packet['data'])
+                    drop = len(self.packets) in self.drop_replies
+                if drop:
+                    return
+                count = len(packet['data'])
+                body = json.dumps({
+                    "response": "success",
+                    "info": f"processed: {count}; failed: 0; total: {count}; seconds spent: 0.000100",
+                }).encode()
+                conn.sendall(ZBXD_HEADER.pack(b'ZBXD', 1, len(body), 0) + body)
+                if not self.keep_open:
+                    return
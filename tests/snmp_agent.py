@@ -0,0 +1,139 @@
+"""Agente SNMP local (UDP) para os testes do cliente e do coletor.
+
+Responde GET, GETNEXT e GETBULK em v2c e v3 (USM authNoPriv) a partir de um
+dicionário ``{oid: valor}``. ``too_big_above`` faz o agente responder tooBig
+quando a resposta passaria desse número de varbinds, como um equipamento com
+PDU pequeno.
+"""
+
+import asyncio
+import bisect
+import time
+
+from monitor import snmp
+
+ENGINE_ID = b'\x80\x00\x1f\x88\x80testengine'
+USM_UNKNOWN_ENGINE_ID = '1.3.6.1.6.3.15.1.1.4.0'
+ERROR_TOO_BIG = 1
+
+SYSTEM_MIB = {
+    (1, 3, 6, 1, 2, 1, 1, 1, 0): b'RouterOS CCR1036',
+    (1, 3, 6, 1, 2, 1, 1, 3, 0): ('ticks', 123456),
+    (1, 3, 6, 1, 2, 1, 1, 5, 0): b'core-border-01',
+}
+
+
+def encode_value(value):
+    """``('ticks'|'c32'|'c64', n)``, ``int``, ``bytes`` ou ``EndOfMib`` para BER."""
+    if isinstance(value, snmp.EndOfMib):
+        return snmp.encode_tlv(value.tag, b'')
+    if isinstance(value, tuple):
+        kind, number = value
+        tag = {'ticks': snmp.TIMETICKS, 'c32': snmp.COUNTER32, 'c64': snmp.COUNTER64}[kind]
+        return snmp.encode_unsigned(number, tag)
+    if isinstance(value, int):
+        return snmp.encode_integer(value)
+    return snmp.encode_octets(value)
+
+
+def plain(value):
+    """Valor como o cliente o decodifica (sem o tipo)."""
+    return value[1] if isinstance(value, tuple) else value
+
+
+class SnmpAgent(asyncio.DatagramProtocol):
+    def __init__(self, mib, community='public', user=b'ops', auth=('sha', 'authpass123'), too_big_above=0):
+        self.mib = dict(mib)
+        self.oids = sorted(self.mib)
+        self.community = community.encode()
+        self.user = user
+        self.auth = auth
+        self.too_big_above = too_big_above
+        self.requests = []
+        self.transport = None
+        self._started = time.monotonic()
+        self.key = snmp.localize_key(snmp.password_to_key(auth[1], auth[0]), ENGINE_ID, auth[0]) if auth else None
+
+    @property
+    def port(self):
+        return self.transport.get_extra_info('sockname')[1]
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def _next(self, oid):
+        index = bisect.bisect_right(self.oids, oid)
+        if index < len(self.oids):
+            return self.oids[index], self.mib[self.oids[index]]
+        return oid, snmp.EndOfMib(snmp.END_OF_MIB_VIEW)
+
+    def _answer(self, pdu):
+        varbinds = [oid for oid, _ in pdu['varbinds']]
+        if pdu['type'] == snmp.GET_REQUEST:
+            return [(oid, self.mib.get(oid, snmp.EndOfMib(snmp.NO_SUCH_INSTANCE))) for oid in varbinds]
+        if pdu['type'] == snmp.GET_NEXT_REQUEST:
+            return [self._next(oid) for oid in varbinds]
+        non_repeaters, repetitions = pdu['error_status'], pdu['error_index']
+        answer = [self._next(oid) for oid in varbinds[:non_repeaters]]
+        cursors = varbinds[non_repeaters:]
+        for _ in range(repetitions):
+            row = [self._next(oid) for oid in cursors]
+            answer.extend(row)
+            cursors = [oid for oid, _ in row]
+        return answer
+
+    def _response(self, pdu):
+        answer = self._answer(pdu)
+        error = 0
+        if self.too_big_above and len(answer) > self.too_big_above:
+            answer, error = [], ERROR_TOO_BIG
+        varbinds = snmp.encode_sequence(*(
+            snmp.encode_sequence(snmp.encode_oid(oid), encode_value(value)) for oid, value in answer
+        ))
+        return snmp.encode_sequence(
+            snmp.encode_integer(pdu['request_id']), snmp.encode_integer(error), snmp.encode_integer(0), varbinds,
+            tag=snmp.RESPONSE,
+        )
+
+    def _usm_state(self):
+        state = snmp.UsmState()
+        state.engine_id = ENGINE_ID
+        state.engine_boots = 1
+        state.engine_time = int(time.monotonic() - self._started) + 1000
+        return state
+
+    def datagram_received(self, data, addr):
+        _, start, _ = snmp.decode_tlv(data, 0)
+        _, version, _ = snmp.decode_value(data, start)
+        if version == snmp.VERSION_V2C:
+            pdu = snmp.parse_v2c_message(data)
+            self.requests.append(pdu)
+            self.transport.sendto(snmp.build_v2c_message(self.community, self._response(pdu)), addr)
+            return
+        pdu = snmp.parse_v3_message(data)
+        self.requests.append(pdu)
+        if not pdu['engine_id']:
+            report = snmp.encode_sequence(
+                snmp.encode_integer(pdu['request_id']), snmp.encode_integer(0), snmp.encode_integer(0),
+                snmp.encode_sequence(snmp.encode_sequence(
+                    snmp.encode_oid(USM_UNKNOWN_ENGINE_ID), snmp.encode_unsigned(1, snmp.COUNTER32),
+                )),
+                tag=snmp.REPORT,
+            )
+            self.transport.sendto(snmp.build_v3_message(pdu['msg_id'], b'', report, self._usm_state(),
+                                                        reportable=False), addr)
+            return
+        if self.key and not snmp.verify_v3_auth(data, pdu['auth_params'], self.key, self.auth[0]):
+            return  # assinatura errada: o agente real também descarta em silêncio
+        message = snmp.build_v3_message(
+            pdu['msg_id'], pdu['user'], self._response(pdu), self._usm_state(),
+            auth_protocol=self.auth[0] if self.key else None, auth_key=self.key, reportable=False,
+        )
+        self.transport.sendto(message, addr)
+
+
+async def start_agent(mib, **options):
+    """Sobe o agente numa porta livre de 127.0.0.1 no loop corrente."""
+    loop = asyncio.get_running_loop()
+    _, agent = await loop.create_datagram_endpoint(lambda: SnmpAgent(mib, **options), local_addr=('127.0.0.1', 0))
+    return agent
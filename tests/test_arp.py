@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+from monitor import arp
+from monitor.arp import ArpStore, IntHashIndex, format_mac, parse_mac
+
+START = 1_700_000_000
+
+
+def entry(ip, mac, interface='ether1'):
+    return {"ip": ip, "mac": mac, "interface": interface}
+
+
+def table(count, mac_base=0x001122000000, interface='ether1'):
+    return [entry(f"10.0.{index // 256}.{index % 256}", format_mac(mac_base + index), interface)
+            for index in range(count)]
+
+
+def test_int_hash_index_handles_collisions_and_growth():
+    index = IntHashIndex(np.uint32, capacity=16)
+    keys = np.arange(0, 5000 * 4096, 4096, dtype=np.uint32)
+    index.put(keys, np.arange(len(keys)))
+    assert len(index) == 5000 and index.mask + 1 >= 5000 / arp.MAX_LOAD
+    assert (index.get(keys) == np.arange(len(keys))).all()
+    index.put(keys[:10], np.full(10, 7))
+    assert (index.get(keys[:10]) == 7).all() and len(index) == 5000
+    assert (index.get(np.array([1, 4097], dtype=np.uint32)) == -1).all()
+
+
+@pytest.mark.parametrize('text', ['00:1b:21:0a:0b:0c', '00-1B-21-0A-0B-0C', '001b.210a.0b0c', '0:1b:21:a:b:c'])
+def test_parse_mac_formats(text):
+    assert format_mac(parse_mac(text)) == '00:1b:21:0a:0b:0c'
+
+
+def test_parse_mac_rejects_garbage():
+    with pytest.raises(ValueError):
+        parse_mac('00:1b:21:0a:0b')
+
+
+def test_first_snapshot_loads_without_events_and_last_duplicate_wins():
+    store = ArpStore()
+    rows = table(3) + [entry('10.0.0.1', '00:00:00:00:00:99'), entry('300.0.0.1', 'x'), {"ip": '10.0.0.9'}]
+    summary = store.apply_snapshot('r1', rows, START)
+
+    assert summary == {"entries": 3, "new": 3, "mac_changed": 0, "moved": 0, "gone": 0, "invalid": 2}
+    assert store.recent_events() == []
+    assert [item['mac'] for item in store.where_ip('10.0.0.1')] == ['00:00:00:00:00:99']
+
+
+def test_vanished_entries_are_dropped_from_lookups():
+    store = ArpStore()
+    store.apply_snapshot('r1', table(5), START)
+    summary = store.apply_snapshot('r1', table(5)[1:4], START + 60)
+
+    assert summary["gone"] == 2 and summary["new"] == 0
+    assert store.where_ip('10.0.0.0') == [] and store.where_ip('10.0.0.4') == []
+    assert store.where_mac(format_mac(0x001122000004)) == []
+    (kept,) = store.where_ip('10.0.0.2')
+    assert (kept['first_seen'], kept['last_seen']) == (START, START + 60)
+    assert len(store) == 3 and store.stats()["dead_rows"] == 2
+
+    # Entrada que volta depois de sumir é nova para o roteador.
+    summary = store.apply_snapshot('r1', table(5)[:4], START + 120)
+    assert (summary["new"], summary["gone"]) == (1, 0)
+    assert [event['ip'] for event in store.recent_events(kind='new')] == ['10.0.0.0']
+    assert store.where_ip('10.0.0.0')[0]['first_seen'] == START + 120
+
+
+def test_mac_change_and_moves_between_interfaces_and_routers():
+    store = ArpStore()
+    store.apply_snapshot('r1', [entry('10.0.0.1', '00:00:00:00:00:01'), entry('10.0.0.2', '00:00:00:00:00:02')],
+                         START)
+    store.apply_snapshot('r2', [], START)
+    store.apply_snapshot('r1', [entry('10.0.0.1', '00:00:00:00:00:11'),
+                                entry('10.0.0.2', '00:00:00:00:00:02', 'vlan20')], START + 60)
+    store.apply_snapshot('r2', [entry('10.0.0.2', '00:00:00:00:00:02', 'ether5')], START + 120)
+
+    # Mais recentes primeiro.
+    moved_router, moved_interface, changed = store.recent_events()
+    assert (changed['type'], changed['old_mac'], changed['mac']) == ('mac_changed', '00:00:00:00:00:01',
+                                                                     '00:00:00:00:00:11')
+    assert (moved_interface['type'], moved_interface['from_interface'], moved_interface['interface']) == (
+        'moved', 'ether1', 'vlan20')
+    assert (moved_router['router'], moved_router['from_router'], moved_router['from_interface']) == (
+        'r2', 'r1', 'vlan20')
+    assert sorted(item['router'] for item in store.where_mac('00:00:00:00:00:02')) == ['r1', 'r2']
+    assert store.recent_events(kind='moved', router='r2') == [moved_router]
+
+
+def test_compaction_and_router_removal_keep_lookups_consistent():
+    store = ArpStore()
+    store.apply_snapshot('r1', table(3000), START)
+    store.apply_snapshot('r2', table(100, mac_base=0x00AA00000000, interface='sfp1'), START)
+    # Sumir com 2/3 da tabela passa do COMPACT_RATIO e dispara a compactação.
+    store.apply_snapshot('r1', table(3000)[::3], START + 60)
+
+    assert store.stats()["dead_rows"] == 0 and len(store) == 1100
+    assert [item['router'] for item in store.where_ip('10.0.0.1')] == ['r2']
+    assert {item['router'] for item in store.where_ip('10.0.0.3')} == {'r1', 'r2'}
+    summary = store.apply_snapshot('r1', table(3000)[::3], START + 120)
+    assert (summary["new"], summary["gone"]) == (0, 0)
+
+    store.remove_router('r1')
+    assert [item['router'] for item in store.where_ip('10.0.0.3')] == ['r2']
+    # Depois da remoção, o próximo snapshot do roteador só recarrega a tabela.
+    store.apply_snapshot('r1', table(10), START + 180)
+    assert store.recent_events(router='r1') == []
@@ -0,0 +1,107 @@
+import time
+
+import pytest
+
+from monitor.bgp import BgpPeer, BgpTracker, TransitionRing
+
+START = 1_700_000_000
+
+
+def peer(state='established', transitions=None, seconds=None, prefixes=None, address='192.0.2.1', asn=65001):
+    return {"peer": address, "asn": asn, "state": state, "established_transitions": transitions,
+            "established_seconds": seconds, "prefixes_received": prefixes}
+
+
+def test_transition_ring_keeps_the_newest_in_order():
+    ring = TransitionRing(capacity=3)
+    for offset, state in enumerate((6, 1, 6, 3)):
+        ring.append(START + offset, state, flaps=300 if offset == 3 else 0)
+
+    assert len(ring) == 3
+    assert list(ring.items()) == [(START + 1, 'idle', 0), (START + 2, 'established', 0), (START + 3, 'active', 255)]
+
+
+def test_score_decays_by_half_every_half_life():
+    state = BgpPeer('r1', '192.0.2.1', START)
+    state.score = 8.0
+    assert state.decayed_score(START + 900, half_life=900) == pytest.approx(4.0)
+    assert state.decayed_score(START + 2700, half_life=900) == pytest.approx(1.0)
+    assert state.decayed_score(START - 60, half_life=900) == 8.0
+
+
+def test_down_and_up_between_polls_are_flaps_and_events():
+    events = []
+    tracker = BgpTracker(half_life=900, threshold=3, on_event=events.append)
+    tracker.apply_snapshot('r1', [peer()], START)
+    tracker.apply_snapshot('r1', [peer('active')], START + 60)
+    tracker.apply_snapshot('r1', [peer()], START + 120)
+
+    assert [(event['type'], event['previous'], event['state']) for event in events] == [
+        ('down', 'established', 'active'), ('up', 'active', 'established'),
+    ]
+    (state,) = tracker.list_peers()
+    assert state['flaps'] == 1 and state['since'] == START + 120
+    assert [item['state'] for item in tracker.history('r1', '192.0.2.1')] == ['established', 'active', 'established']
+
+
+def test_flaps_hidden_between_polls_come_from_counters():
+    tracker = BgpTracker(half_life=900, threshold=3)
+    tracker.apply_snapshot('r1', [peer(transitions=10, seconds=5000)], START)
+    # Caiu e voltou duas vezes entre os polls: o contador de entradas em established subiu 2.
+    tracker.apply_snapshot('r1', [peer(transitions=12, seconds=30)], START + 60)
+    assert tracker.peers[('r1', '192.0.2.1')].flaps == 2
+
+    # Sem contador de transições (ou contador zerado): o uptime que voltou a zero denuncia um flap.
+    tracker.apply_snapshot('r1', [peer(transitions=None, seconds=90)], START + 120)
+    tracker.apply_snapshot('r1', [peer(transitions=None, seconds=20)], START + 180)
+    assert tracker.peers[('r1', '192.0.2.1')].flaps == 3
+    # Uptime andando junto com o relógio (com folga de poucos segundos) não é flap.
+    tracker.apply_snapshot('r1', [peer(transitions=None, seconds=78)], START + 240)
+    assert tracker.peers[('r1', '192.0.2.1')].flaps == 3
+
+
+def test_flapping_event_once_and_decay_clears_the_summary():
+    tracker = BgpTracker(half_life=60, threshold=3)
+    now = time.time()
+    timestamp = now - 600
+    tracker.apply_snapshot('r1', [peer(), peer(address='192.0.2.2')], timestamp)
+    for _ in range(4):
+        timestamp += 1
+        tracker.apply_snapshot('r1', [peer('idle'), peer(address='192.0.2.2')], timestamp)
+        timestamp += 1
+        tracker.apply_snapshot('r1', [peer(), peer(address='192.0.2.2')], timestamp)
+
+    assert [event['peer'] for event in tracker.recent_events(kind='flapping')] == ['192.0.2.1']
+    # Dez minutos parado com meia-vida de 60 s: o score caiu de 4 para ~0,004.
+    summary = tracker.summary()
+    assert summary["routers"]["r1"]["flapping"] == 0
+    assert tracker.list_peers(flapping=True) == []
+
+    tracker.apply_snapshot('r1', [peer('idle'), peer(address='192.0.2.2')], now)
+    for _ in range(3):
+        tracker.apply_snapshot('r1', [peer(), peer(address='192.0.2.2')], now)
+        tracker.apply_snapshot('r1', [peer('idle'), peer(address='192.0.2.2')], now)
+    assert tracker.summary()["routers"]["r1"]["flapping"] == 1
+    assert [item['peer'] for item in tracker.list_peers(flapping=True)] == ['192.0.2.1']
+
+
+def test_prefix_swings_and_incremental_totals():
+    tracker = BgpTracker(delta_ratio=0.2, delta_min=100)
+    tracker.apply_snapshot('r1', [peer(prefixes=1000), peer(address='192.0.2.2', prefixes=50)], START)
+    tracker.apply_snapshot('r2', [peer(state='active')], START)
+    tracker.apply_snapshot('r1', [peer(prefixes=1150), peer(address='192.0.2.2', prefixes=5)], START + 60)
+    assert tracker.recent_events() == []
+
+    tracker.apply_snapshot('r1', [peer(prefixes=700), peer(address='192.0.2.2', prefixes=5)], START + 120)
+    (drop,) = tracker.recent_events(kind='prefix_drop')
+    assert (drop['previous'], drop['prefixes'], drop['delta']) == (1150, 700, -450)
+
+    summary = tracker.summary()
+    assert summary["routers"]["r1"] == {"peers": 2, "peers_up": 2, "peers_down": 0, "flapping": 0, "prefixes": 705}
+    assert summary["fleet"] == {"peers": 3, "peers_up": 2, "peers_down": 1, "flapping": 0, "prefixes": 705,
+                                "routers": 2}
+
+    assert tracker.apply_snapshot('r1', [peer(prefixes=700)], START + 180) == {"peers": 1, "removed": 1}
+    assert tracker.recent_events(kind='removed')[0]['peer'] == '192.0.2.2'
+    tracker.remove_router('r2')
+    assert tracker.summary()["fleet"]["peers"] == 1
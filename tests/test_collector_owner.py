@@ -0,0 +1,34 @@
+import fcntl
+
+import pytest
+
+from monitor import app as monitor_app
+from monitor.ownership import ProcessLock
+
+
+@pytest.fixture
+def second_worker(tmp_path, monkeypatch):
+    """Este processo perde o lock do coletor, como um segundo worker do gunicorn."""
+    path = tmp_path / 'collector.lock'
+    with open(path, 'a+') as owner:
+        # flock vale por descrição de arquivo aberto: este descritor faz o papel do outro processo.
+        fcntl.flock(owner.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        monkeypatch.setattr(monitor_app, 'COLLECTOR_LOCK', ProcessLock(path))
+        monkeypatch.setattr(monitor_app, '_POLLING_SYNCED_PID', None)
+        yield monitor_app.app.test_client()
+
+
+def test_non_owner_serves_login_health_and_assets(second_worker):
+    asset = next(iter(monitor_app.STATIC_ASSETS))
+
+    assert second_worker.get('/health').status_code == 200
+    assert second_worker.get('/login').status_code == 200
+    assert second_worker.get(f"/assets/{asset.hashed_path}").status_code == 200
+    assert monitor_app._POLLING_SYNCED_PID is None
+
+
+@pytest.mark.parametrize('path', ['/api/checklist', '/api/netflow', '/openmetrics', '/checklist'])
+def test_non_owner_refuses_collector_routes(second_worker, path):
+    response = second_worker.get(path)
+    assert response.status_code == 503
+    assert 'único worker' in response.get_json()['error']
@@ -0,0 +1,110 @@
+import os
+import threading
+import time
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from monitor import credentials
+from monitor.credentials import AuthBusy, CredentialStore, HashCheckPool
+
+
+def write_users(path, users, mtime_ns=None):
+    lines = ['users:'] + [f"  - username: {name}\n    password: '{password}'" for name, password in users]
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_store_caches_until_file_changes(tmp_path):
+    path = tmp_path / 'users.yml'
+    write_users(path, [('admin', 'a')], mtime_ns=1_000_000_000)
+    store = CredentialStore(str(path), env_loader=list)
+
+    first = store.records()
+    assert first == {"admin": 'a'}
+    assert store.records() is first
+
+    # Mesmo tamanho, mtime diferente: relê.
+    write_users(path, [('admin', 'b')], mtime_ns=2_000_000_000)
+    assert store.get('admin') == 'b'
+
+
+def test_store_keeps_previous_version_on_broken_yaml(tmp_path):
+    path = tmp_path / 'users.yml'
+    write_users(path, [('admin', 'a')])
+    store = CredentialStore(str(path), env_loader=list)
+    assert store.get('admin') == 'a'
+
+    path.write_text('users: [quebrado\n', encoding='utf-8')
+    assert store.get('admin') == 'a'
+    write_users(path, [('admin', 'nova'), ('noc', 'n')], mtime_ns=3_000_000_000)
+    assert store.records() == {"admin": 'nova', "noc": 'n'}
+
+
+def test_environment_overrides_file_and_missing_file_is_empty(tmp_path):
+    path = tmp_path / 'users.yml'
+    store = CredentialStore(str(path), env_loader=lambda: [{"username": 'admin', "password": 'env'}])
+    assert store.records() == {"admin": 'env'}
+
+    write_users(path, [('admin', 'arquivo'), ('noc', 'n')])
+    assert store.records() == {"admin": 'env', "noc": 'n'}
+
+
+def test_verify_plain_and_hashed_passwords():
+    pool = HashCheckPool(workers=1)
+    hashed = generate_password_hash('segredo', method='pbkdf2:sha256:1000')
+
+    assert pool.verify('segredo', 'segredo')
+    assert not pool.verify('segredo', 'outra')
+    assert pool.verify(hashed, 'segredo')
+    assert not pool.verify(hashed, 'outra')
+    assert not pool.verify('', '')
+    assert not pool.verify('pbkdf2:formato-invalido', 'x')
+
+
+@pytest.fixture
+def blocked_hash(monkeypatch):
+    """``check_password_hash`` preso até ``release.set()``."""
+    release = threading.Event()
+    started = threading.Semaphore(0)
+
+    def slow_check(stored, provided):
+        started.release()
+        release.wait(5)
+        return True
+
+    monkeypatch.setattr(credentials, 'check_password_hash', slow_check)
+    yield release, started
+    release.set()
+
+
+def test_full_queue_fails_fast_with_auth_busy(blocked_hash):
+    release, started = blocked_hash
+    pool = HashCheckPool(workers=1, max_pending=1, timeout=5)
+    results = []
+    waiting = threading.Thread(target=lambda: results.append(pool.check('pbkdf2:x', 'y')))
+    waiting.start()
+    assert started.acquire(timeout=5)
+
+    with pytest.raises(AuthBusy):
+        pool.check('pbkdf2:x', 'y')
+
+    release.set()
+    waiting.join(5)
+    assert results == [True]
+    # A vaga volta no callback do future, logo depois do resultado.
+    deadline = time.monotonic() + 5
+    while True:
+        try:
+            assert pool.check('pbkdf2:x', 'y') is True
+            break
+        except AuthBusy:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+
+
+def test_slow_check_times_out_with_auth_busy(blocked_hash):
+    pool = HashCheckPool(workers=1, max_pending=4, timeout=0.05)
+    with pytest.raises(AuthBusy):
+        pool.check('pbkdf2:x', 'y')
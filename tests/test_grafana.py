@@ -0,0 +1,124 @@
+import pytest
+
+from monitor import grafana
+from monitor.timeseries import EventLog, TimeSeriesStore
+
+START = 1_700_000_000
+
+
+class CountingStore(TimeSeriesStore):
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.calls = []
+
+    def query_many(self, names, *args, **kwargs):
+        self.calls.append((list(names), kwargs.get('agg'), kwargs.get('method')))
+        return super().query_many(names, *args, **kwargs)
+
+
+def store_with(names, **options):
+    store = CountingStore(retention=3600, resolution=10, rollups=(), **options)
+    for name in names:
+        for offset in range(0, 600, 10):
+            store.append(name, START + offset, offset / 10)
+    return store
+
+
+def payload(targets, **extra):
+    body = {"range": {"from": START * 1000, "to": (START + 600) * 1000}, "maxDataPoints": 61, "targets": targets}
+    body.update(extra)
+    return body
+
+
+@pytest.mark.parametrize('value, expected', [
+    (1_700_000_000_000, START),
+    ('1700000000000', START),
+    ('2023-11-14T22:13:20Z', START),
+    ('2023-11-14T22:13:20.000+00:00', START),
+    (None, 42),
+    ('', 42),
+])
+def test_parse_time(value, expected):
+    assert grafana.parse_time(value, 42) == expected
+
+
+def test_query_window_limits_points_and_respects_interval():
+    assert grafana.query_window(payload([])) == (START, START + 600, 10)
+    # intervalMs maior que o necessário para maxDataPoints prevalece.
+    assert grafana.query_window(payload([], intervalMs=30000))[2] == 30
+    with pytest.raises(ValueError):
+        grafana.query_window({"range": {"from": START * 1000 + 1, "to": START * 1000}})
+
+
+def test_expand_targets_globs_exact_names_and_hidden():
+    names = ['cpu', 'snmp.rtt.10.0.0.1', 'snmp.rtt.10.0.0.2', 'snmp.up.10.0.0.1']
+    targets = [
+        {"refId": 'A', "target": 'snmp.rtt.*'},
+        {"refId": 'B', "target": 'cpu', "payload": {"agg": 'max'}},
+        {"refId": 'C', "target": 'memory'},
+        {"refId": 'D', "target": 'cpu', "hide": True},
+        {"refId": 'E', "target": ' '},
+        {"refId": 'F', "target": 'snmp.up.10.0.0.1', "data": 'inválido'},
+    ]
+    assert grafana.expand_targets(targets, names) == [
+        ('A', 'snmp.rtt.10.0.0.1', {}),
+        ('A', 'snmp.rtt.10.0.0.2', {}),
+        ('B', 'cpu', {"agg": 'max'}),
+        ('F', 'snmp.up.10.0.0.1', {}),
+    ]
+
+
+def test_evaluate_reads_each_store_once_per_option_group():
+    local = store_with(['cpu', 'memory'])
+    polled = store_with(['snmp.rtt.a', 'snmp.rtt.b'])
+    targets = [
+        {"refId": 'A', "target": 'cpu'},
+        {"refId": 'B', "target": 'memory'},
+        {"refId": 'C', "target": 'cpu', "payload": {"agg": 'max'}},
+        {"refId": 'D', "target": 'snmp.rtt.*'},
+    ]
+    result = grafana.evaluate([local, polled], payload(targets, maxDataPoints=7))
+
+    assert [(item['refId'], item['target']) for item in result] == [
+        ('A', 'cpu'), ('B', 'memory'), ('C', 'cpu'), ('D', 'snmp.rtt.a'), ('D', 'snmp.rtt.b'),
+    ]
+    assert local.calls == [(['cpu', 'memory'], 'avg', None), (['cpu'], 'max', None)]
+    assert polled.calls == [(['snmp.rtt.a', 'snmp.rtt.b'], 'avg', None)]
+    average, maximum = result[0]['datapoints'], result[2]['datapoints']
+    # Janelas de 100 s com 10 amostras (0..9, 10..19, ...), timestamps em ms.
+    assert average[0] == [4.5, START * 1000] and maximum[0] == [9.0, START * 1000]
+    assert len(average) == 6
+
+
+def test_evaluate_lttb_and_unknown_aggregate():
+    store = store_with(['cpu'])
+    (series,) = grafana.evaluate([store], payload([{"refId": 'A', "target": 'cpu', "payload": {"method": 'lttb'}}],
+                                                  maxDataPoints=11))
+    assert store.calls == [(['cpu'], 'avg', 'lttb')]
+    assert len(series['datapoints']) <= 10
+
+    with pytest.raises(ValueError):
+        grafana.evaluate([store], payload([{"target": 'cpu', "payload": {"agg": 'p99'}}]))
+
+
+def test_search_substring_and_glob():
+    names = ['cpu', 'disk', 'snmp.rtt.10.0.0.1', 'snmp.up.10.0.0.1']
+    assert grafana.search(names, 'RTT') == ['snmp.rtt.10.0.0.1']
+    assert grafana.search(names, 'snmp.*.10.0.0.1') == ['snmp.rtt.10.0.0.1', 'snmp.up.10.0.0.1']
+    assert grafana.search(names, '') == names
+
+
+def test_annotations_filter_by_window_and_text():
+    events = EventLog()
+    events.add(START - 10, 'SNMP caiu', '10.0.0.1 sem resposta', tags=['snmp', 'down'])
+    events.add(START + 60, 'SNMP caiu', '10.0.0.2 sem resposta', tags=['snmp', 'down'])
+    events.add(START + 120, 'SNMP voltou', '10.0.0.2 respondeu', tags=['snmp', 'up'])
+
+    everything = grafana.annotations(events, payload([]))
+    assert [item['time'] for item in everything] == [(START + 60) * 1000, (START + 120) * 1000]
+
+    only_up = grafana.annotations(events, payload([], annotation={"name": 'SNMP', "query": 'VOLTOU'}))
+    assert only_up == [{
+        "annotation": {"name": 'SNMP', "query": 'VOLTOU'}, "time": (START + 120) * 1000,
+        "title": 'SNMP voltou', "text": '10.0.0.2 respondeu', "tags": ['snmp', 'up'],
+    }]
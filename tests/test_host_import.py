@@ -0,0 +1,152 @@
+import io
+import json
+
+import pytest
+
+from monitor import host_import
+from monitor.host_import import ImportFormatError, detect_format, import_hosts, validate_row
+from monitor.inventory import HostInventory
+
+
+def row(**changes):
+    record = {"host_name": 'cpe-01', "ip_address": '10.0.0.1', "snmp_version": 'v2c', "community": 'public'}
+    record.update(changes)
+    return record
+
+
+def test_v3_requires_user_and_valid_auth():
+    host, errors = validate_row(row(snmp_version='V3', community='ops', auth_protocol='SHA',
+                                    auth_password='authpass123'))
+    assert errors == []
+    assert (host['snmp_version'], host['auth_protocol']) == ('v3', 'sha')
+
+    _, errors = validate_row(row(snmp_version='v3', community=''))
+    assert [field for field, _ in errors] == ['community']
+
+
+@pytest.mark.parametrize('changes, field', [
+    ({"auth_protocol": 'sha256', "auth_password": 'authpass123'}, 'auth_protocol'),
+    ({"auth_protocol": 'md5', "auth_password": 'curta'}, 'auth_password'),
+    ({"auth_protocol": 'md5'}, 'auth_password'),
+])
+def test_v3_auth_errors(changes, field):
+    _, errors = validate_row(row(snmp_version='v3', community='ops', **changes))
+    assert [name for name, _ in errors] == [field]
+
+
+def test_v2c_ignores_v3_auth_fields():
+    host, errors = validate_row(row(auth_protocol='sha', auth_password='authpass123'))
+    assert errors == []
+    assert (host['auth_protocol'], host['auth_password']) == ('', '')
+
+
+@pytest.fixture
+def inventory(tmp_path):
+    return HostInventory(tmp_path / 'inventory.db')
+
+
+def run_import(inventory, text, fmt, **options):
+    return import_hosts(inventory, io.BytesIO(text.encode('utf-8')), fmt, **options)
+
+
+@pytest.mark.parametrize('args, fmt', [
+    (('hosts.CSV',), 'csv'),
+    (('hosts.yml',), 'yaml'),
+    (('dump.jsonl',), 'ndjson'),
+    ((None, 'application/x-ndjson; charset=utf-8'), 'ndjson'),
+    ((None, None, 'YML'), 'yaml'),
+])
+def test_detect_format(args, fmt):
+    assert detect_format(*args) == fmt
+
+
+def test_detect_format_rejects_unknown():
+    with pytest.raises(ImportFormatError):
+        detect_format('hosts.txt')
+    with pytest.raises(ImportFormatError):
+        detect_format(explicit='xml')
+
+
+def test_csv_reports_errors_by_line_and_imports_the_rest(inventory):
+    text = (
+        "\ufeffhost_name,ip_address,snmp_version,community,polling,tags\n"
+        "cpe-01,10.0.0.1,v2c,public,60,\"core,bgp\"\n"
+        "sem-ip,,v2c,public,60,\n"
+        "cpe-03,300.1.1.1,v1,public,2,\n"
+        "cpe-04,10.0.0.4:1161,V3,ops,30,\n"
+    )
+    calls = []
+    report = run_import(inventory, text, 'csv', batch_size=1, on_batch=calls.append)
+
+    assert (report.processed, report.imported, report.failed) == (4, 2, 2)
+    assert [(error['line'], error['field']) for error in report.errors] == [
+        (3, 'ip_address'), (4, 'ip_address'), (4, 'snmp_version'), (4, 'polling'),
+    ]
+    assert len(calls) == 2
+    assert inventory.get('10.0.0.1')['tags'] == ['bgp', 'core']
+    assert inventory.get('10.0.0.4:1161')['snmp_version'] == 'v3'
+    assert report.as_dict()["fatal"] is None
+
+
+def test_ndjson_keeps_going_after_unreadable_lines(inventory):
+    lines = [
+        json.dumps({"host_name": 'a', "ip_address": '10.0.0.1', "tags": ['x']}),
+        '{quebrado',
+        '',
+        json.dumps(['não', 'é', 'objeto']),
+        json.dumps({"host_name": 'b', "ip_address": '10.0.0.2', "tags": 7}),
+        json.dumps({"host_name": 'c', "ip_address": 'core-01.example'}),
+    ]
+    report = run_import(inventory, '\n'.join(lines), 'ndjson')
+
+    assert (report.processed, report.imported, report.failed) == (5, 2, 3)
+    assert [(error['line'], error['field']) for error in report.errors] == [(2, ''), (4, ''), (5, 'tags')]
+    assert len(inventory) == 2
+
+
+def test_yaml_list_and_documents(inventory):
+    text = (
+        "- host_name: a\n  ip_address: 10.0.0.1\n"
+        "- host_name: b\n  ip_address: 10.0.0.2\n  snmp_version: v5\n"
+        "---\n"
+        "host_name: c\nip_address: 10.0.0.3\ntags: [core]\n"
+    )
+    report = run_import(inventory, text, 'yaml')
+
+    assert (report.processed, report.imported, report.failed) == (3, 2, 1)
+    assert report.errors == [{"line": 3, "field": 'snmp_version', "message": 'use v2c ou v3'}]
+    assert inventory.get('10.0.0.3')['tags'] == ['core']
+
+
+def test_invalid_yaml_is_fatal_but_keeps_earlier_batches(inventory):
+    text = "- host_name: a\n  ip_address: 10.0.0.1\n- host_name: [quebrado\n"
+    report = run_import(inventory, text, 'yaml')
+
+    assert report.fatal.startswith('YAML inválido')
+    assert report.imported == 1
+    assert inventory.get('10.0.0.1') is not None
+
+
+def test_dry_run_validates_without_writing(inventory):
+    report = run_import(inventory, "host_name,ip_address\na,10.0.0.1\n", 'csv', dry_run=True)
+    assert report.imported == 1 and report.dry_run
+    assert len(inventory) == 0
+
+
+def test_error_report_is_capped(inventory, monkeypatch):
+    monkeypatch.setattr(host_import, 'MAX_REPORTED_ERRORS', 5)
+    report = run_import(inventory, "host_name,ip_address\n" + "x,\n" * 20, 'csv')
+    assert report.failed == 20
+    assert len(report.errors) == 5 and report.errors_truncated
+
+
+def test_cli_returns_error_status_on_failures(tmp_path, capsys):
+    path = tmp_path / 'hosts.ndjson'
+    path.write_text(json.dumps({"ip_address": '10.0.0.1'}) + '\n' + json.dumps({"ip_address": ''}) + '\n')
+
+    status = host_import.main([str(path), '--db', str(tmp_path / 'inventory.db')])
+
+    summary = json.loads(capsys.readouterr().out)
+    assert status == 1
+    assert (summary['imported'], summary['failed']) == (1, 1)
+    assert HostInventory(tmp_path / 'inventory.db').get('10.0.0.1')['host_name'] == 'Host sem nome'
@@ -0,0 +1,129 @@
+import sqlite3
+
+import pytest
+
+from monitor.inventory import MAX_PAGE_SIZE, HostInventory
+
+
+def host(index, **changes):
+    record = {
+        "host_name": f"cpe-{index:05d}",
+        "ip_address": f"10.0.{index // 256}.{index % 256}",
+        "host_group": 'Edge',
+        "snmp_version": 'v2c',
+        "community": 'public',
+    }
+    record.update(changes)
+    return record
+
+
+@pytest.fixture
+def inventory(tmp_path):
+    return HostInventory(tmp_path / 'inventory.db')
+
+
+def test_upsert_get_update_and_remove(inventory):
+    created = inventory.upsert(host(1, tags='core, backbone ,core', polling='120'))
+    assert created['host_name'] == 'cpe-00001'
+    assert created['tags'] == ['backbone', 'core']
+    assert created['polling'] == '120'
+
+    # O IP é a chave: cadastrar de novo atualiza, sem duplicar.
+    updated = inventory.upsert(host(1, host_name='renomeado', tags=['edge']))
+    assert (updated['host_name'], updated['tags']) == ('renomeado', ['edge'])
+    assert updated['created_at'] == created['created_at']
+    assert len(inventory) == 1
+
+    assert inventory.remove('10.0.0.1') is True
+    assert inventory.remove('10.0.0.1') is False
+    assert inventory.get('10.0.0.1') is None
+    assert inventory.tags() == []
+
+
+def test_paging_and_filters(inventory):
+    inventory.upsert_many(
+        host(index, host_group='Edge' if index % 2 else 'Core', tags=[] if index % 2 else ['par'])
+        for index in range(1, 251)
+    )
+
+    first, total = inventory.page(1, 100)
+    last, _ = inventory.page(3, 100)
+    assert total == 250 and len(first) == 100 and len(last) == 50
+    # Mais recentes primeiro, sem repetir hosts entre páginas.
+    assert first[0]['ip_address'] == '10.0.0.250'
+    pages = [item['ip_address'] for number in (1, 2, 3) for item in inventory.page(number, 100)[0]]
+    assert len(set(pages)) == 250
+
+    assert inventory.count(host_group='Core') == 125
+    assert inventory.count(tag='par', host_group='Core') == 125
+    assert inventory.count(tag='par', host_group='Edge') == 0
+    assert inventory.groups() == ['Core', 'Edge']
+    assert len(inventory.page(1, 10 ** 6)[0]) == min(250, MAX_PAGE_SIZE)
+    assert sum(1 for _ in inventory.iter_hosts(batch_size=64)) == 250
+
+
+def test_search_is_case_insensitive_prefix(inventory):
+    inventory.upsert(host(1, host_name='CCR-Core-01'))
+    inventory.upsert(host(2, host_name='ccr-edge-02'))
+    inventory.upsert(host(3, host_name='Switch-DC', ip_address='SW-DC.example:1161'))
+
+    def names(search):
+        return sorted(item['host_name'] for item in inventory.page(search=search)[0])
+
+    assert names('ccr') == ['CCR-Core-01', 'ccr-edge-02']
+    assert names('CCR-CORE') == ['CCR-Core-01']
+    assert names('sw-dc.') == ['Switch-DC']
+    assert names('10.0.0.') == ['CCR-Core-01', 'ccr-edge-02']
+    assert names('core') == []
+
+
+def test_search_uses_the_nocase_indexes(inventory):
+    where, params = inventory._where(search='ccr')
+    plan = ' '.join(row[3] for row in inventory._connection().execute(
+        f'EXPLAIN QUERY PLAN SELECT COUNT(*) FROM hosts{where}', params
+    ))
+    assert 'hosts_name_nocase_idx' in plan and 'hosts_address_nocase_idx' in plan
+
+
+def test_changed_since_resumes_from_watermark(inventory):
+    inventory.upsert_many(host(index) for index in range(1, 11))
+    batches = list(inventory.changed_since(batch_size=4))
+    assert [len(hosts) for hosts, _ in batches] == [4, 4, 2]
+
+    watermark = batches[-1][1]
+    assert list(inventory.changed_since(watermark)) == []
+    inventory.upsert(host(3, host_name='alterado'))
+    (changed, _), = inventory.changed_since(watermark)
+    assert [item['host_name'] for item in changed] == ['alterado']
+
+
+def test_v3_credentials_round_trip(tmp_path):
+    inventory = HostInventory(tmp_path / 'inventory.db')
+    inventory.upsert(host(1, snmp_version='v3', community='ops', auth_protocol='sha', auth_password='authpass123'))
+
+    stored = inventory.get('10.0.0.1')
+    assert (stored['community'], stored['auth_protocol'], stored['auth_password']) == ('ops', 'sha', 'authpass123')
+
+
+def test_old_database_gains_auth_columns(tmp_path):
+    path = tmp_path / 'inventory.db'
+    conn = sqlite3.connect(path)
+    # Schema anterior às credenciais v3.
+    conn.executescript("""
+        CREATE TABLE hosts (
+            id INTEGER PRIMARY KEY, host_name TEXT NOT NULL, ip_address TEXT NOT NULL UNIQUE,
+            host_group TEXT NOT NULL DEFAULT '', template TEXT NOT NULL DEFAULT '',
+            snmp_version TEXT NOT NULL DEFAULT 'v2c', community TEXT NOT NULL DEFAULT '',
+            polling INTEGER NOT NULL DEFAULT 60, notes TEXT NOT NULL DEFAULT '',
+            created_at TEXT NOT NULL, updated_ts REAL NOT NULL
+        );
+        INSERT INTO hosts (host_name, ip_address, created_at, updated_ts) VALUES ('antigo', '10.9.9.9', '', 0);
+    """)
+    conn.close()
+
+    inventory = HostInventory(path)
+    assert inventory.get('10.9.9.9')['auth_protocol'] == ''
+    inventory.upsert(host(2, snmp_version='v3', community='ops', auth_protocol='md5', auth_password='authpass123'))
+    assert inventory.get('10.0.0.2')['auth_protocol'] == 'md5'
+    # Abrir de novo não tenta recriar as colunas.
+    assert HostInventory(path).count() == 2
@@ -0,0 +1,213 @@
+import socket
+import struct
+import time
+
+import pytest
+
+from monitor import netflow
+
+V5_RECORD = struct.Struct('!IIIHHIIIIHHBBBBHHBBH')
+V9_FIELDS = [(8, 4), (12, 4), (7, 2), (11, 2), (4, 1), (10, 4), (14, 4), (1, 8), (2, 4), (21, 4), (22, 4), (61, 1)]
+V9_RECORD = struct.Struct('!IIHHBIIQIIIB')
+SYS_UPTIME = 600000
+
+
+def ip(text):
+    return int.from_bytes(socket.inet_aton(text), 'big')
+
+
+def v5_packet(records, unix_secs, sys_uptime=SYS_UPTIME, sequence=0, sampling=0):
+    """``records``: ``(src, dst, input, output, packets, bytes, last_uptime, srcport, dstport, protocol)``."""
+    body = b''.join(
+        V5_RECORD.pack(ip(src), ip(dst), 0, input_, output, packets, nbytes, last - 1000, last, srcport, dstport,
+                       0, 0x18, protocol, 0, 64512, 65001, 24, 24, 0)
+        for src, dst, input_, output, packets, nbytes, last, srcport, dstport, protocol in records
+    )
+    return netflow.V5_HEADER.pack(5, len(records), sys_uptime, unix_secs, 0, sequence, 0, 0, sampling) + body
+
+
+def v9_packets(unix_secs, records, source_id=7, template_id=300):
+    """Datagrama com o template e datagrama com os dados (``records`` no formato de ``V9_RECORD``)."""
+    template_body = struct.pack('!HH', template_id, len(V9_FIELDS)) + b''.join(
+        struct.pack('!HH', *field) for field in V9_FIELDS
+    )
+    template = netflow.FLOWSET_HEADER.pack(0, 4 + len(template_body)) + template_body
+    data = b''.join(V9_RECORD.pack(*record) for record in records)
+    padding = b'\x00' * (-len(data) % 4)
+    flowset = netflow.FLOWSET_HEADER.pack(template_id, 4 + len(data) + len(padding)) + data + padding
+
+    def header(count):
+        return netflow.V9_HEADER.pack(9, count, SYS_UPTIME, unix_secs, 1, source_id)
+
+    return header(1) + template, header(len(records)) + flowset
+
+
+def v9_record(index, last=SYS_UPTIME - 2000):
+    return (ip('192.0.2.10'), ip(f"198.51.100.{index}"), 50000 + index, 443, 6, 3, 4, 1500 * index, index,
+            last, last - 5000, 0)
+
+
+def test_v5_decode_columns():
+    now = 1_700_000_000
+    packet = v5_packet([
+        ('10.0.0.1', '10.0.0.2', 1, 2, 10, 1500, SYS_UPTIME - 3000, 1234, 80, 6),
+        ('10.0.0.3', '8.8.8.8', 3, 1, 1, 76, SYS_UPTIME, 53000, 53, 17),
+    ], now)
+    batch = netflow.NetflowDecoder().decode('192.0.2.1', [packet], received_at=now + 1)
+
+    assert len(batch) == 2
+    assert batch.input.tolist() == [1, 3] and batch.output.tolist() == [2, 1]
+    assert batch.protocol.tolist() == [6, 17]
+    assert batch.bytes.tolist() == [1500, 76] and batch.packets.tolist() == [10, 1]
+    assert batch.srcaddr.tolist() == [ip('10.0.0.1'), ip('10.0.0.3')]
+    assert batch.dstport.tolist() == [80, 53]
+    assert batch.src_as.tolist() == [64512, 64512]
+    # Fim = relógio do exportador - (sysUpTime - last) em segundos.
+    assert batch.end.tolist() == pytest.approx([now - 3.0, now])
+
+
+def test_v5_sampling_scales_counters():
+    now = 1_700_000_000
+    sampled = v5_packet([('10.0.0.1', '10.0.0.2', 1, 2, 10, 1500, SYS_UPTIME, 1, 2, 6)], now,
+                        sampling=(1 << 14) | 100)
+    batch = netflow.NetflowDecoder().decode('192.0.2.1', [sampled], received_at=now)
+    assert (batch.bytes[0], batch.packets[0]) == (150000, 1000)
+
+
+def test_v5_end_time_survives_uptime_wrap():
+    now = 1_700_000_000
+    # sysUpTime deu a volta: o fluxo terminou 1 s antes da volta e o pacote saiu 5 s depois dela.
+    packet = v5_packet([('10.0.0.1', '10.0.0.2', 1, 2, 1, 100, 2 ** 32 - 1000, 1, 2, 6)], now, sys_uptime=5000)
+    batch = netflow.NetflowDecoder().decode('192.0.2.1', [packet], received_at=now)
+    assert batch.end[0] == pytest.approx(now - 6.0)
+
+
+def test_end_time_is_clamped_to_reception():
+    received_at = 1_700_000_000
+    packet = v5_packet([('10.0.0.1', '10.0.0.2', 1, 2, 1, 100, SYS_UPTIME, 1, 2, 6)], received_at + 86400)
+    batch = netflow.NetflowDecoder().decode('192.0.2.1', [packet], received_at=received_at)
+    assert batch.end[0] == received_at
+
+
+def test_malformed_datagrams_are_counted():
+    decoder = netflow.NetflowDecoder()
+    good = v5_packet([('10.0.0.1', '10.0.0.2', 1, 2, 1, 100, SYS_UPTIME, 1, 2, 6)], 1_700_000_000)
+    batch = decoder.decode('192.0.2.1', [b'\x00', good[:-10], b'\x00\x07' + good[2:], good])
+    assert len(batch) == 1
+    assert decoder.stats["malformed"] == 3
+    assert decoder.stats["packets"] == 4
+
+
+def test_v9_data_before_template_is_dropped_then_decoded():
+    now = 1_700_000_000
+    template, data = v9_packets(now, [v9_record(index) for index in range(1, 6)])
+    decoder = netflow.NetflowDecoder()
+
+    assert decoder.decode('192.0.2.1', [data], received_at=now) is None
+    assert decoder.stats["unknown_template"] == 1
+
+    batch = decoder.decode('192.0.2.1', [template, data], received_at=now)
+    assert decoder.stats["templates"] == 1
+    assert set(decoder.templates) == {('192.0.2.1', 7, 300)}
+    assert len(batch) == 5
+    assert batch.bytes.tolist() == [1500, 3000, 4500, 6000, 7500]
+    assert batch.srcport.tolist() == [50001, 50002, 50003, 50004, 50005]
+    assert batch.input.tolist() == [3] * 5 and batch.output.tolist() == [4] * 5
+    assert batch.end.tolist() == pytest.approx([now - 2.0] * 5)
+
+    # O template fica em cache: os próximos dados não precisam dele no mesmo lote.
+    again = decoder.decode('192.0.2.1', [data], received_at=now)
+    assert len(again) == 5
+    assert decoder.stats["unknown_template"] == 1
+
+
+def test_v9_templates_are_scoped_by_exporter_and_source_id():
+    now = 1_700_000_000
+    template, data = v9_packets(now, [v9_record(1)])
+    _, other_source = v9_packets(now, [v9_record(1)], source_id=8)
+    decoder = netflow.NetflowDecoder()
+    decoder.decode('192.0.2.1', [template], received_at=now)
+
+    assert decoder.decode('192.0.2.2', [data], received_at=now) is None
+    assert decoder.decode('192.0.2.1', [other_source], received_at=now) is None
+    assert decoder.stats["unknown_template"] == 2
+    assert len(decoder.decode('192.0.2.1', [data], received_at=now)) == 1
+
+
+def test_aggregator_counts_both_directions():
+    now = 1_700_000_000
+    packet = v5_packet([
+        ('10.0.0.1', '10.0.0.2', 1, 2, 10, 1000, SYS_UPTIME, 1, 2, 6),
+        ('10.0.0.1', '10.0.0.2', 1, 2, 5, 500, SYS_UPTIME, 1, 2, 6),
+        ('10.0.0.2', '10.0.0.1', 2, 1, 1, 40, SYS_UPTIME, 2, 1, 17),
+    ], now)
+    aggregator = netflow.FlowAggregator()
+    aggregator.add(netflow.NetflowDecoder().decode('192.0.2.1', [packet], received_at=now))
+
+    rows = {(row['interface'], row['protocol']): row for row in aggregator.summary('192.0.2.1')}
+    assert (rows[1, 6]['bytes_in'], rows[1, 6]['packets_in'], rows[1, 6]['flows']) == (1500, 15, 2)
+    assert (rows[2, 6]['bytes_out'], rows[2, 6]['bytes_in']) == (1500, 0)
+    assert (rows[1, 17]['bytes_out'], rows[2, 17]['bytes_in']) == (40, 40)
+
+
+def test_collector_replays_udp_packets():
+    collector = netflow.NetflowCollector('127.0.0.1:0')
+    collector.start()
+    try:
+        now = int(time.time())
+        v5 = [v5_packet([('10.0.0.1', '10.0.0.2', 1, 2, 1, 100, SYS_UPTIME, 1, 2, 6)] * 30, now, sequence=i)
+              for i in range(50)]
+        template, data = v9_packets(now, [v9_record(index) for index in range(1, 26)])
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sender.sendto(data, collector.address)
+        sender.sendto(template, collector.address)
+        time.sleep(0.2)
+        for packet in v5:
+            sender.sendto(packet, collector.address)
+        sender.sendto(data, collector.address)
+        sender.close()
+
+        deadline = time.monotonic() + 5
+        while collector.stats()["flows"] < 50 * 30 + 25 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        stats = collector.stats()
+    finally:
+        collector.stop()
+
+    assert stats["flows"] == 50 * 30 + 25
+    assert stats["unknown_template"] == 1
+    assert stats["templates"] == 1
+    assert stats["malformed"] == 0
+    totals = collector.aggregator.summary('127.0.0.1')
+    assert sum(row['bytes_in'] for row in totals) == 50 * 30 * 100 + sum(1500 * index for index in range(1, 26))
+
+
+START_OF_REPLAY = 1_700_000_000
+
+
+def flows_per_second(collector, exporter, datagrams, rounds=5):
+    """Melhor de três medidas de ``process`` com lotes do tamanho que ``_run`` entrega."""
+    best = 0.0
+    for _ in range(3):
+        started = time.perf_counter()
+        flows = sum(len(collector.process(exporter, datagrams, START_OF_REPLAY)) for _ in range(rounds))
+        best = max(best, flows / (time.perf_counter() - started))
+    return best
+
+
+def test_collector_sustains_50k_flows_per_second():
+    collector = netflow.NetflowCollector('127.0.0.1:0')
+    talkers = netflow.TopTalkers()
+    collector.add_listener(talkers.add)
+    v5 = [
+        v5_packet([(f"10.0.{index % 250}.{flow}", '198.51.100.1', flow % 8, 1, 2, 1500, SYS_UPTIME, 40000 + flow,
+                    443, 6) for flow in range(30)], START_OF_REPLAY, sequence=index)
+        for index in range(netflow.BATCH_PACKETS)
+    ]
+    template, data = v9_packets(START_OF_REPLAY, [v9_record(index) for index in range(1, 25)])
+    collector.process('192.0.2.2', [template], START_OF_REPLAY)
+
+    # Decodificação colunar + agregação + top talkers numa thread: a meta é 50k fluxos/s.
+    assert flows_per_second(collector, '192.0.2.1', v5) >= 50_000
+    assert flows_per_second(collector, '192.0.2.2', [data] * netflow.BATCH_PACKETS) >= 50_000
+    assert collector.stats()["malformed"] == 0
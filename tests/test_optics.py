@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from monitor.optics import DAY, OpticsStore
+
+
+def reading(port, rx, tx=-2.0, temp=40.0):
+    return {"name": port, "rx_dbm": rx, "tx_dbm": tx, "temp_c": temp}
+
+
+def test_status_and_reasons_from_thresholds():
+    store = OpticsStore()
+    store.apply_snapshot('olt1', [
+        reading('sfp1', -10.0),
+        reading('sfp2', -23.0),
+        reading('sfp3', -26.0, temp=65.0),
+        reading('sfp4', 1.5, tx=-7.0),
+        {"name": 'sfp5', "rx_dbm": 'n/a', "tx_dbm": None, "temp_c": ''},
+    ])
+
+    rows = {row['port']: row for row in store.worst(10)}
+    assert (rows['sfp1']['status'], rows['sfp1']['reasons']) == ('ok', [])
+    assert (rows['sfp2']['status'], rows['sfp2']['reasons']) == ('warning', ['rx_low'])
+    assert (rows['sfp3']['status'], rows['sfp3']['reasons']) == ('critical', ['rx_low', 'temp_high'])
+    assert (rows['sfp4']['status'], rows['sfp4']['reasons']) == ('warning', ['rx_high', 'tx_low'])
+    assert rows['sfp5']['rx_dbm'] is None and rows['sfp5']['status'] == 'ok'
+    # Pior primeiro; entre os avisos, menor margem de RX antes.
+    assert [row['port'] for row in store.worst(3)] == ['sfp3', 'sfp2', 'sfp4']
+    assert store.summary() == {"optics": 5, "devices": 1, "ok": 2, "warning": 2, "critical": 1, "degrading": 0}
+
+
+def test_steady_decline_is_ranked_with_days_to_critical():
+    store = OpticsStore(half_life_days=3)
+    start = store.epoch
+    rng = np.random.default_rng(1)
+    for hour in range(0, 72):
+        timestamp = start + hour * 3600
+        store.apply_snapshot('olt1', [
+            # -0,5 dBm/dia a partir de -15 dBm.
+            reading('degrading', -15.0 - 0.5 * hour / 24),
+            # Ruído de ±0,3 dBm sem tendência.
+            reading('noisy', -15.0 + rng.uniform(-0.3, 0.3)),
+        ], timestamp)
+
+    degrading, noisy = store.worst(2)
+    assert degrading['port'] == 'degrading' and degrading['degrading']
+    assert degrading['rx_trend_dbm_day'] == pytest.approx(-0.5, abs=1e-3)
+    # De -16,48 dBm até o crítico de -25 dBm a 0,5 dBm/dia.
+    assert degrading['days_to_rx_critical'] == pytest.approx((25 - 16.479) / 0.5, abs=0.1)
+    assert not noisy['degrading'] and noisy['days_to_rx_critical'] is None
+    assert [row['port'] for row in store.worst(degrading=True)] == ['degrading']
+
+
+def test_no_trend_until_readings_cover_enough_time():
+    store = OpticsStore()
+    for minute in range(0, 120, 5):
+        store.apply_snapshot('olt1', [reading('sfp1', -10.0 - minute / 10)], store.epoch + minute * 60)
+
+    (row,) = store.worst()
+    assert row['rx_trend_dbm_day'] is None and not row['degrading']
+
+
+def test_removed_modules_are_released_and_slots_reused():
+    store = OpticsStore(capacity=2)
+    store.apply_snapshot('olt1', [reading('sfp1', -10.0), reading('sfp2', -11.0)], store.epoch)
+    store.apply_snapshot('sw1', [reading('sfp1', -30.0)], store.epoch)
+    assert len(store.active) >= 3
+
+    assert store.apply_snapshot('olt1', [reading('sfp2', -11.0)], store.epoch + 60) == {"optics": 1, "removed": 1}
+    assert [(row['device'], row['port']) for row in store.worst(device='olt1')] == [('olt1', 'sfp2')]
+    store.apply_snapshot('olt2', [reading('sfp9', -12.0)], store.epoch + 60)
+    assert len(store.keys) == 3
+
+    # A porta que voltou começa a tendência do zero.
+    store.apply_snapshot('olt1', [reading('sfp1', -10.0), reading('sfp2', -11.0)], store.epoch + 120)
+    assert store.sums[store.slots[('olt1', 'sfp1')], 0, 0] == 1.0
+
+    store.remove_device('sw1')
+    assert store.worst(status='critical') == []
+    assert store.summary()["optics"] == 3
+
+
+def test_evaluation_is_cached_until_the_next_snapshot():
+    store = OpticsStore()
+    store.apply_snapshot('olt1', [reading('sfp1', -10.0)], store.epoch)
+    first = store.evaluate()
+    assert store.evaluate() is first
+    store.apply_snapshot('olt1', [reading('sfp1', -10.0)], store.epoch + DAY)
+    assert store.evaluate() is not first
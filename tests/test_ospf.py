@@ -0,0 +1,105 @@
+from monitor.ospf import OspfArea, OspfTopology, full_neighbors
+
+START = 1_700_000_000
+
+
+def test_full_neighbors_keeps_only_full_adjacencies():
+    table = {
+        "areas": [{"id": '0.0.0.0'}, {"id": '0.0.0.1'}, 'lixo'],
+        "neighbors": [
+            {"area": '0.0.0.0', "neighbor_id": '1.1.1.2', "state": 'full'},
+            {"area": '0.0.0.0', "neighbor_id": '1.1.1.3', "state": 'exchange'},
+            {"area": '0.0.0.2', "neighbor_id": '1.1.1.4'},
+            {"neighbor_id": '1.1.1.5'},
+        ],
+    }
+    assert full_neighbors(table) == {"0.0.0.0": {'1.1.1.2'}, "0.0.0.1": set(), "0.0.0.2": {'1.1.1.4'}}
+
+
+def test_area_components_split_only_when_no_other_path():
+    area = OspfArea('0')
+    # Anel a-b-c-d-a com uma cauda d-e.
+    for a, b in (('a', 'b'), ('b', 'c'), ('c', 'd'), ('d', 'a'), ('d', 'e')):
+        area.add_edge(a, b)
+    assert len(area.members) == 1 and area.edges == 5
+
+    assert area.remove_edge('a', 'b') is None
+    assert area.remove_edge('d', 'e') == {'e'}
+    assert sorted(sorted(nodes) for nodes in area.members.values()) == [['a', 'b', 'c', 'd'], ['e']]
+    assert area.add_edge('e', 'b') is True and len(area.members) == 1
+
+
+def ring(topology, routers, timestamp):
+    # Cada roteador informa os dois vizinhos do anel.
+    for index, router in enumerate(routers):
+        neighbors = {routers[index - 1], routers[(index + 1) % len(routers)]}
+        topology.apply_snapshot(router, router, {"0.0.0.0": neighbors}, timestamp)
+
+
+def test_first_snapshots_build_the_graph_silently():
+    topology = OspfTopology()
+    ring(topology, ['r1', 'r2', 'r3', 'r4'], START)
+
+    assert topology.recent_events() == []
+    assert topology.summary() == {"routers": 4, "areas": [
+        {"id": '0.0.0.0', "routers": 4, "adjacencies": 4, "components": 1, "partitioned": False},
+    ]}
+
+
+def test_lost_adjacencies_and_partition_events():
+    events = []
+    topology = OspfTopology(on_event=events.append)
+    routers = ['r1', 'r2', 'r3', 'r4']
+    ring(topology, routers, START)
+
+    # Um lado só deixando de ver o vizinho já derruba a aresta.
+    changes = topology.apply_snapshot('r1', 'r1', {"0.0.0.0": {'r4'}}, START + 60)
+    assert changes == {"added": 0, "lost": [{"area": '0.0.0.0', "routers": ['r1', 'r2']}], "partitions": []}
+    assert [event['type'] for event in events] == ['adjacency_lost']
+
+    changes = topology.apply_snapshot('r3', 'r3', {"0.0.0.0": {'r2'}}, START + 60)
+    assert changes["partitions"] == [{"area": '0.0.0.0', "size": 2, "members": ['r2', 'r3']}]
+    (partition,) = topology.recent_events(kind='partition', area='0.0.0.0')
+    assert partition['components'] == 2
+    assert topology.area('0.0.0.0')["component_members"] == [['r1', 'r4'], ['r2', 'r3']]
+
+    topology.apply_snapshot('r1', 'r1', {"0.0.0.0": {'r2', 'r4'}}, START + 120)
+    assert [event['type'] for event in events[-2:]] == ['adjacency_up', 'partition_healed']
+    assert topology.summary()["areas"][0]["partitioned"] is False
+
+
+def test_neighbor_swap_in_one_poll_is_not_a_partition():
+    topology = OspfTopology()
+    topology.apply_snapshot('r2', 'r2', {"0": {'y', 'z'}}, START)
+    topology.apply_snapshot('r1', 'r1', {"0": {'y'}}, START)
+    # r1 troca y por z: a aresta nova entra antes, então r1 nunca fica isolado.
+    changes = topology.apply_snapshot('r1', 'r1', {"0": {'z'}}, START + 60)
+
+    assert changes == {"added": 1, "lost": [{"area": '0', "routers": ['r1', 'y']}], "partitions": []}
+    assert [event['type'] for event in topology.recent_events()] == ['adjacency_lost', 'adjacency_up']
+    assert topology.area('0')["edges"] == [('r1', 'z'), ('r2', 'y'), ('r2', 'z')]
+
+    # Um vizinho não monitorado que só r1 via sai do grafo junto com a aresta.
+    topology.apply_snapshot('r1', 'r1', {"0": {'z', 'w'}}, START + 120)
+    topology.apply_snapshot('r1', 'r1', {"0": {'z'}}, START + 180)
+    (partition,) = topology.recent_events(kind='partition')
+    assert partition['members'] == ['w']
+    assert topology.area('0')["routers"] == 4
+
+
+def test_router_id_change_and_removal():
+    topology = OspfTopology()
+    ring(topology, ['r1', 'r2', 'r3'], START)
+    topology.apply_snapshot('r1', '9.9.9.9', {"0.0.0.0": {'r2', 'r3'}}, START + 60)
+    # r2 e r3 ainda informam o ID antigo, e r1 não é mais monitorado: vale o que eles dizem.
+    assert topology.area('0.0.0.0')["edges"] == [('r1', 'r2'), ('r1', 'r3'), ('r2', 'r3')]
+
+    topology.apply_snapshot('r2', 'r2', {"0.0.0.0": {'9.9.9.9', 'r3'}}, START + 120)
+    topology.apply_snapshot('r3', 'r3', {"0.0.0.0": {'9.9.9.9', 'r2'}}, START + 120)
+    assert topology.area('0.0.0.0')["edges"] == [('9.9.9.9', 'r2'), ('9.9.9.9', 'r3'), ('r2', 'r3')]
+    assert topology.summary()["routers"] == 3
+
+    topology.remove_router('r2')
+    topology.remove_router('r3')
+    topology.remove_router('r1')
+    assert topology.summary() == {"routers": 0, "areas": []}
@@ -0,0 +1,105 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from monitor import poller
+from snmp_agent import SYSTEM_MIB, start_agent
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('condição não atingida a tempo')
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def agent():
+    """Agente SNMP num loop próprio: o poller roda o dele em outra thread."""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    agent = asyncio.run_coroutine_threadsafe(start_agent(SYSTEM_MIB), loop).result(5)
+    yield agent
+    loop.call_soon_threadsafe(agent.transport.close)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+
+@pytest.fixture
+def snmp_poller():
+    engine = poller.SnmpPoller()
+    engine.start()
+    yield engine
+    engine.stop()
+
+
+def target(agent):
+    return poller.SnmpTarget('127.0.0.1', agent.port, 'v2c', 'public', timeout=1, retries=0)
+
+
+def test_listeners_run_off_the_poller_loop(agent, snmp_poller):
+    calls = []
+
+    def failing(key, result):
+        raise RuntimeError('consumidor com defeito')
+
+    def record(key, result):
+        calls.append((key, result['ok'], threading.current_thread().name))
+
+    snmp_poller.add_listener(failing)
+    snmp_poller.add_listener(record)
+    snmp_poller.upsert('core', target(agent), 1)
+    wait_for(lambda: calls)
+
+    key, ok, thread_name = calls[0]
+    assert (key, ok) == ('core', True)
+    assert thread_name.startswith('snmp-listeners')
+    assert snmp_poller.status('core')['values']['sysName'] == 'core-border-01'
+
+
+def test_unexpected_error_is_reported_and_polling_continues(agent, snmp_poller, monkeypatch):
+    real_get_scalars = poller.get_scalars
+    failures = []
+
+    async def flaky_get_scalars(client, target, oids):
+        if not failures:
+            failures.append(True)
+            raise ValueError('resposta inesperada')
+        return await real_get_scalars(client, target, oids)
+
+    monkeypatch.setattr(poller, 'get_scalars', flaky_get_scalars)
+    results = []
+    snmp_poller.add_listener(lambda key, result: results.append(result))
+    snmp_poller.upsert('core', target(agent), 1)
+    wait_for(lambda: len(results) >= 2, timeout=6)
+
+    assert results[0]['ok'] is False
+    assert results[0]['error'] == 'ValueError: resposta inesperada'
+    assert results[1]['ok'] is True
+
+
+def test_remove_forgets_per_device_state(agent, snmp_poller):
+    results = []
+    snmp_poller.add_listener(lambda key, result: results.append(key))
+    shared = target(agent)
+    snmp_poller.upsert('core', shared, 1)
+    snmp_poller.upsert('core-alias', shared, 1)
+    wait_for(lambda: {'core', 'core-alias'} <= set(results))
+    assert shared.address in snmp_poller.client.stats
+    assert shared.address in snmp_poller._tuners
+
+    # Outro job ainda consulta o mesmo agente: o estado fica.
+    snmp_poller.remove('core')
+    wait_for(lambda: 'core' not in snmp_poller._jobs)
+    assert shared.address in snmp_poller.client.stats
+
+    snmp_poller.remove('core-alias')
+    wait_for(lambda: not len(snmp_poller))
+    assert snmp_poller.status() == {}
+    assert shared.address not in snmp_poller.client.stats
+    assert shared.address not in snmp_poller._tuners
@@ -0,0 +1,103 @@
+import heapq
+import random
+
+import pytest
+
+from monitor import pppoe
+from monitor.pppoe import PppoeSessionStore
+
+START = 1_700_000_000
+
+
+def row(user, download, upload=0, ip=None):
+    return {"user": user, "ip": ip, "interface": f"<pppoe-{user}>", "index": None,
+            "download_octets": download, "upload_octets": upload}
+
+
+def expected_top(store, field, n, concentrator=None):
+    sessions = [session for key, session in store.sessions.items() if concentrator in (None, key[0])]
+    best = heapq.nsmallest(n, sessions, key=lambda session: (-getattr(session, field), session.concentrator,
+                                                               session.user))
+    return [(session.concentrator, session.user, getattr(session, field)) for session in best]
+
+
+def current_top(store, field, n, concentrator=None):
+    return [(item['concentrator'], item['user'], item[field])
+            for item in store.top(n, field, concentrator=concentrator)]
+
+
+def test_snapshot_diff_events_and_indexes():
+    store = PppoeSessionStore()
+    summary = store.apply_snapshot('bras1', [row('cli001', 0, ip='10.0.0.10'), row('cli002', 0), {"ip": 'x'}],
+                                   START)
+    assert summary == {"connected": 2, "disconnected": 0, "changed": 0, "unchanged": 0, "invalid": 1, "sessions": 2}
+    # O primeiro snapshot só carrega o estado: sem eventos de conexão.
+    assert store.recent_events() == []
+
+    summary = store.apply_snapshot('bras1', [row('cli001', 1000, ip='10.0.0.11'), row('cli003', 0)], START + 10)
+    assert (summary["connected"], summary["disconnected"], summary["changed"]) == (1, 1, 1)
+    assert [event['event'] for event in store.recent_events()] == ['disconnect', 'connect']
+    assert store.lookup(ip='10.0.0.10') == []
+    (session,) = store.lookup(ip='10.0.0.11')
+    assert session['user'] == 'cli001' and session['download_bps'] == 800.0
+    assert store.page(search='10.0.0.1')[1] == 1
+
+    store.apply_snapshot('bras2', [row('cli001', 5)], START + 10)
+    assert [item['concentrator'] for item in store.lookup(user='cli001')] == ['bras1', 'bras2']
+    store.remove_concentrator('bras2')
+    assert store.stats() == {"sessions": 2, "concentrators": {"bras1": 2}}
+
+
+def test_counter_reset_does_not_become_negative_rate():
+    store = PppoeSessionStore()
+    store.apply_snapshot('bras1', [row('cli001', 10_000, 5_000)], START)
+    store.apply_snapshot('bras1', [row('cli001', 100, 6_000)], START + 10)
+    (session,) = store.lookup(user='cli001')
+    assert session['download_bps'] == 0.0 and session['upload_bps'] == 800.0
+
+
+def test_top_follows_updates_disconnects_and_concentrators():
+    store = PppoeSessionStore(top_size=3)
+    store.apply_snapshot('bras1', [row(f"cli{index:03}", 0) for index in range(10)], START)
+    store.apply_snapshot('bras1', [row(f"cli{index:03}", index * 1000) for index in range(10)], START + 10)
+    assert [item['user'] for item in store.top(3)] == ['cli009', 'cli008', 'cli007']
+
+    # Os três maiores caem e quem estava fora da lista sobe.
+    rows = [row(f"cli{index:03}", index * 1000 + (0 if index >= 7 else 50_000)) for index in range(9)]
+    store.apply_snapshot('bras1', rows, START + 20)
+    assert current_top(store, 'download_bps', 3) == expected_top(store, 'download_bps', 3)
+
+    store.apply_snapshot('bras2', [row('vip', 10 ** 9)], START + 20)
+    store.apply_snapshot('bras2', [row('vip', 2 * 10 ** 9)], START + 30)
+    assert store.top(1)[0]['user'] == 'vip'
+    assert [item['concentrator'] for item in store.top(3, concentrator='bras1')] == ['bras1'] * 3
+    assert store.top(5, 'upload_octets', concentrator='desconhecido') == []
+    with pytest.raises(ValueError):
+        store.top(field='ip')
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_incremental_top_matches_full_sort(seed, monkeypatch):
+    rng = random.Random(seed)
+    store = PppoeSessionStore(top_size=20)
+    rebuilds = []
+    rebuild = store._rebuild_top
+    monkeypatch.setattr(store, '_rebuild_top', lambda *args: rebuilds.append(args) or rebuild(*args))
+
+    octets = {}
+    timestamp = START
+    for _ in range(40):
+        users = rng.sample(range(400), 300)
+        for user in users:
+            octets[user] = octets.get(user, 0) + rng.choice((0, rng.randrange(10 ** 6)))
+        timestamp += 10
+        store.apply_snapshot('bras1', [row(f"cli{user:03}", octets[user], octets[user] // 3) for user in users],
+                             timestamp)
+        for field in pppoe.TOP_FIELDS:
+            # Empates (várias sessões com taxa 0) podem sair em qualquer ordem: compara os valores.
+            top = current_top(store, field, 20)
+            assert [value for _, _, value in top] == [value for _, _, value in expected_top(store, field, 20)]
+            assert all(getattr(store.sessions[(name, user)], field) == value for name, user, value in top)
+
+    # A varredura só acontece quando a folga não basta, não a cada snapshot.
+    assert len(rebuilds) < 40 * len(pppoe.TOP_FIELDS) // 2
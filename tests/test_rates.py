@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from monitor import rates
+from monitor.rates import CounterRates, rebooted
+
+START = 1_700_000_000
+WRAP_32 = 1 << 32
+
+
+def interface(index, in_octets, out_octets, bits=64, speed=1000, name=None):
+    return {"index": index, "name": name or f"ether{index}", "in_octets": in_octets, "out_octets": out_octets,
+            "counter_bits": bits, "speed_mbps": speed}
+
+
+def test_deltas_wrap_modulo_counter_width():
+    current = np.array([10, 10, 500], dtype=np.uint64)
+    previous = np.array([WRAP_32 - 90, (1 << 64) - 90, 200], dtype=np.uint64)
+    bits = np.array([32, 64, 32], dtype=np.uint8)
+    assert rates._deltas(current, previous, bits).tolist() == [100, 100, 300]
+
+
+@pytest.mark.parametrize('previous, uptime, elapsed, expected', [
+    (None, 100, 60, False),
+    (100_000, 106_000, 60, False),
+    # Poucos segundos de diferença entre o relógio e o sysUpTime não são reinício.
+    (100_000, 104_000, 60, False),
+    (100_000, 500, 60, True),
+    # sysUpTime deu a volta em 2**32 centésimos (497 dias) sem reinício.
+    (WRAP_32 - 1000, 5000, 60, False),
+    (WRAP_32 - 1000, 100, 3600, True),
+])
+def test_rebooted(previous, uptime, elapsed, expected):
+    assert rebooted(previous, uptime, elapsed) is expected
+
+
+def test_rates_from_counters_and_32_bit_wrap():
+    counters = CounterRates(top_size=2)
+    assert counters.apply_interfaces('r1', [
+        interface(1, 0, 0), interface(2, WRAP_32 - 1_000_000, 0, bits=32), interface(3, 5, 5),
+        {"index": 4, "in_octets": None, "out_octets": 1},
+    ], START, uptime=100_000)["rated"] == 0
+
+    result = counters.apply_interfaces('r1', [
+        interface(1, 75_000_000, 12_500_000), interface(2, 11_500_000, 0, bits=32), interface(3, 5, 5),
+    ], START + 10, uptime=101_000)
+    assert result["rated"] == 3 and not result["rebooted"]
+    assert (result["total_in_bps"], result["total_out_bps"]) == (70e6, 10e6)
+
+    traffic = counters.traffic('r1')
+    assert traffic["interfaces_top"] == [
+        {"name": 'ether1', "index": 1, "in_mbps": 60.0, "out_mbps": 10.0},
+        {"name": 'ether2', "index": 2, "in_mbps": 10.0, "out_mbps": 0.0},
+    ]
+    assert traffic["counter_resets"] == 0
+    assert counters.traffic('r1', n=1)["interfaces_top"][0]["index"] == 1
+
+
+def test_counter_cleared_is_not_taken_as_a_wrap():
+    counters = CounterRates()
+    counters.apply_interfaces('r1', [interface(1, 10 ** 12, 10 ** 12, speed=100)], START)
+    # Um contador de 64 bits que volta a um valor baixo daria uma taxa absurda: foi zerado.
+    result = counters.apply_interfaces('r1', [interface(1, 1000, 1000, speed=100)], START + 10)
+    assert result["rated"] == 0 and counters.traffic('r1')["counter_resets"] == 1
+
+    result = counters.apply_interfaces('r1', [interface(1, 126_000, 1000, speed=100)], START + 20)
+    assert result["total_in_bps"] == 100_000.0
+
+
+def test_reboot_makes_the_poll_a_new_baseline():
+    counters = CounterRates()
+    counters.apply_interfaces('r1', [interface(1, 5_000_000, 0)], START, uptime=900_000)
+    result = counters.apply_interfaces('r1', [interface(1, 6_000_000, 0)], START + 60, uptime=3000)
+    assert result["rebooted"] and result["rated"] == 0
+    assert counters.traffic('r1')["counter_resets"] == 1
+
+    result = counters.apply_interfaces('r1', [interface(1, 6_600_000, 0)], START + 120, uptime=9000)
+    assert result["total_in_bps"] == 80_000.0
+
+
+def test_new_interfaces_and_width_changes_wait_for_the_next_poll():
+    counters = CounterRates()
+    counters.update('r1', [5, 1], [100, 100], [0, 0], START, bits=[64, 64])
+    result = counters.update('r1', [1, 7, 5], [1100, 50, 300], [0, 0, 0], START + 8, bits=[64, 64, 32])
+    state = counters.devices['r1']
+    assert state.index.tolist() == [1, 5, 7]
+    # ifIndex 1 casou; 7 é novo; 5 passou a ser lido em 32 bits e recomeça a base.
+    assert np.isnan(state.in_bps).tolist() == [False, True, True]
+    assert result["total_in_bps"] == 1000.0
+
+    counters.update('r2', [1], [0], [0], START)
+    assert [item['device'] for item in counters.fleet()] == ['r1', 'r2']
+    counters.remove_device('r1')
+    assert counters.traffic('r1') is None
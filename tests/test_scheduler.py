@@ -0,0 +1,95 @@
+from collections import Counter
+
+import pytest
+
+from monitor.scheduler import JitteredScheduler, stable_phase
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def scheduler_at(clock, wall=1_700_000_000.0):
+    # Relógio de parede andando junto com o monotônico.
+    return JitteredScheduler(clock=clock, wall_clock=lambda: wall + (clock.now - 1000.0))
+
+
+def test_phase_is_stable_and_inside_interval():
+    assert stable_phase('10.0.0.1', 60) == stable_phase('10.0.0.1', 60)
+    phases = [stable_phase(f"10.0.{index // 256}.{index % 256}", 60) for index in range(5000)]
+    assert all(0 <= phase < 60 for phase in phases)
+    assert len(set(phases)) > 4900
+
+
+def test_first_due_is_aligned_to_wall_clock_phase(clock):
+    wall = 1_700_000_000.0
+    scheduler = scheduler_at(clock, wall)
+    job = scheduler.add('core', 60)
+
+    fires_at_wall = wall + (job.due - clock.now)
+    assert 0 < job.due - clock.now <= 60
+    assert (fires_at_wall - job.phase) % 60 == pytest.approx(0, abs=1e-6)
+
+
+def test_five_thousand_hosts_are_spread_across_the_minute(clock):
+    scheduler = scheduler_at(clock)
+    for index in range(5000):
+        scheduler.add(f"10.0.{index // 256}.{index % 256}", 60)
+
+    per_second = Counter()
+    while clock.now < 1060:
+        clock.now += 1
+        per_second[clock.now] += len(scheduler.pop_due())
+
+    assert sum(per_second.values()) == 5000
+    # ~83 polls/s em média; nenhum segundo concentra uma rajada.
+    assert max(per_second.values()) < 83 * 2
+
+
+def test_reschedule_without_drift_and_missed_deadlines(clock):
+    scheduler = scheduler_at(clock)
+    job = scheduler.add('core', 10)
+    first_due = job.due
+
+    clock.now = first_due + 0.5
+    assert scheduler.pop_due() == [('core', first_due)]
+    assert scheduler.next_deadline() == first_due + 10
+
+    # O loop ficou parado 35 s: três disparos perdidos são contados e pulados.
+    clock.now = first_due + 10 + 35
+    assert scheduler.pop_due() == [('core', first_due + 10)]
+    assert scheduler.next_deadline() == first_due + 50
+    assert job.missed == 3
+    assert scheduler.stats()["missed_deadlines"] == 3
+
+
+def test_remove_and_interval_change_drop_stale_heap_entries(clock):
+    scheduler = scheduler_at(clock)
+    scheduler.add('a', 10)
+    scheduler.add('b', 10)
+    scheduler.add('b', 30)
+    scheduler.remove('a')
+
+    assert len(scheduler) == 1 and 'a' not in scheduler
+    clock.now += 31
+    assert [key for key, _ in scheduler.pop_due()] == ['b']
+
+
+def test_lag_stats(clock):
+    scheduler = scheduler_at(clock)
+    for lag in (0.010, 0.030, -0.001):
+        scheduler.record_lag(lag)
+    stats = scheduler.stats()
+    assert stats["dispatched"] == 3
+    assert stats["lag_max_ms"] == 30.0
+    assert stats["lag_avg_ms"] == pytest.approx(13.33, abs=0.01)
+    assert stats["lag_last_ms"] == 0.0
@@ -0,0 +1,136 @@
+import math
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from monitor import netflow
+from monitor.sketches import CountMinSketch, SpaceSaving
+
+
+def zipf_stream(size, keys=5000, seed=1):
+    rng = np.random.default_rng(seed)
+    ranks = np.minimum(rng.zipf(1.3, size), keys).astype(np.uint64)
+    # Chaves com estrutura de IP (10.x.y.z), como as do coletor.
+    return (np.uint64(0x0A000000) + ranks * np.uint64(7919)), rng.integers(40, 1500, size)
+
+
+def exact(keys, weights):
+    counts = Counter()
+    for key, weight in zip(keys.tolist(), weights.tolist()):
+        counts[key] += weight
+    return counts
+
+
+def assert_space_saving_bounds(sketch, truth):
+    bound = sketch.error_bound()
+    assert bound <= sketch.total // (sketch.capacity + 1)
+    stored = dict(zip(sketch.keys.tolist(), sketch.counts.tolist()))
+    for key, true_count in truth.items():
+        # ``counts`` é limite inferior e o erro não passa de ``error_bound``.
+        lower = stored.get(key, 0)
+        assert lower <= true_count <= lower + bound
+    # Toda chave acima do limite de erro está no sketch.
+    assert {key for key, count in truth.items() if count > bound} <= set(stored)
+
+
+def test_space_saving_error_bound_over_batches():
+    keys, weights = zipf_stream(200_000)
+    sketch = SpaceSaving(capacity=128)
+    for start in range(0, len(keys), 5000):
+        sketch.update(keys[start:start + 5000], weights[start:start + 5000])
+
+    truth = exact(keys, weights)
+    assert len(sketch) <= 128
+    assert sketch.total == sum(truth.values())
+    assert_space_saving_bounds(sketch, truth)
+    heaviest = max(truth, key=truth.get)
+    assert sketch.top(1)[0][0] == heaviest
+    counts = [count for _, count, _ in sketch.top(10)]
+    assert counts == sorted(counts, reverse=True)
+
+
+def test_space_saving_bound_survives_merges_and_serialization():
+    keys, weights = zipf_stream(120_000, seed=7)
+    parts = []
+    for index in range(6):
+        part = SpaceSaving(capacity=64)
+        part.update(keys[index::6], weights[index::6])
+        parts.append(SpaceSaving.from_dict(part.to_dict()))
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+
+    assert_space_saving_bounds(merged, exact(keys, weights))
+    with pytest.raises(ValueError):
+        merged.merge(SpaceSaving(capacity=32))
+
+
+def test_count_min_never_underestimates_and_rarely_overshoots():
+    keys, weights = zipf_stream(200_000, seed=3)
+    sketch = CountMinSketch(width=1000, depth=4)
+    sketch.update(keys, weights)
+    truth = exact(keys, weights)
+
+    assert sketch.width == 1024
+    unique = np.array(list(truth), dtype=np.uint64)
+    estimates = sketch.estimate(unique)
+    true_counts = np.array([truth[key] for key in unique.tolist()])
+    assert (estimates >= true_counts).all()
+    # Garantia: erro <= e/width * total com probabilidade 1 - e**-depth (~98%).
+    limit = math.e / sketch.width * sketch.total
+    assert ((estimates - true_counts) > limit).mean() <= 0.05
+
+
+def test_count_min_merge_equals_single_sketch():
+    keys, weights = zipf_stream(50_000, seed=5)
+    whole = CountMinSketch(width=512, depth=3)
+    whole.update(keys, weights)
+    left, right = CountMinSketch(width=512, depth=3), CountMinSketch(width=512, depth=3)
+    left.update(keys[:20_000], weights[:20_000])
+    right.update(keys[20_000:], weights[20_000:])
+    left.merge(CountMinSketch.from_dict(right.to_dict()))
+
+    assert (left.table == whole.table).all() and left.total == whole.total
+    with pytest.raises(ValueError):
+        left.merge(CountMinSketch(width=512, depth=3, seed=99))
+    with pytest.raises(ValueError):
+        CountMinSketch.from_dict(dict(whole.to_dict(), table=[[0] * 512]))
+
+
+def flow_batch(exporter, sources, nbytes, end):
+    size = len(sources)
+    zeros = np.zeros(size, dtype=np.uint32)
+    return netflow.FlowBatch(
+        exporter, input=zeros, output=zeros, protocol=np.full(size, 6, dtype=np.uint8),
+        bytes=np.asarray(nbytes, dtype=np.uint64), packets=np.ones(size, dtype=np.uint64),
+        end=np.full(size, float(end)), srcaddr=np.asarray(sources, dtype=np.uint32),
+        dstaddr=np.full(size, 0xC6336401, dtype=np.uint32), srcport=np.full(size, 50000, dtype=np.uint16),
+        dstport=np.full(size, 443, dtype=np.uint16), src_as=np.full(size, 64512, dtype=np.uint16),
+        dst_as=np.full(size, 65001, dtype=np.uint16),
+    )
+
+
+def test_top_talkers_windows_exporters_and_merge_state():
+    window = 300
+    now = 1_700_000_100 - 1_700_000_100 % window
+    talkers = netflow.TopTalkers(window=window, windows=3, capacity=16, width=256, depth=3)
+    talkers.add(flow_batch('r1', [0x0A000001] * 3 + [0x0A000002], [1000, 1000, 1000, 500], now))
+    talkers.add(flow_batch('r1', [0x0A000002], [5000], now + window))
+    talkers.add(flow_batch('r2', [0x0A000003], [700], now + window))
+
+    newest = talkers.top('src_ip', n=2, exporter='r1')
+    assert [(item['key'], item['bytes']) for item in newest['items']] == [('10.0.0.2', 5000)]
+    both = talkers.top('src_ip', n=2, exporter='r1', windows=2)
+    assert [(item['key'], item['bytes']) for item in both['items']] == [('10.0.0.2', 5500), ('10.0.0.1', 3000)]
+    assert both['window_start'] == now and both['error_bound'] == 0
+    assert talkers.top('dst_port', windows=2)['items'][0]['key'] == 'tcp/443'
+    assert talkers.estimate('as_pair', 'AS64512-AS65001', windows=2) == 9200
+
+    other = netflow.TopTalkers(window=window, windows=3, capacity=16, width=256, depth=3)
+    assert other.merge_state(talkers.export(windows=3)) == 3
+    assert other.top('src_ip', windows=2)['total_bytes'] == 9200
+    with pytest.raises(ValueError):
+        netflow.TopTalkers(window=60).merge_state(talkers.export())
+    with pytest.raises(ValueError):
+        netflow.TopTalkers(window=window, capacity=8).merge_state(talkers.export())
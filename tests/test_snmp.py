@@ -0,0 +1,201 @@
+import asyncio
+import time
+
+import pytest
+
+from monitor import collector, poller, snmp
+from snmp_agent import ENGINE_ID, SYSTEM_MIB, plain, start_agent
+
+IF_DESCR = '1.3.6.1.2.1.2.2.1.2'
+IF_HC_IN_OCTETS = '1.3.6.1.2.1.31.1.1.1.6'
+IF_HC_OUT_OCTETS = '1.3.6.1.2.1.31.1.1.1.10'
+
+
+def interfaces_mib(count):
+    mib = dict(SYSTEM_MIB)
+    for index in range(1, count + 1):
+        mib[snmp.parse_oid(f"{IF_DESCR}.{index}")] = f"ether{index}".encode()
+        mib[snmp.parse_oid(f"{IF_HC_IN_OCTETS}.{index}")] = ('c64', 2 ** 40 + index)
+        mib[snmp.parse_oid(f"{IF_HC_OUT_OCTETS}.{index}")] = ('c64', index * 1000)
+    # Linha de outra tabela logo depois: o walk tem de parar no fim de cada coluna.
+    mib[snmp.parse_oid('1.3.6.1.2.1.31.1.1.1.18.1')] = b'uplink'
+    return mib
+
+
+async def with_client(mib, scenario, **agent_options):
+    agent = await start_agent(mib, **agent_options)
+    client = poller.SnmpClient()
+    await client.open()
+    try:
+        return await scenario(client, agent)
+    finally:
+        client.close()
+        agent.transport.close()
+
+
+def run(mib, scenario, **agent_options):
+    return asyncio.run(with_client(mib, scenario, **agent_options))
+
+
+@pytest.mark.parametrize('value', [0, 1, -1, 127, 128, -129, 2 ** 31 - 1, -2 ** 31])
+def test_integer_round_trip(value):
+    tag, decoded, end = snmp.decode_value(snmp.encode_integer(value), 0)
+    assert (tag, decoded) == (snmp.INTEGER, value)
+    assert end == len(snmp.encode_integer(value))
+
+
+@pytest.mark.parametrize('tag, value', [
+    (snmp.COUNTER32, 2 ** 32 - 1), (snmp.COUNTER64, 2 ** 64 - 1), (snmp.TIMETICKS, 0), (snmp.GAUGE32, 2 ** 31),
+])
+def test_unsigned_round_trip(tag, value):
+    assert snmp.decode_value(snmp.encode_unsigned(value, tag), 0)[:2] == (tag, value)
+
+
+@pytest.mark.parametrize('oid', [
+    '1.3.6.1.2.1.1.1.0', '1.3.6.1.4.1.14988.1.1.19.1.1.10.4294967295', '1.3.6.1.2.1.4.22.1.2.3.10.0.0.1',
+])
+def test_oid_round_trip(oid):
+    encoded = snmp.encode_oid(oid)
+    assert snmp.decode_value(encoded, 0)[:2] == (snmp.OBJECT_IDENTIFIER, snmp.parse_oid(oid))
+
+
+def test_long_octets_use_long_form_length():
+    payload = bytes(range(256)) * 2
+    encoded = snmp.encode_octets(payload)
+    assert encoded[1] == 0x82
+    assert snmp.decode_value(encoded, 0)[1] == payload
+
+
+def test_truncated_message_is_rejected():
+    message = snmp.build_v2c_message('public', snmp.encode_pdu(snmp.GET_REQUEST, 7, ['1.3.6.1.2.1.1.5.0']))
+    with pytest.raises(snmp.SnmpDecodeError):
+        snmp.parse_v2c_message(message[:-3])
+
+
+def test_v2c_getbulk_message_round_trip():
+    oids = [IF_DESCR, IF_HC_IN_OCTETS]
+    message = snmp.build_v2c_message('public', snmp.encode_pdu(snmp.GET_BULK_REQUEST, 4242, oids, 1, 25))
+    pdu = snmp.parse_v2c_message(message)
+    assert snmp.peek_request_id(message) == 4242
+    assert pdu['type'] == snmp.GET_BULK_REQUEST
+    assert (pdu['error_status'], pdu['error_index']) == (1, 25)
+    assert pdu['varbinds'] == [(snmp.parse_oid(oid), None) for oid in oids]
+
+
+def test_v3_message_is_signed_and_verified():
+    state = snmp.UsmState()
+    state.engine_id, state.engine_boots, state.engine_time = ENGINE_ID, 3, 5000
+    key = snmp.localize_key(snmp.password_to_key('authpass123', 'sha'), ENGINE_ID, 'sha')
+    pdu = snmp.encode_pdu(snmp.GET_REQUEST, 99, ['1.3.6.1.2.1.1.3.0'])
+    message = snmp.build_v3_message(99, b'ops', pdu, state, auth_protocol='sha', auth_key=key)
+
+    parsed = snmp.parse_v3_message(message)
+    assert (parsed['msg_id'], parsed['user'], parsed['engine_id']) == (99, b'ops', ENGINE_ID)
+    assert parsed['flags'] & snmp.FLAG_AUTH
+    assert snmp.peek_request_id(message) == 99
+    assert snmp.verify_v3_auth(message, parsed['auth_params'], key, 'sha')
+
+    other = snmp.localize_key(snmp.password_to_key('outrasenha', 'sha'), ENGINE_ID, 'sha')
+    assert not snmp.verify_v3_auth(message, parsed['auth_params'], other, 'sha')
+    tampered = message[:-1] + bytes((message[-1] ^ 1,))
+    assert not snmp.verify_v3_auth(tampered, parsed['auth_params'], key, 'sha')
+
+
+def test_password_to_key_matches_rfc3414_vector():
+    # RFC 3414 A.3.2: "maplesyrup" com engineID 00..02 (SHA).
+    engine_id = bytes.fromhex('000000000000000000000002')
+    key = snmp.localize_key(snmp.password_to_key('maplesyrup', 'sha'), engine_id, 'sha')
+    assert key.hex() == '6695febc9288e36282235fc7151f128497b38f3f'
+
+
+def test_get_v2c_against_local_agent():
+    async def scenario(client, agent):
+        target = poller.SnmpTarget('127.0.0.1', agent.port, 'v2c', 'public', timeout=1, retries=0)
+        return await client.get(target, list(poller.SYSTEM_OIDS.values()))
+
+    varbinds = run(SYSTEM_MIB, scenario)
+    assert varbinds == [(oid, plain(value)) for oid, value in sorted(SYSTEM_MIB.items())]
+
+
+def test_get_v3_discovers_engine_and_authenticates():
+    async def scenario(client, agent):
+        target = poller.SnmpTarget('127.0.0.1', agent.port, 'v3', user='ops', auth_protocol='sha',
+                                   auth_password='authpass123', timeout=1, retries=0)
+        first = await client.get(target, [poller.SYSTEM_OIDS['sysName']])
+        second = await client.get(target, [poller.SYSTEM_OIDS['sysDescr']])
+        return first, second, agent.requests
+
+    first, second, requests = run(SYSTEM_MIB, scenario)
+    assert first == [((1, 3, 6, 1, 2, 1, 1, 5, 0), b'core-border-01')]
+    assert second == [((1, 3, 6, 1, 2, 1, 1, 1, 0), b'RouterOS CCR1036')]
+    # Uma descoberta de engine e depois só as duas consultas assinadas.
+    assert [request['engine_id'] for request in requests] == [b'', ENGINE_ID, ENGINE_ID]
+
+
+def test_v3_wrong_password_times_out():
+    async def scenario(client, agent):
+        target = poller.SnmpTarget('127.0.0.1', agent.port, 'v3', user='ops', auth_protocol='sha',
+                                   auth_password='senhaerrada', timeout=0.2, retries=0)
+        await client.get(target, [poller.SYSTEM_OIDS['sysName']])
+
+    with pytest.raises(snmp.SnmpTimeout):
+        run(SYSTEM_MIB, scenario)
+
+
+def test_timeout_retries_then_raises():
+    async def scenario(client, agent):
+        # Porta sem agente: cada tentativa espera o timeout inteiro.
+        target = poller.SnmpTarget('127.0.0.1', agent.port, 'v2c', 'public', timeout=0.1, retries=2)
+        agent.transport.close()
+        started = time.monotonic()
+        with pytest.raises(snmp.SnmpTimeout):
+            await client.get(target, [poller.SYSTEM_OIDS['sysName']])
+        return time.monotonic() - started, client.device_stats(target)
+
+    elapsed, stats = run(SYSTEM_MIB, scenario)
+    assert stats.requests == 3 and stats.timeouts == 3 and stats.responses == 0
+    assert elapsed >= 0.3
+
+
+def test_getbulk_walk_reads_every_row_in_few_requests():
+    columns = [IF_DESCR, IF_HC_IN_OCTETS, IF_HC_OUT_OCTETS]
+
+    async def scenario(client, agent):
+        target = poller.SnmpTarget('127.0.0.1', agent.port, 'v2c', 'public', timeout=1, retries=0)
+        return await collector.walk_columns(client, target, columns), agent.requests
+
+    walked, requests = run(interfaces_mib(120), scenario)
+    assert [index for index, _ in walked[IF_DESCR]] == [(index,) for index in range(1, 121)]
+    assert walked[IF_DESCR][0][1] == b'ether1'
+    assert walked[IF_HC_IN_OCTETS][-1] == ((120,), 2 ** 40 + 120)
+    assert walked[IF_HC_OUT_OCTETS][-1] == ((120,), 120000)
+    assert {request['type'] for request in requests} == {snmp.GET_BULK_REQUEST}
+    # Três colunas no mesmo PDU e max-repetitions crescendo: bem menos requisições que linhas.
+    assert len(requests) < 15
+
+
+def test_getbulk_walk_shrinks_repetitions_on_too_big():
+    tuner = collector.RepetitionTuner()
+
+    async def scenario(client, agent):
+        target = poller.SnmpTarget('127.0.0.1', agent.port, 'v2c', 'public', timeout=1, retries=0)
+        return await collector.walk_columns(client, target, [IF_DESCR, IF_HC_IN_OCTETS], tuner)
+
+    walked = run(interfaces_mib(200), scenario, too_big_above=40)
+    assert len(walked[IF_DESCR]) == len(walked[IF_HC_IN_OCTETS]) == 200
+    assert tuner.ceiling * 2 <= 40
+
+
+def test_get_scalars_packs_oids_into_few_pdus():
+    oids = [f"{IF_HC_IN_OCTETS}.{index}" for index in range(1, 301)]
+    batches = collector.pack_oids(oids)
+    assert 1 < len(batches) < 30
+    assert [oid for batch in batches for oid in batch] == oids
+
+    async def scenario(client, agent):
+        target = poller.SnmpTarget('127.0.0.1', agent.port, 'v2c', 'public', timeout=1, retries=0)
+        return await collector.get_scalars(client, target, oids), len(agent.requests)
+
+    values, requests = run(interfaces_mib(300), scenario)
+    assert requests == len(batches)
+    assert values[f"{IF_HC_IN_OCTETS}.300"] == 2 ** 40 + 300
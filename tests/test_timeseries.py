@@ -0,0 +1,109 @@
+import math
+
+import pytest
+
+from monitor.timeseries import EventLog, RingSeries, RollupSeries, TimeSeriesStore, aggregate, lttb
+
+START = 1_700_000_000
+
+
+def test_ring_keeps_the_newest_points_in_order():
+    ring = RingSeries(4)
+    for offset in range(6):
+        ring.append(START + offset, float(offset))
+
+    assert len(ring) == 4
+    assert list(ring.iter_range(0, math.inf)) == [(START + offset, float(offset)) for offset in range(2, 6)]
+    assert list(ring.iter_range(START + 3, START + 4)) == [(START + 3, 3.0), (START + 4, 4.0)]
+    assert ring.oldest_timestamp() == START + 2
+
+
+def test_rollup_buckets_track_min_max_sum_count_last():
+    rollup = RollupSeries(resolution=60, retention=3600)
+    for offset, value in ((0, 5), (10, 1), (59, 9), (60, 2), (30, 100)):
+        rollup.add(START - START % 60 + offset, value)
+
+    first, second = rollup.rows(0, math.inf)
+    bucket = START - START % 60
+    # A amostra atrasada (30 s) chegou depois do bucket seguinte abrir e foi ignorada.
+    assert first == (bucket, 1, 9, 15, 3, 9)
+    assert second == (bucket + 60, 2, 2, 2, 1, 2)
+
+
+def test_aggregate_regroups_rows():
+    rows = [(START + offset, offset, offset, offset, 1, offset) for offset in range(0, 60, 10)]
+    assert aggregate(rows, START, 30) == [(START, 10.0), (START + 30, 40.0)]
+    assert aggregate(rows, START, 30, 'max') == [(START, 20), (START + 30, 50)]
+    assert aggregate(rows, START, 30, 'count') == [(START, 3), (START + 30, 3)]
+    assert aggregate(rows, START, 30, 'last') == [(START, 20), (START + 30, 50)]
+
+
+def test_lttb_keeps_endpoints_and_spikes():
+    points = [(index, 0.0) for index in range(1000)]
+    points[437] = (437, 50.0)
+    points[812] = (812, -20.0)
+    sampled = lttb(points, 50)
+
+    assert len(sampled) == 50
+    assert sampled[0] == points[0] and sampled[-1] == points[-1]
+    assert (437, 50.0) in sampled and (812, -20.0) in sampled
+    assert [x for x, _ in sampled] == sorted(x for x, _ in sampled)
+    assert lttb(points[:10], 20) == points[:10]
+
+
+def test_store_replaces_points_within_resolution_and_ignores_old_ones():
+    store = TimeSeriesStore(retention=600, resolution=10, rollups=())
+    store.append('cpu', START, 1.0)
+    store.append('cpu', START + 5, 2.0)
+    store.append('cpu', START + 10, 3.0)
+    store.append('cpu', START + 1, 99.0)
+
+    assert store.query('cpu', START, START + 60) == (10, [(START + 5, 2.0), (START + 10, 3.0)])
+
+
+def test_store_uses_the_coarsest_rollup_that_fits_the_step():
+    store = TimeSeriesStore(retention=3600, resolution=10, rollups=((60, 86400), (3600, 7 * 86400)))
+    base = START - START % 3600
+    for offset in range(0, 86400, 10):
+        store.append('cpu', base + offset, offset % 600)
+
+    # O bruto cobre só a última hora: consultas mais antigas caem nos rollups.
+    resolution, points = store.query('cpu', base, base + 86400, step=3600)
+    assert resolution == 3600 and len(points) == 24
+    assert points[0] == (base, pytest.approx(295.0))
+
+    resolution, points = store.query('cpu', base + 3600, base + 86400, step=300, agg='max')
+    assert resolution == 60 and len(points) == 23 * 12
+    # Dente de serra de 600 s: cada janela de 5 min vê o pico da sua metade.
+    assert [value for _, value in points[:4]] == [290, 590, 290, 590]
+
+    recent = base + 86400 - 1800
+    resolution, points = store.query('cpu', recent, base + 86400, step=10)
+    assert resolution == 10 and len(points) == 180
+
+
+def test_store_lttb_query_and_errors():
+    store = TimeSeriesStore(retention=3600, resolution=10, rollups=())
+    for offset in range(0, 3600, 10):
+        store.append('cpu', START + offset, 100.0 if offset == 1230 else 1.0)
+
+    _, points = store.query('cpu', START, START + 3600, step=120, method='lttb')
+    assert len(points) == 30
+    assert (START + 1230, 100.0) in points
+
+    with pytest.raises(KeyError):
+        store.query('memory', START, START + 60)
+    with pytest.raises(ValueError):
+        store.query('cpu', START, START + 60, agg='p99')
+    expected = {"cpu": [(START, 1.0), (START + 10, 1.0), (START + 20, 1.0)]}
+    assert store.query_many(['cpu', 'memory', 'cpu'], START, START + 20) == expected
+
+
+def test_event_log_window_and_capacity():
+    events = EventLog(capacity=3)
+    for offset in range(5):
+        events.add(START + offset, f"evento {offset}")
+
+    assert len(events) == 3
+    assert [event['title'] for event in events.between(START + 3, START + 10)] == ['evento 3', 'evento 4']
+    assert [event['title'] for event in events.between(0, START + 2)] == ['evento 2']
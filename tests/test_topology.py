@@ -0,0 +1,84 @@
+import pytest
+
+from monitor.topology import NeighborTopology, node_name
+
+
+def links(*rows):
+    return [{"local_interface": local, "neighbor": neighbor, "port": port} for local, neighbor, port in rows]
+
+
+@pytest.fixture
+def topology():
+    # core1 -- agg1 -- acc1 -- acc2 e core1 -- agg2 -- acc2 (anel), mais agg2 -- cpe1 (folha).
+    topology = NeighborTopology(roots=('core1',))
+    topology.apply_snapshot('10.0.0.1', 'core1', links(('sfp1', 'agg1', 'sfp1'), ('sfp2', 'agg2', 'sfp1')))
+    topology.apply_snapshot('10.0.0.2', 'agg1', links(('sfp1', 'core1', 'sfp1'), ('ether2', 'acc1', 'ether1')))
+    topology.apply_snapshot('10.0.0.3', 'agg2', links(('ether2', 'acc2', 'ether1'), ('ether3', 'cpe1', 'eth0')))
+    topology.apply_snapshot('10.0.0.4', 'acc1', links(('ether2', 'acc2(FOC123)', 'ether2')))
+    return topology
+
+
+def test_node_name_strips_cdp_serial():
+    assert node_name(' sw1.rede.local(FOC1234X0AB) ') == 'sw1.rede.local'
+    assert node_name(None) == ''
+
+
+def test_unchanged_snapshot_keeps_version_and_cached_graph(topology):
+    graph = topology.graph()
+    assert topology.graph() is graph
+
+    same = links(('sfp1', 'agg1', 'sfp1'), ('sfp2', 'agg2', 'sfp1'))
+    assert topology.apply_snapshot('10.0.0.1', 'core1', same[::-1]) == {"changed": False, "links": 2,
+                                                                        "version": graph.version}
+    assert topology.graph() is graph
+
+    # Mudança de porta ou de nome do equipamento é mudança de versão.
+    result = topology.apply_snapshot('10.0.0.1', 'core1', links(('sfp1', 'agg1', 'sfp9'), ('sfp2', 'agg2', 'sfp1')))
+    assert result["changed"] and result["version"] == graph.version + 1
+    rebuilt = topology.graph()
+    assert rebuilt is not graph and rebuilt.version == result["version"]
+    assert topology.apply_snapshot('10.0.0.1', 'core-1', same)["changed"]
+
+
+def test_vanished_links_and_removed_devices_update_the_graph(topology):
+    before = topology.graph()
+    assert before.shortest_path('core1', 'acc1')["hops"] == 2
+
+    topology.apply_snapshot('10.0.0.2', 'agg1', links(('sfp1', 'core1', 'sfp1')))
+    # agg1 parou de ver acc1, mas acc1 continua ligado pelo anel através de acc2.
+    assert topology.graph().shortest_path('core1', 'acc1')["nodes"] == ['core1', 'agg2', 'acc2', 'acc1']
+
+    topology.remove_device('10.0.0.4')
+    graph = topology.graph()
+    assert 'acc1' not in graph.index
+    assert graph.version == before.version + 2
+    with pytest.raises(KeyError):
+        graph.shortest_path('core1', 'acc1')
+    topology.remove_device('desconhecido')
+    assert topology.graph() is graph
+
+
+def test_graph_edges_merge_links_reported_by_both_sides(topology):
+    graph = topology.graph()
+    payload = graph.as_dict()
+    names = [node['name'] for node in payload['nodes']]
+    core_agg1 = next(edge for edge in payload['edges']
+                     if {names[edge['source']], names[edge['target']]} == {'core1', 'agg1'})
+    assert sorted(link['device'] for link in core_agg1['links']) == ['agg1', 'core1']
+    assert len(payload['edges']) == 6
+    root = payload['nodes'][graph.index['core1']]
+    # Raiz no centro do layout radial; o componente é deslocado pelo raio (2 saltos).
+    assert root['root'] and (root['x'], root['y']) == (200.0, 0.0)
+
+
+def test_blast_radius_and_components(topology):
+    graph = topology.graph()
+    # Com o anel, perder agg1 não isola ninguém; perder agg2 isola a folha cpe1.
+    assert graph.blast_radius('agg1')["affected"] == []
+    assert graph.blast_radius('agg2') == {"node": 'agg2', "roots": ['core1'], "affected": ['cpe1'], "count": 1}
+
+    topology.apply_snapshot('10.0.0.9', 'ilha1', links(('ether1', 'ilha2', 'ether1')))
+    components = topology.graph().components()
+    assert [component['size'] for component in components] == [6, 2]
+    assert components[1]['members'] == ['ilha1', 'ilha2']
+    assert topology.graph().shortest_path('core1', 'ilha1') is None
@@ -0,0 +1,142 @@
+import pytest
+
+from fake_zabbix import FakeZabbixApi
+from monitor import zabbix
+from monitor.inventory import HostInventory
+
+
+def host(index, **changes):
+    record = {
+        "host_name": f"cpe-{index:05d}",
+        "ip_address": f"10.{index // 65536}.{index // 256 % 256}.{index % 256}",
+        "host_group": 'Edge' if index % 2 else f"POP {index % 7}",
+        "template": 'Template MikroTik SNMP' if index % 3 else '',
+        "snmp_version": 'v2c',
+        "community": 'public',
+        "tags": ['cpe'],
+    }
+    record.update(changes)
+    return record
+
+
+@pytest.fixture
+def api():
+    server = FakeZabbixApi().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def inventory(tmp_path):
+    return HostInventory(tmp_path / 'inventory.db')
+
+
+def hostid(api, name):
+    return next(hostid for hostid, item in api.hosts.items() if item['host'] == name)
+
+
+def make_sync(api, inventory, batch_size=1000):
+    client = zabbix.ZabbixClient(api.url, token='', user='Admin', password='zabbix', timeout=5)
+    return zabbix.ZabbixSync(client, inventory, batch_size=batch_size)
+
+
+def test_initial_sync_creates_hosts_in_few_requests(api, inventory):
+    inventory.upsert_many(host(index) for index in range(1, 2501))
+    summary = make_sync(api, inventory).sync()
+
+    assert summary["hosts"] == summary["created"] == 2500
+    assert len(api.hosts) == 2500
+    # Login (com a tentativa "username" recusada) + no máximo três POSTs por lote de 1000 hosts.
+    assert api.posts <= 2 + 3 * 3
+    assert len(api.calls('host.create')) == 3
+    created = api.host_by_name('10.0.0.7')
+    assert created['name'] == 'cpe-00007'
+    assert created['templates'] == [{"templateid": '500'}]
+    assert created['tags'] == [{"tag": 'cpe'}]
+    assert inventory.get_state(zabbix.SYNC_STATE_KEY)
+
+
+def test_sync_is_incremental(api, inventory):
+    inventory.upsert_many(host(index) for index in range(1, 101))
+    sync = make_sync(api, inventory)
+    sync.sync()
+    posts = api.posts
+
+    assert sync.sync()["hosts"] == 0
+    assert api.posts == posts
+    assert api.calls('host.create') == ['host.create']
+
+
+def test_changed_hosts_are_updated_in_one_post(api, inventory):
+    inventory.upsert_many(host(index) for index in range(1, 51))
+    sync = make_sync(api, inventory)
+    sync.sync()
+    api.posted_methods.clear()
+
+    inventory.upsert(host(3, host_name='cpe-renomeado', community='nova', tags=['cpe', 'vip']))
+    inventory.upsert(host(4, snmp_version='v3', community='ops'))
+    inventory.upsert(host(5, snmp_version='v3', community='noc', auth_protocol='sha', auth_password='authpass123'))
+    summary = sync.sync()
+
+    assert (summary["created"], summary["updated"]) == (0, 3)
+    last_post = api.posted_methods[-1]
+    assert {'host.massupdate', 'host.update', 'hostinterface.update'} <= set(last_post)
+    assert 'host.create' not in last_post
+
+    renamed = api.host_by_name('10.0.0.3')
+    assert renamed['name'] == 'cpe-renomeado'
+    assert renamed['tags'] == [{"tag": 'cpe'}, {"tag": 'vip'}]
+    interfaces = {item['hostid']: item for item in api.interfaces.values()}
+    assert interfaces[hostid(api, '10.0.0.3')]['details']['community'] == 'nova'
+    v3 = interfaces[hostid(api, '10.0.0.4')]['details']
+    assert (v3['version'], v3['securityname'], v3['securitylevel']) == (3, 'ops', zabbix.SNMPV3_NOAUTHNOPRIV)
+    v3_auth = interfaces[hostid(api, '10.0.0.5')]['details']
+    assert v3_auth['securitylevel'] == zabbix.SNMPV3_AUTHNOPRIV
+    assert (v3_auth['authprotocol'], v3_auth['authpassphrase']) == (zabbix.SNMPV3_AUTH_PROTOCOLS['sha'], 'authpass123')
+
+
+def test_host_without_snmp_interface_gets_one(api, inventory):
+    inventory.upsert(host(1))
+    sync = make_sync(api, inventory)
+    sync.sync()
+    api.interfaces.clear()
+
+    inventory.upsert(host(1, community='outra'))
+    sync.sync()
+
+    assert api.calls('hostinterface.create') == ['hostinterface.create']
+    (interface,) = api.interfaces.values()
+    assert interface['details']['community'] == 'outra'
+
+
+def test_failed_batch_keeps_watermark_and_is_retried(api, inventory):
+    inventory.upsert_many(host(index) for index in range(1, 1501))
+    sync = make_sync(api, inventory, batch_size=1000)
+
+    api.fail_methods['host.create'] = 0
+    with pytest.raises(zabbix.ZabbixError):
+        sync.sync()
+    assert inventory.get_state(zabbix.SYNC_STATE_KEY) is None
+    assert not api.hosts
+
+    api.fail_methods.clear()
+    summary = sync.sync()
+    assert summary["created"] == 1500
+    assert len(api.hosts) == 1500
+
+
+def test_watermark_advances_per_accepted_batch(api, inventory):
+    inventory.upsert_many(host(index) for index in range(1, 1501))
+    sync = make_sync(api, inventory, batch_size=1000)
+
+    api.fail_methods['host.create'] = 1
+    with pytest.raises(zabbix.ZabbixError):
+        sync.sync()
+    assert len(api.hosts) == 1000
+    assert inventory.get_state(zabbix.SYNC_STATE_KEY)
+
+    api.fail_methods.clear()
+    summary = sync.sync()
+    # Só o segundo lote volta: o primeiro já foi aceito.
+    assert summary["hosts"] == summary["created"] == 500
+    assert len(api.hosts) == 1500
@@ -0,0 +1,158 @@
+import json
+import socket
+import time
+
+import pytest
+
+from fake_zabbix import FakeTrapper
+from monitor import zabbix_sender
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('condição não atingida a tempo')
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def trapper():
+    server = FakeTrapper()
+    yield server
+    server.stop()
+
+
+def test_packet_framing():
+    payload = {"request": "sender data", "data": [{"host": "cpe-01", "key": "rx", "value": "çã"}]}
+    packet = zabbix_sender.encode_packet(payload)
+    body = json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    assert packet[:5] == b'ZBXD\x01'
+    assert int.from_bytes(packet[5:9], 'little') == len(body)
+    assert packet[9:13] == b'\x00\x00\x00\x00'
+    assert packet[13:] == body
+
+
+def test_read_packet_reassembles_partial_reads():
+    left, right = socket.socketpair()
+    with left, right:
+        packet = zabbix_sender.encode_packet({"response": "success", "info": "processed: 1; failed: 0"})
+        for index in range(0, len(packet), 7):
+            left.sendall(packet[index:index + 7])
+        assert zabbix_sender.read_packet(right) == {"response": "success", "info": "processed: 1; failed: 0"}
+
+
+def test_read_packet_rejects_other_protocols():
+    left, right = socket.socketpair()
+    with left, right:
+        left.sendall(zabbix_sender.HEADER.pack(b'HTTP', 1, 2, 0) + b'{}')
+        with pytest.raises(zabbix_sender.SenderError):
+            zabbix_sender.read_packet(right)
+
+
+def test_values_are_sent_in_batches(trapper):
+    sender = zabbix_sender.ZabbixSender(trapper.server, batch_size=100, max_latency=1.0, timeout=2)
+    for index in range(1000):
+        sender.send('cpe-01', 'rx', index, clock=1700000000 + index)
+    wait_for(lambda: len(trapper.values) == 1000)
+    sender.stop()
+
+    assert [int(item['value']) for item in trapper.values] == list(range(1000))
+    assert trapper.values[0] == {"host": 'cpe-01', "key": 'rx', "value": '0', "clock": 1700000000, "ns": 0}
+    assert all(len(packet['data']) == 100 for packet in trapper.packets)
+    assert sender.stats["batches"] == 10
+    assert sender.stats["sent"] == sender.stats["processed"] == 1000
+    assert sender.stats["retries"] == 0
+
+
+def test_partial_batch_waits_at_most_max_latency(trapper):
+    sender = zabbix_sender.ZabbixSender(trapper.server, batch_size=1000, max_latency=0.1, timeout=2)
+    started = time.monotonic()
+    sender.send_many('cpe-01', {"rx": 1, "tx": 2, "down": None})
+    wait_for(lambda: len(trapper.values) == 2)
+    sender.stop()
+
+    assert 0.05 < time.monotonic() - started < 2
+    assert [item['key'] for item in trapper.values] == ['rx', 'tx']
+
+
+def test_connection_is_reused_when_server_keeps_it_open():
+    server = FakeTrapper(keep_open=True)
+    sender = zabbix_sender.ZabbixSender(server.server, batch_size=50, max_latency=1.0, timeout=2)
+    for index in range(500):
+        sender.send('cpe-01', 'rx', index)
+    wait_for(lambda: len(server.values) == 500)
+    sender.stop()
+    server.stop()
+
+    assert sender.stats["batches"] == 10
+    assert sender.stats["reconnects"] == server.connections == 1
+
+
+def test_connection_closed_by_server_is_replaced_before_sending(trapper):
+    sender = zabbix_sender.ZabbixSender(trapper.server, batch_size=100, max_latency=1.0, timeout=2)
+    for index in range(300):
+        sender.send('cpe-01', 'rx', index)
+    wait_for(lambda: len(trapper.values) == 300)
+    sender.stop()
+
+    # O trapper fecha após cada resposta: o sender percebe e passa a abrir uma conexão por lote, sem falhas.
+    assert [int(item['value']) for item in trapper.values] == list(range(300))
+    assert sender.stats["reconnects"] == trapper.connections == 3
+    assert sender.stats["retries"] == 0
+
+
+def test_peer_closed_detects_eof_on_idle_connection():
+    left, right = socket.socketpair()
+    with right:
+        assert not zabbix_sender.peer_closed(right)
+        left.close()
+        assert zabbix_sender.peer_closed(right)
+
+
+def test_lost_reply_is_not_resent_blindly():
+    server = FakeTrapper(keep_open=True, drop_replies={2})
+    sender = zabbix_sender.ZabbixSender(server.server, batch_size=10, max_latency=0.02, timeout=2)
+    for index in range(10):
+        sender.send('cpe-01', 'rx', index)
+    wait_for(lambda: sender.stats["batches"] == 1)
+    for index in range(10, 20):
+        sender.send('cpe-01', 'rx', index)
+    wait_for(lambda: sender.stats["batches"] == 2)
+    sender.stop()
+    server.stop()
+
+    # O segundo lote saiu pela conexão reaproveitada e a resposta não veio: nada de reenvio
+    # imediato; o lote volta para a fila e é repetido com backoff, visível em ``retries``.
+    assert sender.stats["retries"] == 1
+    assert len(server.packets) == 3
+    assert [int(item['value']) for item in server.packets[-1]['data']] == list(range(10, 20))
+
+
+def test_failed_batch_is_requeued_in_order():
+    server = FakeTrapper(fail_first=1)
+    sender = zabbix_sender.ZabbixSender(server.server, batch_size=100, max_latency=0.02, timeout=2)
+    for index in range(300):
+        sender.send('cpe-01', 'rx', index)
+    wait_for(lambda: len(server.values) == 300)
+    sender.stop()
+    server.stop()
+
+    # A conexão recusada não perde nem duplica valores: o lote volta para a frente da fila.
+    assert [int(item['value']) for item in server.values] == list(range(300))
+    assert sender.stats["retries"] == 1
+    assert sender.stats["last_error"] is None
+    assert sender.pending() == 0
+
+
+def test_requeue_drops_oldest_when_buffer_is_full():
+    sender = zabbix_sender.ZabbixSender('127.0.0.1:1', batch_size=10, buffer_size=20)
+    batch = [{"value": str(index)} for index in range(10)]
+    sender._queue.extend({"value": str(index)} for index in range(100, 115))
+
+    sender._requeue(batch)
+
+    assert sender.pending() == 20
+    assert sender.stats["dropped"] == 5
+    assert [item['value'] for item in list(sender._queue)[:5]] == ['5', '6', '7', '8', '9']